@@ -10,6 +10,7 @@ from flask_compress import Compress
 from config import FLASK_DEBUG, FLASK_PORT
 from db import init_indexes
 from routes import api_bp
+from reference_store import get_reference_store
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -38,7 +39,7 @@ def create_app():
         response.headers["X-Content-Type-Options"] = "nosniff"
         response.headers["X-Frame-Options"] = "DENY"
         response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Cache-Control"] = "no-store"
+        response.headers.setdefault("Cache-Control", "no-store")
         return response
 
     @app.before_request
@@ -51,6 +52,9 @@ def create_app():
     # --- Register blueprints ---
     app.register_blueprint(api_bp, url_prefix="/api")
 
+    # --- Serialise + compress static reference data once ---
+    get_reference_store()
+
     # --- Health-check (root) ---
     @app.route("/", methods=["GET"])
     def health():
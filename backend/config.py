@@ -31,6 +31,17 @@ MARKET_MODE = os.getenv("MARKET_MODE", "api")  # api | msp_only
 # Yield Model
 # ---------------------------------------------------------------------------
 YIELD_MODEL_DIR = os.getenv("YIELD_MODEL_DIR", "models")
+YIELD_MODEL_RELOAD_INTERVAL = float(os.getenv("YIELD_MODEL_RELOAD_INTERVAL", "30"))
+
+# ---------------------------------------------------------------------------
+# Scheme → document guide join
+# ---------------------------------------------------------------------------
+SCHEME_GUIDES_CHECK_INTERVAL = float(os.getenv("SCHEME_GUIDES_CHECK_INTERVAL", "60"))
+
+# ---------------------------------------------------------------------------
+# Scheme ranking (write-time TF-IDF model, see services/scheme_enrichment.py)
+# ---------------------------------------------------------------------------
+RANKING_MODEL_CHECK_INTERVAL = float(os.getenv("RANKING_MODEL_CHECK_INTERVAL", "60"))
 
 # ---------------------------------------------------------------------------
 # Pagination defaults
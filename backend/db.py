@@ -50,30 +50,29 @@ def get_calendar_tasks_collection():
     return get_db()["calendar_tasks"]
 
 
+def get_meta_collection():
+    """Returns the meta collection (catalogue version, see services/scheme_sync.py)."""
+    return get_db()["meta"]
+
+
 # ---------------------------------------------------------------------------
 # Indexes
 # ---------------------------------------------------------------------------
 def init_indexes():
     """Create indexes for query performance.
 
-    Indexes created:
-        - states     (multikey)  — eligibility filter
-        - crops      (multikey)  — eligibility filter
-        - max_land   (ascending) — range filter
-        - min_land   (ascending) — range filter
-        - season     (ascending) — optional filter
-        - type       (ascending) — optional filter
-        - benefit_amount (descending) — sorting
+    Scheme indexes are derived from the app's hot queries by
+    services/index_advisor.py (ESR order: equality, sort, range):
+        - states + benefit_amount + min_land + max_land — eligibility filter,
+          sorted; also serves the crop recommender (states prefix)
+        - type + benefit_amount    — listing filtered by type
+        - benefit_amount (desc)    — unfiltered listing
+        - scheme_name              — bulk sync lookups and upserts
+    The single-field indexes they replace are dropped.
     """
-    schemes = get_schemes_collection()
-
-    schemes.create_index([("states", ASCENDING)])
-    schemes.create_index([("crops", ASCENDING)])
-    schemes.create_index([("min_land", ASCENDING)])
-    schemes.create_index([("max_land", ASCENDING)])
-    schemes.create_index([("season", ASCENDING)])
-    schemes.create_index([("type", ASCENDING)])
-    schemes.create_index([("benefit_amount", -1)])
+    from services.index_advisor import apply_indexes
+
+    apply_indexes(get_schemes_collection())
 
     # Farmers collection indexes
     farmers = get_farmers_collection()
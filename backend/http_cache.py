@@ -0,0 +1,107 @@
+"""
+AgriScheme Backend — HTTP caching for catalogue-style endpoints.
+
+`cache_policy` gives a route a strong ETag, `If-None-Match` → 304 handling
+and a `Cache-Control: max-age=…, stale-while-revalidate=…` header, so
+clients on slow links revalidate instead of re-downloading unchanged JSON.
+
+The ETag comes from a content version when the route has one (checked
+before the view runs, so a 304 costs nothing), otherwise from a hash of
+the response body. Only 200 responses are cached; errors keep the global
+`no-store` default set in app.py.
+
+Usage:
+    @api_bp.route("/crop-calendar")
+    @cache_policy(max_age=3600, stale_while_revalidate=86400,
+                  version=calendar_version)
+    def crop_calendar_endpoint(): ...
+"""
+
+import hashlib
+import logging
+from functools import wraps
+
+from flask import make_response, request
+
+logger = logging.getLogger(__name__)
+
+
+def make_etag(data: bytes) -> str:
+    """Strong ETag value (unquoted) for a byte string."""
+    return hashlib.sha1(data).hexdigest()[:20]
+
+
+def etag_matches(etag: str) -> bool:
+    """True if the request's If-None-Match names `etag`.
+
+    Flask-Compress rewrites ETags of compressed responses to
+    "<etag>:gzip" / "<etag>:br", so the encoding suffix is ignored.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"').split(":")[0] == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str, cache_control: str = None):
+    """An empty 304 response carrying the validator and cache policy."""
+    response = make_response("", 304)
+    response.set_etag(etag)
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def cache_policy(max_age: int, stale_while_revalidate: int = 0, version=None):
+    """Decorator: ETag + conditional GET + Cache-Control for a view.
+
+    Args:
+        max_age: Seconds a client may reuse the response without asking.
+        stale_while_revalidate: Extra seconds a stale copy may be shown
+            while it is revalidated in the background.
+        version: Optional callable returning the current content version.
+            The ETag is then derived from it and the request URL; if it
+            raises, the body hash is used instead.
+    """
+    cache_control = f"public, max-age={max_age}"
+    if stale_while_revalidate:
+        cache_control += f", stale-while-revalidate={stale_while_revalidate}"
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = None
+            if version is not None:
+                try:
+                    current = version()
+                except Exception as exc:  # e.g. database down: hash the body instead
+                    logger.warning("Content version unavailable: %s", exc)
+                else:
+                    etag = make_etag(f"{current}|{request.full_path}".encode("utf-8"))
+                    if etag_matches(etag):
+                        return not_modified(etag, cache_control)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            if etag is None:
+                etag = make_etag(response.get_data())
+                if etag_matches(etag):
+                    return not_modified(etag, cache_control)
+
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = cache_control
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,157 @@
+"""
+AgriScheme Backend — Pre-encoded reference data responses.
+
+Static tables (document guides, crop calendar templates, soil colour
+profiles, crop suitability, MSP prices) never change while the process is
+running, so each one is serialised to JSON once, compressed once with
+gzip and brotli, and kept in memory together with a strong ETag.
+Requests are answered by picking the variant the client accepts and
+writing its bytes — no jsonify and no per-request compression
+(Flask-Compress skips responses that already carry Content-Encoding).
+
+Usage:
+    store = get_reference_store()
+    return store.respond("soil-colors")
+"""
+
+import gzip
+import json
+import logging
+import threading
+
+from flask import Response, request
+
+from http_cache import etag_matches, make_etag, not_modified
+
+try:
+    import brotli
+except ImportError:  # gzip-only without the brotli package
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Reference data is fixed for the lifetime of the process; clients may
+# reuse it for a day and keep showing it for a week while revalidating.
+REFERENCE_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
+
+
+class EncodedResponse:
+    """One resource, serialised once, with its compressed variants."""
+
+    __slots__ = ("body", "variants", "etag")
+
+    def __init__(self, payload):
+        self.body = json.dumps(
+            payload, ensure_ascii=True, sort_keys=True, separators=(",", ":"),
+        ).encode("utf-8")
+        self.etag = make_etag(self.body)
+        self.variants = {}
+        # Only keep an encoding if it actually saves bytes
+        if brotli is not None:
+            data = brotli.compress(self.body, quality=11)
+            if len(data) < len(self.body):
+                self.variants["br"] = data
+        data = gzip.compress(self.body, compresslevel=9, mtime=0)
+        if len(data) < len(self.body):
+            self.variants["gzip"] = data
+
+    def choose(self, accept_encodings) -> tuple:
+        """(encoding or None, bytes) for a request's Accept-Encoding."""
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding, self.variants[encoding]
+        return None, self.body
+
+
+class ReferenceStore:
+    """Named EncodedResponse entries, built once."""
+
+    def __init__(self):
+        self._entries = {}
+
+    def add(self, name: str, payload):
+        self._entries[name] = EncodedResponse(payload)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name: str) -> EncodedResponse | None:
+        return self._entries.get(name)
+
+    def names(self) -> list:
+        return sorted(n for n in self._entries if ":" not in n)
+
+    def respond(self, name: str, cache_control: str = REFERENCE_CACHE_CONTROL) -> Response:
+        """Serve a stored entry: 304 on a matching ETag, else the best variant.
+
+        Raises:
+            KeyError: unknown entry name
+        """
+        entry = self._entries[name]
+        if etag_matches(entry.etag):
+            return not_modified(entry.etag, cache_control)
+
+        encoding, data = entry.choose(request.accept_encodings)
+        response = Response(data, mimetype="application/json")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+            # Same convention as Flask-Compress for encoded representations
+            response.set_etag(f"{entry.etag}:{encoding}")
+        else:
+            response.set_etag(entry.etag)
+        response.vary.add("Accept-Encoding")
+        response.headers["Cache-Control"] = cache_control
+        return response
+
+
+def _build() -> ReferenceStore:
+    from services.calendar_service import _CROP_CALENDARS, _DEFAULT_CALENDAR
+    from services.document_guide_service import (
+        DOCUMENT_GUIDES,
+        format_guide,
+        get_all_supported_documents,
+    )
+    from services.market_service import _BASE_PRICES
+    from services.soil_image_analyzer import SOIL_COLOR_PROFILES
+    from services.soil_rules_engine import CROP_SUITABILITY
+
+    store = ReferenceStore()
+
+    # Tables served by /api/reference/<name>
+    guide_keys = [k for k, v in DOCUMENT_GUIDES.items() if "_alias" not in v]
+    store.add("document-guides", {
+        "success": True, "guides": {k: format_guide(k) for k in guide_keys},
+    })
+    store.add("crop-calendars", {
+        "success": True, "calendars": _CROP_CALENDARS, "default": _DEFAULT_CALENDAR,
+    })
+    store.add("soil-colors", {"success": True, "profiles": SOIL_COLOR_PROFILES})
+    store.add("crop-suitability", {"success": True, "crop_suitability": CROP_SUITABILITY})
+    store.add("msp", {
+        "success": True, "unit": "₹/quintal",
+        "prices": {crop: info["price"] for crop, info in _BASE_PRICES.items()},
+    })
+
+    # Payloads of /api/supported-documents and /api/document-guide
+    store.add("supported-documents", {
+        "success": True, "documents": get_all_supported_documents(),
+    })
+    for key in guide_keys:
+        store.add(f"document-guide:{key}", {"success": True, "guide": format_guide(key)})
+
+    return store
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_reference_store() -> ReferenceStore:
+    """The process-wide store, built on first use (app.py builds it at startup)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _build()
+                logger.info("Reference store ready: %d responses", len(_store))
+    return _store
@@ -3,23 +3,45 @@ AgriScheme Backend — API routes.
 Implements the eligibility matching engine and scheme management endpoints.
 """
 import re
+import json
 import logging
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from db import get_schemes_collection
 from config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from http_cache import cache_policy, etag_matches, not_modified
+from reference_store import get_reference_store
 from services.weather_service import get_weather
-from services.market_service import get_market_prices
+from services.market_service import get_market_snapshot
 from services.ai_service import ask_ai
 from services.voice_nlp_service import parse_voice_input
 from services.ranking_service import rank_schemes
 from services.forecast_service import get_price_forecast
 from services.disease_service import detect_disease
 from services.yield_service import predict_yield
-from services.soil_service import analyze_soil_image, analyze_soil_manual
+from services.soil_service import (
+    analyze_soil_csv,
+    analyze_soil_image,
+    analyze_soil_images,
+    analyze_soil_manual,
+)
+from services.image_ingest import MAX_IMAGE_SIZE, ImageError, ImagePayload
 from services.crop_recommender_service import recommend_crops
 from services.alert_service import check_weather_alerts, check_price_alerts
-from services.calendar_service import get_crop_calendar
-from services.document_guide_service import get_document_guide, get_all_supported_documents
+from services.calendar_service import get_crop_calendar, calendar_version
+from services.document_guide_service import resolve_document_key
+from services.scheme_guides_service import (
+    get_document_guides,
+    get_scheme_guides,
+    invalidate_scheme_guides,
+)
+from services.scheme_enrichment import (
+    RANK_FIELD,
+    enrich_catalogue_in_background,
+    enrich_scheme,
+    parse_benefit_amount,
+)
+from services.scheme_sync import bump_catalogue_version, get_catalogue_version
+from services.scheme_queries import BENEFIT_SORT, eligibility_query, listing_query
 
 api_bp = Blueprint("api", __name__)
 
@@ -72,23 +94,40 @@ def _sanitize_number(value, field_name, min_val=0, max_val=10000):
     return float(value)
 
 
-def _parse_benefit_amount(benefit_str):
-    """Extract a numeric value from a benefit string for sorting.
+# Multipart framing (boundaries, part headers, small text fields) on top of the image
+_MULTIPART_OVERHEAD = 64 * 1024
+_BINARY_TYPES = ("application/octet-stream", "image/jpeg", "image/png", "image/webp")
 
-    Examples:
-        '₹6,000 per year'   → 6000
-        'Up to ₹2,00,000'   → 200000
-        'Comprehensive ...'  → 0
+
+def _image_upload():
+    """Read a binary image upload, if the request is one.
+
+    Supports:
+        multipart/form-data       — file field "image", other params as form fields
+        application/octet-stream  — (or image/*) raw body, params in the query string
+
+    Returns:
+        (ImagePayload, params dict), or (None, None) for a JSON request
+        (legacy base64 form, handled by the caller).
+
+    Raises:
+        ImageError: missing file or over the 4 MB limit (checked against
+        Content-Length before reading, and again while reading).
     """
-    if not benefit_str:
-        return 0
-    nums = re.findall(r"[\d,]+", str(benefit_str).replace(",", ""))
-    if nums:
-        try:
-            return float(nums[0].replace(",", ""))
-        except ValueError:
-            pass
-    return 0
+    mimetype = request.mimetype
+    if mimetype != "multipart/form-data" and mimetype not in _BINARY_TYPES:
+        return None, None
+
+    if request.content_length and request.content_length > MAX_IMAGE_SIZE + _MULTIPART_OVERHEAD:
+        raise ImageError("Image too large. Maximum 4MB.")
+
+    if mimetype == "multipart/form-data":
+        upload = request.files.get("image")
+        if upload is None:
+            raise ImageError("image file is required (multipart field 'image')")
+        return ImagePayload.from_stream(upload.stream), request.form.to_dict()
+
+    return ImagePayload.from_stream(request.stream), request.args.to_dict()
 
 
 # ---------------------------------------------------------------------------
@@ -128,22 +167,9 @@ def get_eligible_schemes():
                 return jsonify({"error": str(e)}), 400
 
         # --- Build MongoDB query ---
-        query = {
-            "states": {"$in": [state, "All", "All India"]},
-            "crops": {"$in": [crop, "All", "All Crops"]},
-            "min_land": {"$lte": land_size},
-            "max_land": {"$gte": land_size},
-        }
-
         # Season filter: match if scheme season equals input OR scheme has no
         # season restriction (empty / "All" / missing)
-        if season:
-            query["$or"] = [
-                {"season": season},
-                {"season": "All"},
-                {"season": ""},
-                {"season": {"$exists": False}},
-            ]
+        query = eligibility_query(state, crop, land_size, season)
 
         # --- Projection (only necessary fields) ---
         projection = {
@@ -160,6 +186,7 @@ def get_eligible_schemes():
             "documents_required": 1,
             "official_link": 1,
             "description": 1,
+            RANK_FIELD: 1,
         }
 
         # --- Pagination ---
@@ -171,7 +198,7 @@ def get_eligible_schemes():
         schemes_collection = get_schemes_collection()
         cursor = (
             schemes_collection.find(query, projection)
-            .sort("benefit_amount", -1)
+            .sort(BENEFIT_SORT)
             .skip(skip)
             .limit(limit)
         )
@@ -186,6 +213,8 @@ def get_eligible_schemes():
                 schemes = rank_schemes(schemes, state, crop, land_size, season or "All")
             except Exception as rank_err:
                 logger.warning("Ranking fallback: %s", rank_err)
+        for scheme in schemes:  # stored rank features stay internal
+            scheme.pop(RANK_FIELD, None)
 
         return jsonify({
             "success": True,
@@ -203,22 +232,27 @@ def get_eligible_schemes():
 # ---------------------------------------------------------------------------
 # GET /api/schemes  —  List all schemes (paginated)
 # ---------------------------------------------------------------------------
+def _catalogue_version() -> str:
+    """ETag version of scheme listings; bumped by every catalogue write."""
+    return f"catalogue:{get_catalogue_version()}"
+
+
 @api_bp.route("/schemes", methods=["GET"])
+@cache_policy(max_age=300, stale_while_revalidate=3600, version=_catalogue_version)
 def list_schemes():
     """Return all schemes with optional type filter and pagination."""
     try:
         schemes_collection = get_schemes_collection()
 
-        query = {}
         scheme_type = request.args.get("type")
         if scheme_type:
             try:
                 scheme_type = _sanitize_string(scheme_type, "type")
-                query["type"] = scheme_type
             except ValueError as e:
                 return jsonify({"error": str(e)}), 400
+        query = listing_query(scheme_type)
 
-        projection = {"_id": 0}
+        projection = {"_id": 0, RANK_FIELD: 0}
 
         page = max(1, int(request.args.get("page", 1)))
         limit = min(int(request.args.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
@@ -226,7 +260,7 @@ def list_schemes():
 
         cursor = (
             schemes_collection.find(query, projection)
-            .sort("benefit_amount", -1)
+            .sort(BENEFIT_SORT)
             .skip(skip)
             .limit(limit)
         )
@@ -275,10 +309,22 @@ def add_scheme():
 
         # Compute benefit_amount for sorting if not provided
         if "benefit_amount" not in data:
-            data["benefit_amount"] = _parse_benefit_amount(data.get("benefit", ""))
+            data["benefit_amount"] = parse_benefit_amount(data.get("benefit", ""))
 
         schemes_collection = get_schemes_collection()
-        schemes_collection.insert_one(data)
+        inserted = schemes_collection.insert_one(data)
+        bump_catalogue_version()
+        invalidate_scheme_guides()
+
+        # The scheme is stored; ranking falls back to per-request TF-IDF
+        # until its features exist, so enrichment must not fail the request.
+        # Only the new document is vectorised here (stored IDF); the
+        # catalogue-wide refit runs off the request path.
+        try:
+            enrich_scheme(inserted.inserted_id, data)
+        except Exception as exc:
+            logger.error("Scheme enrichment after addScheme failed: %s", exc)
+        enrich_catalogue_in_background()
 
         return jsonify({"message": "Scheme added successfully"}), 201
 
@@ -332,8 +378,17 @@ def market_prices():
         if len(state) > 100:
             return jsonify({"error": "state parameter too long"}), 400
 
-        result = get_market_prices(state, crop)
-        return jsonify({"success": True, **result})
+        try:
+            snap = get_market_snapshot(state, crop)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        if etag_matches(snap.etag):
+            return not_modified(snap.etag, "no-cache")
+
+        response = Response(snap.body, mimetype="application/json")
+        response.set_etag(snap.etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     except Exception as exc:
         return jsonify({"error": f"Internal server error: {exc}"}), 500
@@ -424,15 +479,19 @@ def price_forecast():
 
     Query params:
         crop (str, required) — crop name
+        state (str, optional) — state for stored mandi history
     """
     try:
         crop = request.args.get("crop", "").strip()
+        state = request.args.get("state", "").strip() or None
         if not crop:
             return jsonify({"error": "crop query parameter is required"}), 400
         if len(crop) > 50:
             return jsonify({"error": "crop parameter too long"}), 400
+        if state and len(state) > 50:
+            return jsonify({"error": "state parameter too long"}), 400
 
-        result = get_price_forecast(crop)
+        result = get_price_forecast(crop, state=state)
 
         if "error" in result:
             return jsonify({"success": False, **result}), 400
@@ -454,24 +513,33 @@ def detect_disease_endpoint():
         image      (str, required) — base64-encoded image
         crop_hint  (str, optional) — crop name for context
         language   (str, optional) — locale code, default en
+
+    or a binary upload (multipart field "image", or a raw
+    application/octet-stream body with crop_hint/language as query params).
     """
     try:
-        data = request.get_json(silent=True)
-        if not data or not isinstance(data, dict):
-            return jsonify({"error": "Request body must be a JSON object"}), 400
+        try:
+            payload, data = _image_upload()
+        except ImageError as e:
+            return jsonify({"error": str(e)}), 400
 
-        image_b64 = (data.get("image") or "").strip()
-        crop_hint = (data.get("crop_hint") or "").strip()
-        language = (data.get("language") or "en").strip()
+        if payload is None:
+            data = request.get_json(silent=True)
+            if not data or not isinstance(data, dict):
+                return jsonify({"error": "Request body must be a JSON object"}), 400
+
+            image_b64 = (data.get("image") or "").strip()
+            if not image_b64:
+                return jsonify({"error": "image is required (base64 encoded)"}), 400
 
-        if not image_b64:
-            return jsonify({"error": "image is required (base64 encoded)"}), 400
+            # Limit image size (~4MB base64 ≈ ~5.3M chars)
+            if len(image_b64) > 6_000_000:
+                return jsonify({"error": "Image too large. Maximum 4MB."}), 400
 
-        # Limit image size (~4MB base64 ≈ ~5.3M chars)
-        if len(image_b64) > 6_000_000:
-            return jsonify({"error": "Image too large. Maximum 4MB."}), 400
+        crop_hint = (data.get("crop_hint") or "").strip()
+        language = (data.get("language") or "en").strip()
 
-        result = detect_disease(image_b64, crop_hint, language)
+        result = detect_disease(payload or image_b64, crop_hint, language)
 
         if "error" in result:
             return jsonify({"success": False, **result}), 400
@@ -544,16 +612,28 @@ def analyze_soil_endpoint():
         soil_data   (dict, optional) — {ph, nitrogen, phosphorus, potassium,
                                         organic_carbon, soil_type} (for manual mode)
         language    (str, optional) — locale code, default en
+
+    Photo mode also accepts a binary upload (multipart field "image", or a
+    raw application/octet-stream body with language as a query param).
     """
     try:
-        data = request.get_json(silent=True)
-        if not data or not isinstance(data, dict):
-            return jsonify({"error": "Request body must be a JSON object"}), 400
+        try:
+            payload, data = _image_upload()
+        except ImageError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if payload is None:
+            data = request.get_json(silent=True)
+            if not data or not isinstance(data, dict):
+                return jsonify({"error": "Request body must be a JSON object"}), 400
 
-        mode = (data.get("mode") or "photo").strip().lower()
+        mode = "photo" if payload is not None else (data.get("mode") or "photo").strip().lower()
         language = (data.get("language") or "en").strip()
 
-        if mode == "photo":
+        if mode == "photo" and payload is not None:
+            result = analyze_soil_image(payload, language)
+
+        elif mode == "photo":
             image_b64 = (data.get("image") or "").strip()
             if not image_b64:
                 return jsonify({"error": "image is required for photo mode"}), 400
@@ -587,6 +667,86 @@ def analyze_soil_endpoint():
         return jsonify({"error": f"Internal server error: {exc}"}), 500
 
 
+# ---------------------------------------------------------------------------
+# POST /api/analyze-soil-batch  —  Many soil photos in one request
+# ---------------------------------------------------------------------------
+@api_bp.route("/analyze-soil-batch", methods=["POST"])
+def analyze_soil_batch_endpoint():
+    """Analyze a batch of soil photos (e.g. all photos from one field).
+
+    Expects JSON body:
+        images   (list[str], required) — base64-encoded soil images (max 50)
+        language (str, optional) — locale code, default en
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+
+        images = data.get("images")
+        if not isinstance(images, list) or not images:
+            return jsonify({"error": "images must be a non-empty list"}), 400
+        if len(images) > 50:
+            return jsonify({"error": "Too many images. Maximum 50 per batch."}), 400
+        if not all(isinstance(img, str) for img in images):
+            return jsonify({"error": "images must be base64 strings"}), 400
+        if any(len(img) > 6_000_000 for img in images):
+            return jsonify({"error": "Image too large. Maximum 4MB."}), 400
+
+        language = (data.get("language") or "en").strip()
+        result = analyze_soil_images([img.strip() for img in images], language)
+        return jsonify({"success": True, **result})
+
+    except Exception as exc:
+        return jsonify({"error": f"Internal server error: {exc}"}), 500
+
+
+# ---------------------------------------------------------------------------
+# POST /api/analyze-soil-csv  —  Lab bulk upload of soil test reports
+# ---------------------------------------------------------------------------
+_MAX_CSV_SIZE = 32 * 1024 * 1024
+_CSV_TYPES = ("text/csv", "text/plain", "application/octet-stream")
+
+
+@api_bp.route("/analyze-soil-csv", methods=["POST"])
+def analyze_soil_csv_endpoint():
+    """Rule-based analysis of every sample in a soil testing lab's CSV.
+
+    Expects either multipart/form-data with the file in field "file", or
+    the CSV itself as a text/csv body (max 32 MB). Columns (header row,
+    case-insensitive): ph, nitrogen, phosphorus, potassium,
+    organic_carbon, soil_type, and an optional sample_id.
+
+    Streams application/x-ndjson: one JSON object per sample as it is
+    analysed ({row, sample_id, ...same fields as manual /analyze-soil} or
+    {row, sample_id, error}), then a final {"summary": {...}} line.
+    """
+    try:
+        if request.content_length and request.content_length > _MAX_CSV_SIZE:
+            return jsonify({"error": "File too large. Maximum 32MB."}), 400
+
+        if request.mimetype == "multipart/form-data":
+            upload = request.files.get("file")
+            if upload is None:
+                return jsonify({"error": "CSV file is required (multipart field 'file')"}), 400
+            stream = upload.stream
+        elif request.mimetype in _CSV_TYPES:
+            stream = request.stream
+        else:
+            return jsonify({"error": "Upload a CSV file (multipart or text/csv body)"}), 400
+
+        try:
+            results = analyze_soil_csv(stream)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        lines = (json.dumps(item, separators=(",", ":")) + "\n" for item in results)
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+    except Exception as exc:
+        return jsonify({"error": f"Internal server error: {exc}"}), 500
+
+
 # ---------------------------------------------------------------------------
 # POST /api/recommend-crop  —  AI Crop Recommendation
 # ---------------------------------------------------------------------------
@@ -710,6 +870,7 @@ def price_alerts_endpoint():
 # GET /api/crop-calendar  —  Crop Calendar & Planner
 # ---------------------------------------------------------------------------
 @api_bp.route("/crop-calendar", methods=["GET"])
+@cache_policy(max_age=3600, stale_while_revalidate=86400, version=calendar_version)
 def crop_calendar_endpoint():
     """Get crop calendar with growth phases and tasks.
 
@@ -758,12 +919,14 @@ def document_guide_endpoint():
         if len(document) > 200:
             return jsonify({"error": "document parameter too long"}), 400
 
-        result = get_document_guide(document)
+        key = resolve_document_key(document)
+        if key is None:
+            return jsonify({
+                "success": False,
+                "error": f"No application guide available for '{document}'. Please visit your nearest Common Service Centre (CSC) or government office for assistance.",
+            }), 404
 
-        if "error" in result:
-            return jsonify({"success": False, **result}), 404
-
-        return jsonify({"success": True, "guide": result})
+        return get_reference_store().respond(f"document-guide:{key}")
 
     except Exception as exc:
         return jsonify({"error": f"Internal server error: {exc}"}), 500
@@ -776,7 +939,70 @@ def document_guide_endpoint():
 def supported_documents_endpoint():
     """Return list of all documents for which application guides are available."""
     try:
-        documents = get_all_supported_documents()
-        return jsonify({"success": True, "documents": documents})
+        return get_reference_store().respond("supported-documents")
+    except Exception as exc:
+        return jsonify({"error": f"Internal server error: {exc}"}), 500
+
+
+# ---------------------------------------------------------------------------
+# POST /api/document-guides  —  All guides for a scheme or document list
+# ---------------------------------------------------------------------------
+@api_bp.route("/document-guides", methods=["POST"])
+def document_guides_endpoint():
+    """Return the guides for several documents in one response.
+
+    Expects JSON body with one of:
+        scheme_name (str)       — guides for the scheme's documents_required
+        documents   (list[str]) — explicit document names (max 50)
+
+    Guides shared by several documents are returned once, keyed by guide id;
+    `documents` maps each requested name to its guide id (null if none).
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+
+        if data.get("scheme_name"):
+            try:
+                scheme_name = _sanitize_string(data["scheme_name"], "scheme_name", max_len=200)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            result = get_scheme_guides(scheme_name)
+            if "error" in result:
+                return jsonify({"success": False, **result}), 404
+            return jsonify({"success": True, **result})
+
+        documents = data.get("documents")
+        if not isinstance(documents, list) or not documents:
+            return jsonify({"error": "scheme_name or a non-empty documents list is required"}), 400
+        if len(documents) > 50:
+            return jsonify({"error": "documents list too long (max 50)"}), 400
+        if not all(isinstance(d, str) and 0 < len(d.strip()) <= 200 for d in documents):
+            return jsonify({"error": "documents must be non-empty strings (max 200 chars)"}), 400
+
+        result = get_document_guides([d.strip() for d in documents])
+        return jsonify({"success": True, **result})
+
+    except Exception as exc:
+        return jsonify({"error": f"Internal server error: {exc}"}), 500
+
+
+# ---------------------------------------------------------------------------
+# GET /api/reference/<name>  —  Static reference tables (pre-encoded)
+# ---------------------------------------------------------------------------
+@api_bp.route("/reference/<name>", methods=["GET"])
+def reference_data_endpoint(name):
+    """Return a static reference table.
+
+    Names: document-guides, crop-calendars, soil-colors,
+    crop-suitability, msp.
+    """
+    try:
+        store = get_reference_store()
+        if name not in store.names():
+            return jsonify({"error": f"Unknown reference table '{name}'",
+                            "available": store.names()}), 404
+        return store.respond(name)
     except Exception as exc:
         return jsonify({"error": f"Internal server error: {exc}"}), 500
@@ -16,6 +16,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 import json
 from db import get_schemes_collection, init_indexes
+from services.scheme_enrichment import enrich_catalogue, parse_benefit_amount
+from services.scheme_sync import bump_catalogue_version
 
 
 # ── State normalisation map ─────────────────────────────────────────────────
@@ -200,7 +202,7 @@ def add_new_schemes():
             "scheme_name": name,
             "type": raw.get("type", "Other"),
             "benefit": raw.get("benefit", ""),
-            "benefit_amount": raw.get("benefit_amount") or 0,
+            "benefit_amount": raw.get("benefit_amount") or parse_benefit_amount(raw.get("benefit", "")),
             "states": _normalise_states(raw.get("states", ["All"])),
             "crops": _normalise_crops(raw.get("crops", ["All"])),
             "min_land": raw.get("min_land", 0) or 0,
@@ -235,7 +237,12 @@ def add_new_schemes():
 
     # ── Insert into MongoDB ──────────────────────────────────────────────
     result = schemes_col.insert_many(to_insert)
-    print(f"\nInserted {len(result.inserted_ids)} new schemes.")
+    print(f"\nInserted {len(result.inserted_ids)} new schemes "
+          f"(catalogue v{bump_catalogue_version()}).")
+
+    # ── Benefit amounts + rank features (services/scheme_enrichment.py) ──
+    enriched = enrich_catalogue()
+    print(f"Rank features updated for {enriched['enriched']} of {enriched['schemes']} schemes.")
 
     # ── Rebuild indexes ──────────────────────────────────────────────────
     init_indexes()
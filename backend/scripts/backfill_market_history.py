@@ -0,0 +1,265 @@
+"""
+AgriScheme Backend — AGMARKNET history backfill.
+
+Pages through a data.gov.in mandi price resource with offset/limit and
+parallel workers, and bulk-loads every record into the market price
+history store (services/market_history.py).
+
+  - Commodity names are normalised to the spellings in
+    market_service._CROP_TO_COMMODITY, so forecasts find the rows.
+  - Records are inserted in batches (default 5000 rows per transaction).
+  - Progress is checkpointed per commodity after every committed batch;
+    re-running the same command resumes where a crashed run stopped.
+
+Usage:
+    python scripts/backfill_market_history.py                       (all commodities)
+    python scripts/backfill_market_history.py --commodity Rice --commodity Wheat
+    python scripts/backfill_market_history.py --state Punjab --workers 8
+    python scripts/backfill_market_history.py --resource <resource-id>   (e.g. a historical price dataset)
+    python scripts/backfill_market_history.py --reset                   (ignore checkpoint)
+
+Requires DATA_GOV_API_KEY.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from services import market_history
+from services.market_stream import RecordStream
+from services.market_service import (
+    DATA_GOV_API_KEY,
+    _CROP_TO_COMMODITY,
+    _RESOURCE_ID,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKPOINT_PATH = os.path.join(_BACKEND_DIR, "data", "market_backfill_checkpoint.json")
+
+PAGE_SIZE = 1000
+BATCH_SIZE = 5000
+TIMEOUT = 30  # seconds
+MAX_RETRIES = 4
+
+
+# ─── Commodity normalisation ──────────────────────────────────────────────
+
+def _key(name: str) -> str:
+    return " ".join((name or "").lower().split())
+
+
+# Canonical AGMARKNET spellings, reachable from either the commodity name or
+# our crop name (e.g. "tur" → "Arhar (Tur/Red Gram)")
+_CANONICAL = {_key(c): c for c in _CROP_TO_COMMODITY.values()}
+_CANONICAL.update({_key(crop): c for crop, c in _CROP_TO_COMMODITY.items()})
+
+
+def normalize_commodity(name: str) -> str:
+    """Map a commodity or crop name to its canonical AGMARKNET spelling."""
+    return _CANONICAL.get(_key(name), (name or "").strip())
+
+
+def default_commodities() -> list:
+    return sorted(set(_CROP_TO_COMMODITY.values()))
+
+
+# ─── Checkpoint ───────────────────────────────────────────────────────────
+
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        logger.warning("Unreadable checkpoint %s — starting fresh", path)
+        return {}
+
+
+def save_checkpoint(state: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# ─── data.gov.in paging ───────────────────────────────────────────────────
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    """One keep-alive session per worker thread."""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+        _local.session.headers["Accept"] = "application/json"
+    return _local.session
+
+
+def fetch_page(resource: str, commodity: str, offset: int, limit: int,
+               state: str = None) -> tuple:
+    """Fetch one page; returns (records, total). Retries 429/5xx with backoff."""
+    params = {
+        "api-key": DATA_GOV_API_KEY,
+        "format": "json",
+        "offset": offset,
+        "limit": limit,
+        "filters[commodity]": commodity,
+    }
+    if state and state != "All":
+        params["filters[state]"] = state
+
+    url = f"https://api.data.gov.in/resource/{resource}"
+    for attempt in range(MAX_RETRIES):
+        try:
+            response = _session().get(url, params=params, timeout=TIMEOUT, stream=True)
+            with response:
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise requests.exceptions.RequestException(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                stream = RecordStream(response.iter_content(chunk_size=64 * 1024))
+                records = list(stream)
+            return records, int(stream.meta.get("total", 0) or 0)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            delay = 2 ** attempt
+            logger.warning("%s offset %d: %s — retrying in %ds", commodity, offset, e, delay)
+            time.sleep(delay)
+    return [], 0
+
+
+# ─── Backfill ─────────────────────────────────────────────────────────────
+
+def _normalise(records: list) -> list:
+    for rec in records:
+        rec["commodity"] = normalize_commodity(rec.get("commodity") or "")
+    return records
+
+
+def backfill_commodity(commodity: str, checkpoint: dict, *, resource: str,
+                       state: str = None, page_size: int = PAGE_SIZE,
+                       workers: int = 4, batch_size: int = BATCH_SIZE,
+                       checkpoint_path: str = CHECKPOINT_PATH,
+                       fetch=fetch_page) -> int:
+    """Load every page of one commodity; returns rows inserted this run.
+
+    Pages are only marked done in the checkpoint after their rows have
+    been committed, so a crash at any point loses at most one batch of
+    work and never skips data.
+    """
+    key = f"{resource}|{commodity}|{state or 'All'}"
+    progress = checkpoint.setdefault(key, {"total": None, "done": []})
+    done = set(progress["done"])
+    inserted = 0
+    buffer, buffered_offsets = [], []
+
+    def flush():
+        nonlocal inserted
+        if buffer:
+            inserted += market_history.append_records(buffer)
+        done.update(buffered_offsets)
+        progress["done"] = sorted(done)
+        save_checkpoint(checkpoint, checkpoint_path)
+        buffer.clear()
+        buffered_offsets.clear()
+
+    def add(offset, records):
+        buffer.extend(_normalise(records))
+        buffered_offsets.append(offset)
+        if len(buffer) >= batch_size:
+            flush()
+
+    # First page tells us the total
+    if progress["total"] is None:
+        records, total = fetch(resource, commodity, 0, page_size, state)
+        progress["total"] = total
+        add(0, records)
+        done.add(0)  # not persisted until its batch is flushed
+
+    offsets = [o for o in range(0, progress["total"], page_size) if o not in done]
+
+    # Keep at most 2 pages per worker in flight so memory stays bounded
+    pending = {}
+    queue = iter(offsets)
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while len(pending) < workers * 2:
+                offset = next(queue, None)
+                if offset is None:
+                    break
+                pending[pool.submit(fetch, resource, commodity, offset, page_size, state)] = offset
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                offset = pending.pop(fut)
+                try:
+                    records, _ = fut.result()
+                except Exception as e:
+                    failed += 1
+                    logger.error("%s offset %d failed: %s", commodity, offset, e)
+                    continue
+                add(offset, records)
+    flush()
+
+    if failed:
+        logger.warning("%s: %d pages failed — re-run to retry them", commodity, failed)
+    return inserted
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill AGMARKNET price history")
+    parser.add_argument("--commodity", action="append",
+                        help="Commodity or crop name (repeatable; default: all known)")
+    parser.add_argument("--state", help="Only fetch one state")
+    parser.add_argument("--resource", default=_RESOURCE_ID, help="data.gov.in resource id")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="Rows per insert transaction")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--reset", action="store_true", help="Ignore the existing checkpoint")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not DATA_GOV_API_KEY:
+        raise SystemExit("DATA_GOV_API_KEY is not set — nothing to backfill.")
+
+    commodities = [normalize_commodity(c) for c in args.commodity] if args.commodity \
+        else default_commodities()
+    checkpoint = {} if args.reset else load_checkpoint(args.checkpoint)
+
+    total = 0
+    start = time.perf_counter()
+    for commodity in commodities:
+        t0 = time.perf_counter()
+        n = backfill_commodity(
+            commodity, checkpoint,
+            resource=args.resource, state=args.state, page_size=args.page_size,
+            workers=args.workers, batch_size=args.batch_size,
+            checkpoint_path=args.checkpoint,
+        )
+        total += n
+        logger.info("%-28s %8d rows  (%.1fs)", commodity, n, time.perf_counter() - t0)
+
+    logger.info("Backfill complete: %d rows in %.1fs", total, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
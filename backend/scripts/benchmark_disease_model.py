@@ -0,0 +1,152 @@
+"""
+Benchmark the Offline Crop Disease Classifier — per-photo CPU latency.
+
+Times the offline path of detect_disease for single uploads, stage by
+stage: feature extraction (reduced-resolution decode + colour/texture
+features) and prediction through the flattened forest engine, next to
+scikit-learn's own predict_proba on the same model for comparison.
+
+Photos come from --images (any folder tree of .jpg/.png, e.g.
+data/disease_images); without one, synthetic 1600×1200 leaf-like JPEGs
+(the size of a typical phone upload) are generated. Without a trained
+model a stand-in forest with the training script's hyperparameters is
+fitted on random features, which is enough for latency numbers.
+
+Usage:
+  cd backend
+  python scripts/benchmark_disease_model.py
+  python scripts/benchmark_disease_model.py --images data/disease_images --runs 200
+"""
+
+import io
+import os
+import sys
+import time
+import pickle
+import argparse
+
+import numpy as np
+from PIL import Image
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from services.disease_classifier import FEATURE_NAMES, extract_features  # noqa: E402
+from services.forest_engine import FlatForest  # noqa: E402
+
+MODEL_PATH = os.path.join(BACKEND_DIR, "models", "disease_model.pkl")
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def synthetic_photos(n, size=(1600, 1200), seed=0):
+    """JPEG bytes of green leaves with random brown/yellow spots."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    photos = []
+    for _ in range(n):
+        img = np.empty((h, w, 3), dtype=np.uint8)
+        img[:] = (40 + rng.integers(0, 40), 110 + rng.integers(0, 60), 30 + rng.integers(0, 30))
+        img = np.clip(img + rng.normal(0, 12, img.shape), 0, 255).astype(np.uint8)
+        for _ in range(rng.integers(0, 40)):
+            x, y, r = rng.integers(0, w), rng.integers(0, h), rng.integers(5, 60)
+            img[max(y - r, 0):y + r, max(x - r, 0):x + r] = rng.choice(
+                [(120, 80, 30), (190, 170, 40), (60, 40, 20)])
+        buf = io.BytesIO()
+        Image.fromarray(img).save(buf, format="JPEG", quality=85)
+        photos.append(buf.getvalue())
+    return photos
+
+
+def load_photos(root, limit):
+    """Up to `limit` encoded photos from a folder tree."""
+    photos = []
+    for dirpath, _, files in sorted(os.walk(root)):
+        for name in sorted(files):
+            if name.lower().endswith(_IMAGE_EXTENSIONS):
+                with open(os.path.join(dirpath, name), "rb") as f:
+                    photos.append(f.read())
+                if len(photos) >= limit:
+                    return photos
+    return photos
+
+
+def load_model(path, n_estimators):
+    """The trained model, or a stand-in of the same shape."""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            print(f"  Model: {path}")
+            return pickle.load(f)["model"]
+
+    from train_disease_model import train_model
+
+    print(f"  Model: none at {path}; fitting a stand-in on random features")
+    rng = np.random.default_rng(0)
+    X = rng.random((3000, len(FEATURE_NAMES)), dtype=np.float32)
+    y = rng.integers(0, 20, len(X))
+    return train_model(X, y, n_estimators)
+
+
+def _timed(fn, items):
+    """Per-item latency in ms and the results."""
+    times, results = [], []
+    for item in items:
+        start = time.perf_counter()
+        results.append(fn(item))
+        times.append((time.perf_counter() - start) * 1000)
+    return np.array(times), results
+
+
+def _row(name, ms):
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    print(f"  {name:<28} {ms.mean():>8.2f} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline disease classification latency")
+    parser.add_argument("--images", help="Folder of photos (default: synthetic JPEGs)")
+    parser.add_argument("--model", default=MODEL_PATH,
+                        help="Model path (default: models/disease_model.pkl)")
+    parser.add_argument("--runs", type=int, default=100, help="Photos to time (default: 100)")
+    parser.add_argument("--n-estimators", type=int, default=150,
+                        help="Trees of the stand-in model (default: 150)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 70)
+    print("  OFFLINE DISEASE CLASSIFIER LATENCY (single photo, 1 thread)")
+    print("=" * 70)
+    photos = load_photos(args.images, args.runs) if args.images else synthetic_photos(args.runs)
+    if not photos:
+        raise SystemExit(f"No photos found under {args.images}.")
+    print(f"  Photos: {len(photos)} "
+          f"({'from ' + args.images if args.images else 'synthetic 1600x1200 JPEG'}, "
+          f"avg {np.mean([len(p) for p in photos]) / 1024:.0f} KB)")
+
+    model = load_model(args.model, args.n_estimators)
+    model.set_params(n_jobs=1)
+    forest = FlatForest.from_estimator(model)
+    print(f"  Trees: {forest.n_trees}, classes: {len(model.classes_)}")
+
+    extract_features(photos[0])  # warm-up
+    feature_ms, features = _timed(extract_features, photos)
+    flat_ms, flat = _timed(lambda x: forest.predict_proba(x)[0], features)
+    sk_ms, sk = _timed(lambda x: model.predict_proba(x[None, :])[0], features)
+    if not np.allclose(flat, sk, atol=1e-9):
+        raise SystemExit("FlatForest and scikit-learn probabilities differ!")
+
+    print(f"\n  {'Stage (ms)':<28} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    print(f"  {'─' * 64}")
+    _row("decode + features", feature_ms)
+    _row("predict (FlatForest)", flat_ms)
+    _row("predict (scikit-learn)", sk_ms)
+    _row("total (offline path)", feature_ms + flat_ms)
+    print(f"\n  Throughput: {1000 / (feature_ms + flat_ms).mean():.0f} photos/s per core")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Check Scheme Indexes — index advisor report and explain-plan check.
+
+Prints the ESR-ordered indexes services/index_advisor.py derives from the
+app's hot queries, then explains every hot query against the configured
+database (MONGO_URI / DB_NAME) and reports any that fall back to a
+COLLSCAN or an in-memory SORT. Exits with status 1 when one does.
+
+Usage:
+  cd backend
+  python scripts/check_indexes.py            # report only
+  python scripts/check_indexes.py --apply    # create/replace indexes first
+"""
+
+import os
+import sys
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from db import get_schemes_collection  # noqa: E402
+from services.index_advisor import (  # noqa: E402
+    apply_indexes,
+    check_hot_queries,
+    hot_queries,
+    index_name,
+    recommend_index,
+    recommended_indexes,
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check that hot scheme queries are index-served")
+    parser.add_argument("--apply", action="store_true",
+                        help="Create the recommended indexes before checking")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("Hot queries → ESR index:")
+    for shape in hot_queries():
+        print(f"  {shape.name:<24} {index_name(recommend_index(shape)) or '(none)'}")
+    print("\nRecommended indexes:")
+    for keys in recommended_indexes():
+        print(f"  {index_name(keys)}")
+
+    collection = get_schemes_collection()
+    if args.apply:
+        apply_indexes(collection)
+        print("\n[OK] Indexes applied.")
+
+    report = check_hot_queries(collection)
+    print("\nExplain plans:")
+    for shape in hot_queries():
+        problems = report.get(shape.name)
+        print(f"  {shape.name:<24} {'❌ ' + ', '.join(problems) if problems else '✅ index-served'}")
+    return 1 if report else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,6 +19,16 @@ Output:
 Usage:
   cd backend
   python scripts/generate_yield_dataset.py
+
+Large synthetic datasets (stress tests / benchmarks):
+  python scripts/generate_yield_dataset.py --rows 10000000
+  python scripts/generate_yield_dataset.py --rows 1000000 --format parquet
+
+  --rows switches to a NumPy-vectorised generator: each chunk of rows is
+  drawn from its own seeded RNG stream and appended to the full/train/test
+  files, so memory stays bounded by --chunksize regardless of --rows.
+  Output goes to data/synthetic/ unless --output-dir is given.
+  Parquet output requires pyarrow (pip install pyarrow).
 """
 
 import os
@@ -26,6 +36,11 @@ import sys
 import csv
 import random
 import math
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
 
 random.seed(42)  # Reproducibility
 
@@ -211,10 +226,25 @@ CROP_DATA = {
 }
 
 
+YEARS = list(range(2001, 2023))  # 2001 to 2022
+
+# ── Drought/flood years (historically realistic) ──
+# Major drought years: 2002, 2009, 2014-15 (partial), 2018
+# Flood years: 2005, 2013, 2019
+DROUGHT_YEARS = {2002: 0.82, 2009: 0.85, 2014: 0.92, 2015: 0.93, 2018: 0.90}
+FLOOD_YEARS = {2005: 0.88, 2013: 0.90, 2019: 0.87}
+
+HEADERS = [
+    "Crop_Year", "State", "Crop", "Season",
+    "Area_1000_ha", "Production_1000_tonnes",
+    "Yield_tonnes_per_ha", "Annual_Rainfall_mm", "Irrigation_pct",
+]
+
+
 def generate_dataset():
     """Generate year-wise crop yield dataset based on published statistics."""
     rows = []
-    years = list(range(2001, 2023))  # 2001 to 2022
+    years = YEARS
 
     for (crop, state, season), params in CROP_DATA.items():
         y01 = params["y01"]
@@ -241,19 +271,14 @@ def generate_dataset():
             rain_effect = 1.0 - 0.3 * (rain_ratio - 1.0) ** 2
             rain_effect = max(0.7, min(1.15, rain_effect))
 
-            # ── Drought/flood years (historically realistic) ──
-            # Major drought years: 2002, 2009, 2014-15 (partial), 2018
-            # Flood years: 2005, 2013, 2019
-            drought_years = {2002: 0.82, 2009: 0.85, 2014: 0.92, 2015: 0.93, 2018: 0.90}
-            flood_years = {2005: 0.88, 2013: 0.90, 2019: 0.87}
-
+            # ── Drought/flood years ──
             extreme_factor = 1.0
-            if year in drought_years:
-                extreme_factor = drought_years[year]
+            if year in DROUGHT_YEARS:
+                extreme_factor = DROUGHT_YEARS[year]
                 # Drought: reduce rainfall too
                 actual_rainfall = round(actual_rainfall * random.uniform(0.55, 0.75), 1)
-            elif year in flood_years:
-                extreme_factor = flood_years[year]
+            elif year in FLOOD_YEARS:
+                extreme_factor = FLOOD_YEARS[year]
                 actual_rainfall = round(actual_rainfall * random.uniform(1.3, 1.6), 1)
 
             # ── Irrigation effect ──
@@ -302,11 +327,7 @@ def save_dataset(rows, output_dir):
     train_rows = rows[:split_idx]
     test_rows = rows[split_idx:]
 
-    headers = [
-        "Crop_Year", "State", "Crop", "Season",
-        "Area_1000_ha", "Production_1000_tonnes",
-        "Yield_tonnes_per_ha", "Annual_Rainfall_mm", "Irrigation_pct",
-    ]
+    headers = HEADERS
 
     # Full dataset
     full_path = os.path.join(output_dir, "crop_yield.csv")
@@ -332,12 +353,217 @@ def save_dataset(rows, output_dir):
     return len(rows), len(train_rows), len(test_rows)
 
 
-def main():
+# ─── Vectorised generator (--rows) ───────────────────────────────────────
+# Same yield model as generate_dataset(), evaluated column-wise on NumPy
+# arrays. Rows sample (crop, state, season) and year uniformly, so a run of
+# len(CROP_DATA) × len(YEARS) rows has the same expected mix as the
+# legacy full grid.
+
+_COMBOS = list(CROP_DATA.keys())
+_COMBO_CROP = np.array([c[0] for c in _COMBOS], dtype=object)
+_COMBO_STATE = np.array([c[1] for c in _COMBOS], dtype=object)
+_COMBO_SEASON = np.array([c[2] for c in _COMBOS], dtype=object)
+_COMBO_Y01 = np.array([CROP_DATA[c]["y01"] for c in _COMBOS])
+_COMBO_Y22 = np.array([CROP_DATA[c]["y22"] for c in _COMBOS])
+_COMBO_AREA = np.array([CROP_DATA[c]["area"] for c in _COMBOS], dtype=float)
+_COMBO_RAIN = np.array([CROP_DATA[c]["rain"] for c in _COMBOS], dtype=float)
+_COMBO_IRR = np.array([CROP_DATA[c]["irr"] for c in _COMBOS], dtype=float)
+
+# Indexed by (year - 2001)
+_YEAR_EXTREME = np.array(
+    [DROUGHT_YEARS.get(y, FLOOD_YEARS.get(y, 1.0)) for y in YEARS]
+)
+_YEAR_DROUGHT = np.array([y in DROUGHT_YEARS for y in YEARS])
+_YEAR_FLOOD = np.array([y in FLOOD_YEARS for y in YEARS])
+
+TRAIN_FRACTION = 0.8
+DEFAULT_CHUNK_SIZE = 500_000
+
+
+def generate_chunk(rng, n_rows):
+    """Generate `n_rows` synthetic rows as a DataFrame with HEADERS columns."""
+    combo = rng.integers(0, len(_COMBOS), n_rows)
+    year_idx = rng.integers(0, len(YEARS), n_rows)
+    progress = year_idx / 21.0
+
+    y01 = _COMBO_Y01[combo]
+    trend_yield = y01 + (_COMBO_Y22[combo] - y01) * progress
+
+    # Rainfall variation
+    typical_rain = _COMBO_RAIN[combo]
+    rain_var = np.clip(rng.normal(1.0, 0.15, n_rows), 0.5, 1.5)
+    actual_rainfall = np.round(typical_rain * rain_var, 1)
+
+    # Rainfall effect on yield
+    rain_ratio = actual_rainfall / typical_rain
+    rain_effect = np.clip(1.0 - 0.3 * (rain_ratio - 1.0) ** 2, 0.7, 1.15)
+
+    # Drought/flood years
+    extreme_factor = _YEAR_EXTREME[year_idx]
+    drought = _YEAR_DROUGHT[year_idx]
+    flood = _YEAR_FLOOD[year_idx]
+    rain_scale = np.where(
+        drought, rng.uniform(0.55, 0.75, n_rows),
+        np.where(flood, rng.uniform(1.3, 1.6, n_rows), 1.0),
+    )
+    actual_rainfall = np.round(actual_rainfall * rain_scale, 1)
+
+    # Irrigation effect
+    base_irr = _COMBO_IRR[combo]
+    irr_buffer = 1.0 + (base_irr / 100.0) * 0.05 * (1.0 - rain_ratio)
+    irr_pct = np.round(np.clip(base_irr + rng.normal(0, 2, n_rows), 0, 100), 1)
+
+    # Final yield
+    noise = rng.normal(0, 1, n_rows) * trend_yield * 0.04
+    actual_yield = trend_yield * rain_effect * extreme_factor * irr_buffer + noise
+    actual_yield = np.round(np.maximum(0.05, actual_yield), 2)
+
+    # Area variation
+    area_var = rng.normal(1.0, 0.08, n_rows)
+    actual_area = np.round(_COMBO_AREA[combo] * area_var * (1 + progress * 0.1), 1)
+    actual_area = np.maximum(5, actual_area)
+
+    return pd.DataFrame({
+        "Crop_Year": (year_idx + YEARS[0]).astype(np.int16),
+        "State": _COMBO_STATE[combo],
+        "Crop": _COMBO_CROP[combo],
+        "Season": _COMBO_SEASON[combo],
+        "Area_1000_ha": actual_area,
+        "Production_1000_tonnes": np.round(actual_area * actual_yield, 1),
+        "Yield_tonnes_per_ha": actual_yield,
+        "Annual_Rainfall_mm": actual_rainfall,
+        "Irrigation_pct": irr_pct,
+    }, columns=HEADERS)
+
+
+def iter_chunks(n_rows, chunksize=DEFAULT_CHUNK_SIZE, seed=42):
+    """Yield (full, train, test) DataFrames covering `n_rows` rows in total.
+
+    Each chunk gets its own child seed of `seed`, so chunks are
+    reproducible and independent of each other. Rows within a chunk are
+    already in random order; the first 80% go to train, the rest to test,
+    which matches the shuffle + 80/20 cut of save_dataset().
+    """
+    n_chunks = max(1, -(-n_rows // chunksize))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    remaining = n_rows
+    for child in seeds:
+        size = min(chunksize, remaining)
+        remaining -= size
+        df = generate_chunk(np.random.default_rng(child), size)
+        split_idx = int(size * TRAIN_FRACTION)
+        yield df, df.iloc[:split_idx], df.iloc[split_idx:]
+
+
+class _ChunkWriter:
+    """Appends DataFrame chunks to a single CSV or Parquet file."""
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._parquet = None
+        self._file = None
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit(
+                    "Parquet output requires pyarrow: pip install pyarrow "
+                    "(or use --format csv)"
+                )
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+
+    def write(self, df):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            df.to_csv(self._file, header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def save_large_dataset(n_rows, output_dir, fmt="csv",
+                       chunksize=DEFAULT_CHUNK_SIZE, seed=42):
+    """Stream `n_rows` synthetic rows to full/train/test files in output_dir."""
+    os.makedirs(output_dir, exist_ok=True)
+    ext = "parquet" if fmt == "parquet" else "csv"
+    writers = [
+        _ChunkWriter(os.path.join(output_dir, f"{name}.{ext}"), fmt)
+        for name in ("crop_yield", "yield_train", "yield_test")
+    ]
+    try:
+        for parts in iter_chunks(n_rows, chunksize, seed):
+            for writer, part in zip(writers, parts):
+                writer.write(part)
+    finally:
+        for writer in writers:
+            writer.close()
+    return tuple(w.rows for w in writers)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the crop yield dataset")
+    parser.add_argument("--rows", type=int, default=0,
+                        help="Generate N synthetic rows with the vectorised generator")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv",
+                        help="Output format for --rows (default: csv)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows generated and written per chunk")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed for --rows")
+    parser.add_argument("--output-dir",
+                        help="Output directory (default: data/, or data/synthetic/ with --rows)")
+    return parser.parse_args(argv)
+
+
+def main_large(args, data_dir):
+    output_dir = args.output_dir or os.path.join(data_dir, "synthetic")
+
+    print("=" * 70)
+    print("  CROP YIELD DATASET GENERATOR — vectorised")
+    print(f"  Rows: {args.rows:,}  Chunk: {args.chunksize:,}  "
+          f"Format: {args.format}  Seed: {args.seed}")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    total, train, test = save_large_dataset(
+        args.rows, output_dir, args.format, args.chunksize, args.seed,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"\n  Total rows:      {total:,}")
+    print(f"  Training rows:   {train:,} (80%)")
+    print(f"  Test rows:       {test:,} (20%)")
+    print(f"  Elapsed:         {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(f"\n  Files saved to: {output_dir}/")
+    print(f"{'=' * 70}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Determine output directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
     backend_dir = os.path.dirname(script_dir)
     data_dir = os.path.join(backend_dir, "data")
 
+    if args.rows > 0:
+        main_large(args, data_dir)
+        return
+    data_dir = args.output_dir or data_dir
+
     print("=" * 70)
     print("  CROP YIELD DATASET GENERATOR")
     print("  Based on ICRISAT / DES (GOI) Published Statistics")
@@ -1,76 +1,353 @@
-import pdfplumber
-import json
+"""
+AgriScheme Backend — Scheme extraction from PDF compendia.
+
+Splits the text of government scheme booklets into sections ("1. Name",
+"Scheme Name: ...") and turns each into a scheme document.
+
+Pages are extracted in a process pool, PAGES_PER_TASK pages per task, and
+fed in page order through an incremental section splitter, so sections are
+yielded (and written as NDJSON) while later pages are still being read —
+memory stays flat no matter how long the compendium is.
+
+A directory of PDFs is written as one NDJSON file per PDF. Progress is
+checkpointed per file after every batch of pages (pages done, byte offset
+of the output, unfinished section text); re-running the same command
+skips finished files and resumes a crashed one at the last checkpoint.
+
+Usage:
+    python scripts/pdf_parser.py compendium.pdf schemes.json     (JSON array)
+    python scripts/pdf_parser.py compendium.pdf schemes.ndjson   (streamed NDJSON)
+    python scripts/pdf_parser.py pdfs/ out/ --workers 4          (directory, resumable)
+    python scripts/pdf_parser.py pdfs/ out/ --reset              (ignore checkpoint)
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
 import re
+import json
 import argparse
-import sys
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import pdfplumber
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+PAGES_PER_TASK = 16
+CHECKPOINT_NAME = ".pdf_checkpoint.json"
+
+# Splits text into potential scheme sections: "1. Name" or "Scheme Name:"
+# (very basic heuristic; adjust to the document format)
+_SECTION_SPLIT = re.compile(r"(?:\n\d+\.\s+|Scheme Name:\s*)")
+_BENEFIT = re.compile(r"(?:Benefit|Assistance|Subsidy):\s*(.*)", re.IGNORECASE)
+
+
+# ─── Page extraction (runs in worker processes) ───────────────────────────
+
+_open_pdf = None  # (path, pdfplumber.PDF) kept open per worker process
+
+
+def _pdf(path: str):
+    global _open_pdf
+    if _open_pdf is None or _open_pdf[0] != path:
+        if _open_pdf is not None:
+            _open_pdf[1].close()
+        _open_pdf = (path, pdfplumber.open(path))
+    return _open_pdf[1]
+
+
+def page_count(path: str) -> int:
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_page_range(path: str, start: int, stop: int) -> list:
+    """Text of pages [start, stop); pages without a text layer give ''."""
+    pdf = _pdf(path)
+    texts = []
+    for page in pdf.pages[start:stop]:
+        texts.append(page.extract_text() or "")
+        page.close()  # drop the page's parsed objects
+    return texts
+
+
+def iter_page_batches(path: str, start_page: int = 0, pool=None,
+                      pages_per_task: int = None):
+    """Yield (pages_done, [page texts]) in page order.
+
+    With a pool, a bounded number of batches is extracted ahead in
+    parallel; without one, pages are read in this process.
+    """
+    total = page_count(path)
+    pages_per_task = pages_per_task or PAGES_PER_TASK
+    ranges = [(s, min(s + pages_per_task, total))
+              for s in range(start_page, total, pages_per_task)]
+    if pool is None:
+        for s, e in ranges:
+            yield e, extract_page_range(path, s, e)
+        return
+
+    ahead = 2 * (os.cpu_count() or 1)  # batches in flight; bounds memory
+    pending = deque()
+    ranges = iter(ranges)
+    for s, e in ranges:
+        pending.append((e, pool.submit(extract_page_range, path, s, e)))
+        if len(pending) >= ahead:
+            break
+    while pending:
+        e, future = pending.popleft()
+        texts = future.result()
+        nxt = next(ranges, None)
+        if nxt is not None:
+            pending.append((nxt[1], pool.submit(extract_page_range, path, *nxt)))
+        yield e, texts
+
+
+# ─── Sections → schemes ───────────────────────────────────────────────────
+
+class SectionSplitter:
+    """Incremental version of re.split(_SECTION_SPLIT, whole_text).
+
+    Text before the last separator seen is complete; the rest (from that
+    separator on) is kept as `tail`, because the next page can still
+    extend it. Empty pieces are dropped.
+    """
+
+    def __init__(self, tail: str = ""):
+        self.tail = tail
+
+    def feed(self, text: str) -> list:
+        buf = self.tail + text
+        sections, pos, last = [], 0, None
+        for match in _SECTION_SPLIT.finditer(buf):
+            if last is not None:
+                sections.append(buf[pos:last.start()])
+                pos = last.end()
+            last = match
+        if last is None:
+            self.tail = buf
+            return []
+        sections.append(buf[pos:last.start()])
+        self.tail = buf[last.start():]
+        return [s for s in sections if s]
+
+    def close(self) -> list:
+        buf, self.tail = self.tail, ""
+        match = _SECTION_SPLIT.match(buf)
+        section = buf[match.end():] if match else buf
+        return [section] if section else []
+
+
+def section_to_scheme(section: str) -> dict | None:
+    """Scheme document for one section, None for noise (< 50 chars)."""
+    if not section.strip() or len(section) < 50:
+        return None
+
+    lines = section.strip().split("\n")
+    name = lines[0].strip()
+
+    # Extract Benefit if possible
+    benefit_match = _BENEFIT.search(section)
+    benefit = benefit_match.group(1).strip() if benefit_match else "See details"
 
-def parse_pdf_to_json(pdf_path, output_json_path):
-    schemes = []
-    
+    # Just taking the first few lines as description for now
+    description_text = " ".join(lines[1:5]).strip()
+
+    return {
+        "scheme_name": name,
+        "type": "General",  # Placeholder
+        "benefit": benefit,
+        "states": ["All"],  # Default
+        "crops": ["All"],  # Default
+        "min_land": 0,
+        "max_land": 100,
+        "description": {
+            "en": description_text,
+            "hi": "",
+            "ml": "",
+            "ta": "",
+        },
+    }
+
+
+def _schemes(sections: list) -> list:
+    return [s for s in map(section_to_scheme, sections) if s]
+
+
+def stream_pdf(path: str, pool=None, start_page: int = 0, tail: str = ""):
+    """Yield (schemes, pages_done, tail) after every batch of pages.
+
+    `tail` is the splitter state to resume from. A last item with an
+    empty tail flushes the final section.
+    """
+    splitter = SectionSplitter(tail)
+    pages_done = start_page
+    for pages_done, texts in iter_page_batches(path, start_page, pool):
+        sections = splitter.feed("".join(t + "\n" for t in texts))
+        yield _schemes(sections), pages_done, splitter.tail
+    yield _schemes(splitter.close()), pages_done, ""
+
+
+def iter_schemes(path: str, pool=None):
+    """Schemes of one PDF, in document order."""
+    for schemes, _, _ in stream_pdf(path, pool):
+        yield from schemes
+
+
+# ─── Output ───────────────────────────────────────────────────────────────
+
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        logger.warning("Unreadable checkpoint %s — starting fresh", path)
+        return {}
+
+
+def save_checkpoint(state: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _signature(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def extract_to_ndjson(pdf_path: str, out_path: str, pool=None,
+                      checkpoint: dict = None, checkpoint_path: str = None) -> int:
+    """Write one scheme per line to out_path; returns the number of schemes.
+
+    With a checkpoint dict, progress for this PDF is stored under its
+    file name after every batch and a previous partial run is resumed.
+    """
+    key = os.path.basename(pdf_path)
+    state = (checkpoint or {}).get(key)
+    if state and state.get("signature") != _signature(pdf_path):
+        logger.info("%s changed since the last run — starting over", key)
+        state = None
+    if state and state.get("done"):
+        logger.info("%s already extracted (%d schemes)", key, state["schemes"])
+        return state["schemes"]
+
+    if state and os.path.exists(out_path):
+        logger.info("Resuming %s at page %d", key, state["pages_done"] + 1)
+        f = open(out_path, "r+b")
+        f.truncate(state["offset"])  # drop lines written after the checkpoint
+        f.seek(state["offset"])
+    else:
+        state = None
+        f = open(out_path, "wb")
+    state = state or {"signature": _signature(pdf_path), "pages_done": 0,
+                      "offset": 0, "tail": "", "schemes": 0}
+
+    with f:
+        for schemes, pages_done, tail in stream_pdf(pdf_path, pool, state["pages_done"],
+                                                    state["tail"]):
+            for scheme in schemes:
+                f.write((json.dumps(scheme, ensure_ascii=False) + "\n").encode("utf-8"))
+            state.update(pages_done=pages_done, tail=tail, offset=f.tell(),
+                         schemes=state["schemes"] + len(schemes))
+            if checkpoint is not None:
+                f.flush()
+                os.fsync(f.fileno())
+                checkpoint[key] = state
+                save_checkpoint(checkpoint, checkpoint_path)
+            logger.info("  %s: %d pages, %d schemes", key, pages_done, state["schemes"])
+
+    state["done"] = True
+    if checkpoint is not None:
+        checkpoint[key] = state
+        save_checkpoint(checkpoint, checkpoint_path)
+    return state["schemes"]
+
+
+def extract_directory(in_dir: str, out_dir: str, workers: int = None,
+                      reset: bool = False) -> dict:
+    """Extract every PDF in in_dir to out_dir/<name>.ndjson, resumably.
+
+    Returns {pdf file name: number of schemes}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint_path = os.path.join(out_dir, CHECKPOINT_NAME)
+    checkpoint = {} if reset else load_checkpoint(checkpoint_path)
+    pdfs = sorted(f for f in os.listdir(in_dir) if f.lower().endswith(".pdf"))
+    logger.info("%d PDFs in %s", len(pdfs), in_dir)
+
+    counts = {}
+    with _pool(workers) as pool:
+        for name in pdfs:
+            out_path = os.path.join(out_dir, os.path.splitext(name)[0] + ".ndjson")
+            try:
+                counts[name] = extract_to_ndjson(os.path.join(in_dir, name), out_path, pool,
+                                                 checkpoint, checkpoint_path)
+            except Exception as e:
+                logger.error("✗ %s failed: %s — continuing with the next file", name, e)
+    return counts
+
+
+@contextmanager
+def _pool(workers: int = None):
+    """ProcessPoolExecutor for workers > 1, else None (pages read inline)."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        yield None
+        return
+    executor = ProcessPoolExecutor(max_workers=workers)
     try:
-        print(f"Reading PDF: {pdf_path}...")
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-        
-        # Split text into potential scheme sections
-        # Assuming schemes might be numbered or start with "Scheme Name" or just be distinctive headers
-        # This regex tries to find "1. Name" or "Scheme Name:" patterns
-        # Adjust logic based on actual document format
-        
-        # Example: Splits by "Scheme Name:" or Number like "1." 
-        # (Very basic heuristic)
-        sections = re.split(r'(?:\n\d+\.\s+|Scheme Name:\s*)', text)
-        
-        for section in sections:
-            if not section.strip() or len(section) < 50:
-                continue
-            
-            lines = section.strip().split('\n')
-            name = lines[0].strip()
-            
-            # Extract Benefit if possible
-            benefit_match = re.search(r'(?:Benefit|Assistance|Subsidy):\s*(.*)', section, re.IGNORECASE)
-            benefit = benefit_match.group(1).strip() if benefit_match else "See details"
-            
-            # Extract Description
-            # Just taking the first few lines as description for now
-            description_text = " ".join(lines[1:5]).strip()
-            
-            scheme = {
-                "scheme_name": name,
-                "type": "General", # Placeholder
-                "benefit": benefit,
-                "states": ["All"], # Default
-                "crops": ["All"], # Default
-                "min_land": 0,
-                "max_land": 100,
-                "description": {
-                    "en": description_text,
-                    "hi": "", 
-                    "ml": "",
-                    "ta": ""
-                }
-            }
-            schemes.append(scheme)
-
-        print(f"Extracted {len(schemes)} schemes.")
-        
-        with open(output_json_path, 'w', encoding='utf-8') as f:
-            json.dump(schemes, f, indent=4, ensure_ascii=False)
-            
-        print(f"Saved to {output_json_path}")
-        
+        yield executor
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def parse_pdf_to_json(pdf_path, output_json_path, workers=None):
+    """Extract all schemes of one PDF into a JSON array file."""
+    logger.info("Reading PDF: %s...", pdf_path)
+    with _pool(workers) as pool:
+        schemes = list(iter_schemes(pdf_path, pool))
+    logger.info("Extracted %d schemes.", len(schemes))
+
+    with open(output_json_path, "w", encoding="utf-8") as f:
+        json.dump(schemes, f, indent=4, ensure_ascii=False)
+    logger.info("Saved to %s", output_json_path)
+    return schemes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse Scheme PDF to JSON")
+    parser.add_argument("input_pdf", help="Path to input PDF file, or a directory of PDFs")
+    parser.add_argument("output_json", default="schemes.json", nargs="?",
+                        help="Output .json / .ndjson file (or directory for a directory input)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Page extraction processes (default: all CPUs)")
+    parser.add_argument("--reset", action="store_true",
+                        help="Directory mode: ignore the checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    try:
+        if os.path.isdir(args.input_pdf):
+            counts = extract_directory(args.input_pdf, args.output_json, args.workers, args.reset)
+            print(f"\n✅ Done. {sum(counts.values())} schemes from {len(counts)} PDFs.")
+        elif args.output_json.endswith(".ndjson"):
+            with _pool(args.workers) as pool:
+                count = extract_to_ndjson(args.input_pdf, args.output_json, pool)
+            print(f"\n✅ Done. {count} schemes written to {args.output_json}")
+        else:
+            parse_pdf_to_json(args.input_pdf, args.output_json, args.workers)
     except Exception as e:
         print(f"Error parsing PDF: {e}")
         sys.exit(1)
 
+
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Parse Scheme PDF to JSON")
-    parser.add_argument("input_pdf", help="Path to input PDF file")
-    parser.add_argument("output_json", help="Path to output JSON file", default="schemes.json", nargs="?")
-    
-    args = parser.parse_args()
-    
-    parse_pdf_to_json(args.input_pdf, args.output_json)
+    main()
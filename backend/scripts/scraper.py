@@ -8,28 +8,43 @@ Sources:
     4. pmfby.gov.in         — Pradhan Mantri Fasal Bima Yojana
     5. nabard.org           — NABARD Agricultural Loans & Subsidies
 
+All sources are fetched in parallel (one thread each) through one pooled
+keep-alive session, so a refresh takes as long as the slowest source.
+Each source has its own time budget for the whole download, not just per
+socket read. Pages are fetched with conditional GET: the ETag /
+Last-Modified of the last successful fetch and the schemes parsed from it
+are kept in data/scraper_cache.json, and a 304 Not Modified reuses those
+schemes without downloading or parsing the page again.
+
 Usage:
     python -m scripts.scraper                      (from backend/)
     python scripts/scraper.py                       (from backend/)
     python scripts/scraper.py --insert              (scrape + insert into MongoDB)
     python scripts/scraper.py --output out.json     (custom output path)
+    python scripts/scraper.py --no-cache            (unconditional GETs)
 """
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 import json
-import sys
+import time
 import argparse
 import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.path.join(_BACKEND_DIR, "data", "scraper_cache.json")
+
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -39,56 +54,46 @@ HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.5",
 }
-TIMEOUT = 15  # seconds
+TIMEOUT = 15          # seconds, default budget per source
+CONNECT_TIMEOUT = 5   # seconds
+_CHUNK_SIZE = 64 * 1024
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Source 1 — data.gov.in  (API-based catalog search)
 # ═══════════════════════════════════════════════════════════════════════════
-def scrape_data_gov_in():
-    """Fetch agriculture-related datasets from data.gov.in catalog API."""
-    logger.info("Scraping data.gov.in ...")
+def parse_data_gov_in(soup):
+    """Agriculture-related datasets from the data.gov.in catalog search page."""
     schemes = []
+    items = soup.select(".views-row, .view-content .views-row")
 
-    try:
-        url = "https://data.gov.in/search?title=agriculture+scheme&sort=changed"
-        resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        resp.raise_for_status()
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-        items = soup.select(".views-row, .view-content .views-row")
-
-        for item in items[:10]:
-            title_el = item.select_one("h3 a, .views-field-title a, a")
-            if not title_el:
-                continue
-            title = title_el.get_text(strip=True)
-            link = title_el.get("href", "")
-            if link and not link.startswith("http"):
-                link = f"https://data.gov.in{link}"
-
-            desc_el = item.select_one(".views-field-body, p, .field-content")
-            desc = desc_el.get_text(strip=True) if desc_el else ""
+    for item in items[:10]:
+        title_el = item.select_one("h3 a, .views-field-title a, a")
+        if not title_el:
+            continue
+        title = title_el.get_text(strip=True)
+        link = title_el.get("href", "")
+        if link and not link.startswith("http"):
+            link = f"https://data.gov.in{link}"
 
-            schemes.append({
-                "scheme_name": title,
-                "type": "Subsidy",
-                "benefit": "See official portal",
-                "benefit_amount": 0,
-                "states": ["All"],
-                "crops": ["All"],
-                "min_land": 0,
-                "max_land": 100,
-                "season": "All",
-                "documents_required": ["Aadhaar Card", "Land Records"],
-                "official_link": link or "https://data.gov.in",
-                "description": {"en": desc or title},
-                "source": "data.gov.in",
-            })
+        desc_el = item.select_one(".views-field-body, p, .field-content")
+        desc = desc_el.get_text(strip=True) if desc_el else ""
 
-        logger.info("  → Fetched %d entries from data.gov.in", len(schemes))
-    except Exception as exc:
-        logger.warning("  ✗ data.gov.in scrape failed: %s", exc)
+        schemes.append({
+            "scheme_name": title,
+            "type": "Subsidy",
+            "benefit": "See official portal",
+            "benefit_amount": 0,
+            "states": ["All"],
+            "crops": ["All"],
+            "min_land": 0,
+            "max_land": 100,
+            "season": "All",
+            "documents_required": ["Aadhaar Card", "Land Records"],
+            "official_link": link or "https://data.gov.in",
+            "description": {"en": desc or title},
+            "source": "data.gov.in",
+        })
 
     return schemes
 
@@ -96,313 +101,423 @@ def scrape_data_gov_in():
 # ═══════════════════════════════════════════════════════════════════════════
 # Source 2 — agricoop.nic.in (Ministry of Agriculture)
 # ═══════════════════════════════════════════════════════════════════════════
-def scrape_agricoop():
-    """Scrape scheme listings from Ministry of Agriculture website."""
-    logger.info("Scraping agricoop.nic.in ...")
-    schemes = []
-
-    try:
-        url = "https://agricoop.nic.in/en/Major"
-        resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        resp.raise_for_status()
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-        rows = soup.select("table tr, .view-content .views-row, li a")
-
-        for row in rows[:15]:
-            link_el = row.select_one("a") if row.name != "a" else row
-            if not link_el:
-                continue
-            name = link_el.get_text(strip=True)
-            if len(name) < 5:
-                continue
-
-            href = link_el.get("href", "")
-            if href and not href.startswith("http"):
-                href = f"https://agricoop.nic.in{href}"
-
-            schemes.append({
-                "scheme_name": name,
-                "type": "Subsidy",
-                "benefit": "Government subsidy",
-                "benefit_amount": 0,
-                "states": ["All"],
-                "crops": ["All"],
-                "min_land": 0,
-                "max_land": 100,
-                "season": "All",
-                "documents_required": ["Aadhaar Card", "Land Records", "Bank Account Details"],
-                "official_link": href or "https://agricoop.nic.in",
-                "description": {"en": f"Government scheme: {name}"},
-                "source": "agricoop.nic.in",
-            })
-
-        logger.info("  → Fetched %d entries from agricoop.nic.in", len(schemes))
-    except Exception as exc:
-        logger.warning("  ✗ agricoop.nic.in scrape failed: %s", exc)
-
-    return schemes
-
-
-# ═══════════════════════════════════════════════════════════════════════════
-# Source 3 — pmkisan.gov.in
-# ═══════════════════════════════════════════════════════════════════════════
-def scrape_pmkisan():
-    """Return PM-KISAN scheme details (primarily static + page verification)."""
-    logger.info("Scraping pmkisan.gov.in ...")
+def parse_agricoop(soup):
+    """Scheme listings from the Ministry of Agriculture website."""
     schemes = []
+    rows = soup.select("table tr, .view-content .views-row, li a")
 
-    try:
-        url = "https://pmkisan.gov.in"
-        resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        resp.raise_for_status()
+    for row in rows[:15]:
+        link_el = row.select_one("a") if row.name != "a" else row
+        if not link_el:
+            continue
+        name = link_el.get_text(strip=True)
+        if len(name) < 5:
+            continue
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        # Extract dynamic stats if available
-        stats_text = ""
-        stats_el = soup.select_one(".counter, .stat, .beneficiary-count")
-        if stats_el:
-            stats_text = f" Beneficiaries: {stats_el.get_text(strip=True)}."
-
-        schemes.append({
-            "scheme_name": "Pradhan Mantri Kisan Samman Nidhi (PM-KISAN)",
-            "type": "Income Support",
-            "benefit": "₹6,000 per year (₹2,000 × 3 installments)",
-            "benefit_amount": 6000,
-            "states": ["All"],
-            "crops": ["All"],
-            "min_land": 0,
-            "max_land": 100,
-            "season": "All",
-            "documents_required": [
-                "Aadhaar Card",
-                "Land Ownership Records",
-                "Bank Account (linked to Aadhaar)",
-                "Mobile Number",
-            ],
-            "official_link": "https://pmkisan.gov.in",
-            "description": {
-                "en": (
-                    "PM-KISAN provides ₹6,000 per year income support to all "
-                    "landholding farmer families in three equal installments of "
-                    "₹2,000 each directly to their bank accounts via DBT."
-                    + stats_text
-                ),
-            },
-            "source": "pmkisan.gov.in",
-        })
+        href = link_el.get("href", "")
+        if href and not href.startswith("http"):
+            href = f"https://agricoop.nic.in{href}"
 
-        logger.info("  → Fetched PM-KISAN data")
-    except Exception as exc:
-        logger.warning("  ✗ pmkisan.gov.in scrape failed: %s — using fallback data", exc)
         schemes.append({
-            "scheme_name": "Pradhan Mantri Kisan Samman Nidhi (PM-KISAN)",
-            "type": "Income Support",
-            "benefit": "₹6,000 per year",
-            "benefit_amount": 6000,
+            "scheme_name": name,
+            "type": "Subsidy",
+            "benefit": "Government subsidy",
+            "benefit_amount": 0,
             "states": ["All"],
             "crops": ["All"],
             "min_land": 0,
             "max_land": 100,
             "season": "All",
-            "documents_required": ["Aadhaar Card", "Land Records", "Bank Account"],
-            "official_link": "https://pmkisan.gov.in",
-            "description": {
-                "en": "PM-KISAN provides ₹6,000/year income support to farmer families.",
-            },
-            "source": "pmkisan.gov.in (fallback)",
+            "documents_required": ["Aadhaar Card", "Land Records", "Bank Account Details"],
+            "official_link": href or "https://agricoop.nic.in",
+            "description": {"en": f"Government scheme: {name}"},
+            "source": "agricoop.nic.in",
         })
 
     return schemes
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# Source 3 — pmkisan.gov.in
+# ═══════════════════════════════════════════════════════════════════════════
+def parse_pmkisan(soup):
+    """PM-KISAN scheme details (primarily static + page verification)."""
+    # Extract dynamic stats if available
+    stats_text = ""
+    stats_el = soup.select_one(".counter, .stat, .beneficiary-count")
+    if stats_el:
+        stats_text = f" Beneficiaries: {stats_el.get_text(strip=True)}."
+
+    return [{
+        "scheme_name": "Pradhan Mantri Kisan Samman Nidhi (PM-KISAN)",
+        "type": "Income Support",
+        "benefit": "₹6,000 per year (₹2,000 × 3 installments)",
+        "benefit_amount": 6000,
+        "states": ["All"],
+        "crops": ["All"],
+        "min_land": 0,
+        "max_land": 100,
+        "season": "All",
+        "documents_required": [
+            "Aadhaar Card",
+            "Land Ownership Records",
+            "Bank Account (linked to Aadhaar)",
+            "Mobile Number",
+        ],
+        "official_link": "https://pmkisan.gov.in",
+        "description": {
+            "en": (
+                "PM-KISAN provides ₹6,000 per year income support to all "
+                "landholding farmer families in three equal installments of "
+                "₹2,000 each directly to their bank accounts via DBT."
+                + stats_text
+            ),
+        },
+        "source": "pmkisan.gov.in",
+    }]
+
+
+PMKISAN_FALLBACK = [{
+    "scheme_name": "Pradhan Mantri Kisan Samman Nidhi (PM-KISAN)",
+    "type": "Income Support",
+    "benefit": "₹6,000 per year",
+    "benefit_amount": 6000,
+    "states": ["All"],
+    "crops": ["All"],
+    "min_land": 0,
+    "max_land": 100,
+    "season": "All",
+    "documents_required": ["Aadhaar Card", "Land Records", "Bank Account"],
+    "official_link": "https://pmkisan.gov.in",
+    "description": {
+        "en": "PM-KISAN provides ₹6,000/year income support to farmer families.",
+    },
+    "source": "pmkisan.gov.in (fallback)",
+}]
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Source 4 — pmfby.gov.in (Crop Insurance)
 # ═══════════════════════════════════════════════════════════════════════════
-def scrape_pmfby():
-    """Return PMFBY scheme details."""
-    logger.info("Scraping pmfby.gov.in ...")
+def parse_pmfby(soup):
+    """PMFBY scheme details."""
+    # Try to find crop-wise premium info
+    tables = soup.select("table")
+    premium_info = ""
+    for table in tables:
+        text = table.get_text()
+        if "premium" in text.lower() or "kharif" in text.lower():
+            rows = table.select("tr")
+            for row in rows[:5]:
+                cells = [td.get_text(strip=True) for td in row.select("td, th")]
+                if cells:
+                    premium_info += " | ".join(cells) + ". "
+            break
+
+    return [{
+        "scheme_name": "Pradhan Mantri Fasal Bima Yojana (PMFBY)",
+        "type": "Insurance",
+        "benefit": "Comprehensive Crop Insurance Coverage",
+        "benefit_amount": 200000,
+        "states": ["All"],
+        "crops": ["All"],
+        "min_land": 0,
+        "max_land": 100,
+        "season": "All",
+        "documents_required": [
+            "Aadhaar Card",
+            "Land Records / Tenancy Agreement",
+            "Bank Account Details",
+            "Sowing Certificate",
+            "Crop Details Declaration",
+        ],
+        "official_link": "https://pmfby.gov.in",
+        "description": {
+            "en": (
+                "PMFBY provides comprehensive crop insurance coverage at very low "
+                "premium rates — 2% for Kharif, 1.5% for Rabi, 5% for commercial/"
+                "horticultural crops. Covers yield losses, prevented sowing, "
+                "post-harvest losses, and localized calamities. "
+                + (premium_info if premium_info else "")
+            ),
+        },
+        "source": "pmfby.gov.in",
+    }]
+
+
+PMFBY_FALLBACK = [{
+    "scheme_name": "Pradhan Mantri Fasal Bima Yojana (PMFBY)",
+    "type": "Insurance",
+    "benefit": "Comprehensive Crop Insurance",
+    "benefit_amount": 200000,
+    "states": ["All"],
+    "crops": ["All"],
+    "min_land": 0,
+    "max_land": 100,
+    "season": "All",
+    "documents_required": ["Aadhaar Card", "Land Records", "Bank Account", "Sowing Certificate"],
+    "official_link": "https://pmfby.gov.in",
+    "description": {"en": "Comprehensive crop insurance at 2% (Kharif) / 1.5% (Rabi) premium."},
+    "source": "pmfby.gov.in (fallback)",
+}]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Source 5 — nabard.org (Loans & Subsidies)
+# ═══════════════════════════════════════════════════════════════════════════
+def parse_nabard(soup):
+    """NABARD scheme information."""
     schemes = []
+    links = soup.select("a")
 
-    try:
-        url = "https://pmfby.gov.in"
-        resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        resp.raise_for_status()
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        # Try to find crop-wise premium info
-        tables = soup.select("table")
-        premium_info = ""
-        for table in tables:
-            text = table.get_text()
-            if "premium" in text.lower() or "kharif" in text.lower():
-                rows = table.select("tr")
-                for row in rows[:5]:
-                    cells = [td.get_text(strip=True) for td in row.select("td, th")]
-                    if cells:
-                        premium_info += " | ".join(cells) + ". "
-                break
+    keywords = ["scheme", "fund", "loan", "subsidy", "credit", "rural", "farm", "agri"]
+    for link in links:
+        text = link.get_text(strip=True)
+        href = link.get("href", "")
+        if any(kw in text.lower() for kw in keywords) and len(text) > 10:
+            if href and not href.startswith("http"):
+                href = f"https://www.nabard.org/{href.lstrip('/')}"
 
-        schemes.append({
-            "scheme_name": "Pradhan Mantri Fasal Bima Yojana (PMFBY)",
-            "type": "Insurance",
-            "benefit": "Comprehensive Crop Insurance Coverage",
-            "benefit_amount": 200000,
-            "states": ["All"],
-            "crops": ["All"],
-            "min_land": 0,
-            "max_land": 100,
-            "season": "All",
-            "documents_required": [
-                "Aadhaar Card",
-                "Land Records / Tenancy Agreement",
-                "Bank Account Details",
-                "Sowing Certificate",
-                "Crop Details Declaration",
-            ],
-            "official_link": "https://pmfby.gov.in",
-            "description": {
-                "en": (
-                    "PMFBY provides comprehensive crop insurance coverage at very low "
-                    "premium rates — 2% for Kharif, 1.5% for Rabi, 5% for commercial/"
-                    "horticultural crops. Covers yield losses, prevented sowing, "
-                    "post-harvest losses, and localized calamities. "
-                    + (premium_info if premium_info else "")
-                ),
-            },
-            "source": "pmfby.gov.in",
-        })
+            schemes.append({
+                "scheme_name": text,
+                "type": "Loan",
+                "benefit": "Financial assistance / loan facility",
+                "benefit_amount": 0,
+                "states": ["All"],
+                "crops": ["All"],
+                "min_land": 0,
+                "max_land": 100,
+                "season": "All",
+                "documents_required": [
+                    "Aadhaar Card",
+                    "Land Records",
+                    "Bank Account Details",
+                    "Project Report (if applicable)",
+                ],
+                "official_link": href or "https://www.nabard.org",
+                "description": {"en": f"NABARD programme: {text}"},
+                "source": "nabard.org",
+            })
 
-        logger.info("  → Fetched PMFBY data")
-    except Exception as exc:
-        logger.warning("  ✗ pmfby.gov.in scrape failed: %s — using fallback", exc)
-        schemes.append({
-            "scheme_name": "Pradhan Mantri Fasal Bima Yojana (PMFBY)",
-            "type": "Insurance",
-            "benefit": "Comprehensive Crop Insurance",
-            "benefit_amount": 200000,
-            "states": ["All"],
-            "crops": ["All"],
-            "min_land": 0,
-            "max_land": 100,
-            "season": "All",
-            "documents_required": ["Aadhaar Card", "Land Records", "Bank Account", "Sowing Certificate"],
-            "official_link": "https://pmfby.gov.in",
-            "description": {"en": "Comprehensive crop insurance at 2% (Kharif) / 1.5% (Rabi) premium."},
-            "source": "pmfby.gov.in (fallback)",
-        })
+    # De-duplicate by scheme name
+    seen = set()
+    unique = []
+    for s in schemes:
+        if s["scheme_name"] not in seen:
+            seen.add(s["scheme_name"])
+            unique.append(s)
+    return unique[:10]
+
+
+NABARD_FALLBACK = [{
+    "scheme_name": "NABARD Rural Infrastructure Development Fund (RIDF)",
+    "type": "Loan",
+    "benefit": "Low-interest infrastructure loans",
+    "benefit_amount": 500000,
+    "states": ["All"],
+    "crops": ["All"],
+    "min_land": 0,
+    "max_land": 100,
+    "season": "All",
+    "documents_required": ["Aadhaar Card", "Land Records", "Project Proposal"],
+    "official_link": "https://www.nabard.org",
+    "description": {"en": "RIDF provides low-interest loans for rural infrastructure."},
+    "source": "nabard.org (fallback)",
+}]
 
-    return schemes
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Source registry
+# ═══════════════════════════════════════════════════════════════════════════
+# fallback: schemes returned when the page cannot be fetched or parsed
+# timeout:  seconds for the whole download of the page
+Source = namedtuple("Source", "name url parse fallback timeout")
+
+SOURCES = [
+    Source("data.gov.in", "https://data.gov.in/search?title=agriculture+scheme&sort=changed",
+           parse_data_gov_in, [], 20),
+    Source("agricoop.nic.in", "https://agricoop.nic.in/en/Major", parse_agricoop, [], TIMEOUT),
+    Source("pmkisan.gov.in", "https://pmkisan.gov.in", parse_pmkisan, PMKISAN_FALLBACK, 10),
+    Source("pmfby.gov.in", "https://pmfby.gov.in", parse_pmfby, PMFBY_FALLBACK, TIMEOUT),
+    Source("nabard.org", "https://www.nabard.org/content.aspx?id=2", parse_nabard,
+           NABARD_FALLBACK, TIMEOUT),
+]
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# Source 5 — nabard.org (Loans & Subsidies)
+# Fetch engine
 # ═══════════════════════════════════════════════════════════════════════════
-def scrape_nabard():
-    """Scrape NABARD scheme information."""
-    logger.info("Scraping nabard.org ...")
-    schemes = []
+def make_session(pool_size: int = len(SOURCES)) -> requests.Session:
+    """One keep-alive session shared by all scraper threads.
+
+    Every source is a different host, so the adapter keeps one small
+    connection pool per host; GETs through a shared session are safe
+    across threads.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def load_cache(path: str) -> dict:
+    """Validators and parsed schemes per source from the last run."""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        logger.warning("Unreadable scraper cache %s — fetching everything", path)
+        return {}
+
+
+def save_cache(cache: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read_body(resp, deadline: float) -> str:
+    """Download the response body, giving up once `deadline` has passed.
+
+    The read timeout only bounds each socket read; a server that trickles
+    bytes would otherwise hold a thread for far longer than the budget.
+    """
+    body = bytearray()
+    for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+        body += chunk
+        if time.monotonic() > deadline:
+            raise requests.exceptions.Timeout("source time budget exceeded")
+    return bytes(body).decode(resp.encoding or "utf-8", errors="replace")
+
+
+def scrape_source(source: Source, session: requests.Session, cached: dict = None) -> tuple:
+    """Fetch and parse one source.
+
+    Args:
+        source: Entry of SOURCES.
+        session: Shared session from make_session().
+        cached: This source's cache entry from the last run, if any.
+
+    Returns:
+        (schemes, timing, cache_entry) — timing is {"source", "status",
+        "schemes", "seconds"} with status 'fetched', 'not_modified' or
+        'failed'; cache_entry is None when nothing should be stored.
+    """
+    start = time.monotonic()
+    logger.info("Scraping %s ...", source.name)
+    headers = {}
+    if cached and cached.get("url") == source.url and "schemes" in cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
 
     try:
-        url = "https://www.nabard.org/content.aspx?id=2"
-        resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        resp.raise_for_status()
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-        links = soup.select("a")
-
-        keywords = ["scheme", "fund", "loan", "subsidy", "credit", "rural", "farm", "agri"]
-        for link in links:
-            text = link.get_text(strip=True)
-            href = link.get("href", "")
-            if any(kw in text.lower() for kw in keywords) and len(text) > 10:
-                if href and not href.startswith("http"):
-                    href = f"https://www.nabard.org/{href.lstrip('/')}"
-
-                schemes.append({
-                    "scheme_name": text,
-                    "type": "Loan",
-                    "benefit": "Financial assistance / loan facility",
-                    "benefit_amount": 0,
-                    "states": ["All"],
-                    "crops": ["All"],
-                    "min_land": 0,
-                    "max_land": 100,
-                    "season": "All",
-                    "documents_required": [
-                        "Aadhaar Card",
-                        "Land Records",
-                        "Bank Account Details",
-                        "Project Report (if applicable)",
-                    ],
-                    "official_link": href or "https://www.nabard.org",
-                    "description": {"en": f"NABARD programme: {text}"},
-                    "source": "nabard.org",
-                })
-
-        # De-duplicate by scheme name
-        seen = set()
-        unique = []
-        for s in schemes:
-            if s["scheme_name"] not in seen:
-                seen.add(s["scheme_name"])
-                unique.append(s)
-        schemes = unique[:10]
-
-        logger.info("  → Fetched %d entries from nabard.org", len(schemes))
+        resp = session.get(source.url, headers=headers, stream=True,
+                           timeout=(CONNECT_TIMEOUT, source.timeout))
+        try:
+            if resp.status_code == 304 and headers:
+                schemes, status, entry = cached["schemes"], "not_modified", cached
+                logger.info("  → %s unchanged, reusing %d entries", source.name, len(schemes))
+            else:
+                resp.raise_for_status()
+                html = _read_body(resp, start + source.timeout)
+                schemes, status = source.parse(BeautifulSoup(html, "html.parser")), "fetched"
+                entry = None
+                if resp.headers.get("ETag") or resp.headers.get("Last-Modified"):
+                    entry = {
+                        "url": source.url,
+                        "etag": resp.headers.get("ETag"),
+                        "last_modified": resp.headers.get("Last-Modified"),
+                        "schemes": schemes,
+                    }
+                logger.info("  → Fetched %d entries from %s", len(schemes), source.name)
+        finally:
+            resp.close()
     except Exception as exc:
-        logger.warning("  ✗ nabard.org scrape failed: %s — using fallback", exc)
-        schemes.append({
-            "scheme_name": "NABARD Rural Infrastructure Development Fund (RIDF)",
-            "type": "Loan",
-            "benefit": "Low-interest infrastructure loans",
-            "benefit_amount": 500000,
-            "states": ["All"],
-            "crops": ["All"],
-            "min_land": 0,
-            "max_land": 100,
-            "season": "All",
-            "documents_required": ["Aadhaar Card", "Land Records", "Project Proposal"],
-            "official_link": "https://www.nabard.org",
-            "description": {"en": "RIDF provides low-interest loans for rural infrastructure."},
-            "source": "nabard.org (fallback)",
-        })
+        schemes, status, entry = list(source.fallback), "failed", None
+        logger.warning("  ✗ %s scrape failed: %s%s", source.name, exc,
+                       " — using fallback data" if schemes else "")
 
-    return schemes
+    timing = {
+        "source": source.name,
+        "status": status,
+        "schemes": len(schemes),
+        "seconds": round(time.monotonic() - start, 3),
+    }
+    return schemes, timing, entry
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Orchestrator
 # ═══════════════════════════════════════════════════════════════════════════
-def scrape_all_sources():
-    """Run all scrapers and return a combined, deduplicated list."""
-    all_schemes = []
-
-    scrapers = [
-        scrape_data_gov_in,
-        scrape_agricoop,
-        scrape_pmkisan,
-        scrape_pmfby,
-        scrape_nabard,
-    ]
-
-    for scraper_fn in scrapers:
-        try:
-            results = scraper_fn()
-            all_schemes.extend(results)
-        except Exception as exc:
-            logger.error("Scraper %s raised unexpected error: %s", scraper_fn.__name__, exc)
-
-    # Add timestamp
-    for s in all_schemes:
-        s["scraped_at"] = datetime.utcnow().isoformat()
+def scrape_sources(sources=None, session=None, cache_path=CACHE_PATH) -> tuple:
+    """Scrape all sources concurrently.
+
+    Args:
+        sources: Sources to scrape (default: SOURCES).
+        session: Shared session (default: a new make_session()).
+        cache_path: Conditional GET cache file; None disables it.
+
+    Returns:
+        (schemes, timings) — schemes in source order, one timing per source.
+    """
+    sources = SOURCES if sources is None else sources
+    session = session or make_session(max(len(sources), 1))
+    cache = load_cache(cache_path)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(len(sources), 1)) as pool:
+        futures = [pool.submit(scrape_source, s, session, cache.get(s.name)) for s in sources]
+        results = [f.result() for f in futures]
+    elapsed = time.monotonic() - start
+
+    all_schemes, timings = [], []
+    for source, (schemes, timing, entry) in zip(sources, results):
+        all_schemes.extend(schemes)
+        timings.append(timing)
+        if entry is not None:
+            cache[source.name] = entry
+        elif timing["status"] == "fetched":
+            cache.pop(source.name, None)  # page no longer sends validators
+    if cache_path:
+        save_cache(cache, cache_path)
+
+    logger.info("Scraped %d sources in %.2fs (slowest %.2fs)", len(sources), elapsed,
+                max((t["seconds"] for t in timings), default=0.0))
+    return all_schemes, timings
+
+
+def _with_timestamp(schemes):
+    """Copies stamped with scraped_at (cached schemes stay unstamped)."""
+    scraped_at = datetime.utcnow().isoformat()
+    return [{**s, "scraped_at": scraped_at} for s in schemes]
+
+
+def scrape_all_sources(cache_path=CACHE_PATH):
+    """Run all scrapers and return a combined list."""
+    all_schemes, _ = scrape_sources(cache_path=cache_path)
+    all_schemes = _with_timestamp(all_schemes)
 
     logger.info("=" * 60)
     logger.info("Total schemes scraped: %d", len(all_schemes))
     return all_schemes
 
 
+def print_timings(timings):
+    """Per-source status and duration table."""
+    print(f"\n  {'Source':<20} {'Status':<14} {'Schemes':>8} {'Seconds':>9}")
+    print(f"  {'─' * 54}")
+    for t in timings:
+        print(f"  {t['source']:<20} {t['status']:<14} {t['schemes']:>8} {t['seconds']:>9.2f}")
+
+
 def save_to_json(schemes, output_path="schemes_scraped.json"):
     """Save scraped schemes to a JSON file."""
     with open(output_path, "w", encoding="utf-8") as f:
@@ -411,25 +526,20 @@ def save_to_json(schemes, output_path="schemes_scraped.json"):
 
 
 def insert_into_db(schemes):
-    """Insert scraped schemes into MongoDB (merges with existing data)."""
-    from db import get_schemes_collection
-
-    collection = get_schemes_collection()
-    inserted = 0
-    updated = 0
+    """Upsert scraped schemes into MongoDB (merges with existing data).
 
-    for scheme in schemes:
-        result = collection.update_one(
-            {"scheme_name": scheme["scheme_name"]},
-            {"$set": scheme},
-            upsert=True,
-        )
-        if result.upserted_id:
-            inserted += 1
-        elif result.modified_count > 0:
-            updated += 1
+    Only schemes whose content changed since the last sync are written,
+    in one bulk write (services/scheme_sync.py); rank features are then
+    recomputed for the catalogue (services/scheme_enrichment.py).
+    """
+    from services.scheme_enrichment import enrich_catalogue
+    from services.scheme_sync import sync_schemes
 
-    logger.info("DB insert complete: %d new, %d updated", inserted, updated)
+    stats = sync_schemes(schemes, mode="merge")
+    enrich_catalogue()
+    logger.info("DB insert complete: %d new, %d updated, %d unchanged",
+                stats["inserted"], stats["updated"], stats["unchanged"])
+    return stats
 
 
 # ---------------------------------------------------------------------------
@@ -439,9 +549,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Scrape government agriculture scheme data")
     parser.add_argument("--output", default="schemes_scraped.json", help="Output JSON path")
     parser.add_argument("--insert", action="store_true", help="Insert results into MongoDB")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Fetch every page unconditionally and keep no validators")
     args = parser.parse_args()
 
-    schemes = scrape_all_sources()
+    schemes, timings = scrape_sources(cache_path=None if args.no_cache else CACHE_PATH)
+    schemes = _with_timestamp(schemes)
+    print_timings(timings)
 
     # Always save to file
     save_to_json(schemes, args.output)
@@ -3,6 +3,11 @@ AgriScheme Backend — Database seeder.
 Populates the schemes collection with comprehensive, real-world government
 agriculture scheme data including all required fields.
 
+Re-seeding syncs in place (services/scheme_sync.py): unchanged schemes are
+skipped, changed ones replaced, schemes not in this list deleted — all in
+one bulk write, so the collection is never empty and keeps its indexes.
+Rank features are then recomputed (services/scheme_enrichment.py).
+
 Usage:
     python -m scripts.seed_db       (from backend/)
     python scripts/seed_db.py        (from backend/)
@@ -12,18 +17,14 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from pprint import pprint
-from db import get_schemes_collection, init_indexes
+from db import init_indexes
+from services.scheme_enrichment import enrich_catalogue
+from services.scheme_sync import sync_schemes
 
 
 def seed_database():
-    """Drop existing data and insert 33 schemes with full field coverage."""
+    """Make the schemes collection match the 33 seed schemes with full field coverage."""
     try:
-        schemes_col = get_schemes_collection()
-
-        # Clear existing data
-        schemes_col.drop()
-        print("Dropped existing schemes collection.")
-
         schemes = [
             # ───────────────────────────────────────────────────────────
             # 1. PM-KISAN  (Income Support — All India)
@@ -933,11 +934,16 @@ def seed_database():
             },
         ]
 
-        result = schemes_col.insert_many(schemes)
-        print(f"\n✅ Inserted {len(result.inserted_ids)} schemes into the database.")
+        stats = sync_schemes(schemes, mode="replace", prune=True)
+        print(f"\n✅ Synced {len(schemes)} schemes: {stats['inserted']} new, "
+              f"{stats['updated']} updated, {stats['unchanged']} unchanged, "
+              f"{stats['deleted']} removed (catalogue v{stats['version']}).")
+
+        enriched = enrich_catalogue()
+        print(f"✅ Rank features updated for {enriched['enriched']} of "
+              f"{enriched['schemes']} schemes (ranking model v{enriched['version']}).")
 
-        # Re-initialise indexes
-        print("Re-initializing indexes...")
+        # Ensure indexes exist (no-op when they already do)
         init_indexes()
 
         print(f"\nDatabase seeded successfully with {len(schemes)} schemes.")
@@ -0,0 +1,278 @@
+"""
+Train the Offline Crop Disease Classifier — RandomForest on leaf photos.
+
+Expects a local labelled image set with one folder per class, in the
+PlantVillage layout "<Crop>___<Disease>":
+
+  data/disease_images/
+      Tomato___Early_blight/*.jpg
+      Tomato___healthy/*.jpg
+      Rice___Brown_spot/*.jpg
+      ...
+
+(the public PlantVillage set, our own field photos, or both). Every image
+is reduced to the colour/texture feature vector of
+services/disease_classifier.py; the feature matrix is cached as .npy under
+models/cache/ (keyed by the file list, sizes and mtimes plus the feature
+version), so re-runs with other hyperparameters skip decoding.
+
+Metrics reported: accuracy, macro F1, per-class precision/recall,
+feature importance.
+
+Output:
+  models/disease_model.pkl — model + labels + feature version + metrics
+
+Servers load the model the first time DISEASE_MODE=offline|hybrid needs
+it; restart them to pick up a retrained model. Measure latency with
+scripts/benchmark_disease_model.py.
+
+Usage:
+  cd backend
+  python scripts/train_disease_model.py
+  python scripts/train_disease_model.py --images /data/plantvillage --max-per-class 500
+"""
+
+import os
+import sys
+import time
+import pickle
+import random
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report, f1_score
+from sklearn.model_selection import train_test_split
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from services.disease_classifier import (  # noqa: E402
+    FEATURE_NAMES,
+    FEATURE_VERSION,
+    extract_features,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Paths
+DATA_DIR = os.path.join(BACKEND_DIR, "data")
+MODEL_DIR = os.path.join(BACKEND_DIR, "models")
+CACHE_DIR = os.path.join(MODEL_DIR, "cache")
+IMAGE_DIR = os.path.join(DATA_DIR, "disease_images")
+
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def list_images(root, max_per_class=0, seed=42):
+    """(paths, labels) of all images under root/<label>/, sorted per class.
+
+    With max_per_class > 0 a reproducible random subset is taken per class.
+    """
+    if not os.path.isdir(root):
+        raise FileNotFoundError(
+            f"Image folder not found at {root}. Put one sub-folder of photos "
+            "per class there, named <Crop>___<Disease> (PlantVillage layout)."
+        )
+    rng = random.Random(seed)
+    paths, labels = [], []
+    for label in sorted(os.listdir(root)):
+        folder = os.path.join(root, label)
+        if not os.path.isdir(folder):
+            continue
+        files = sorted(
+            os.path.join(folder, f) for f in os.listdir(folder)
+            if f.lower().endswith(_IMAGE_EXTENSIONS)
+        )
+        if max_per_class and len(files) > max_per_class:
+            files = sorted(rng.sample(files, max_per_class))
+        paths += files
+        labels += [label] * len(files)
+    return paths, labels
+
+
+def _features_of_file(path):
+    """Features of one image file, None if it cannot be decoded."""
+    try:
+        with open(path, "rb") as f:
+            return extract_features(f.read())
+    except Exception as e:
+        logger.warning("Skipping %s: %s", path, e)
+        return None
+
+
+def _cache_key(paths):
+    """Cache key from the file list signature + feature version."""
+    h = hashlib.sha1(f"v{FEATURE_VERSION}".encode())
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"|{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}".encode())
+    return h.hexdigest()[:16]
+
+
+def extract_all(paths, labels, workers=0, use_cache=True):
+    """Feature matrix of all images (undecodable ones dropped), cached as .npy."""
+    key = _cache_key(paths)
+    x_path = os.path.join(CACHE_DIR, f"disease.{key}.X.npy")
+    y_path = os.path.join(CACHE_DIR, f"disease.{key}.y.npy")
+    if use_cache and os.path.exists(x_path) and os.path.exists(y_path):
+        logger.info("Using cached features (%s)", key)
+        return np.load(x_path), np.load(y_path)
+
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            features = list(pool.map(_features_of_file, paths, chunksize=32))
+    else:
+        features = [_features_of_file(p) for p in paths]
+    keep = [i for i, f in enumerate(features) if f is not None]
+    X = np.stack([features[i] for i in keep]) if keep else np.empty((0, len(FEATURE_NAMES)))
+    y = np.array([labels[i] for i in keep])
+    logger.info("Extracted features of %d images in %.1fs", len(keep), time.perf_counter() - start)
+
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for target, arr in ((x_path, X), (y_path, y)):
+            tmp = target + ".tmp.npy"
+            np.save(tmp, arr)
+            os.replace(tmp, target)
+    return X, y
+
+
+def train_model(X_train, y_train, n_estimators=150):
+    """Train a RandomForest sized for millisecond CPU inference."""
+    model = RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=18,
+        min_samples_leaf=2,
+        max_features="sqrt",
+        class_weight="balanced_subsample",
+        random_state=42,
+        n_jobs=-1,
+    )
+    model.fit(X_train, y_train)
+    return model
+
+
+def evaluate(model, X_train, y_train, X_test, y_test):
+    """Accuracy / macro F1 on train and test, per-class report, importances."""
+    y_train_pred = model.predict(X_train)
+    y_test_pred = model.predict(X_test)
+    metrics = {
+        "train_accuracy": float(accuracy_score(y_train, y_train_pred)),
+        "test_accuracy": float(accuracy_score(y_test, y_test_pred)),
+        "test_macro_f1": float(f1_score(y_test, y_test_pred, average="macro")),
+        "n_train": int(len(y_train)),
+        "n_test": int(len(y_test)),
+    }
+
+    print("\n" + "=" * 70)
+    print("  MODEL EVALUATION")
+    print("=" * 70)
+    print(f"\n  {'Metric':<20} {'Training':<15} {'Test':<15}")
+    print(f"  {'─' * 50}")
+    print(f"  {'Accuracy':<20} {metrics['train_accuracy']:<15.4f} {metrics['test_accuracy']:<15.4f}")
+    print(f"  {'Macro F1':<20} {'':<15} {metrics['test_macro_f1']:<15.4f}")
+
+    print(f"\n  {'─' * 60}")
+    print("  PER-CLASS TEST METRICS:")
+    print(classification_report(y_test, y_test_pred, digits=3, zero_division=0))
+
+    print(f"  {'─' * 50}")
+    print("  FEATURE IMPORTANCE (top 12):")
+    importances = model.feature_importances_
+    for idx in np.argsort(importances)[::-1][:12]:
+        bar = "█" * int(importances[idx] * 80)
+        print(f"  {FEATURE_NAMES[idx]:<18} {importances[idx]:.4f}  {bar}")
+
+    return metrics
+
+
+def _atomic_pickle(obj, path):
+    """Pickle to a temp file and rename, so readers never see a partial file."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def save_model(model, metrics, path=None):
+    """Save model, class labels and metadata as one artifact."""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = path or os.path.join(MODEL_DIR, "disease_model.pkl")
+    _atomic_pickle({
+        "model": model,
+        "labels": [str(c) for c in model.classes_],
+        "feature_version": FEATURE_VERSION,
+        "feature_names": FEATURE_NAMES,
+        "metrics": metrics,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }, path)
+    print(f"\n  Model saved: {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the offline crop disease classifier")
+    parser.add_argument("--images", default=IMAGE_DIR,
+                        help="Folder with one sub-folder per class (default: data/disease_images)")
+    parser.add_argument("--max-per-class", type=int, default=0,
+                        help="Use at most N images per class (default: all)")
+    parser.add_argument("--test-size", type=float, default=0.2,
+                        help="Held-out share for evaluation (default: 0.2)")
+    parser.add_argument("--n-estimators", type=int, default=150,
+                        help="Trees (default: 150)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Feature extraction processes (default: all CPUs)")
+    parser.add_argument("--output", help="Model path (default: models/disease_model.pkl)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore and do not write the .npy feature cache")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 70)
+    print("  CROP DISEASE CLASSIFIER TRAINING")
+    print("  Algorithm: RandomForest on colour/texture features (scikit-learn)")
+    print("=" * 70)
+
+    # 1. Images + features (cached as .npy)
+    paths, labels = list_images(args.images, args.max_per_class)
+    if len(set(labels)) < 2:
+        raise SystemExit(f"Need at least two classes of images under {args.images}.")
+    logger.info("Images: %d in %d classes", len(paths), len(set(labels)))
+    X, y = extract_all(paths, labels, args.workers, not args.no_cache)
+
+    # 2. Stratified split
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.test_size, stratify=y, random_state=42,
+    )
+    logger.info("Training samples: %d, Test samples: %d", len(X_train), len(X_test))
+
+    # 3. Train
+    print(f"\n  Training RandomForest ({args.n_estimators} trees, max_depth=18)...")
+    model = train_model(X_train, y_train, args.n_estimators)
+    print("  Training complete!")
+
+    # 4. Evaluate
+    metrics = evaluate(model, X_train, y_train, X_test, y_test)
+
+    # 5. Save
+    save_model(model, metrics, args.output)
+
+    print("=" * 70)
+    print("  DONE. Enable with DISEASE_MODE=offline or DISEASE_MODE=hybrid.")
+    print("=" * 70)
+    return model
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,34 @@ evaluates on yield_test.csv, and saves model + encoders.
 
 Metrics reported: R², MAE, RMSE, per-crop breakdown.
 
+CSVs are streamed in chunks with explicit dtypes, and the encoded feature
+matrices are cached as .npy files under models/cache/ (keyed by CSV
+size/mtime and encoder classes), so re-runs on unchanged data skip parsing.
+
+With --warm-start N the existing model is loaded and N extra trees are
+fitted on the (new season) training CSV, reusing the saved label encoders.
+
+Model files are replaced atomically; running YieldPredictor instances pick
+up the new model on their next reload check (no server restart needed).
+
 Output:
   models/yield_model.pkl      — Trained RandomForest model
   models/yield_encoders.pkl   — Label encoders + metadata
+  models/cache/*.npy          — Encoded feature matrix cache
 
 Usage:
   cd backend
   python scripts/train_yield_model.py
+  python scripts/train_yield_model.py --warm-start 50 --train-csv data/new_season.csv
 """
 
 import os
 import sys
+import time
 import pickle
+import hashlib
 import logging
+import argparse
 
 import numpy as np
 import pandas as pd
@@ -36,87 +51,121 @@ DATA_DIR = os.path.join(BACKEND_DIR, "data")
 MODEL_DIR = os.path.join(BACKEND_DIR, "models")
 
 
-def load_data():
-    """Load train and test CSV files."""
-    train_path = os.path.join(DATA_DIR, "yield_train.csv")
-    test_path = os.path.join(DATA_DIR, "yield_test.csv")
+# Explicit dtypes — avoids pandas type inference on every chunk
+_CSV_DTYPES = {
+    "Crop_Year": "int32",
+    "State": "str",
+    "Crop": "str",
+    "Season": "str",
+    "Annual_Rainfall_mm": "float64",
+    "Irrigation_pct": "float64",
+    "Yield_tonnes_per_ha": "float64",
+}
+_CATEGORICAL_COLS = ["Crop", "State", "Season"]
+_FEATURE_COLS = ["Crop_Year", "Annual_Rainfall_mm", "Irrigation_pct"]
+_TARGET_COL = "Yield_tonnes_per_ha"
+_CHUNK_SIZE = 100_000
+
+CACHE_DIR = os.path.join(MODEL_DIR, "cache")
+
+
+def _default_paths():
+    return (
+        os.path.join(DATA_DIR, "yield_train.csv"),
+        os.path.join(DATA_DIR, "yield_test.csv"),
+    )
 
-    if not os.path.exists(train_path):
-        raise FileNotFoundError(
-            f"Training data not found at {train_path}. "
-            "Run: python scripts/generate_yield_dataset.py"
-        )
-    if not os.path.exists(test_path):
+
+def _check_exists(path):
+    if not os.path.exists(path):
         raise FileNotFoundError(
-            f"Test data not found at {test_path}. "
+            f"Data not found at {path}. "
             "Run: python scripts/generate_yield_dataset.py"
         )
 
-    train_df = pd.read_csv(train_path)
-    test_df = pd.read_csv(test_path)
 
-    logger.info("Loaded %d training rows, %d test rows", len(train_df), len(test_df))
-    return train_df, test_df
+def iter_csv_chunks(path, columns=None, chunksize=_CHUNK_SIZE):
+    """Stream a yield CSV in chunks with explicit dtypes."""
+    columns = columns or list(_CSV_DTYPES)
+    dtypes = {c: _CSV_DTYPES[c] for c in columns}
+    yield from pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize)
 
 
-def preprocess(train_df, test_df):
-    """Feature engineering and encoding.
+def fit_encoders(paths, chunksize=_CHUNK_SIZE):
+    """Fit label encoders on ALL unique values across the given CSVs.
 
-    Features used:
-    - Crop (label-encoded)
-    - State (label-encoded)
-    - Season (label-encoded)
-    - Crop_Year (numeric)
-    - Annual_Rainfall_mm (numeric)
-    - Irrigation_pct (numeric)
-
-    Target: Yield_tonnes_per_ha
+    Only the categorical columns are read, chunk by chunk.
     """
-    # Initialize label encoders
-    crop_enc = LabelEncoder()
-    state_enc = LabelEncoder()
-    season_enc = LabelEncoder()
-
-    # Fit on ALL unique values (train + test) to avoid unseen labels
-    all_crops = pd.concat([train_df["Crop"], test_df["Crop"]]).unique()
-    all_states = pd.concat([train_df["State"], test_df["State"]]).unique()
-    all_seasons = pd.concat([train_df["Season"], test_df["Season"]]).unique()
-
-    crop_enc.fit(all_crops)
-    state_enc.fit(all_states)
-    season_enc.fit(all_seasons)
-
-    feature_cols = ["Crop_Year", "Annual_Rainfall_mm", "Irrigation_pct"]
-    target_col = "Yield_tonnes_per_ha"
-
-    def encode_df(df):
-        X = df[feature_cols].copy()
-        X["Crop_enc"] = crop_enc.transform(df["Crop"])
-        X["State_enc"] = state_enc.transform(df["State"])
-        X["Season_enc"] = season_enc.transform(df["Season"])
-        y = df[target_col].values
-        return X.values, y
-
-    X_train, y_train = encode_df(train_df)
-    X_test, y_test = encode_df(test_df)
-
-    encoders = {
-        "crop_encoder": crop_enc,
-        "state_encoder": state_enc,
-        "season_encoder": season_enc,
-        "feature_order": feature_cols + ["Crop_enc", "State_enc", "Season_enc"],
-    }
+    uniques = {col: set() for col in _CATEGORICAL_COLS}
+    for path in paths:
+        for chunk in iter_csv_chunks(path, _CATEGORICAL_COLS, chunksize):
+            for col in _CATEGORICAL_COLS:
+                uniques[col].update(chunk[col].unique())
 
-    logger.info("Features: %s", encoders["feature_order"])
-    logger.info("Training samples: %d, Test samples: %d", len(X_train), len(X_test))
+    return {
+        "crop_encoder": LabelEncoder().fit(sorted(uniques["Crop"])),
+        "state_encoder": LabelEncoder().fit(sorted(uniques["State"])),
+        "season_encoder": LabelEncoder().fit(sorted(uniques["Season"])),
+        "feature_order": _FEATURE_COLS + ["Crop_enc", "State_enc", "Season_enc"],
+    }
 
-    return X_train, y_train, X_test, y_test, encoders
 
+def _encode_chunk(df, encoders):
+    """Encode one DataFrame chunk into (X, y) float arrays.
 
-def train_model(X_train, y_train):
+    Raises ValueError if a label is unknown to the encoders.
+    """
+    X = np.empty((len(df), 6), dtype=np.float64)
+    X[:, :3] = df[_FEATURE_COLS].to_numpy(dtype=np.float64)
+    X[:, 3] = encoders["crop_encoder"].transform(df["Crop"])
+    X[:, 4] = encoders["state_encoder"].transform(df["State"])
+    X[:, 5] = encoders["season_encoder"].transform(df["Season"])
+    return X, df[_TARGET_COL].to_numpy(dtype=np.float64)
+
+
+def _cache_key(path, encoders):
+    """Cache key from the CSV file signature + encoder classes."""
+    st = os.stat(path)
+    h = hashlib.sha1(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}".encode())
+    for name in ("crop_encoder", "state_encoder", "season_encoder"):
+        h.update("|".join(map(str, encoders[name].classes_)).encode())
+    return h.hexdigest()[:16]
+
+
+def encode_csv(path, encoders, chunksize=_CHUNK_SIZE, use_cache=True):
+    """Stream a CSV into encoded (X, y) arrays, cached on disk as .npy."""
+    _check_exists(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    key = _cache_key(path, encoders)
+    x_path = os.path.join(CACHE_DIR, f"{stem}.{key}.X.npy")
+    y_path = os.path.join(CACHE_DIR, f"{stem}.{key}.y.npy")
+
+    if use_cache and os.path.exists(x_path) and os.path.exists(y_path):
+        logger.info("Using cached features for %s", os.path.basename(path))
+        return np.load(x_path), np.load(y_path)
+
+    X_parts, y_parts = [], []
+    for chunk in iter_csv_chunks(path, chunksize=chunksize):
+        X, y = _encode_chunk(chunk, encoders)
+        X_parts.append(X)
+        y_parts.append(y)
+    X = np.concatenate(X_parts) if X_parts else np.empty((0, 6))
+    y = np.concatenate(y_parts) if y_parts else np.empty(0)
+
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for target, arr in ((x_path, X), (y_path, y)):
+            tmp = target + ".tmp.npy"
+            np.save(tmp, arr)
+            os.replace(tmp, target)
+
+    return X, y
+
+
+def train_model(X_train, y_train, n_estimators=200):
     """Train RandomForest with optimized hyperparameters."""
     model = RandomForestRegressor(
-        n_estimators=200,
+        n_estimators=n_estimators,
         max_depth=20,
         min_samples_split=5,
         min_samples_leaf=2,
@@ -128,7 +177,37 @@ def train_model(X_train, y_train):
     return model
 
 
-def evaluate(model, X_train, y_train, X_test, y_test, test_df):
+def warm_start_model(model, X_new, y_new, extra_trees):
+    """Grow an existing forest by `extra_trees` trees fitted on new data.
+
+    Existing trees are kept untouched; only the added estimators see X_new.
+    """
+    model.set_params(
+        warm_start=True,
+        n_estimators=len(model.estimators_) + extra_trees,
+        n_jobs=-1,
+    )
+    model.fit(X_new, y_new)
+    model.set_params(warm_start=False)
+    return model
+
+
+def load_saved_model():
+    """Load the current model + encoders from MODEL_DIR."""
+    model_path = os.path.join(MODEL_DIR, "yield_model.pkl")
+    encoder_path = os.path.join(MODEL_DIR, "yield_encoders.pkl")
+    if not os.path.exists(model_path) or not os.path.exists(encoder_path):
+        raise FileNotFoundError(
+            f"No saved model in {MODEL_DIR}. Run a full training first."
+        )
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    with open(encoder_path, "rb") as f:
+        encoders = pickle.load(f)
+    return model, encoders
+
+
+def evaluate(model, X_train, y_train, X_test, y_test, test_crops):
     """Evaluate model with R², MAE, RMSE on both train and test sets."""
     # Training set metrics
     y_train_pred = model.predict(X_train)
@@ -157,10 +236,10 @@ def evaluate(model, X_train, y_train, X_test, y_test, test_df):
     print(f"  {'Crop':<16} {'Count':<8} {'MAE':<10} {'RMSE':<10} {'R²':<10}")
     print(f"  {'─' * 60}")
 
-    crops = test_df["Crop"].unique()
+    crops = np.unique(test_crops)
     per_crop = []
     for crop in sorted(crops):
-        mask = test_df["Crop"].values == crop
+        mask = test_crops == crop
         if mask.sum() < 2:
             continue
         crop_r2 = r2_score(y_test[mask], y_test_pred[mask])
@@ -185,19 +264,30 @@ def evaluate(model, X_train, y_train, X_test, y_test, test_df):
     }
 
 
+def _atomic_pickle(obj, path):
+    """Pickle to a temp file and rename, so readers never see a partial file."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(obj, f)
+    os.replace(tmp, path)
+
+
 def save_model(model, encoders, metrics):
-    """Save trained model and encoders to disk."""
+    """Save trained model and encoders to disk.
+
+    Encoders are written first: running predictors watch the model file,
+    so by the time its mtime changes the matching encoders are in place.
+    """
     os.makedirs(MODEL_DIR, exist_ok=True)
 
     model_path = os.path.join(MODEL_DIR, "yield_model.pkl")
     encoder_path = os.path.join(MODEL_DIR, "yield_encoders.pkl")
 
-    with open(model_path, "wb") as f:
-        pickle.dump(model, f)
-
     encoders["metrics"] = metrics
-    with open(encoder_path, "wb") as f:
-        pickle.dump(encoders, f)
+    encoders["n_estimators"] = len(model.estimators_)
+    encoders["trained_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    _atomic_pickle(encoders, encoder_path)
+    _atomic_pickle(model, model_path)
 
     model_size = os.path.getsize(model_path) / 1024
     print(f"\n  Model saved: {model_path} ({model_size:.0f} KB)")
@@ -227,36 +317,81 @@ def compare_with_synthetic():
 """)
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the crop yield model")
+    parser.add_argument("--train-csv", help="Training CSV (default: data/yield_train.csv)")
+    parser.add_argument("--test-csv", help="Test CSV (default: data/yield_test.csv)")
+    parser.add_argument("--warm-start", type=int, default=0, metavar="N",
+                        help="Add N trees to the saved model instead of retraining")
+    parser.add_argument("--n-estimators", type=int, default=200,
+                        help="Trees for a full training run (default: 200)")
+    parser.add_argument("--chunksize", type=int, default=_CHUNK_SIZE,
+                        help="Rows per CSV chunk")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore and do not write the .npy feature cache")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    default_train, default_test = _default_paths()
+    train_path = args.train_csv or default_train
+    test_path = args.test_csv or default_test
+    use_cache = not args.no_cache
+
     print("=" * 70)
     print("  CROP YIELD MODEL TRAINING")
     print("  Algorithm: RandomForest (scikit-learn)")
     print("  Data: ICRISAT / DES published statistics")
     print("=" * 70)
 
-    # 1. Load data
-    train_df, test_df = load_data()
+    # 1. Encoders — reuse saved ones when growing an existing forest
+    if args.warm_start > 0:
+        model, encoders = load_saved_model()
+        encoders.pop("metrics", None)
+    else:
+        model = None
+        encoders = fit_encoders([train_path, test_path], args.chunksize)
+    logger.info("Features: %s", encoders["feature_order"])
 
-    # 2. Preprocess
-    X_train, y_train, X_test, y_test, encoders = preprocess(train_df, test_df)
+    # 2. Stream + encode (cached as .npy)
+    try:
+        X_train, y_train = encode_csv(train_path, encoders, args.chunksize, use_cache)
+        X_test, y_test = encode_csv(test_path, encoders, args.chunksize, use_cache)
+    except ValueError as e:
+        if args.warm_start > 0:
+            raise SystemExit(
+                f"New data contains labels unknown to the saved model ({e}). "
+                "Run a full training instead of --warm-start."
+            )
+        raise
+    logger.info("Training samples: %d, Test samples: %d", len(X_train), len(X_test))
 
     # 3. Train
-    print("\n  Training RandomForest (200 trees, max_depth=20)...")
-    model = train_model(X_train, y_train)
+    if model is not None:
+        before = len(model.estimators_)
+        print(f"\n  Warm start: adding {args.warm_start} trees to {before}...")
+        model = warm_start_model(model, X_train, y_train, args.warm_start)
+    else:
+        print(f"\n  Training RandomForest ({args.n_estimators} trees, max_depth=20)...")
+        model = train_model(X_train, y_train, args.n_estimators)
     print("  Training complete!")
 
     # 4. Evaluate
-    metrics = evaluate(model, X_train, y_train, X_test, y_test, test_df)
+    test_crops = encoders["crop_encoder"].inverse_transform(X_test[:, 3].astype(int))
+    metrics = evaluate(model, X_train, y_train, X_test, y_test, test_crops)
 
-    # 5. Save
+    # 5. Save (running predictors hot-swap on their next reload check)
     save_model(model, encoders, metrics)
 
     # 6. Comparison
-    compare_with_synthetic()
+    if args.warm_start == 0:
+        compare_with_synthetic()
 
     print("=" * 70)
     print("  DONE. Model ready for production use.")
     print("=" * 70)
+    return model
 
 
 if __name__ == "__main__":
@@ -3,8 +3,10 @@ AgriScheme Backend — Crop Calendar Service.
 Provides crop growth phase timelines, tasks, and schedules
 based on crop, state, season, and sowing date.
 """
+import hashlib
+import json
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -548,6 +550,17 @@ _DEFAULT_CALENDAR = {
 }
 
 
+# Content version of the calendar templates (HTTP ETags)
+CALENDAR_VERSION = hashlib.sha1(
+    json.dumps([_CROP_CALENDARS, _DEFAULT_CALENDAR], sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+
+def calendar_version() -> str:
+    """Version of a calendar response: templates + today's date (is_past/is_today)."""
+    return f"{CALENDAR_VERSION}:{date.today().isoformat()}"
+
+
 def get_crop_calendar(crop: str, state: str = "", season: str = "",
                       sowing_date: str = None) -> dict:
     """Get the crop calendar with calculated dates.
@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 
 from services.weather_service import get_weather
 from services.market_service import get_market_prices
+from services.scheme_queries import state_schemes_query
 
 load_dotenv()
 
@@ -137,16 +138,7 @@ def recommend_crops(
     try:
         from db import get_schemes_collection
         schemes_coll = get_schemes_collection()
-        scheme_query = {
-            "states": {"$in": [state, "All", "All India"]},
-        }
-        if season:
-            scheme_query["$or"] = [
-                {"season": season},
-                {"season": "All"},
-                {"season": ""},
-                {"season": {"$exists": False}},
-            ]
+        scheme_query = state_schemes_query(state, season)
         schemes = list(schemes_coll.find(scheme_query, {"_id": 0, "scheme_name": 1, "crops": 1, "benefit": 1}).limit(20))
         if schemes:
             scheme_lines = []
@@ -0,0 +1,291 @@
+"""
+AgriScheme Backend — Near-duplicate photo cache for disease detection.
+
+Farmers often send the same leaf photo again (re-sent, re-compressed by a
+messenger, slightly resized). Each upload gets a 64-bit perceptual hash
+(pHash: DCT of a 32×32 grey thumbnail, low 8×8 frequencies against their
+median), which barely changes under such edits. Results are kept per
+(crop hint, language) in a BK-tree over Hamming distance, so an upload
+within DISEASE_DEDUP_DISTANCE bits of an earlier one reuses its result
+instead of calling Gemini Vision again.
+
+Crop hints and languages are compared case- and whitespace-insensitively;
+every distinct hint keeps its own partition, so a result is only reused
+for the same hint. The row cap below bounds the cache whatever the hints.
+
+Results are persisted in a local SQLite file and loaded back on first
+use; each lookup also picks up rows written since by other worker
+processes, so all gunicorn workers share one cache. Rows older than
+DISEASE_CACHE_MAX_AGE, or beyond DISEASE_CACHE_MAX_ROWS, are deleted
+oldest first, in batches of a tenth of the limit, and the trees are
+rebuilt without them (in every worker, on its next access).
+
+Env vars:
+  DISEASE_CACHE_DB        — path to the SQLite file
+                            (default: data/disease_cache.sqlite3)
+  DISEASE_DEDUP_DISTANCE  — max differing hash bits for a match
+                            (default 6 of 64; -1 disables the cache)
+  DISEASE_CACHE_MAX_AGE   — seconds a result is reused (default 30 days)
+  DISEASE_CACHE_MAX_ROWS  — results kept (default 50000)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from PIL import Image
+
+from services.image_ingest import open_reduced
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DB_PATH = os.getenv(
+    "DISEASE_CACHE_DB",
+    os.path.join(_BACKEND_DIR, "data", "disease_cache.sqlite3"),
+)
+DISEASE_DEDUP_DISTANCE = int(os.getenv("DISEASE_DEDUP_DISTANCE", "6"))
+DISEASE_CACHE_MAX_AGE = float(os.getenv("DISEASE_CACHE_MAX_AGE", str(30 * 86400)))
+DISEASE_CACHE_MAX_ROWS = int(os.getenv("DISEASE_CACHE_MAX_ROWS", "50000"))
+
+# Eviction removes this share of the limit at once, so trees are rebuilt
+# once per batch rather than on every upload
+_EVICT_SLACK = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS disease_results (
+    id         INTEGER PRIMARY KEY,
+    phash      INTEGER NOT NULL,  -- 64-bit hash stored as signed int64
+    crop_hint  TEXT NOT NULL,
+    language   TEXT NOT NULL,
+    result     TEXT NOT NULL,     -- JSON
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS disease_results_created_at ON disease_results (created_at);
+"""
+
+# ─── Perceptual hash ──────────────────────────────────────────────────────
+_HASH_SIDE = 32
+_LOW_FREQ = 8
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis: coefficients = D @ x @ D.T for an n×n block."""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    d = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    d[0] /= np.sqrt(2.0)
+    return d
+
+
+_DCT = _dct_matrix(_HASH_SIDE)[:_LOW_FREQ]
+_BIT_WEIGHTS = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+
+
+def perceptual_hash(raw) -> int:
+    """64-bit pHash of encoded image bytes.
+
+    Raises:
+        OSError / ValueError: the bytes are not a decodable image.
+    """
+    img = open_reduced(raw, 4 * _HASH_SIDE).convert("L")
+    img = img.resize((_HASH_SIDE, _HASH_SIDE), Image.BOX)
+    pixels = np.asarray(img, dtype=np.float64)
+    coeffs = (_DCT @ pixels @ _DCT.T).ravel()
+    # The DC term only tracks overall brightness, so it is left out of the median
+    bits = coeffs > np.median(coeffs[1:])
+    return int(np.sum(_BIT_WEIGHTS[bits], dtype=np.uint64))
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+# ─── BK-tree ──────────────────────────────────────────────────────────────
+class BKTree:
+    """Metric tree over Hamming distance: hash → value, radius search.
+
+    Each node's children are keyed by their distance to it, so a search for
+    everything within r of a query only descends into children whose key
+    lies in [d - r, d + r] (triangle inequality).
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self):
+        self._root = None  # [hash, value, {distance: node}]
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key: int, value):
+        """Insert; an identical hash replaces the stored value."""
+        if self._root is None:
+            self._root = [key, value, {}]
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            d = hamming(key, node[0])
+            if d == 0:
+                node[1] = value
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [key, value, {}]
+                self._size += 1
+                return
+            node = child
+
+    def nearest(self, key: int, radius: int):
+        """(distance, value) of the closest entry within `radius`, or None."""
+        if self._root is None:
+            return None
+        best = None
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            d = hamming(key, node[0])
+            if d <= radius and (best is None or d < best[0]):
+                best = (d, node[1])
+                if d == 0:
+                    break
+                radius = d  # only closer matches are interesting now
+            for dist, child in node[2].items():
+                if d - radius <= dist <= d + radius:
+                    stack.append(child)
+        return best
+
+
+# ─── Persistent result cache ──────────────────────────────────────────────
+def _to_signed(h: int) -> int:
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def _to_unsigned(h: int) -> int:
+    return h + (1 << 64) if h < 0 else h
+
+
+class DiseaseResultCache:
+    """pHash → detection result, one BK-tree per (crop hint, language)."""
+
+    def __init__(self, path: str = None, max_distance: int = DISEASE_DEDUP_DISTANCE,
+                 max_age: float = DISEASE_CACHE_MAX_AGE, max_rows: int = DISEASE_CACHE_MAX_ROWS):
+        self.path = path or _DB_PATH
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.max_rows = max_rows
+        self._trees = {}
+        self._entries = deque()  # (id, partition, hash, result) in id order
+        self._last_id = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _partition(crop_hint: str, language: str) -> tuple:
+        return (" ".join((crop_hint or "").split()).lower(),
+                (language or "en").strip().lower())
+
+    def _connection(self) -> sqlite3.Connection:
+        """The process's connection (used under self._lock), opened on first use."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _evict(self, conn):
+        """Delete the oldest rows once the age or row limit is exceeded."""
+        first_id, last_id = conn.execute(
+            "SELECT MIN(id), MAX(id) FROM disease_results").fetchone()
+        if first_id is None:
+            return
+        keep_from = first_id
+        # Rows are only ever deleted oldest-first, so ids stay contiguous
+        if last_id - first_id + 1 > self.max_rows:
+            keep_from = last_id - int(self.max_rows * (1 - _EVICT_SLACK)) + 1
+        now = time.time()
+        oldest = conn.execute(
+            "SELECT created_at FROM disease_results WHERE id = ?", (first_id,)).fetchone()
+        if oldest and oldest[0] < now - self.max_age:
+            row = conn.execute(
+                "SELECT MIN(id) FROM disease_results WHERE created_at >= ?",
+                (now - self.max_age * (1 - _EVICT_SLACK),),
+            ).fetchone()
+            keep_from = max(keep_from, row[0] if row[0] is not None else last_id + 1)
+        if keep_from > first_id:
+            with conn:
+                conn.execute("DELETE FROM disease_results WHERE id < ?", (keep_from,))
+            logger.info("Disease cache: evicted %d results", keep_from - first_id)
+
+    def _refresh(self, conn):
+        """Evict, load rows added since the last refresh, drop deleted ones."""
+        self._evict(conn)
+        rows = conn.execute(
+            "SELECT id, phash, crop_hint, language, result FROM disease_results "
+            "WHERE id > ? ORDER BY id", (self._last_id,),
+        ).fetchall()
+        for row_id, phash, crop_hint, language, result in rows:
+            entry = (row_id, (crop_hint, language), _to_unsigned(phash), json.loads(result))
+            self._entries.append(entry)
+            self._trees.setdefault(entry[1], BKTree()).add(entry[2], entry[3])
+            self._last_id = row_id
+        if rows:
+            logger.debug("Disease cache: loaded %d results", len(rows))
+
+        # Rows deleted here or by another worker: rebuild the trees without them
+        first_id = conn.execute("SELECT MIN(id) FROM disease_results").fetchone()[0]
+        if self._entries and (first_id is None or self._entries[0][0] < first_id):
+            self._entries = deque(e for e in self._entries
+                                  if first_id is not None and e[0] >= first_id)
+            self._trees = {}
+            for _, partition, phash, result in self._entries:
+                self._trees.setdefault(partition, BKTree()).add(phash, result)
+
+    def lookup(self, phash: int, crop_hint: str, language: str) -> tuple | None:
+        """(distance, result) of the nearest earlier upload, or None."""
+        if self.max_distance < 0:
+            return None
+        with self._lock:
+            self._refresh(self._connection())
+            tree = self._trees.get(self._partition(crop_hint, language))
+            return tree.nearest(phash, self.max_distance) if tree else None
+
+    def add(self, phash: int, crop_hint: str, language: str, result: dict):
+        """Remember a fresh result for later near-duplicates."""
+        if self.max_distance < 0:
+            return
+        partition = self._partition(crop_hint, language)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO disease_results "
+                    "(phash, crop_hint, language, result, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (_to_signed(phash), *partition,
+                     json.dumps(result, ensure_ascii=False), time.time()),
+                )
+            # Pick up our own row (and any from other workers) in id order
+            self._refresh(conn)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_disease_cache() -> DiseaseResultCache:
+    """The process-wide cache, opened on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiseaseResultCache()
+    return _cache
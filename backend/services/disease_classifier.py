@@ -0,0 +1,405 @@
+"""
+AgriScheme Backend — Offline Crop Disease Classifier.
+
+CPU-only alternative to Gemini Vision for DISEASE_MODE=offline|hybrid.
+Each photo is reduced to a small colour/texture feature vector
+(extract_features: hue histogram of the leaf, green / yellow / brown /
+dark / pale pixel shares, saturation and brightness statistics, edge and
+Laplacian texture energy, how patchy the off-green areas are) and
+classified by a RandomForest trained on a local labelled image set with
+scripts/train_disease_model.py. Inference runs through the flattened
+NumPy forest engine, so a prediction costs a few milliseconds.
+
+Labels follow the PlantVillage folder convention "<Crop>___<Disease>"
+(e.g. "Tomato___Early_blight", "Rice___healthy"). Advice comes from
+DISEASE_INFO, matched on the disease part of the label; diseases without
+an entry get general guidance.
+
+Output:
+  models/disease_model.pkl — {"model", "labels", "feature_version",
+                              "metrics", "trained_at"}
+"""
+
+import logging
+import os
+import pickle
+import re
+import threading
+
+import numpy as np
+
+from services.forest_engine import FlatForest
+from services.image_ingest import open_reduced
+from services.soil_image_analyzer import _rgb_to_hsv_array
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MODEL_PATH = os.path.join(_BACKEND_DIR, "models", "disease_model.pkl")
+
+# ─── Features ─────────────────────────────────────────────────────────────
+# Bump when extract_features changes; models trained on another version
+# are refused instead of silently mis-predicting.
+FEATURE_VERSION = 1
+
+_FEATURE_SIDE = 128             # photos are decoded with longest side ≤ 128
+_HUE_EDGES = np.linspace(0, 360, 13)
+_GRID = 4                       # cells per side for the lesion patchiness stats
+
+FEATURE_NAMES = (
+    [f"hue_{int(lo)}_{int(hi)}" for lo, hi in zip(_HUE_EDGES, _HUE_EDGES[1:])]
+    + ["leaf_share", "green_share", "yellow_share", "brown_share",
+       "dark_share", "pale_share",
+       "sat_mean", "sat_std", "val_mean", "val_std",
+       "grad_mean", "grad_std", "laplacian_var",
+       "lesion_cell_std", "lesion_cell_max"]
+)
+
+
+def _rgb_features(rgb: np.ndarray) -> np.ndarray:
+    """Feature vector of one RGB uint8 array (H, W, 3)."""
+    hsv = _rgb_to_hsv_array(rgb)
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+
+    leaf = (s > 15) & (v > 15)              # coloured, i.e. not background
+    n_leaf = max(int(leaf.sum()), 1)
+    green = leaf & (h >= 65) & (h < 170)
+    yellow = leaf & (h >= 40) & (h < 65)
+    brown = leaf & ((h < 40) | (h >= 330))  # red-brown lesions, rust
+    dark = v < 25                           # necrotic / sooty spots
+    pale = (s < 15) & (v > 70)              # powdery or bleached patches
+
+    hue_hist = np.histogram(h[leaf], bins=_HUE_EDGES)[0] / n_leaf
+    shares = [
+        leaf.mean(), green.sum() / n_leaf, yellow.sum() / n_leaf,
+        brown.sum() / n_leaf, dark.mean(), pale.mean(),
+    ]
+    if leaf.any():
+        colour = [s[leaf].mean(), s[leaf].std(), v[leaf].mean(), v[leaf].std()]
+    else:
+        colour = [0.0, 0.0, v.mean(), v.std()]
+
+    gray = rgb.astype(np.float32).mean(axis=2)
+    if min(gray.shape) >= 3:
+        grad = np.abs(np.diff(gray, axis=1))[:-1, :] + np.abs(np.diff(gray, axis=0))[:, :-1]
+        laplacian = (4 * gray[1:-1, 1:-1] - gray[:-2, 1:-1] - gray[2:, 1:-1]
+                     - gray[1:-1, :-2] - gray[1:-1, 2:])
+        texture = [grad.mean(), grad.std(), laplacian.var()]
+    else:
+        texture = [0.0, 0.0, 0.0]
+
+    # Diseased tissue tends to come in patches; healthy leaves are even
+    lesion = (leaf & ~green).astype(np.float32)
+    ch, cw = lesion.shape[0] // _GRID, lesion.shape[1] // _GRID
+    if ch and cw:
+        cells = lesion[:ch * _GRID, :cw * _GRID].reshape(_GRID, ch, _GRID, cw).mean(axis=(1, 3))
+        patchiness = [cells.std(), cells.max()]
+    else:
+        patchiness = [0.0, float(lesion.mean())]
+
+    return np.concatenate([hue_hist, shares, colour, texture, patchiness]).astype(np.float32)
+
+
+def extract_features(raw) -> np.ndarray:
+    """Feature vector (len(FEATURE_NAMES),) of encoded image bytes.
+
+    Raises:
+        OSError / ValueError: the bytes are not a decodable image.
+    """
+    return _rgb_features(np.asarray(open_reduced(raw, _FEATURE_SIDE)))
+
+
+# ─── Advice per disease ───────────────────────────────────────────────────
+# Keyed by the normalised disease part of a label ("early blight"); a label
+# matches the longest key it contains.
+DISEASE_INFO = {
+    "early blight": {
+        "description": "Fungal disease (Alternaria) that starts on older leaves and spreads upward.",
+        "symptoms": ["Brown spots with concentric rings on older leaves",
+                     "Yellowing around the spots", "Leaves dry and drop early"],
+        "treatment": ["Remove and destroy affected leaves",
+                      "Spray Mancozeb 75% WP (2.5 g/litre) or Chlorothalonil at 10-day intervals"],
+        "prevention": ["Rotate with non-solanaceous crops", "Avoid overhead irrigation; mulch the soil"],
+        "severity": "moderate",
+    },
+    "late blight": {
+        "description": "Fast-spreading water-mould disease (Phytophthora) favoured by cool, humid weather.",
+        "symptoms": ["Dark, water-soaked patches on leaves", "White fungal growth on leaf undersides",
+                     "Rapid collapse of foliage"],
+        "treatment": ["Spray Metalaxyl + Mancozeb (2.5 g/litre) immediately",
+                      "Remove and burn infected plants"],
+        "prevention": ["Use certified disease-free seed", "Ensure good drainage and spacing for air flow"],
+        "severity": "severe",
+    },
+    "blast": {
+        "description": "Fungal disease of rice (Magnaporthe) affecting leaves, nodes and panicles.",
+        "symptoms": ["Spindle-shaped spots with grey centres and brown margins",
+                     "Neck rot and empty panicles in severe cases"],
+        "treatment": ["Spray Tricyclazole 75% WP (0.6 g/litre)",
+                      "Avoid excess nitrogen until the disease is controlled"],
+        "prevention": ["Grow resistant varieties", "Balanced nitrogen in split doses"],
+        "severity": "severe",
+    },
+    "bacterial leaf blight": {
+        "description": "Bacterial disease (Xanthomonas) spreading through irrigation water and wind-driven rain.",
+        "symptoms": ["Yellow to straw-coloured stripes from the leaf tip", "Wavy leaf margins that dry out"],
+        "treatment": ["Spray Streptocycline (0.3 g) + Copper oxychloride (2.5 g) per litre",
+                      "Drain the field for a few days"],
+        "prevention": ["Use resistant varieties", "Avoid clipping seedling tips at transplanting"],
+        "severity": "severe",
+    },
+    "bacterial spot": {
+        "description": "Bacterial disease (Xanthomonas) of tomato and pepper leaves and fruit.",
+        "symptoms": ["Small dark, greasy spots on leaves", "Raised scabby spots on fruit"],
+        "treatment": ["Spray copper oxychloride (3 g/litre)", "Remove badly infected plants"],
+        "prevention": ["Use disease-free seed and seedlings", "Avoid working in wet fields"],
+        "severity": "moderate",
+    },
+    "brown spot": {
+        "description": "Fungal disease (Bipolaris) of rice, common on nutrient-poor soils.",
+        "symptoms": ["Oval brown spots with grey centres on leaves", "Discoloured grains"],
+        "treatment": ["Spray Mancozeb (2.5 g/litre) or Propiconazole (1 ml/litre)",
+                      "Correct potassium and silicon deficiency"],
+        "prevention": ["Seed treatment with Carbendazim", "Balanced fertilisation"],
+        "severity": "moderate",
+    },
+    "leaf spot": {
+        "description": "Fungal leaf spot (Cercospora / Septoria type) reducing the green leaf area.",
+        "symptoms": ["Many small round spots with light centres and dark borders",
+                     "Yellowing and early leaf drop"],
+        "treatment": ["Remove affected leaves",
+                      "Spray Carbendazim (1 g/litre) or Mancozeb (2.5 g/litre)"],
+        "prevention": ["Crop rotation and clean field residue", "Avoid wetting the foliage"],
+        "severity": "moderate",
+    },
+    "rust": {
+        "description": "Fungal rust disease producing powdery pustules of spores on leaves.",
+        "symptoms": ["Orange-brown powdery pustules on leaves", "Leaves yellow and dry"],
+        "treatment": ["Spray Propiconazole 25% EC (1 ml/litre) or Mancozeb (2.5 g/litre)"],
+        "prevention": ["Grow rust-resistant varieties", "Timely sowing; remove volunteer plants"],
+        "severity": "moderate",
+    },
+    "powdery mildew": {
+        "description": "Fungal disease forming a white powdery layer, favoured by dry days and humid nights.",
+        "symptoms": ["White powdery patches on leaves and stems", "Leaves curl, yellow and dry"],
+        "treatment": ["Spray wettable sulphur (3 g/litre) or Hexaconazole (1 ml/litre)"],
+        "prevention": ["Adequate plant spacing", "Avoid excess nitrogen"],
+        "severity": "moderate",
+    },
+    "downy mildew": {
+        "description": "Water-mould disease thriving in cool, wet conditions.",
+        "symptoms": ["Yellow patches on the upper leaf surface",
+                     "Grey-purple downy growth on the underside"],
+        "treatment": ["Spray Metalaxyl + Mancozeb (2 g/litre)"],
+        "prevention": ["Improve drainage and air flow", "Avoid late-evening irrigation"],
+        "severity": "moderate",
+    },
+    "leaf curl": {
+        "description": "Viral disease spread by whiteflies; infected plants stay stunted.",
+        "symptoms": ["Upward curling and crinkling of leaves", "Yellowing and stunted growth"],
+        "treatment": ["Uproot and destroy infected plants",
+                      "Control whiteflies with Imidacloprid (0.3 ml/litre) or yellow sticky traps"],
+        "prevention": ["Use virus-resistant varieties", "Raise nurseries under insect-proof net"],
+        "severity": "severe",
+    },
+    "mosaic": {
+        "description": "Viral disease causing mottled leaves; spread by aphids, whiteflies or handling.",
+        "symptoms": ["Light and dark green mosaic pattern on leaves", "Distorted, smaller leaves"],
+        "treatment": ["Remove and destroy infected plants", "Control insect vectors"],
+        "prevention": ["Use virus-free seed", "Wash hands and tools after handling plants"],
+        "severity": "severe",
+    },
+    "leaf mold": {
+        "description": "Fungal disease (Passalora) of tomato in humid greenhouses and dense canopies.",
+        "symptoms": ["Pale yellow spots on upper leaf surface", "Olive-green mould underneath"],
+        "treatment": ["Spray Chlorothalonil or Mancozeb (2.5 g/litre)", "Remove lower infected leaves"],
+        "prevention": ["Reduce humidity and improve ventilation"],
+        "severity": "moderate",
+    },
+    "spider mites": {
+        "description": "Tiny sap-sucking mites that multiply fast in hot, dry weather.",
+        "symptoms": ["Fine yellow speckling on leaves", "Fine webbing on leaf undersides"],
+        "treatment": ["Spray wettable sulphur (3 g/litre) or Dicofol (2.5 ml/litre)",
+                      "Spray water on leaf undersides"],
+        "prevention": ["Avoid water stress", "Keep field borders weed-free"],
+        "severity": "moderate",
+    },
+    "scab": {
+        "description": "Fungal disease causing corky lesions on leaves and fruit.",
+        "symptoms": ["Olive-green to black velvety spots on leaves", "Cracked, corky spots on fruit"],
+        "treatment": ["Spray Captan or Mancozeb (2.5 g/litre) from bud break"],
+        "prevention": ["Remove fallen leaves", "Prune for open canopy"],
+        "severity": "moderate",
+    },
+    "black rot": {
+        "description": "Fungal or bacterial rot causing dark lesions and fruit decay.",
+        "symptoms": ["Brown leaf spots with dark borders", "Black, shrivelled fruit"],
+        "treatment": ["Remove infected fruit and leaves", "Spray copper oxychloride (3 g/litre)"],
+        "prevention": ["Prune and destroy infected wood", "Keep canopy open"],
+        "severity": "moderate",
+    },
+    "leaf blight": {
+        "description": "Fungal leaf blight producing long lesions that merge and kill leaves.",
+        "symptoms": ["Long grey-green to tan lesions on leaves", "Large dead areas on leaves"],
+        "treatment": ["Spray Mancozeb (2.5 g/litre) or Propiconazole (1 ml/litre)"],
+        "prevention": ["Resistant hybrids and crop rotation", "Bury crop residue after harvest"],
+        "severity": "moderate",
+    },
+    "wilt": {
+        "description": "Soil-borne fungal or bacterial wilt blocking the plant's water vessels.",
+        "symptoms": ["Sudden drooping of leaves", "Brown discolouration inside the stem"],
+        "treatment": ["Uproot and destroy wilted plants",
+                      "Drench soil with Carbendazim (1 g/litre) around healthy plants"],
+        "prevention": ["Crop rotation", "Soil application of Trichoderma with FYM"],
+        "severity": "severe",
+    },
+}
+
+_HEALTHY_INFO = {
+    "description": "The leaf shows no visible signs of disease.",
+    "symptoms": [],
+    "treatment": ["No treatment needed"],
+    "prevention": ["Keep monitoring the crop weekly",
+                   "Follow balanced fertilisation and irrigation"],
+    "severity": "none",
+}
+
+_GENERAL_INFO = {
+    "description": "Signs of disease were detected on the leaf.",
+    "symptoms": [],
+    "treatment": ["Remove badly affected leaves",
+                  "Consult your nearest Krishi Vigyan Kendra (KVK) for a confirmed diagnosis"],
+    "prevention": ["Use certified seed and rotate crops", "Keep the field clean of crop residue"],
+    "severity": "moderate",
+}
+
+
+def _clean_label_part(text: str) -> str:
+    return re.sub(r"[_\s]+", " ", text).strip()
+
+
+def split_label(label: str) -> tuple:
+    """(crop, disease) of a label, e.g. Tomato___Early_blight → Tomato, Early blight."""
+    crop, _, disease = label.partition("___")
+    if not disease:
+        crop, disease = "", crop
+    return _clean_label_part(crop), _clean_label_part(disease)
+
+
+def _disease_info(disease: str) -> dict:
+    name = re.sub(r"[^a-z ]+", " ", disease.lower())
+    name = re.sub(r"\s+", " ", name).strip()
+    if "healthy" in name:
+        return _HEALTHY_INFO
+    matches = [key for key in DISEASE_INFO if key in name]
+    return DISEASE_INFO[max(matches, key=len)] if matches else _GENERAL_INFO
+
+
+# ─── Classifier ───────────────────────────────────────────────────────────
+class DiseaseClassifier:
+    """The trained model, loaded once on first use."""
+
+    def __init__(self, path: str = None):
+        self.path = path or _MODEL_PATH
+        self.forest = None
+        self.labels = []
+        self.crops = np.array([])
+        self.metrics = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.path):
+                logger.warning("Disease model not found at %s. "
+                               "Run: python scripts/train_disease_model.py", self.path)
+                return
+            try:
+                with open(self.path, "rb") as f:
+                    artifact = pickle.load(f)
+                if artifact.get("feature_version") != FEATURE_VERSION:
+                    logger.error("Disease model was trained on feature version %s (current %s); "
+                                 "retrain it", artifact.get("feature_version"), FEATURE_VERSION)
+                    return
+                self.forest = FlatForest.from_estimator(artifact["model"])
+                self.labels = list(artifact["labels"])
+                self.crops = np.array([split_label(l)[0].lower() for l in self.labels])
+                self.metrics = artifact.get("metrics", {})
+                logger.info("Disease model loaded: %d classes, %d trees, test accuracy %s",
+                            len(self.labels), self.forest.n_trees,
+                            self.metrics.get("test_accuracy", "N/A"))
+            except Exception as e:
+                logger.error("Failed to load disease model: %s", e)
+                self.forest = None
+
+    @property
+    def available(self) -> bool:
+        self._load()
+        return self.forest is not None
+
+    def classify(self, raw, crop_hint: str = "") -> dict:
+        """Classify one photo.
+
+        Args:
+            raw: Encoded image bytes.
+            crop_hint: If it names a crop the model knows, only that crop's
+                classes are considered.
+
+        Returns:
+            dict in the detect_disease schema with analysis_method
+            'offline_classifier', or an 'error' key.
+        """
+        if not self.available:
+            return {"error": "Offline disease model is not available."}
+        try:
+            features = extract_features(raw)
+        except Exception as e:
+            return {"error": f"Invalid image data: {e}"}
+
+        proba = self.forest.predict_proba(features)[0]
+        hint = (crop_hint or "").strip().lower()
+        if hint:
+            known = self.crops == hint
+            if known.any() and proba[known].sum() > 0:
+                proba = np.where(known, proba, 0.0)
+                proba = proba / proba.sum()
+
+        order = np.argsort(proba)[::-1]
+        best = int(order[0])
+        crop, disease = split_label(self.labels[best])
+        info = _disease_info(disease)
+        healthy = info is _HEALTHY_INFO
+
+        return {
+            "is_healthy": healthy,
+            "disease_name": "Healthy" if healthy else disease,
+            "confidence": round(float(proba[best]), 2),
+            "description": info["description"],
+            "symptoms": list(info["symptoms"]),
+            "treatment": list(info["treatment"]),
+            "prevention": list(info["prevention"]),
+            "severity": info["severity"],
+            "crop_identified": crop or crop_hint or "Unknown",
+            "alternatives": [
+                {"label": self.labels[i], "probability": round(float(proba[i]), 2)}
+                for i in order[1:4] if proba[i] > 0
+            ],
+            "analysis_method": "offline_classifier",
+        }
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> DiseaseClassifier:
+    """The process-wide classifier (model loaded on first classify)."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = DiseaseClassifier()
+    return _classifier
@@ -1,16 +1,21 @@
 """
 AgriScheme Backend — Crop Disease Detection Service.
 Uses Google Gemini Vision API to analyze plant images and detect
-diseases, providing treatment recommendations.
+diseases, providing treatment recommendations, or the offline
+colour/texture classifier in services/disease_classifier.py.
 
-Supports image analysis via base64-encoded images.
+Supports image analysis via base64-encoded images. Near-duplicates of
+earlier uploads (same crop hint and language) are answered from the
+perceptual-hash cache in services/disease_cache.py.
 """
 import os
-import base64
 import logging
 import requests
 from dotenv import load_dotenv
 
+from services.disease_cache import get_disease_cache, perceptual_hash
+from services.image_ingest import ImageError, ensure_payload
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -21,44 +26,87 @@ GEMINI_URL = (
     "gemini-2.5-flash:generateContent"
 )
 
-# Max image size: 4MB
-MAX_IMAGE_SIZE = 4 * 1024 * 1024
+# Choose disease analysis mode: "gemini" (default) | "offline" | "hybrid"
+# "gemini"  — uses Gemini Vision only (needs API key + network)
+# "offline" — uses the local classifier only (needs models/disease_model.pkl,
+#             see scripts/train_disease_model.py); advice is in English
+# "hybrid"  — tries offline first; falls back to Gemini on low confidence
+DISEASE_MODE = os.getenv("DISEASE_MODE", "gemini").lower()
+DISEASE_HYBRID_THRESHOLD = float(os.getenv("DISEASE_HYBRID_THRESHOLD", "0.60"))
 
 
-def detect_disease(image_base64: str, crop_hint: str = "",
+def detect_disease(image, crop_hint: str = "",
                    language: str = "en") -> dict:
     """Analyze a plant image to detect diseases.
 
+    Mode is controlled by DISEASE_MODE (see above). In 'offline' and
+    'hybrid' mode Gemini is also used when the offline model is missing
+    or cannot read the image, if an API key is configured.
+
     Args:
-        image_base64: Base64-encoded image data (JPEG/PNG).
+        image: ImagePayload or base64-encoded image data (JPEG/PNG).
         crop_hint: Optional crop name to improve accuracy.
         language: Language code for the response (en, hi, ta, ml).
 
     Returns:
         dict with disease info, or 'error' key on failure.
     """
-    if not GEMINI_API_KEY:
-        return {"error": "GEMINI_API_KEY is not configured on the server."}
-
-    if not image_base64:
-        return {"error": "No image provided."}
+    # Decoded and size-checked once; MIME type sniffed from header bytes
+    try:
+        image = ensure_payload(image)
+    except ImageError as e:
+        return {"error": str(e)}
 
-    # Validate base64 size
+    # Same photo (re-sent, re-compressed, resized) seen before → reuse result
     try:
-        raw_bytes = base64.b64decode(image_base64)
-        if len(raw_bytes) > MAX_IMAGE_SIZE:
-            return {"error": "Image too large. Maximum 4MB allowed."}
-    except Exception:
-        return {"error": "Invalid base64 image data."}
-
-    # Detect MIME type from header bytes
-    mime_type = "image/jpeg"
-    if raw_bytes[:8] == b'\x89PNG\r\n\x1a\n':
-        mime_type = "image/png"
-    elif raw_bytes[:2] == b'\xff\xd8':
-        mime_type = "image/jpeg"
-    elif raw_bytes[:4] == b'RIFF' and raw_bytes[8:12] == b'WEBP':
-        mime_type = "image/webp"
+        phash = perceptual_hash(image.raw)
+    except Exception as e:  # undecodable here; let Gemini judge the image
+        logger.debug("No perceptual hash for upload: %s", e)
+        phash = None
+    if phash is not None:
+        hit = get_disease_cache().lookup(phash, crop_hint, language)
+        if hit is not None:
+            distance, result = hit
+            logger.info("Disease detection cache hit (distance %d)", distance)
+            return {**result, "cached": True}
+
+    # --- Gemini-only mode ---
+    if DISEASE_MODE == "gemini":
+        return _detect_disease_gemini(image, crop_hint, language, phash)
+
+    # --- Offline classifier ---
+    from services.disease_classifier import get_classifier
+
+    offline_result = get_classifier().classify(image.raw, crop_hint)
+    if "error" in offline_result:
+        logger.warning("Offline disease detection failed: %s", offline_result["error"])
+        if GEMINI_API_KEY:
+            logger.info("Falling back to Gemini Vision")
+            return _detect_disease_gemini(image, crop_hint, language, phash)
+        return offline_result
+
+    # --- Hybrid mode: check confidence ---
+    if DISEASE_MODE == "hybrid":
+        confidence = offline_result.get("confidence", 0)
+        if confidence < DISEASE_HYBRID_THRESHOLD and GEMINI_API_KEY:
+            logger.info(
+                "Offline confidence %.2f < %.2f — upgrading to Gemini Vision",
+                confidence, DISEASE_HYBRID_THRESHOLD,
+            )
+            gemini_result = _detect_disease_gemini(image, crop_hint, language, phash)
+            if "error" not in gemini_result:
+                return gemini_result
+            # If Gemini also fails, return offline result anyway
+            logger.warning("Gemini fallback failed, using offline result")
+
+    return offline_result
+
+
+def _detect_disease_gemini(image, crop_hint: str, language: str,
+                           phash: int = None) -> dict:
+    """Gemini Vision detection; successful results are remembered under `phash`."""
+    if not GEMINI_API_KEY:
+        return {"error": "GEMINI_API_KEY is not configured on the server."}
 
     lang_map = {
         "en": "English",
@@ -96,8 +144,8 @@ If the image is not a plant or is unclear, still return the JSON with is_healthy
                     {"text": system_prompt},
                     {
                         "inline_data": {
-                            "mime_type": mime_type,
-                            "data": image_base64,
+                            "mime_type": image.mime_type,
+                            "data": image.base64,
                         }
                     },
                 ]
@@ -176,6 +224,8 @@ If the image is not a plant or is unclear, still return the JSON with is_healthy
         result.setdefault("severity", "unknown")
         result.setdefault("crop_identified", crop_hint or "Unknown")
 
+        if phash is not None:
+            get_disease_cache().add(phash, crop_hint, language, result)
         return result
 
     except Exception as e:
@@ -4,7 +4,10 @@ Provides step-by-step guidance on how to apply for common documents
 required by Indian government agricultural schemes.
 """
 
+import bisect
 import logging
+import math
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -518,46 +521,150 @@ def _normalize_doc_name(doc_name: str) -> str:
     return doc_name.strip().lower()
 
 
-def get_document_guide(document_name: str) -> dict:
-    """Get step-by-step guidance for obtaining a specific document.
-
-    Args:
-        document_name: Name of the document (e.g., 'Aadhaar Card', 'Land Records')
+# ---------------------------------------------------------------------------
+# Search index (built once at import)
+# ---------------------------------------------------------------------------
+# Lookups never scan DOCUMENT_GUIDES: a name is resolved by exact match,
+# then by scoring guides through their tokens — exact token, token prefix
+# (bisect over the sorted vocabulary) or a close misspelling (SymSpell-style
+# delete variants) — weighted by how rare the token is.
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_PREFIX_MIN = 3          # shortest query token used as a prefix
+_EXACT, _PREFIX, _FUZZY = 1.0, 0.8, 0.6
+
+
+def _tokens(text: str) -> list:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1]
+
+
+def _max_edits(token: str) -> int:
+    """Edit budget for fuzzy matching: 'adhar' → 'aadhaar' needs 2."""
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) == 4 else 2
+
+
+def _deletes(token: str, depth: int) -> set:
+    """All strings reachable from `token` by up to `depth` deletions."""
+    out = {token}
+    frontier = {token}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance (adjacent transpositions count 1)."""
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class _GuideIndex:
+    """Normalised names and tokens → canonical guide keys."""
+
+    def __init__(self, guides: dict):
+        self.exact = {}       # normalised key / display name → canonical key
+        self.postings = {}    # token → set of canonical keys
+        self.order = {}       # canonical key → position (stable tie-break)
+        self.deletes = {}     # delete variant → set of tokens
+
+        for key, guide in guides.items():
+            canonical = key
+            alias = guide.get("_alias")
+            if alias in guides:
+                canonical = alias
+            self.order.setdefault(canonical, len(self.order))
+
+            names = [key, guides[canonical].get("document_name", "")]
+            for name in names:
+                if name:
+                    self.exact.setdefault(_normalize_doc_name(name), canonical)
+                for token in _tokens(name):
+                    self.postings.setdefault(token, set()).add(canonical)
+
+        self.vocab = sorted(self.postings)
+        n_docs = len(self.order)
+        self.idf = {
+            t: math.log(1 + n_docs / len(keys)) for t, keys in self.postings.items()
+        }
+        for token in self.vocab:
+            for variant in _deletes(token, _max_edits(token)):
+                self.deletes.setdefault(variant, set()).add(token)
+
+    def _prefix_matches(self, token: str) -> list:
+        if len(token) < _PREFIX_MIN:
+            return []
+        lo = bisect.bisect_left(self.vocab, token)
+        hi = bisect.bisect_left(self.vocab, token + "\uffff")
+        return [t for t in self.vocab[lo:hi] if t != token]
+
+    def _fuzzy_matches(self, token: str) -> list:
+        budget = _max_edits(token)
+        if not budget:
+            return []
+        candidates = set()
+        for variant in _deletes(token, budget):
+            candidates |= self.deletes.get(variant, set())
+        return [
+            (t, d) for t in candidates
+            if t != token and (d := _edit_distance(token, t)) <= min(budget, _max_edits(t))
+        ]
 
-    Returns:
-        dict with guide information, or error dict if not found
+    def lookup(self, name: str) -> str | None:
+        normalized = _normalize_doc_name(name)
+        if normalized in self.exact:
+            return self.exact[normalized]
+
+        scores = {}
+        for token in set(_tokens(normalized)):
+            # Best weight this query token contributes to each guide
+            best = {}
+            matches = [(token, _EXACT)] if token in self.postings else []
+            if not matches:
+                matches = [(t, _PREFIX) for t in self._prefix_matches(token)]
+            if not matches:
+                matches = [(t, _FUZZY / d) for t, d in self._fuzzy_matches(token)]
+            for matched, weight in matches:
+                w = weight * self.idf[matched]
+                for key in self.postings[matched]:
+                    if w > best.get(key, 0):
+                        best[key] = w
+            for key, w in best.items():
+                scores[key] = scores.get(key, 0) + w
+
+        if not scores:
+            return None
+        return min(scores, key=lambda k: (-scores[k], self.order[k]))
+
+
+_INDEX = _GuideIndex(DOCUMENT_GUIDES)
+
+
+def resolve_document_key(document_name: str) -> str | None:
+    """Map a user-supplied document name to its DOCUMENT_GUIDES key.
+
+    Tries an exact name match, then token, prefix and misspelling matches
+    through the prebuilt index; aliases are already resolved. Returns None
+    if no guide matches.
     """
-    normalized = _normalize_doc_name(document_name)
-
-    # Direct match
-    guide = DOCUMENT_GUIDES.get(normalized)
-
-    # If not found, try partial matching
-    if guide is None:
-        for key, value in DOCUMENT_GUIDES.items():
-            if normalized in key or key in normalized:
-                guide = value
-                break
-
-    # If still not found, try word-based matching
-    if guide is None:
-        words = normalized.split()
-        for key, value in DOCUMENT_GUIDES.items():
-            if any(word in key for word in words if len(word) > 3):
-                guide = value
-                break
-
-    if guide is None:
-        return {
-            "error": f"No application guide available for '{document_name}'. Please visit your nearest Common Service Centre (CSC) or government office for assistance."
-        }
+    return _INDEX.lookup(document_name)
 
-    # Resolve alias
-    if "_alias" in guide:
-        guide = DOCUMENT_GUIDES.get(guide["_alias"], guide)
 
+def format_guide(key: str) -> dict:
+    """Public response shape of the guide stored under `key`."""
+    guide = DOCUMENT_GUIDES[key]
     return {
-        "document_name": guide.get("document_name", document_name),
+        "document_name": guide.get("document_name", key),
         "description": guide.get("description", ""),
         "issuing_authority": guide.get("issuing_authority", ""),
         "estimated_time": guide.get("estimated_time", ""),
@@ -569,6 +676,43 @@ def get_document_guide(document_name: str) -> dict:
     }
 
 
+def get_document_guide(document_name: str) -> dict:
+    """Get step-by-step guidance for obtaining a specific document.
+
+    Args:
+        document_name: Name of the document (e.g., 'Aadhaar Card', 'Land Records')
+
+    Returns:
+        dict with guide information, or error dict if not found
+    """
+    key = resolve_document_key(document_name)
+    if key is None:
+        return {
+            "error": f"No application guide available for '{document_name}'. Please visit your nearest Common Service Centre (CSC) or government office for assistance."
+        }
+    return format_guide(key)
+
+
+def resolve_documents(document_names: list) -> dict:
+    """Resolve several document names at once, one guide per distinct key.
+
+    Returns:
+        dict with:
+          documents  — [{"document": name, "guide_key": key or None}] in input order
+          guides     — {guide_key: guide} (shared guides appear once)
+          unresolved — names without a guide
+    """
+    documents, guides, unresolved = [], {}, []
+    for name in document_names:
+        key = resolve_document_key(name)
+        documents.append({"document": name, "guide_key": key})
+        if key is None:
+            unresolved.append(name)
+        elif key not in guides:
+            guides[key] = format_guide(key)
+    return {"documents": documents, "guides": guides, "unresolved": unresolved}
+
+
 def get_all_supported_documents() -> list:
     """Return a list of all documents for which guides are available."""
     names = set()
@@ -1,26 +1,38 @@
 """
 AgriScheme Backend — Market Price Forecasting Service.
-Uses Facebook Prophet for time-series forecasting of crop market prices.
 Generates synthetic historical data from base MSP prices and forecasts
 7 days ahead to help farmers identify the best selling window.
 
-Falls back to simple statistical forecasting if Prophet is unavailable.
+The synthetic history is one (crops × days) NumPy matrix whose noise is
+a hash of the calendar date and crop, cached per day and shared with the
+market price service; the Holt-Winters forecast for all crops is cached
+alongside it.
+
+Forecasting methods (FORECAST_METHOD env var):
+  - holt_winters (default): additive Holt-Winters with weekly seasonality,
+    implemented in NumPy. All crops are fitted together as one
+    (crops × days) matrix, with smoothing parameters picked per crop from a
+    small grid by one-step-ahead SSE.
+  - prophet: Facebook Prophet, fitted per request. Kept for offline
+    accuracy comparisons; falls back to holt_winters if not installed.
+  - statistical: moving average + linear trend.
 """
 import logging
-import math
-import random
-from datetime import datetime, timedelta
+import os
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from services import market_history
 
 logger = logging.getLogger(__name__)
 
-# Try importing Prophet; fall back gracefully
-try:
-    from prophet import Prophet
-    PROPHET_AVAILABLE = True
-    logger.info("Prophet is available for forecasting.")
-except ImportError:
-    PROPHET_AVAILABLE = False
-    logger.warning("Prophet not installed. Using statistical fallback for forecasting.")
+FORECAST_METHOD = os.getenv("FORECAST_METHOD", "holt_winters").strip().lower()
+_METHODS = ("holt_winters", "prophet", "statistical")
+
+# Prophet is slow to import; load it only when the prophet method is used
+_prophet_cls = None
 
 # Base prices (same as market_service.py)
 _BASE_PRICES = {
@@ -48,53 +60,129 @@ _BASE_PRICES = {
     "Pulses":     7400,
     "Sunflower":  7280,
     "Spices":     32000,
+    "Vegetables": 2500,
+    "Fruits":     4500,
+    "Oilseeds":   5650,
 }
 
 
-def _generate_historical_prices(base_price: float, days: int = 60) -> list:
-    """Generate synthetic but realistic historical daily prices.
+# ---------------------------------------------------------------------------
+# Synthetic price history
+# ---------------------------------------------------------------------------
+_CROPS = list(_BASE_PRICES)
+_CROP_INDEX = {crop: i for i, crop in enumerate(_CROPS)}
+_BASE_VECTOR = np.array([_BASE_PRICES[c] for c in _CROPS], dtype=np.float64)
+
+
+# Per-crop drift amplitude; the drift itself follows the calendar
+_TREND_SEED = 2024
+_TREND_PERIOD = 180  # days
+_TREND = np.random.default_rng(_TREND_SEED).uniform(-0.03, 0.03, size=(len(_CROPS), 1))
+
+
+# SplitMix64 constants: a counter-based hash, so each (date, crop) cell's
+# noise is computed independently of the window around it
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _date_noise(ordinals: np.ndarray) -> np.ndarray:
+    """Noise (±2%) as a (crops × days) matrix, a pure function of (date, crop)."""
+    crops = np.arange(len(_CROPS), dtype=np.uint64)[:, None]
+    z = ordinals.astype(np.uint64)[None, :] * np.uint64(len(_CROPS)) + crops
+    z = z * _GOLDEN  # uint64 arithmetic wraps, as the hash expects
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    z ^= z >> np.uint64(31)
+    unit = (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53  # [0, 1)
+    return unit * 0.04 - 0.02
+
+
+@lru_cache(maxsize=8)
+def _history_matrix(as_of: date, days: int):
+    """Synthetic daily prices for every crop, cached per (day, window).
 
-    Creates a time series with:
+    Creates a (crops × days) matrix covering the `days` days before
+    `as_of` with:
     - Weekly seasonality (±3%)
     - Random daily noise (±2%)
-    - Slow trend drift (±5% over period)
+    - Slow trend drift (±3%, over a 180-day cycle)
+
+    Every component depends only on the crop and the calendar date (the
+    noise is a hash of the date ordinal and crop index), so a date has the
+    same price in every window, on every day and in every worker process.
+
+    Returns:
+        (dates, prices) — list of YYYY-MM-DD strings and a read-only array.
     """
-    import pandas as pd
+    ordinals = np.arange(as_of.toordinal() - days, as_of.toordinal())
+    noise = _date_noise(ordinals)
+
+    day_of_week = (ordinals - 1) % 7  # date.fromordinal(1) is a Monday
+    trend_factor = 1 + _TREND * np.sin(2 * np.pi * ordinals / _TREND_PERIOD)
+    weekly_factor = 1 + 0.03 * np.sin(2 * np.pi * day_of_week / 7)
 
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
+    prices = np.round(_BASE_VECTOR[:, None] * trend_factor * weekly_factor * (1 + noise))
+    prices.flags.writeable = False
+    dates = [date.fromordinal(int(o)).strftime("%Y-%m-%d") for o in ordinals]
+    return dates, prices
 
-    history = []
-    trend = random.uniform(-0.03, 0.03)  # Overall trend
 
-    for i in range(days):
-        date = start_date + timedelta(days=i)
+def get_price_history(days: int = 60):
+    """Today's synthetic price history for all crops.
 
-        # Trend component
-        trend_factor = 1 + (trend * i / days)
+    Shared by the forecast, market and alert endpoints so they agree on
+    the same numbers.
 
-        # Weekly seasonality (markets are busier mid-week)
-        day_of_week = date.weekday()
-        weekly_factor = 1 + 0.03 * math.sin(2 * math.pi * day_of_week / 7)
+    Returns:
+        (crops, dates, prices) where prices has shape (len(crops), days).
+    """
+    dates, prices = _history_matrix(date.today(), days)
+    return _CROPS, dates, prices
 
-        # Random noise
-        random.seed(date.year * 10000 + date.month * 100 + date.day + hash(str(base_price)) % 1000)
-        noise = random.uniform(-0.02, 0.02)
-        random.seed()
 
-        price = base_price * trend_factor * weekly_factor * (1 + noise)
-        history.append({
-            "ds": date.strftime("%Y-%m-%d"),
-            "y": round(price, 0),
-        })
+def _crop_history(crop: str, days: int = 60) -> list:
+    """One crop's history as [{"ds": YYYY-MM-DD, "y": price}, ...]."""
+    _, dates, prices = get_price_history(days)
+    row = prices[_CROP_INDEX[crop]]
+    return [{"ds": d, "y": float(y)} for d, y in zip(dates, row)]
+
+
+def _real_history(crop: str, state: str = None, days: int = 60) -> list:
+    """Stored AGMARKNET history for a crop, [] if under two weeks of data."""
+    # Imported here: market_service imports this module at load time
+    from services.market_service import _CROP_TO_COMMODITY
+
+    commodity = _CROP_TO_COMMODITY.get(crop, crop)
+    try:
+        return market_history.get_price_series(
+            commodity, state, days, min_days=2 * _SEASON_LENGTH,
+        )
+    except Exception as e:
+        logger.warning("Market history unavailable for %s: %s", crop, e)
+        return []
 
-    return history
+
+def _get_prophet():
+    """Return the Prophet class, or None if it is not installed."""
+    global _prophet_cls
+    if _prophet_cls is None:
+        try:
+            from prophet import Prophet
+            _prophet_cls = Prophet
+        except ImportError:
+            logger.warning("Prophet not installed. Using Holt-Winters forecasting.")
+            _prophet_cls = False
+    return _prophet_cls or None
 
 
 def _forecast_with_prophet(history: list, periods: int = 7) -> list:
     """Forecast using Facebook Prophet."""
     import pandas as pd
 
+    Prophet = _get_prophet()
+
     df = pd.DataFrame(history)
     df["ds"] = pd.to_datetime(df["ds"])
 
@@ -167,14 +255,125 @@ def _forecast_simple(history: list, periods: int = 7) -> list:
     return results
 
 
+# ---------------------------------------------------------------------------
+# Holt-Winters (additive trend + additive weekly seasonality)
+# ---------------------------------------------------------------------------
+_SEASON_LENGTH = 7
+_HW_ALPHAS = (0.1, 0.3, 0.5, 0.8)   # level
+_HW_BETAS = (0.0, 0.05, 0.15)       # trend
+_HW_GAMMAS = (0.05, 0.2, 0.4)       # seasonality
+_INTERVAL_Z = 1.2816  # 80% interval, same width as Prophet's default
+
+
+def _holt_winters_fit(Y: np.ndarray) -> dict:
+    """Fit additive Holt-Winters to every row of Y at once.
+
+    Each row is one series of daily prices. The recursion is run for all
+    rows × all grid parameter combinations together, and each row keeps
+    the combination with the lowest one-step-ahead squared error.
+
+    Args:
+        Y: Array of shape (n_series, n_days), n_days >= 2 * 7.
+
+    Returns:
+        dict of per-series arrays: level, trend, season (n_series, 7),
+        sigma (one-step residual std) and the chosen alpha/beta/gamma.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    n_series, n_days = Y.shape
+    m = _SEASON_LENGTH
+    if n_days < 2 * m:
+        raise ValueError(f"Holt-Winters needs at least {2 * m} days of history")
+
+    grid = np.array(
+        [(a, b, g) for a in _HW_ALPHAS for b in _HW_BETAS for g in _HW_GAMMAS]
+    )
+    alpha, beta, gamma = (grid[:, i, None] for i in range(3))  # (G, 1)
+    n_grid = len(grid)
+
+    # Initial state from the first two seasons, shared by every grid point
+    first = Y[:, :m].mean(axis=1)
+    second = Y[:, m:2 * m].mean(axis=1)
+    level = np.broadcast_to(first, (n_grid, n_series)).copy()
+    trend = np.broadcast_to((second - first) / m, (n_grid, n_series)).copy()
+    season = np.broadcast_to(Y[:, :m] - first[:, None],
+                             (n_grid, n_series, m)).copy()
+    sse = np.zeros((n_grid, n_series))
+
+    for t in range(m, n_days):
+        y = Y[:, t]
+        s = season[:, :, t % m]
+        err = y - (level + trend + s)
+        sse += err * err
+        new_level = alpha * (y - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, :, t % m] = gamma * (y - new_level) + (1 - gamma) * s
+        level = new_level
+
+    best = sse.argmin(axis=0)
+    cols = np.arange(n_series)
+    return {
+        "level": level[best, cols],
+        "trend": trend[best, cols],
+        "season": season[best, cols],
+        "sigma": np.sqrt(sse[best, cols] / (n_days - m)),
+        "alpha": grid[best, 0],
+        "beta": grid[best, 1],
+        "gamma": grid[best, 2],
+        "n_days": n_days,
+    }
+
+
+def _holt_winters_predict(fit: dict, periods: int = 7):
+    """Point forecasts and 80% bounds, each of shape (n_series, periods)."""
+    h = np.arange(1, periods + 1)
+    season_idx = (fit["n_days"] - 1 + h) % _SEASON_LENGTH
+    yhat = (fit["level"][:, None] + fit["trend"][:, None] * h
+            + fit["season"][:, season_idx])
+    margin = _INTERVAL_Z * fit["sigma"][:, None] * np.sqrt(h)
+    return yhat, yhat - margin, yhat + margin
+
+
+def _forecast_rows(last_date: str, yhat, lower, upper) -> list:
+    """Format one series' forecast arrays in the response schema."""
+    start = datetime.strptime(last_date, "%Y-%m-%d")
+    return [
+        {
+            "date": (start + timedelta(days=d + 1)).strftime("%Y-%m-%d"),
+            "predicted_price": round(float(yhat[d]), 0),
+            "lower_bound": round(float(lower[d]), 0),
+            "upper_bound": round(float(upper[d]), 0),
+        }
+        for d in range(len(yhat))
+    ]
+
+
+@lru_cache(maxsize=8)
+def _forecast_holt_winters(as_of: date, days: int, periods: int = 7) -> dict:
+    """Forecast every crop from the day's history in one fit (cached per day)."""
+    dates, prices = _history_matrix(as_of, days)
+    yhat, lower, upper = _holt_winters_predict(_holt_winters_fit(prices), periods)
+    return {
+        crop: _forecast_rows(dates[-1], yhat[i], lower[i], upper[i])
+        for i, crop in enumerate(_CROPS)
+    }
+
+
 def get_price_forecast(crop: str, days_history: int = 60,
-                       forecast_days: int = 7) -> dict:
+                       forecast_days: int = 7, method: str = None,
+                       state: str = None) -> dict:
     """Get price forecast for a crop.
 
+    Uses stored AGMARKNET history (services/market_history.py) when at
+    least two weeks of it exist for the crop, else the synthetic history.
+
     Args:
         crop: Crop name (must be in _BASE_PRICES).
-        days_history: Number of historical days to generate.
+        days_history: Number of historical days to use.
         forecast_days: Number of days to forecast.
+        method: holt_winters | prophet | statistical
+            (default: FORECAST_METHOD env var).
+        state: Optional state for stored history (all-India by default).
 
     Returns:
         dict with historical prices, forecast, and metadata.
@@ -182,19 +381,34 @@ def get_price_forecast(crop: str, days_history: int = 60,
     if crop not in _BASE_PRICES:
         return {"error": f"Unknown crop: {crop}. Available: {list(_BASE_PRICES.keys())}"}
 
+    method = (method or FORECAST_METHOD).lower()
+    if method not in _METHODS:
+        return {"error": f"Unknown forecast method: {method}. Available: {list(_METHODS)}"}
+    if method == "prophet" and _get_prophet() is None:
+        method = "holt_winters"
+    if method == "holt_winters" and days_history < 2 * _SEASON_LENGTH:
+        method = "statistical"
+
     base_price = _BASE_PRICES[crop]
 
     try:
-        # Generate historical data
-        history = _generate_historical_prices(base_price, days_history)
+        history = _real_history(crop, state, days_history)
+        history_source = "agmarknet" if history else "synthetic"
+        if not history:
+            history = _crop_history(crop, days_history)
 
         # Forecast
-        if PROPHET_AVAILABLE:
+        if method == "holt_winters" and history_source == "agmarknet":
+            fit = _holt_winters_fit(np.array([[h["y"] for h in history]]))
+            yhat, lower, upper = _holt_winters_predict(fit, forecast_days)
+            forecast = _forecast_rows(history[-1]["ds"], yhat[0], lower[0], upper[0])
+        elif method == "holt_winters":
+            cached = _forecast_holt_winters(date.today(), days_history, forecast_days)
+            forecast = [dict(row) for row in cached[crop]]
+        elif method == "prophet":
             forecast = _forecast_with_prophet(history, forecast_days)
-            method = "prophet"
         else:
             forecast = _forecast_simple(history, forecast_days)
-            method = "statistical"
 
         # Calculate trend
         first_price = history[0]["y"]
@@ -209,6 +423,7 @@ def get_price_forecast(crop: str, days_history: int = 60,
             "base_msp": base_price,
             "unit": "₹/quintal",
             "method": method,
+            "history_source": history_source,
             "historical": history[-14:],  # Last 14 days only for response
             "forecast": forecast,
             "trend_pct": trend_pct,
@@ -0,0 +1,142 @@
+"""
+AgriScheme Backend — Flattened Forest Inference Engine.
+
+Evaluates a trained scikit-learn RandomForestRegressor (or
+RandomForestClassifier) with plain NumPy.
+The `tree_` arrays of every estimator are concatenated into flat node
+tables, and all trees × all rows are walked together one depth level at a
+time, so a prediction costs ~max_depth vectorised gathers instead of one
+Python-level `tree.predict()` call per tree.
+
+A single call returns the forest mean plus any quantiles of the per-tree
+predictions (used for the yield confidence interval). For classifiers each
+leaf holds the class distribution and predict_proba() averages them, as
+sklearn does.
+
+Usage:
+    engine = FlatForest.from_estimator(model)
+    mean, (p10, p90) = engine.predict_quantiles(X, (0.10, 0.90))
+    proba = FlatForest.from_estimator(classifier).predict_proba(X)
+"""
+import numpy as np
+
+_TREE_LEAF = -1  # sklearn.tree._tree.TREE_LEAF
+
+
+class FlatForest:
+    """All trees of a fitted forest packed into contiguous node arrays.
+
+    Leaves point to themselves on both sides, so rows that reach a leaf
+    early simply stay put while deeper trees keep descending.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots,
+                 max_depth: int, n_features: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_estimator(cls, model) -> "FlatForest":
+        """Build the engine from a fitted RandomForestRegressor/Classifier."""
+        estimators = getattr(model, "estimators_", None)
+        if not estimators:
+            raise ValueError("Model has no fitted estimators_")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for est in estimators:
+            tree = est.tree_
+            n_nodes = tree.node_count
+            local_ids = np.arange(n_nodes, dtype=np.intp)
+            is_leaf = tree.children_left == _TREE_LEAF
+
+            left = np.where(is_leaf, local_ids, tree.children_left) + offset
+            right = np.where(is_leaf, local_ids, tree.children_right) + offset
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(left.astype(np.intp))
+            rights.append(right.astype(np.intp))
+            if hasattr(model, "classes_"):
+                # Leaf class distributions (counts in older sklearn → normalise)
+                dist = tree.value[:, 0, :].astype(np.float64)
+                values.append(dist / np.maximum(dist.sum(axis=1, keepdims=True), 1e-12))
+            else:
+                values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, int(tree.max_depth))
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            n_features=int(model.n_features_in_),
+        )
+
+    def predict_trees(self, X) -> np.ndarray:
+        """Return per-tree predictions with shape (n_trees, n_rows).
+
+        For a classifier: (n_trees, n_rows, n_classes) leaf distributions.
+        """
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X has {X.shape[1]} features, forest expects {self.n_features}"
+            )
+
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows, dtype=np.intp)
+        nodes = np.repeat(self.roots[:, None], n_rows, axis=1)
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            nodes = np.where(
+                x <= self.threshold[nodes], self.left[nodes], self.right[nodes]
+            )
+
+        return self.value[nodes]
+
+    def predict(self, X) -> np.ndarray:
+        """Forest mean prediction, equivalent to `model.predict(X)`."""
+        return self.predict_trees(X).mean(axis=0)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities (n_rows, n_classes), equivalent to
+        `classifier.predict_proba(X)` (columns in `classifier.classes_` order)."""
+        return self.predict_trees(X).mean(axis=0)
+
+    def predict_quantiles(self, X, quantiles=(0.10, 0.90)):
+        """Forest mean plus quantiles of the per-tree predictions.
+
+        Args:
+            X: Feature matrix (n_rows, n_features) or a single row.
+            quantiles: Iterable of quantiles in [0, 1].
+
+        Returns:
+            (mean, q) where mean has shape (n_rows,) and q has shape
+            (len(quantiles), n_rows).
+        """
+        per_tree = self.predict_trees(X)
+        q = np.quantile(per_tree, np.asarray(quantiles, dtype=np.float64), axis=0)
+        return per_tree.mean(axis=0), q
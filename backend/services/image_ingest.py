@@ -0,0 +1,134 @@
+"""
+AgriScheme Backend — Shared image ingestion for soil and disease uploads.
+
+An upload is decoded from base64 exactly once into an ImagePayload, which
+carries the raw bytes, the sniffed MIME type and the original base64 text
+(for Gemini's inline_data) through the whole request. Pixel access goes
+through open_reduced(): for JPEG, Pillow's draft() makes libjpeg scale by
+1/2–1/8 in the DCT domain, so a full-resolution bitmap is never built,
+and the remaining downscale uses a cheap box filter — the colour
+statistics the analyzers compute are averages anyway.
+
+Binary uploads (multipart file or raw request body) are read with
+ImagePayload.from_stream(): chunked, failing as soon as the 4 MB limit is
+crossed, into one buffer that the payload exposes as a memoryview — no
+base64 round trip and no extra copy of the bytes.
+
+Usage:
+    payload = ImagePayload.from_base64(image_b64)   # raises ImageError
+    payload = ImagePayload.from_stream(request.stream)
+    img = open_reduced(payload.raw, 256)            # RGB, longest side ≤ 256
+"""
+
+import base64
+import binascii
+import io
+
+from PIL import Image
+
+# Max image size: 4MB
+MAX_IMAGE_SIZE = 4 * 1024 * 1024
+_READ_CHUNK = 64 * 1024
+
+
+class ImageError(ValueError):
+    """Upload rejected; the message is safe to return to the client."""
+
+
+def sniff_mime_type(raw: bytes) -> str:
+    """MIME type from magic bytes (JPEG when unknown)."""
+    if raw[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if raw[:4] == b"RIFF" and raw[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+
+def read_limited(stream, limit: int = None) -> memoryview:
+    """Read a binary stream to the end, failing once it exceeds `limit` bytes."""
+    limit = limit or MAX_IMAGE_SIZE
+    buf = bytearray()
+    while True:
+        chunk = stream.read(_READ_CHUNK)
+        if not chunk:
+            break
+        if len(buf) + len(chunk) > limit:
+            raise ImageError("Image too large. Maximum 4MB allowed.")
+        buf += chunk
+    return memoryview(buf)
+
+
+class ImagePayload:
+    """One uploaded image: raw bytes, MIME type, base64 text on demand.
+
+    `raw` is bytes, or a memoryview for streamed uploads.
+    """
+
+    __slots__ = ("raw", "mime_type", "_base64")
+
+    def __init__(self, raw, mime_type: str = None, base64_text: str = None):
+        if not raw:
+            raise ImageError("No image provided.")
+        if len(raw) > MAX_IMAGE_SIZE:
+            raise ImageError("Image too large. Maximum 4MB allowed.")
+        self.raw = raw
+        self.mime_type = mime_type or sniff_mime_type(raw)
+        self._base64 = base64_text
+
+    @classmethod
+    def from_base64(cls, image_base64: str) -> "ImagePayload":
+        if not image_base64:
+            raise ImageError("No image provided.")
+        try:
+            raw = base64.b64decode(image_base64)
+        except (binascii.Error, ValueError, TypeError):
+            raise ImageError("Invalid base64 image data.") from None
+        return cls(raw, base64_text=image_base64)
+
+    @classmethod
+    def from_stream(cls, stream) -> "ImagePayload":
+        """Binary upload body (file-like), limit enforced while reading."""
+        return cls(read_limited(stream))
+
+    @property
+    def base64(self) -> str:
+        """Base64 text for JSON APIs; the upload's own text when it came as base64."""
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.raw).decode("ascii")
+        return self._base64
+
+
+def ensure_payload(image) -> ImagePayload:
+    """Accept an ImagePayload, raw bytes or a base64 string."""
+    if isinstance(image, ImagePayload):
+        return image
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return ImagePayload(image)
+    return ImagePayload.from_base64(image)
+
+
+def open_reduced(raw, max_side: int, box: float = None) -> Image.Image:
+    """Decode to RGB at reduced resolution.
+
+    Args:
+        raw: Encoded image bytes (or memoryview).
+        max_side: Target longest side (an upper bound; smaller images are
+            not enlarged).
+        box: Optional center fraction (e.g. 0.5) to crop before resizing.
+            The result is then exactly max_side × max_side.
+    """
+    img = Image.open(io.BytesIO(raw))
+    # Decode at least as large as the region we keep (JPEG only; no-op elsewhere)
+    draft_side = max_side if box is None else int(max_side / box)
+    img.draft("RGB", (draft_side, draft_side))
+    img = img.convert("RGB")
+    if box is None:
+        img.thumbnail((max_side, max_side), Image.BOX)
+        return img
+    w, h = img.size
+    margin_w = int(w * (1 - box) / 2)
+    margin_h = int(h * (1 - box) / 2)
+    return img.resize(
+        (max_side, max_side), Image.BOX,
+        box=(margin_w, margin_h, w - margin_w, h - margin_h),
+    )
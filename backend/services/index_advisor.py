@@ -0,0 +1,164 @@
+"""
+AgriScheme Backend — Index advisor for the schemes collection.
+
+Derives compound indexes from the hot queries the app actually sends
+(built by services/scheme_queries.py) using the ESR rule:
+
+  1. Equality fields  (scalar / $eq / $in)
+  2. Sort fields      (in sort order and direction)
+  3. Range fields     ($lt / $lte / $gt / $gte)
+
+`states` and `crops` are arrays, and MongoDB cannot put two array fields in
+one compound index ("cannot index parallel arrays"), so only the first of
+them in the query is keyed; the other is applied as a fetch filter, as are
+$or clauses (the season clause includes `$exists: false`, which no index
+bound can answer on its own).
+
+`apply_indexes` creates the recommended indexes and drops the single-field
+indexes they replace — left in place, the planner may still pick
+`states_1` and sort in memory. `explain_problems` runs a hot query's
+explain plan and reports COLLSCAN or blocking SORT stages.
+"""
+
+import logging
+from collections import namedtuple
+
+from pymongo import ASCENDING
+
+from services.scheme_queries import (
+    BENEFIT_SORT,
+    eligibility_query,
+    listing_query,
+    state_schemes_query,
+)
+
+logger = logging.getLogger(__name__)
+
+QueryShape = namedtuple("QueryShape", "name filter sort")
+
+ARRAY_FIELDS = frozenset({"states", "crops"})
+
+_EQUALITY_OPS = frozenset({"$eq", "$in"})
+_RANGE_OPS = frozenset({"$lt", "$lte", "$gt", "$gte"})
+
+# Stages that mean a hot query is not served by an index
+BAD_STAGES = frozenset({"COLLSCAN", "SORT"})
+
+# Single-field indexes created by earlier versions of init_indexes
+LEGACY_INDEXES = ("states_1", "crops_1", "min_land_1", "max_land_1", "season_1", "type_1")
+
+
+def hot_queries() -> list:
+    """The query shapes the app sends, built with representative values."""
+    return [
+        QueryShape("eligibility", eligibility_query("Punjab", "Wheat", 2.0, "Rabi"), BENEFIT_SORT),
+        QueryShape("eligibility_any_season", eligibility_query("Punjab", "Wheat", 2.0), BENEFIT_SORT),
+        QueryShape("listing", listing_query(), BENEFIT_SORT),
+        QueryShape("listing_by_type", listing_query("Subsidy"), BENEFIT_SORT),
+        QueryShape("crop_recommender", state_schemes_query("Punjab", "Kharif"), None),
+        # services/scheme_sync.py: stored hashes and per-scheme upserts
+        QueryShape("scheme_sync", {"scheme_name": {"$in": ["PM-KISAN"]}}, None),
+    ]
+
+
+def classify(query: dict) -> tuple:
+    """Split a filter's fields into (equality, range, residual) lists, in query order."""
+    equality, ranges, residual = [], [], []
+    for field, cond in query.items():
+        if field.startswith("$"):
+            residual.append(field)
+        elif not isinstance(cond, dict) or set(cond) <= _EQUALITY_OPS:
+            equality.append(field)
+        elif set(cond) <= _RANGE_OPS:
+            ranges.append(field)
+        else:
+            residual.append(field)
+    return equality, ranges, residual
+
+
+def recommend_index(shape: QueryShape) -> list:
+    """ESR-ordered index keys for one query shape ([] when none helps)."""
+    equality, ranges, _ = classify(shape.filter)
+    keys, has_array = [], False
+
+    def add(field, direction):
+        nonlocal has_array
+        if any(field == k for k, _ in keys):
+            return
+        if field in ARRAY_FIELDS:
+            if has_array:
+                return
+            has_array = True
+        keys.append((field, direction))
+
+    for field in equality:
+        add(field, ASCENDING)
+    for field, direction in shape.sort or ():
+        add(field, direction)
+    for field in ranges:
+        add(field, ASCENDING)
+    return keys
+
+
+def recommended_indexes(shapes=None) -> list:
+    """Indexes covering every shape, without duplicates or prefixes of one another."""
+    candidates = []
+    for shape in hot_queries() if shapes is None else shapes:
+        keys = recommend_index(shape)
+        if keys and keys not in candidates:
+            candidates.append(keys)
+    return [keys for keys in candidates
+            if not any(other != keys and other[:len(keys)] == keys for other in candidates)]
+
+
+def index_name(keys: list) -> str:
+    """MongoDB's default name for an index (e.g. "states_1_benefit_amount_-1")."""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def apply_indexes(collection) -> list:
+    """Create the recommended indexes and drop the legacy ones they replace."""
+    names = [collection.create_index(keys) for keys in recommended_indexes()]
+    existing = collection.index_information()
+    for name in LEGACY_INDEXES:
+        if name in existing and name not in names:
+            collection.drop_index(name)
+            logger.info("Dropped superseded index %s", name)
+    return names
+
+
+def plan_stages(explain: dict) -> list:
+    """Every stage name in the winning plan of an explain() result."""
+    stages = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if isinstance(node.get("stage"), str):
+                stages.append(node["stage"])
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(explain.get("queryPlanner", {}).get("winningPlan", {}))
+    return stages
+
+
+def explain_problems(collection, shape: QueryShape, limit: int = 20) -> list:
+    """COLLSCAN / in-memory SORT stages in the winning plan of a hot query."""
+    cursor = collection.find(shape.filter)
+    if shape.sort:
+        cursor = cursor.sort(shape.sort)
+    stages = plan_stages(cursor.limit(limit).explain())
+    return sorted(BAD_STAGES.intersection(stages))
+
+
+def check_hot_queries(collection, shapes=None) -> dict:
+    """{query name: bad stages} for every hot query that is not index-served."""
+    report = {}
+    for shape in hot_queries() if shapes is None else shapes:
+        problems = explain_problems(collection, shape)
+        if problems:
+            report[shape.name] = problems
+    return report
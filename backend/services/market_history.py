@@ -0,0 +1,193 @@
+"""
+AgriScheme Backend — Market Price History Store.
+
+Append-only daily store of AGMARKNET mandi records in a local SQLite file,
+so forecasting and trends can read real price history with one range scan
+instead of re-downloading or synthesising it.
+
+Layout:
+  market_prices — one row per (commodity, state, market, arrival_date,
+  variety), keyed by that tuple (WITHOUT ROWID, so the primary key is the
+  clustered time-series index). Secondary indexes on
+  (commodity, state, arrival_date) and (commodity, arrival_date) make the
+  per-state and all-India date-range reads single index range scans.
+  Re-fetching the same day replaces the row.
+
+Env vars:
+  MARKET_HISTORY_DB — path to the SQLite file
+                      (default: data/market_history.sqlite3)
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DB_PATH = os.getenv(
+    "MARKET_HISTORY_DB",
+    os.path.join(_BACKEND_DIR, "data", "market_history.sqlite3"),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS market_prices (
+    commodity    TEXT NOT NULL,
+    state        TEXT NOT NULL,
+    market       TEXT NOT NULL,
+    arrival_date TEXT NOT NULL,  -- ISO YYYY-MM-DD
+    variety      TEXT NOT NULL DEFAULT '',
+    district     TEXT,
+    grade        TEXT,
+    min_price    REAL,
+    max_price    REAL,
+    modal_price  REAL NOT NULL,
+    fetched_at   REAL NOT NULL,
+    PRIMARY KEY (commodity, state, market, arrival_date, variety)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_market_prices_commodity_state_date
+    ON market_prices (commodity, state, arrival_date);
+CREATE INDEX IF NOT EXISTS idx_market_prices_commodity_date
+    ON market_prices (commodity, arrival_date);
+"""
+
+_INSERT = """
+INSERT OR REPLACE INTO market_prices (
+    commodity, state, market, arrival_date, variety,
+    district, grade, min_price, max_price, modal_price, fetched_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_initialized = set()
+
+
+def _connect(path: str = None) -> sqlite3.Connection:
+    """Open a connection, creating the schema on first use of a path."""
+    path = path or _DB_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _initialized.add(path)
+    return conn
+
+
+def _parse_date(value: str) -> str | None:
+    """AGMARKNET dd/mm/yyyy (or ISO) → YYYY-MM-DD, None if unparseable."""
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime("%Y-%m-%d")
+        except (ValueError, AttributeError):
+            continue
+    return None
+
+
+def _to_row(rec: dict, fetched_at: float) -> tuple | None:
+    """Normalise one API record into an insert tuple, None if unusable."""
+    try:
+        modal = float(rec.get("modal_price", 0))
+        min_p = float(rec.get("min_price", 0) or 0)
+        max_p = float(rec.get("max_price", 0) or 0)
+    except (ValueError, TypeError):
+        return None
+    arrival = _parse_date(rec.get("arrival_date", ""))
+    commodity = (rec.get("commodity") or "").strip()
+    state = (rec.get("state") or "").strip()
+    market = (rec.get("market") or "").strip()
+    if modal <= 0 or not arrival or not commodity or not state or not market:
+        return None
+    return (
+        commodity, state, market, arrival, (rec.get("variety") or "").strip(),
+        rec.get("district", ""), rec.get("grade", ""),
+        min_p, max_p, modal, fetched_at,
+    )
+
+
+def append_records(records: list, path: str = None) -> int:
+    """Store raw AGMARKNET records; returns the number of rows written."""
+    now = time.time()
+    rows = [row for row in (_to_row(r, now) for r in records or []) if row]
+    if not rows:
+        return 0
+    with closing(_connect(path)) as conn, conn:
+        conn.executemany(_INSERT, rows)
+    return len(rows)
+
+
+def get_daily_prices(commodity: str, state: str = None, start: str = None,
+                     end: str = None, path: str = None) -> list:
+    """Average modal price per arrival date, oldest first.
+
+    Args:
+        commodity: AGMARKNET commodity name (e.g. "Arhar (Tur/Red Gram)").
+        state: Optional state filter; all-India average when omitted.
+        start, end: Optional inclusive ISO date bounds.
+
+    Returns:
+        list of dicts: {date, modal_price, min_price, max_price, markets}.
+    """
+    sql = (
+        "SELECT arrival_date, AVG(modal_price), MIN(NULLIF(min_price, 0)), "
+        "MAX(max_price), COUNT(*) FROM market_prices WHERE commodity = ?"
+    )
+    params = [commodity]
+    if state and state != "All":
+        sql += " AND state = ?"
+        params.append(state)
+    if start:
+        sql += " AND arrival_date >= ?"
+        params.append(start)
+    if end:
+        sql += " AND arrival_date <= ?"
+        params.append(end)
+    sql += " GROUP BY arrival_date ORDER BY arrival_date"
+
+    if not os.path.exists(path or _DB_PATH):
+        return []
+    with closing(_connect(path)) as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [
+        {
+            "date": d, "modal_price": modal,
+            "min_price": low if low is not None else modal,
+            "max_price": high, "markets": n,
+        }
+        for d, modal, low, high, n in rows
+    ]
+
+
+def get_price_series(commodity: str, state: str = None, days: int = 60,
+                     as_of: date = None, min_days: int = 1,
+                     path: str = None) -> list:
+    """Daily modal prices for the `days` days before `as_of`, gap-filled.
+
+    Days without arrivals carry the previous day's price forward; the
+    series starts at the first day that has data.
+
+    Returns:
+        [{"ds": YYYY-MM-DD, "y": price}, ...] — empty if fewer than
+        `min_days` distinct days are stored in the window.
+    """
+    as_of = as_of or date.today()
+    start = as_of - timedelta(days=days)
+    end = as_of - timedelta(days=1)
+    daily = get_daily_prices(commodity, state, start.isoformat(),
+                             end.isoformat(), path)
+    if not daily or len(daily) < min_days:
+        return []
+
+    by_date = {d["date"]: d["modal_price"] for d in daily}
+    series = []
+    day = date.fromisoformat(daily[0]["date"])
+    last = None
+    while day <= end:
+        key = day.isoformat()
+        last = by_date.get(key, last)
+        series.append({"ds": key, "y": round(last, 0)})
+        day += timedelta(days=1)
+    return series
+
@@ -6,6 +6,15 @@ AgriScheme Backend — Market Price Service (Production).
   2. API    — data.gov.in Open Government Data Platform (live mandi prices)
   3. MSP    — Fallback to government MSP-based simulation
 
+Every record fetched in tier 2 is also appended to the market price
+history store (services/market_history.py).
+
+Assembled responses are kept per (state, crop filter) as pre-serialised
+snapshots with an ETag (get_market_snapshot), valid until the earliest
+expiry of their constituent prices or until one of them is refreshed.
+Only Indian states and union territories (plus "All") are accepted, and
+the snapshot store is a bounded LRU.
+
 Env vars:
   DATA_GOV_API_KEY — Free API key from https://data.gov.in/
   MARKET_CACHE_TTL — Cache time-to-live in seconds (default: 21600 = 6 hrs)
@@ -19,14 +28,21 @@ API Resource:
 import os
 import json
 import time
+import hashlib
 import logging
 import math
-import random
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
 
 import requests
 from dotenv import load_dotenv
 
+from services import market_history
+from services.forecast_service import get_price_history
+from services.market_stream import PriceAggregator, RecordStream
+from services.voice_nlp_parser import VALID_STATES
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -39,6 +55,8 @@ MARKET_MODE = os.getenv("MARKET_MODE", "api").lower()
 # data.gov.in resource ID for AGMARKNET daily commodity prices
 _RESOURCE_ID = "9ef84268-d588-465a-a308-a864a43d0070"
 _API_BASE = f"https://api.data.gov.in/resource/{_RESOURCE_ID}"
+_STREAM_CHUNK = 64 * 1024  # bytes per iter_content read
+_HISTORY_BATCH = 1000      # records per history store insert
 
 # Cache file
 _BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -162,31 +180,46 @@ def _save_cache(cache: dict):
         logger.warning("Failed to save market cache: %s", e)
 
 
-def _get_cached(state: str, crop: str) -> dict | None:
-    """Return cached data if valid (within TTL)."""
+def _get_cache_entry(state: str, crop: str) -> dict | None:
+    """Return the raw cache entry ({timestamp, data}) if within TTL."""
     cache = _load_cache()
     key = f"{state}:{crop}"
     entry = cache.get(key)
-    if entry and time.time() - entry.get("timestamp", 0) < MARKET_CACHE_TTL:
+    if entry and entry.get("data") and time.time() - entry.get("timestamp", 0) < MARKET_CACHE_TTL:
         logger.debug("Cache hit: %s", key)
-        return entry.get("data")
+        return entry
     return None
 
 
+def _get_cached(state: str, crop: str) -> dict | None:
+    """Return cached data if valid (within TTL)."""
+    entry = _get_cache_entry(state, crop)
+    return entry["data"] if entry else None
+
+
 def _set_cache(state: str, crop: str, data: dict):
     """Store data in cache with current timestamp."""
     cache = _load_cache()
     key = f"{state}:{crop}"
     cache[key] = {"timestamp": time.time(), "data": data}
     _save_cache(cache)
+    _invalidate_snapshots(state)
+
+
+def _record_history(records: list):
+    """Append fetched records to the persistent price history store."""
+    try:
+        market_history.append_records(records)
+    except Exception as e:
+        logger.warning("Failed to store market history: %s", e)
 
 
 # ─── data.gov.in API ──────────────────────────────────────────────────────
 
-def _fetch_from_api(state: str, commodity: str, limit: int = 50) -> list | None:
-    """Fetch real mandi prices from data.gov.in AGMARKNET API.
+def _open_api_stream(state: str, commodity: str, limit: int = 50):
+    """Start a streaming request to the data.gov.in AGMARKNET API.
 
-    Returns list of price records, or None on failure.
+    Returns the response with the body not yet read, or None on failure.
     """
     if not DATA_GOV_API_KEY:
         logger.debug("No DATA_GOV_API_KEY set — skipping API call")
@@ -209,125 +242,130 @@ def _fetch_from_api(state: str, commodity: str, limit: int = 50) -> list | None:
             params=params,
             timeout=10,
             headers={"Accept": "application/json"},
+            stream=True,
         )
+    except requests.exceptions.Timeout:
+        logger.warning("data.gov.in API timeout for %s / %s", state, commodity)
+        return None
+    except requests.exceptions.ConnectionError:
+        logger.warning("data.gov.in API connection error")
+        return None
 
-        if response.status_code == 429:
-            logger.warning("data.gov.in API rate limited")
-            return None
+    if response.status_code == 429:
+        logger.warning("data.gov.in API rate limited")
+        response.close()
+        return None
 
-        if response.status_code != 200:
-            logger.warning(
-                "data.gov.in API returned %d: %s",
-                response.status_code, response.text[:200],
-            )
-            return None
+    if response.status_code != 200:
+        logger.warning(
+            "data.gov.in API returned %d: %s",
+            response.status_code, response.text[:200],
+        )
+        response.close()
+        return None
 
-        data = response.json()
-        records = data.get("records", [])
+    return response
 
-        if not records:
-            logger.debug("No records from API for %s / %s", state, commodity)
-            return None
 
-        return records
+def _iter_api_records(response):
+    """Yield records from a streaming API response as they are decoded."""
+    with response:
+        yield from RecordStream(response.iter_content(chunk_size=_STREAM_CHUNK))
 
-    except requests.exceptions.Timeout:
-        logger.warning("data.gov.in API timeout for %s / %s", state, commodity)
+
+def _fetch_from_api(state: str, commodity: str, limit: int = 50) -> list | None:
+    """Fetch real mandi prices from data.gov.in AGMARKNET API.
+
+    Returns list of price records, or None on failure.
+    """
+    response = _open_api_stream(state, commodity, limit)
+    if response is None:
         return None
-    except requests.exceptions.ConnectionError:
-        logger.warning("data.gov.in API connection error")
+
+    try:
+        records = list(_iter_api_records(response))
+    except requests.exceptions.RequestException as e:
+        logger.warning("data.gov.in API read error for %s / %s: %s", state, commodity, e)
         return None
     except (json.JSONDecodeError, KeyError, ValueError) as e:
         logger.warning("data.gov.in API parse error: %s", e)
         return None
 
+    if not records:
+        logger.debug("No records from API for %s / %s", state, commodity)
+        return None
 
-def _parse_api_records(records: list, crop: str) -> dict | None:
-    """Parse API records into our standard price format.
+    return records
 
-    Returns price info dict or None if records are unusable.
+
+def _fetch_prices(state: str, commodity: str, crop: str,
+                  limit: int = 50) -> dict | None:
+    """Stream API records straight into a price aggregate.
+
+    Records are aggregated and appended to the history store as they are
+    decoded, without materialising the response or the record list.
+
+    Returns price info dict or None if the API gave nothing usable.
     """
-    if not records:
+    response = _open_api_stream(state, commodity, limit)
+    if response is None:
         return None
 
-    valid_prices = []
-    mandi_name = None
-    arrival_date = None
-
-    for rec in records:
-        try:
-            modal = float(rec.get("modal_price", 0))
-            min_p = float(rec.get("min_price", 0))
-            max_p = float(rec.get("max_price", 0))
-            if modal <= 0:
-                continue
-
-            valid_prices.append({
-                "modal": modal,
-                "min": min_p,
-                "max": max_p,
-                "market": rec.get("market", ""),
-                "date": rec.get("arrival_date", ""),
-                "district": rec.get("district", ""),
-                "variety": rec.get("variety", ""),
-            })
-
-            if not mandi_name:
-                mandi_name = rec.get("market", "")
-            if not arrival_date:
-                arrival_date = rec.get("arrival_date", "")
-
-        except (ValueError, TypeError):
-            continue
-
-    if not valid_prices:
+    agg = PriceAggregator()
+    batch = []
+    try:
+        for rec in _iter_api_records(response):
+            agg.add(rec)
+            batch.append(rec)
+            if len(batch) >= _HISTORY_BATCH:
+                _record_history(batch)
+                batch = []
+    except requests.exceptions.RequestException as e:
+        logger.warning("data.gov.in API read error for %s / %s: %s", state, commodity, e)
         return None
+    except (json.JSONDecodeError, KeyError, ValueError) as e:
+        logger.warning("data.gov.in API parse error: %s", e)
+        return None
+    finally:
+        if batch:
+            _record_history(batch)
 
-    # Aggregate: weighted average of modal prices
-    avg_price = sum(p["modal"] for p in valid_prices) / len(valid_prices)
-    positive_mins = [p["min"] for p in valid_prices if p["min"] > 0]
-    min_price = min(positive_mins) if positive_mins else avg_price
-    max_price = max(p["max"] for p in valid_prices) if valid_prices else avg_price
+    if not agg.count:
+        logger.debug("No usable records from API for %s / %s", state, commodity)
+    return agg.result(crop, _BASE_PRICES.get(crop, {}).get("price"))
 
-    # Compare with MSP for trend
-    msp = _BASE_PRICES.get(crop, {}).get("price", avg_price)
-    change = round(avg_price - msp, 0)
-    change_pct = round((change / msp) * 100, 1) if msp else 0
 
-    if change_pct > 1:
-        trend = "up"
-    elif change_pct < -1:
-        trend = "down"
-    else:
-        trend = "stable"
+def _parse_api_records(records: list, crop: str) -> dict | None:
+    """Parse API records into our standard price format.
 
-    return {
-        "crop": crop,
-        "price": round(avg_price, 0),
-        "min_price": round(min_price, 0),
-        "max_price": round(max_price, 0),
-        "unit": "₹/quintal",
-        "change": change,
-        "change_pct": change_pct,
-        "trend": trend,
-        "mandi": mandi_name or "Various",
-        "data_date": arrival_date or datetime.now().strftime("%d/%m/%Y"),
-        "source": "data.gov.in (AGMARKNET)",
-        "records_count": len(valid_prices),
-    }
+    Returns price info dict or None if records are unusable.
+    """
+    if not records:
+        return None
+
+    agg = PriceAggregator()
+    for rec in records:
+        agg.add(rec)
+    return agg.result(crop, _BASE_PRICES.get(crop, {}).get("price"))
 
 
 # ─── MSP Fallback ────────────────────────────────────────────────────────
 
-def _generate_msp_price(base_price: float) -> float:
-    """Generate a realistic fluctuating price based on MSP."""
+def _generate_msp_price(crop: str, base_price: float) -> float:
+    """Generate a realistic fluctuating price based on MSP.
+
+    The daily movement is the crop's latest day in the shared synthetic
+    history (see forecast_service.get_price_history), so market prices,
+    alerts and forecasts agree.
+    """
     now = datetime.now()
-    day_seed = now.year * 1000 + now.timetuple().tm_yday
     hour_factor = math.sin(now.hour * 0.3) * 0.02
 
-    random.seed(day_seed)
-    daily_pct = random.uniform(-0.05, 0.05)
-    random.seed()
+    crops, _, history = get_price_history()
+    try:
+        daily_pct = history[crops.index(crop), -1] / base_price - 1
+    except ValueError:
+        daily_pct = 0.0
 
     return round(base_price * (1 + daily_pct + hour_factor), 0)
 
@@ -338,7 +376,7 @@ def _get_msp_price(crop: str, mandi: str = "N/A") -> dict:
     if not info:
         return None
 
-    current = _generate_msp_price(info["price"])
+    current = _generate_msp_price(crop, info["price"])
     change = round(current - info["price"], 0)
     change_pct = round((change / info["price"]) * 100, 1) if info["price"] else 0
 
@@ -363,16 +401,23 @@ def _get_msp_price(crop: str, mandi: str = "N/A") -> dict:
 
 # ─── Main Public API ─────────────────────────────────────────────────────
 
-def get_market_prices(state: str, crop: str = None) -> dict:
-    """Get market prices for a state, with real API + cache + MSP fallback.
+def _next_hour(now: float) -> float:
+    """Epoch seconds of the next wall-clock hour (MSP prices move hourly)."""
+    dt = datetime.fromtimestamp(now).replace(minute=0, second=0, microsecond=0)
+    return (dt + timedelta(hours=1)).timestamp()
 
-    Args:
-        state: Indian state name (or "All")
-        crop:  Optional specific crop filter
+
+def _build_market_prices(state: str, crop: str = None) -> tuple:
+    """Assemble prices crop by crop through the 3 tiers.
 
     Returns:
-        dict with: state, mandis, last_updated, prices[], source
+        (result dict, expires_at) — expires_at is the earliest time any
+        constituent price may change: its cache entry's TTL, or the next
+        hour for MSP-simulated prices.
     """
+    now = time.time()
+    expires_at = now + MARKET_CACHE_TTL
+
     # Determine which crops to show
     if crop and crop in _BASE_PRICES:
         crop_list = [crop]
@@ -387,31 +432,31 @@ def get_market_prices(state: str, crop: str = None) -> dict:
         price_data = None
 
         # ── Tier 1: Cache ──
-        cached = _get_cached(state, c)
-        if cached:
-            price_data = cached
-            source = cached.get("source", "cache")
+        entry = _get_cache_entry(state, c)
+        if entry:
+            price_data = entry["data"]
+            source = price_data.get("source", "cache")
+            expires_at = min(expires_at, entry["timestamp"] + MARKET_CACHE_TTL)
 
         # ── Tier 2: data.gov.in API ──
         if price_data is None and MARKET_MODE != "msp_only":
             commodity = _CROP_TO_COMMODITY.get(c, c)
-            records = _fetch_from_api(state, commodity)
-            if records:
-                parsed = _parse_api_records(records, c)
-                if parsed:
-                    price_data = parsed
-                    source = "data.gov.in (AGMARKNET)"
-                    _set_cache(state, c, parsed)
+            parsed = _fetch_prices(state, commodity, c)
+            if parsed:
+                price_data = parsed
+                source = "data.gov.in (AGMARKNET)"
+                _set_cache(state, c, parsed)
 
         # ── Tier 3: MSP Fallback ──
         if price_data is None:
             price_data = _get_msp_price(c, mandis[0] if mandis else "N/A")
             source = "MSP (Government of India)"
+            expires_at = min(expires_at, _next_hour(now))
 
         if price_data:
             prices.append(price_data)
 
-    return {
+    result = {
         "state": state,
         "mandis": mandis,
         "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M"),
@@ -419,3 +464,103 @@ def get_market_prices(state: str, crop: str = None) -> dict:
         "source": source,
         "cache_ttl_seconds": MARKET_CACHE_TTL,
     }
+    return result, expires_at
+
+
+# ─── Per-state snapshots ──────────────────────────────────────────────────
+# The assembled response for each (state, crop filter) is kept in memory,
+# already serialised, until the earliest expiry of its constituent prices
+# or until one of them is refreshed via _set_cache(). Keys are limited to
+# Indian states/UTs and known crops, and the store is an LRU of at most
+# _MAX_SNAPSHOTS entries; expired snapshots are dropped on every insert.
+
+_MAX_SNAPSHOTS = 128
+_KNOWN_STATES = {s.lower(): s for s in VALID_STATES + ["All"]}
+
+
+def normalize_state(state: str) -> str:
+    """Canonical state or UT name; empty means "All".
+
+    Raises:
+        ValueError: if `state` is not an Indian state or union territory.
+    """
+    name = str(state or "").strip()
+    if not name:
+        return "All"
+    try:
+        return _KNOWN_STATES[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown state '{name}'") from None
+
+
+class MarketSnapshot:
+    """A materialised market response: dict, JSON body and strong ETag."""
+
+    __slots__ = ("data", "body", "etag", "expires_at")
+
+    def __init__(self, data: dict, expires_at: float):
+        self.data = data
+        self.body = json.dumps(
+            {"success": True, **data}, ensure_ascii=True, sort_keys=True,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.expires_at = expires_at
+
+
+_snapshots = OrderedDict()
+_snapshot_lock = threading.Lock()
+
+
+def _invalidate_snapshots(state: str):
+    """Drop every snapshot that includes a price for `state`."""
+    with _snapshot_lock:
+        for key in [k for k in _snapshots if k[0] == state]:
+            del _snapshots[key]
+
+
+def _store_snapshot(key: tuple, snap: MarketSnapshot):
+    """Insert a snapshot, evicting expired ones, then the least recently used."""
+    now = time.time()
+    with _snapshot_lock:
+        for k in [k for k, v in _snapshots.items() if v.expires_at <= now]:
+            del _snapshots[k]
+        _snapshots[key] = snap
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > _MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+
+
+def get_market_snapshot(state: str, crop: str = None) -> MarketSnapshot:
+    """Return the (possibly cached) snapshot for a state and crop filter.
+
+    Raises:
+        ValueError: for an unknown state (see normalize_state).
+    """
+    key = (normalize_state(state), crop if crop in _BASE_PRICES else None)
+    with _snapshot_lock:
+        snap = _snapshots.get(key)
+        if snap is not None and time.time() < snap.expires_at:
+            _snapshots.move_to_end(key)
+            return snap
+
+    data, expires_at = _build_market_prices(*key)
+    snap = MarketSnapshot(data, expires_at)
+    _store_snapshot(key, snap)
+    return snap
+
+
+def get_market_prices(state: str, crop: str = None) -> dict:
+    """Get market prices for a state, with real API + cache + MSP fallback.
+
+    Served from the per-state snapshot; treat the returned dict as
+    read-only, it is shared between callers.
+
+    Args:
+        state: Indian state or UT name (or "All"; unknown states raise ValueError)
+        crop:  Optional specific crop filter
+
+    Returns:
+        dict with: state, mandis, last_updated, prices[], source
+    """
+    return get_market_snapshot(state, crop).data
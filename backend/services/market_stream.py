@@ -0,0 +1,204 @@
+"""
+AgriScheme Backend — Streaming data.gov.in record parser.
+
+data.gov.in returns one JSON object whose "records" array can hold
+thousands of mandi rows. Instead of `response.json()` (whole body, then the
+whole record list in memory), RecordStream decodes the body incrementally
+from `response.iter_content()` and yields one record dict at a time, so
+aggregation starts with the first chunk and memory stays bounded by the
+chunk size plus one record.
+
+PriceAggregator folds records into running count/sum/min/max per crop,
+producing the same price dict as market_service._parse_api_records.
+
+Usage:
+    stream = RecordStream(response.iter_content(chunk_size=65536))
+    agg = PriceAggregator()
+    for rec in stream:
+        agg.add(rec)
+    stream.meta["total"], agg.result("Rice")
+"""
+
+import codecs
+import json
+from datetime import datetime
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class RecordStream:
+    """Iterate the items of a top-level JSON array field from byte chunks.
+
+    Top-level fields that precede the array (e.g. "total", "count") are
+    available in `meta` once iteration has started.
+    """
+
+    def __init__(self, chunks, field: str = "records"):
+        self._chunks = iter(chunks)
+        self._field = field
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._eof = False
+        self.meta = {}
+
+    def _read(self) -> bool:
+        """Append the next chunk to the buffer; False at end of input."""
+        if self._eof:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += self._utf8.decode(chunk)
+                return True
+        self._buf += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def _find_array(self) -> bool:
+        """Consume the prefix up to the array's '['; False if not present."""
+        pos = 0
+        depth = 0
+        in_string = escape = False
+        string_start = 0
+        last_key = None
+        while True:
+            while pos < len(self._buf):
+                ch = self._buf[pos]
+                if in_string:
+                    if escape:
+                        escape = False
+                    elif ch == "\\":
+                        escape = True
+                    elif ch == '"':
+                        in_string = False
+                        last_key = self._buf[string_start:pos + 1]
+                elif ch == '"':
+                    in_string = True
+                    string_start = pos
+                elif ch in "{[":
+                    depth += 1
+                elif ch in "}]":
+                    depth -= 1
+                elif ch == ":" and depth == 1 and json.loads(last_key) == self._field:
+                    # Value must start with '['; fetch more input if needed
+                    rest = pos + 1
+                    while True:
+                        while rest < len(self._buf) and self._buf[rest] in _WHITESPACE:
+                            rest += 1
+                        if rest < len(self._buf) or not self._read():
+                            break
+                    if rest >= len(self._buf) or self._buf[rest] != "[":
+                        return False
+                    self._parse_meta(self._buf[:pos + 1])
+                    self._buf = self._buf[rest + 1:]
+                    return True
+                pos += 1
+            if not self._read():
+                return False
+
+    def _parse_meta(self, prefix: str):
+        """Decode the fields before the array: '{..., "records":' + 'null}'."""
+        try:
+            meta = json.loads(prefix + "null}")
+            meta.pop(self._field, None)
+            self.meta = meta
+        except json.JSONDecodeError:
+            self.meta = {}
+
+    def __iter__(self):
+        if not self._find_array():
+            return
+        pos = 0
+        while True:
+            buf = self._buf
+            while pos < len(buf) and (buf[pos] in _WHITESPACE or buf[pos] == ","):
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                if pos >= len(buf):
+                    raise json.JSONDecodeError("need more data", buf, pos)
+                item, end = _DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Item is cut off at the chunk boundary — drop what was
+                # consumed and read on
+                self._buf = buf[pos:]
+                pos = 0
+                if not self._read():
+                    raise json.JSONDecodeError(
+                        f"Truncated '{self._field}' array", self._buf, 0,
+                    )
+                continue
+            pos = end
+            yield item
+
+
+class PriceAggregator:
+    """Running modal/min/max aggregation of AGMARKNET records (O(1) memory)."""
+
+    def __init__(self):
+        self.count = 0
+        self.modal_sum = 0.0
+        self.min_positive = None
+        self.max_price = None
+        self.mandi = None
+        self.arrival_date = None
+
+    def add(self, rec: dict) -> bool:
+        """Fold one record in; returns False if it is unusable."""
+        try:
+            modal = float(rec.get("modal_price", 0))
+            min_p = float(rec.get("min_price", 0))
+            max_p = float(rec.get("max_price", 0))
+        except (ValueError, TypeError):
+            return False
+        if modal <= 0:
+            return False
+
+        self.count += 1
+        self.modal_sum += modal
+        if min_p > 0 and (self.min_positive is None or min_p < self.min_positive):
+            self.min_positive = min_p
+        if self.max_price is None or max_p > self.max_price:
+            self.max_price = max_p
+        if not self.mandi:
+            self.mandi = rec.get("market", "")
+        if not self.arrival_date:
+            self.arrival_date = rec.get("arrival_date", "")
+        return True
+
+    def result(self, crop: str, msp: float = None) -> dict | None:
+        """Price dict in market_service's format, None if nothing was added."""
+        if not self.count:
+            return None
+
+        avg_price = self.modal_sum / self.count
+        min_price = self.min_positive if self.min_positive is not None else avg_price
+        max_price = self.max_price
+
+        # Compare with MSP for trend
+        msp = msp or avg_price
+        change = round(avg_price - msp, 0)
+        change_pct = round((change / msp) * 100, 1) if msp else 0
+
+        if change_pct > 1:
+            trend = "up"
+        elif change_pct < -1:
+            trend = "down"
+        else:
+            trend = "stable"
+
+        return {
+            "crop": crop,
+            "price": round(avg_price, 0),
+            "min_price": round(min_price, 0),
+            "max_price": round(max_price, 0),
+            "unit": "₹/quintal",
+            "change": change,
+            "change_pct": change_pct,
+            "trend": trend,
+            "mandi": self.mandi or "Various",
+            "data_date": self.arrival_date or datetime.now().strftime("%d/%m/%Y"),
+            "source": "data.gov.in (AGMARKNET)",
+            "records_count": self.count,
+        }
@@ -2,77 +2,83 @@
 AgriScheme Backend — Smart Scheme Ranking Service.
 Uses TF-IDF vectorization and Cosine Similarity to rank government
 schemes by personal relevance to the farmer's profile.
+
+Scheme vectors, normalised benefits and the catalogue IDF are computed at
+write time (services/scheme_enrichment.py), so a request only vectorises
+the farmer profile and takes dot products. Schemes written before
+enrichment ran fall back to fitting TF-IDF on the result page.
 """
 import logging
+import threading
+import time
+
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
+from config import RANKING_MODEL_CHECK_INTERVAL
+from services.scheme_enrichment import (
+    RANK_FIELD,
+    build_scheme_profile,
+    get_ranking_model,
+    get_ranking_model_version,
+    size_category,
+    tokenize,
+    vectorize,
+)
+
 logger = logging.getLogger(__name__)
 
+# Weighted: 60% relevance + 40% normalized benefit
+_RELEVANCE_WEIGHT = 0.6
+_BENEFIT_WEIGHT = 0.4
 
-def _build_farmer_profile(state: str, crop: str, land_size: float, season: str) -> str:
-    """Build a text profile describing the farmer's situation."""
-    size_category = "small"
-    if land_size > 4:
-        size_category = "large"
-    elif land_size > 2:
-        size_category = "medium"
-
-    return (
-        f"Farmer in {state} growing {crop} crop during {season} season "
-        f"with {land_size} hectares of {size_category} land holding. "
-        f"{crop} cultivation in {state} {season}."
-    )
 
+class _RankingModel:
+    """The catalogue IDF, reloaded when enrichment bumps its version."""
 
-def _build_scheme_profile(scheme: dict) -> str:
-    """Build a text description from a scheme document for TF-IDF matching."""
-    parts = []
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._model = None
+        self._version = None
+        self._checked_at = 0.0
 
-    name = scheme.get("scheme_name", "")
-    if name:
-        parts.append(name)
+    def invalidate(self):
+        with self._lock:
+            self._version = None
 
-    scheme_type = scheme.get("type", "")
-    if scheme_type:
-        parts.append(scheme_type)
+    @staticmethod
+    def _meta():
+        from db import get_meta_collection
+        return get_meta_collection()
 
-    benefit = scheme.get("benefit", "")
-    if benefit:
-        parts.append(benefit)
+    def get(self) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            if self._version is None or now - self._checked_at >= RANKING_MODEL_CHECK_INTERVAL:
+                meta = self._meta()
+                version = get_ranking_model_version(meta)
+                if version != self._version:
+                    self._model = get_ranking_model(meta) if version else None
+                    self._version = version
+                self._checked_at = now
+            return self._model
 
-    # Description (can be a dict with language keys or a string)
-    desc = scheme.get("description", "")
-    if isinstance(desc, dict):
-        desc = desc.get("en", str(desc))
-    if desc:
-        parts.append(str(desc))
 
-    # States
-    states = scheme.get("states", [])
-    if isinstance(states, list):
-        parts.append(" ".join(states))
+_model = _RankingModel()
 
-    # Crops
-    crops = scheme.get("crops", [])
-    if isinstance(crops, list):
-        parts.append(" ".join(crops))
 
-    # Season
-    season = scheme.get("season", "")
-    if season:
-        parts.append(season)
+def invalidate_ranking_model():
+    """Reload the ranking model on the next request (call after enrichment)."""
+    _model.invalidate()
 
-    # Land range
-    min_land = scheme.get("min_land", 0)
-    max_land = scheme.get("max_land", 100)
-    if min_land <= 2:
-        parts.append("small farmer marginal")
-    if max_land >= 10:
-        parts.append("large farmer")
-    parts.append("medium farmer")
 
-    return " ".join(parts)
+def _build_farmer_profile(state: str, crop: str, land_size: float, season: str) -> str:
+    """Build a text profile describing the farmer's situation."""
+    return (
+        f"Farmer in {state} growing {crop} crop during {season} season "
+        f"with {land_size} hectares of {size_category(land_size)} land holding. "
+        f"{crop} cultivation in {state} {season}."
+    )
 
 
 def rank_schemes(schemes: list, state: str, crop: str,
@@ -95,52 +101,82 @@ def rank_schemes(schemes: list, state: str, crop: str,
         return schemes
 
     if len(schemes) == 1:
+        schemes[0].pop(RANK_FIELD, None)
         schemes[0]["relevance_score"] = 1.0
         return schemes
 
     try:
-        # Build text documents
-        farmer_profile = _build_farmer_profile(state, crop, land_size, season)
-        scheme_profiles = [_build_scheme_profile(s) for s in schemes]
-
-        # All documents: farmer profile first, then scheme profiles
-        all_docs = [farmer_profile] + scheme_profiles
-
-        # TF-IDF Vectorization
-        vectorizer = TfidfVectorizer(
-            stop_words="english",
-            max_features=5000,
-            ngram_range=(1, 2),
-        )
-        tfidf_matrix = vectorizer.fit_transform(all_docs)
-
-        # Cosine similarity between farmer profile (index 0) and each scheme
-        farmer_vec = tfidf_matrix[0:1]
-        scheme_vecs = tfidf_matrix[1:]
-        similarities = cosine_similarity(farmer_vec, scheme_vecs).flatten()
-
-        # Combine with benefit_amount for final score
-        # Weighted: 60% relevance + 40% normalized benefit
-        max_benefit = max(
-            (s.get("benefit_amount", 0) for s in schemes), default=1
-        )
-        if max_benefit == 0:
-            max_benefit = 1
-
-        for i, scheme in enumerate(schemes):
-            tfidf_score = float(similarities[i])
-            benefit_norm = scheme.get("benefit_amount", 0) / max_benefit
-            combined_score = 0.6 * tfidf_score + 0.4 * benefit_norm
+        model = _model.get()
+        if model is None or not all(RANK_FIELD in s for s in schemes):
+            return _rank_with_fit(schemes, state, crop, land_size, season)
+
+        farmer_vec = _farmer_vector(
+            _build_farmer_profile(state, crop, land_size, season), model["idf"])
+        for scheme in schemes:
+            features = scheme.pop(RANK_FIELD)
+            tfidf = features["tfidf"]
+            tfidf_score = sum(w * tfidf.get(term, 0.0) for term, w in farmer_vec.items())
+            combined_score = (_RELEVANCE_WEIGHT * tfidf_score
+                              + _BENEFIT_WEIGHT * features["benefit_norm"])
             scheme["relevance_score"] = round(combined_score, 4)
 
         # Sort by combined relevance score (highest first)
         schemes.sort(key=lambda s: s.get("relevance_score", 0), reverse=True)
-
         return schemes
 
     except Exception as e:
         logger.error("Ranking error: %s", e)
         # Fallback: return schemes as-is with default scores
         for scheme in schemes:
+            scheme.pop(RANK_FIELD, None)
             scheme["relevance_score"] = 0.5
         return schemes
+
+
+def _farmer_vector(profile: str, idf: dict) -> dict:
+    """L2-normalised TF-IDF vector of the farmer profile over the catalogue vocabulary."""
+    return vectorize(tokenize(profile), idf)
+
+
+def _rank_with_fit(schemes: list, state: str, crop: str,
+                   land_size: float, season: str) -> list:
+    """Per-request ranking for schemes without stored rank features."""
+    for scheme in schemes:
+        scheme.pop(RANK_FIELD, None)
+
+    # Build text documents
+    farmer_profile = _build_farmer_profile(state, crop, land_size, season)
+    scheme_profiles = [build_scheme_profile(s) for s in schemes]
+
+    # All documents: farmer profile first, then scheme profiles
+    all_docs = [farmer_profile] + scheme_profiles
+
+    # TF-IDF Vectorization
+    vectorizer = TfidfVectorizer(
+        stop_words="english",
+        max_features=5000,
+        ngram_range=(1, 2),
+    )
+    tfidf_matrix = vectorizer.fit_transform(all_docs)
+
+    # Cosine similarity between farmer profile (index 0) and each scheme
+    farmer_vec = tfidf_matrix[0:1]
+    scheme_vecs = tfidf_matrix[1:]
+    similarities = cosine_similarity(farmer_vec, scheme_vecs).flatten()
+
+    # Combine with benefit_amount for final score
+    max_benefit = max(
+        (s.get("benefit_amount", 0) for s in schemes), default=1
+    )
+    if max_benefit == 0:
+        max_benefit = 1
+
+    for i, scheme in enumerate(schemes):
+        tfidf_score = float(similarities[i])
+        benefit_norm = scheme.get("benefit_amount", 0) / max_benefit
+        combined_score = _RELEVANCE_WEIGHT * tfidf_score + _BENEFIT_WEIGHT * benefit_norm
+        scheme["relevance_score"] = round(combined_score, 4)
+
+    # Sort by combined relevance score (highest first)
+    schemes.sort(key=lambda s: s.get("relevance_score", 0), reverse=True)
+    return schemes
@@ -0,0 +1,319 @@
+"""
+AgriScheme Backend — Write-time enrichment of scheme documents.
+
+Everything the ranking service needs about a scheme is computed when the
+catalogue is written, not per request. After any write (seed, scraper
+sync, add_new_schemes, /api/addScheme) `enrich_catalogue` recomputes,
+for the whole catalogue:
+
+  - benefit_amount      parsed from the benefit text when missing
+  - rank_features       stored on each scheme:
+        benefit_norm    benefit_amount / the catalogue's highest benefit
+        size_flags      small / medium / large farmer eligibility
+        tokens          the analysed profile text (unigrams + bigrams)
+        tfidf           {term: weight}, L2-normalised, catalogue-wide IDF
+  - the ranking model   meta document "ranking": IDF per term, used to
+                        vectorise the farmer profile at request time
+
+IDF and the benefit maximum are catalogue-wide, so a new scheme can shift
+every vector; only documents whose features changed are written, in one
+unordered bulk_write, and the model's version is bumped so running
+servers reload it.
+
+/api/addScheme does not refit in the request: `enrich_scheme` writes the
+new document's features against the stored model (unknown terms are
+dropped, the benefit is capped at 1), and `enrich_catalogue_in_background`
+runs the full pass on a daemon thread.
+"""
+
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+
+from pymongo import ReturnDocument, UpdateOne
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+RANK_FIELD = "rank_features"
+RANKING_MODEL_ID = "ranking"
+
+# Same text analysis as the per-request TfidfVectorizer it replaces
+MAX_FEATURES = 5000
+_ANALYZER = TfidfVectorizer(stop_words="english", ngram_range=(1, 2)).build_analyzer()
+
+_PROFILE_FIELDS = ("scheme_name", "type", "benefit", "description", "states", "crops",
+                   "season", "min_land", "max_land", "benefit_amount")
+
+_PRECISION = 6
+
+
+def parse_benefit_amount(benefit_str):
+    """Extract a numeric value from a benefit string for sorting.
+
+    Examples:
+        '₹6,000 per year'   → 6000
+        'Up to ₹2,00,000'   → 200000
+        'Comprehensive ...'  → 0
+    """
+    if not benefit_str:
+        return 0
+    nums = re.findall(r"[\d,]+", str(benefit_str).replace(",", ""))
+    if nums:
+        try:
+            return float(nums[0].replace(",", ""))
+        except ValueError:
+            pass
+    return 0
+
+
+def size_category(land_size: float) -> str:
+    """Holding size of a farmer: small (≤ 2 ha), medium (≤ 4 ha) or large."""
+    if land_size > 4:
+        return "large"
+    if land_size > 2:
+        return "medium"
+    return "small"
+
+
+def size_flags(scheme: dict) -> dict:
+    """Which holding sizes a scheme's land range is aimed at."""
+    return {
+        "small": scheme.get("min_land", 0) <= 2,
+        "medium": True,
+        "large": scheme.get("max_land", 100) >= 10,
+    }
+
+
+def build_scheme_profile(scheme: dict) -> str:
+    """Build a text description from a scheme document for TF-IDF matching."""
+    parts = []
+
+    name = scheme.get("scheme_name", "")
+    if name:
+        parts.append(name)
+
+    scheme_type = scheme.get("type", "")
+    if scheme_type:
+        parts.append(scheme_type)
+
+    benefit = scheme.get("benefit", "")
+    if benefit:
+        parts.append(benefit)
+
+    # Description (can be a dict with language keys or a string)
+    desc = scheme.get("description", "")
+    if isinstance(desc, dict):
+        desc = desc.get("en", str(desc))
+    if desc:
+        parts.append(str(desc))
+
+    # States
+    states = scheme.get("states", [])
+    if isinstance(states, list):
+        parts.append(" ".join(states))
+
+    # Crops
+    crops = scheme.get("crops", [])
+    if isinstance(crops, list):
+        parts.append(" ".join(crops))
+
+    # Season
+    season = scheme.get("season", "")
+    if season:
+        parts.append(season)
+
+    # Land range
+    flags = size_flags(scheme)
+    if flags["small"]:
+        parts.append("small farmer marginal")
+    if flags["large"]:
+        parts.append("large farmer")
+    parts.append("medium farmer")
+
+    return " ".join(parts)
+
+
+def tokenize(text: str) -> list:
+    """Unigrams and bigrams of `text`, English stop words removed."""
+    return _ANALYZER(text)
+
+
+def vectorize(tokens: list, idf: dict) -> dict:
+    """L2-normalised TF-IDF weights of `tokens` over a stored vocabulary."""
+    counts = Counter(term for term in tokens if term in idf)
+    vec = {term: count * idf[term] for term, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in vec.values()))
+    return {term: w / norm for term, w in vec.items()} if norm else {}
+
+
+def _benefit(scheme: dict) -> float:
+    amount = scheme.get("benefit_amount")
+    return amount if amount is not None else parse_benefit_amount(scheme.get("benefit", ""))
+
+
+def compute_features(schemes: list) -> tuple:
+    """Rank features for every scheme of a catalogue, and the ranking model.
+
+    Returns:
+        (features, model): one rank_features dict per scheme (same order),
+        and {"idf": {term: idf}, "max_benefit": float, "schemes": int}.
+    """
+    benefits = [_benefit(s) for s in schemes]
+    max_benefit = max(benefits, default=0) or 1
+    tokens = [tokenize(build_scheme_profile(s)) for s in schemes]
+
+    idf, rows = {}, [{} for _ in schemes]
+    if any(tokens):
+        vectorizer = TfidfVectorizer(analyzer=lambda doc: doc, max_features=MAX_FEATURES)
+        matrix = vectorizer.fit_transform(tokens).tocsr()
+        terms = vectorizer.get_feature_names_out()
+        idf = {str(t): round(float(w), _PRECISION) for t, w in zip(terms, vectorizer.idf_)}
+        for i in range(matrix.shape[0]):
+            row = matrix.getrow(i)
+            rows[i] = {str(terms[j]): round(float(w), _PRECISION)
+                       for j, w in zip(row.indices, row.data)}
+
+    features = [
+        {
+            "benefit_norm": round(benefit / max_benefit, _PRECISION),
+            "size_flags": size_flags(scheme),
+            "tokens": toks,
+            "tfidf": row,
+        }
+        for scheme, benefit, toks, row in zip(schemes, benefits, tokens, rows)
+    ]
+    return features, {"idf": idf, "max_benefit": float(max_benefit), "schemes": len(schemes)}
+
+
+def scheme_features(scheme: dict, model: dict) -> dict:
+    """Rank features for one scheme against a stored ranking model."""
+    tokens = tokenize(build_scheme_profile(scheme))
+    return {
+        "benefit_norm": round(min(_benefit(scheme) / model["max_benefit"], 1.0), _PRECISION),
+        "size_flags": size_flags(scheme),
+        "tokens": tokens,
+        "tfidf": {term: round(w, _PRECISION)
+                  for term, w in vectorize(tokens, model["idf"]).items()},
+    }
+
+
+def _collections(collection, meta):
+    if collection is None or meta is None:
+        from db import get_meta_collection, get_schemes_collection
+        collection = get_schemes_collection() if collection is None else collection
+        meta = get_meta_collection() if meta is None else meta
+    return collection, meta
+
+
+def get_ranking_model(meta=None) -> dict | None:
+    """The stored ranking model (None before the first enrichment)."""
+    if meta is None:
+        from db import get_meta_collection
+        meta = get_meta_collection()
+    return meta.find_one({"_id": RANKING_MODEL_ID})
+
+
+def get_ranking_model_version(meta=None) -> int:
+    """Version of the stored ranking model (0 before the first enrichment)."""
+    if meta is None:
+        from db import get_meta_collection
+        meta = get_meta_collection()
+    doc = meta.find_one({"_id": RANKING_MODEL_ID}, {"version": 1})
+    return int(doc["version"]) if doc else 0
+
+
+def enrich_catalogue(collection=None, meta=None) -> dict:
+    """Recompute rank features for the whole catalogue; write what changed.
+
+    Returns:
+        dict with schemes (catalogue size), enriched (documents written)
+        and version (ranking model version).
+    """
+    collection, meta = _collections(collection, meta)
+    projection = {field: 1 for field in ("_id",) + _PROFILE_FIELDS + (RANK_FIELD,)}
+    docs = list(collection.find({}, projection))
+    features, model = compute_features(docs)
+
+    ops = []
+    for doc, feats in zip(docs, features):
+        update = {}
+        if doc.get("benefit_amount") is None:
+            update["benefit_amount"] = parse_benefit_amount(doc.get("benefit", ""))
+        if doc.get(RANK_FIELD) != feats:
+            update[RANK_FIELD] = feats
+        if update:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+
+    stored = get_ranking_model(meta)
+    if stored is None or ops or any(stored.get(k) != v for k, v in model.items()):
+        stored = meta.find_one_and_update(
+            {"_id": RANKING_MODEL_ID},
+            {"$set": {**model, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    stats = {"schemes": len(docs), "enriched": len(ops), "version": int(stored["version"])}
+    logger.info("Scheme enrichment: %d of %d schemes updated (ranking model v%d)",
+                stats["enriched"], stats["schemes"], stats["version"])
+    return stats
+
+
+def enrich_scheme(scheme_id, scheme: dict, collection=None, meta=None) -> bool:
+    """Write rank features for one new scheme against the stored model.
+
+    Returns:
+        False (nothing written) before the first catalogue enrichment.
+    """
+    collection, meta = _collections(collection, meta)
+    model = get_ranking_model(meta)
+    if model is None:
+        return False
+    collection.update_one({"_id": scheme_id},
+                          {"$set": {RANK_FIELD: scheme_features(scheme, model)}})
+    return True
+
+
+# ─── Background catalogue pass ────────────────────────────────────────────
+# One pass at a time per process; a request arriving mid-pass schedules
+# exactly one more, so the last write is always covered.
+
+_refit_lock = threading.Lock()
+_refit_thread = None
+_refit_again = False
+
+
+def _refit_loop():
+    global _refit_thread, _refit_again
+    from services.ranking_service import invalidate_ranking_model
+
+    while True:
+        try:
+            enrich_catalogue()
+            invalidate_ranking_model()
+        except Exception as e:
+            logger.error("Background scheme enrichment failed: %s", e)
+        with _refit_lock:
+            if not _refit_again:
+                _refit_thread = None
+                return
+            _refit_again = False
+
+
+def enrich_catalogue_in_background() -> threading.Thread:
+    """Run enrich_catalogue on a daemon thread; returns the running thread."""
+    global _refit_thread, _refit_again
+    with _refit_lock:
+        if _refit_thread is not None:
+            _refit_again = True
+            return _refit_thread
+        _refit_thread = threading.Thread(target=_refit_loop, name="scheme-enrichment",
+                                         daemon=True)
+        _refit_thread.start()
+        return _refit_thread
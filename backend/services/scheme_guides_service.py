@@ -0,0 +1,100 @@
+"""
+AgriScheme Backend — Scheme → Document Guide Join.
+
+Precomputes, for every scheme, the resolved guides of its
+`documents_required` list, so a client gets all guides for a scheme in
+one lookup instead of one /api/document-guide call per document.
+
+The join is rebuilt when the schemes collection changes: at most every
+SCHEME_GUIDES_CHECK_INTERVAL seconds a cheap signature (document count,
+newest _id and the catalogue version bumped by bulk syncs, which update
+documents in place) is compared with the one the join was built from, and
+invalidate() forces a rebuild after an in-process write (/api/addScheme).
+"""
+
+import logging
+import threading
+import time
+
+from config import SCHEME_GUIDES_CHECK_INTERVAL
+from services.document_guide_service import resolve_documents
+
+logger = logging.getLogger(__name__)
+
+
+class _SchemeGuideJoin:
+    """scheme name (lower-cased) → resolved guides for its documents."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None
+        self._signature = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = None
+
+    @staticmethod
+    def _collection():
+        from db import get_schemes_collection
+        return get_schemes_collection()
+
+    @staticmethod
+    def _catalogue_version() -> int:
+        from services.scheme_sync import get_catalogue_version
+        return get_catalogue_version()
+
+    def _signature_of(self, coll) -> tuple:
+        newest = coll.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        return (coll.estimated_document_count(), newest["_id"] if newest else None,
+                self._catalogue_version())
+
+    def _build(self, coll) -> dict:
+        entries = {}
+        for doc in coll.find({}, {"_id": 0, "scheme_name": 1, "documents_required": 1}):
+            name = doc.get("scheme_name")
+            if not name:
+                continue
+            entry = {"scheme_name": name, **resolve_documents(doc.get("documents_required") or [])}
+            entries[name.strip().lower()] = entry
+        logger.info("Scheme guide join built: %d schemes", len(entries))
+        return entries
+
+    def get(self, scheme_name: str) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            if self._entries is None or now - self._checked_at >= SCHEME_GUIDES_CHECK_INTERVAL:
+                coll = self._collection()
+                signature = self._signature_of(coll)
+                if self._entries is None or signature != self._signature:
+                    self._entries = self._build(coll)
+                    self._signature = signature
+                self._checked_at = now
+            return self._entries.get(scheme_name.strip().lower())
+
+
+_join = _SchemeGuideJoin()
+
+
+def get_scheme_guides(scheme_name: str) -> dict:
+    """All document guides for one scheme, deduplicated.
+
+    Returns:
+        dict with scheme_name, documents[], guides{}, unresolved[] —
+        or an error dict if the scheme is unknown.
+    """
+    entry = _join.get(scheme_name)
+    if entry is None:
+        return {"error": f"Scheme '{scheme_name}' not found"}
+    return entry
+
+
+def get_document_guides(document_names: list) -> dict:
+    """All guides for an explicit list of document names, deduplicated."""
+    return resolve_documents(document_names)
+
+
+def invalidate_scheme_guides():
+    """Force a rebuild on the next lookup (call after writing schemes)."""
+    _join.invalidate()
@@ -0,0 +1,51 @@
+"""
+AgriScheme Backend — MongoDB query builders for the schemes collection.
+
+The eligibility engine, the scheme listing and the crop recommender build
+their filters here, so the index advisor (services/index_advisor.py) can
+derive indexes from exactly the queries the app sends.
+"""
+
+# Sort order of every paginated scheme listing
+BENEFIT_SORT = [("benefit_amount", -1)]
+
+
+def season_clause(season: str) -> list:
+    """$or matching the season, or schemes without a season restriction."""
+    return [
+        {"season": season},
+        {"season": "All"},
+        {"season": ""},
+        {"season": {"$exists": False}},
+    ]
+
+
+def eligibility_query(state: str, crop: str, land_size: float, season: str = None) -> dict:
+    """Filter for POST /api/getEligibleSchemes.
+
+    State and crop match directly or through the "All" wildcards, land_size
+    must lie within [min_land, max_land], and the season (if given) must
+    match or be unrestricted.
+    """
+    query = {
+        "states": {"$in": [state, "All", "All India"]},
+        "crops": {"$in": [crop, "All", "All Crops"]},
+        "min_land": {"$lte": land_size},
+        "max_land": {"$gte": land_size},
+    }
+    if season:
+        query["$or"] = season_clause(season)
+    return query
+
+
+def listing_query(scheme_type: str = None) -> dict:
+    """Filter for GET /api/schemes (optional type)."""
+    return {"type": scheme_type} if scheme_type else {}
+
+
+def state_schemes_query(state: str, season: str = None) -> dict:
+    """Filter for the schemes the crop recommender quotes for a state."""
+    query = {"states": {"$in": [state, "All", "All India"]}}
+    if season:
+        query["$or"] = season_clause(season)
+    return query
@@ -0,0 +1,135 @@
+"""
+AgriScheme Backend — Bulk sync of scheme documents into MongoDB.
+
+Used by the scraper and the seeder instead of one update_one per scheme
+or drop + insert_many. Every stored scheme carries `content_hash`, a hash
+of the payload it was last written from; a sync reads the stored hashes in
+one query, skips schemes whose hash is unchanged and sends the rest as a
+single unordered bulk_write:
+
+  - mode="merge"   → UpdateOne($set, upsert) — keeps fields the payload
+                     does not mention (scraper)
+  - mode="replace" → ReplaceOne(upsert) — the document becomes exactly
+                     the payload (seeder)
+  - prune=True     → schemes missing from the payload are deleted in the
+                     same batch
+
+Documents keep their _id and the collection is never empty, so readers
+see no gap and existing indexes stay in place. Whenever a sync writes
+anything, the catalogue version in the meta collection is incremented;
+caches built from the schemes collection compare it to decide whether to
+rebuild.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+
+from pymongo import DeleteMany, ReplaceOne, ReturnDocument, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_ID = "schemes"
+
+# Not part of a scheme's content: identity, the hash itself, scrape time
+_VOLATILE_FIELDS = frozenset({"_id", "content_hash", "scraped_at"})
+
+
+def content_hash(scheme: dict) -> str:
+    """Stable hash of a scheme's content (key order and volatile fields ignored)."""
+    content = {k: v for k, v in scheme.items() if k not in _VOLATILE_FIELDS}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False,
+                         separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _collections(collection, meta):
+    if collection is None or meta is None:
+        from db import get_meta_collection, get_schemes_collection
+        collection = get_schemes_collection() if collection is None else collection
+        meta = get_meta_collection() if meta is None else meta
+    return collection, meta
+
+
+def get_catalogue_version(meta=None) -> int:
+    """Current catalogue version (0 before the first sync)."""
+    if meta is None:
+        from db import get_meta_collection
+        meta = get_meta_collection()
+    doc = meta.find_one({"_id": CATALOGUE_ID}, {"version": 1})
+    return int(doc["version"]) if doc else 0
+
+
+def bump_catalogue_version(meta=None) -> int:
+    """Increment the catalogue version after a write; returns the new version."""
+    if meta is None:
+        from db import get_meta_collection
+        meta = get_meta_collection()
+    doc = meta.find_one_and_update(
+        {"_id": CATALOGUE_ID},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return int(doc["version"])
+
+
+def sync_schemes(schemes: list, mode: str = "merge", prune: bool = False,
+                 collection=None, meta=None) -> dict:
+    """Write only the changed schemes, in one bulk_write.
+
+    Args:
+        schemes: Scheme dicts keyed by scheme_name (the last duplicate wins).
+        mode: "merge" ($set into the stored document) or "replace".
+        prune: Delete stored schemes whose name is not in `schemes`.
+        collection / meta: Default to the schemes and meta collections.
+
+    Returns:
+        dict with inserted, updated, unchanged, deleted and version.
+    """
+    if mode not in ("merge", "replace"):
+        raise ValueError(f"Unknown sync mode: {mode}")
+    collection, meta = _collections(collection, meta)
+
+    incoming = {}
+    for scheme in schemes:
+        name = scheme.get("scheme_name")
+        if not name:
+            raise ValueError("Every scheme needs a scheme_name")
+        doc = {k: v for k, v in scheme.items() if k != "_id"}
+        doc["content_hash"] = content_hash(doc)
+        incoming[name] = doc
+
+    query = {} if prune else {"scheme_name": {"$in": list(incoming)}}
+    stored = {
+        doc.get("scheme_name"): doc.get("content_hash")
+        for doc in collection.find(query, {"_id": 0, "scheme_name": 1, "content_hash": 1})
+    }
+
+    ops = []
+    for name, doc in incoming.items():
+        if stored.get(name) == doc["content_hash"]:
+            continue
+        if mode == "merge":
+            ops.append(UpdateOne({"scheme_name": name}, {"$set": doc}, upsert=True))
+        else:
+            ops.append(ReplaceOne({"scheme_name": name}, doc, upsert=True))
+    stale = [name for name in stored if name not in incoming] if prune else []
+    if stale:
+        ops.append(DeleteMany({"scheme_name": {"$in": stale}}))
+
+    stats = {"inserted": 0, "updated": 0,
+             "unchanged": len(incoming) - (len(ops) - bool(stale)), "deleted": 0}
+    if ops:
+        result = collection.bulk_write(ops, ordered=False)
+        stats.update(inserted=result.upserted_count, updated=result.modified_count,
+                     deleted=result.deleted_count)
+        stats["version"] = bump_catalogue_version(meta)
+    else:
+        stats["version"] = get_catalogue_version(meta)
+
+    logger.info("Scheme sync: %d new, %d updated, %d unchanged, %d deleted (catalogue v%d)",
+                stats["inserted"], stats["updated"], stats["unchanged"],
+                stats["deleted"], stats["version"])
+    return stats
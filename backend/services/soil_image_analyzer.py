@@ -9,14 +9,27 @@ Based on:
   - ICAR Soil Classification (Indian soils)
   - Pedological color–property correlations
 
+Batches (analyze_soil_images) decode in a process pool — JPEGs via
+Pillow's draft mode, so full resolution is never decoded — stack the
+center crops into one array for a single HSV conversion, and score every
+image against every profile as one matrix.
+
 Dependencies: Pillow, NumPy (no OpenCV required)
 """
-import io
-import base64
+import os
 import logging
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import numpy as np
 from PIL import Image
 
+from services.image_ingest import ImageError, ensure_payload, open_reduced
+from services.soil_rules_engine import CropSuitabilityTable
+
 logger = logging.getLogger(__name__)
 
 # ─── Soil Color Profiles (HSV dominant ranges) ────────────────────────────
@@ -140,22 +153,103 @@ CROP_MAP = {
     "Laterite": ["Rubber", "Tea", "Coffee", "Coconut", "Cashew", "Tapioca"],
 }
 
+# Same pH-window filtering as manual analysis, precomputed per soil type × pH
+_CROP_TABLE = CropSuitabilityTable(CROP_MAP, ["Consult local agronomist"])
+
+# ─── Batch settings ───────────────────────────────────────────────────────
+_THUMB_SIZE = 256           # longest side the single-image path works at
+_CROP_FRAC = 0.5            # center fraction used for colour statistics
+_BATCH_CROP = 128           # batch crops are resampled to this square size
+_INLINE_BATCH = 4           # smaller batches skip the process pool
+SOIL_BATCH_WORKERS = int(os.getenv("SOIL_BATCH_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+# Profile bounds as arrays for vectorised matching (Black Cotton is the
+# priority rule, not a scored candidate)
+_BLACK_COTTON = "Black Cotton (Regur)"
+_SCORED_PROFILES = [n for n in SOIL_COLOR_PROFILES if n != _BLACK_COTTON]
+
+
+def _profile_array(field: str, default: float, index: int = None) -> np.ndarray:
+    values = []
+    for name in _SCORED_PROFILES:
+        v = SOIL_COLOR_PROFILES[name].get(field, default)
+        values.append(v[index] if index is not None else v)
+    return np.array(values, dtype=np.float64)
+
+
+_P_HUE_LO = _profile_array("hue", (0, 360), 0)
+_P_HUE_HI = _profile_array("hue", (0, 360), 1)
+_P_MIN_SAT = _profile_array("min_sat", 0)
+_P_MAX_SAT = _profile_array("max_sat", 100)
+_P_MIN_VAL = _profile_array("min_val", 0)
+_P_MAX_VAL = _profile_array("max_val", 100)
+
 # ────────────────────────────────────────────────────────────────────────────
 
 
-def _decode_image(image_base64: str) -> Image.Image:
-    """Decode base64 string to PIL Image, resize for fast processing."""
-    raw = base64.b64decode(image_base64)
-    img = Image.open(io.BytesIO(raw)).convert("RGB")
-    # Resize to max 256px on longest side for speed
-    img.thumbnail((256, 256), Image.LANCZOS)
-    return img
+def _decode_image(image) -> Image.Image:
+    """Decode an upload to a PIL RGB image, max 256px on the longest side."""
+    return open_reduced(ensure_payload(image).raw, _THUMB_SIZE)
+
+
+def _decode_center_crop(raw: bytes) -> np.ndarray:
+    """Decode image bytes to a (_BATCH_CROP, _BATCH_CROP, 3) uint8 center crop.
+
+    Reduced-resolution decode (image_ingest.open_reduced), so a 12 MP
+    photo is never expanded to full resolution. Runs in pool workers.
+    """
+    crop = open_reduced(raw, _BATCH_CROP, box=_CROP_FRAC)
+    return np.asarray(crop, dtype=np.uint8)
+
+
+def _decode_for_batch(raw: bytes) -> tuple:
+    """Pool task: (crop, None) or (None, error message)."""
+    try:
+        return _decode_center_crop(raw), None
+    except Exception as e:
+        return None, str(e) or type(e).__name__
+
+
+_pool = None
+_pool_lock = threading.Lock()
 
 
-def _rgb_to_hsv_array(img: Image.Image) -> np.ndarray:
-    """Convert PIL RGB image to HSV numpy array (H: 0-360, S: 0-100, V: 0-100)."""
-    arr = np.array(img, dtype=np.float32) / 255.0
-    r, g, b = arr[:, :, 0], arr[:, :, 1], arr[:, :, 2]
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: safe inside threaded servers, workers only import this module
+            _pool = ProcessPoolExecutor(
+                max_workers=SOIL_BATCH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _decode_many(raws: list) -> list:
+    """Decode a batch, in the process pool when it is worth the IPC."""
+    global _pool
+    if len(raws) < _INLINE_BATCH or SOIL_BATCH_WORKERS < 2:
+        return [_decode_for_batch(r) for r in raws]
+    chunksize = max(1, len(raws) // (SOIL_BATCH_WORKERS * 4))
+    raws = [r if isinstance(r, bytes) else bytes(r) for r in raws]  # memoryviews don't pickle
+    try:
+        return list(_get_pool().map(_decode_for_batch, raws, chunksize=chunksize))
+    except BrokenProcessPool:
+        logger.warning("Soil decode pool broke — decoding batch in-process")
+        with _pool_lock:
+            _pool = None
+        return [_decode_for_batch(r) for r in raws]
+
+
+def _rgb_to_hsv_array(img) -> np.ndarray:
+    """Convert RGB to HSV (H: 0-360, S: 0-100, V: 0-100).
+
+    Accepts a PIL image or any uint8 array whose last axis is RGB, e.g. a
+    stacked (N, H, W, 3) batch.
+    """
+    arr = np.asarray(img, dtype=np.float32) / 255.0
+    r, g, b = arr[..., 0], arr[..., 1], arr[..., 2]
 
     cmax = np.maximum(np.maximum(r, g), b)
     cmin = np.minimum(np.minimum(r, g), b)
@@ -210,69 +304,55 @@ def _estimate_moisture(mean_s: float, mean_v: float) -> str:
         return "Dry"
 
 
-def _match_soil_profile(mean_h, mean_s, mean_v):
-    """Match mean HSV values to best soil color profile.
+def _match_soil_profiles(mean_h, mean_s, mean_v) -> tuple:
+    """Match N mean-HSV triples to soil profiles in one pass.
 
-    Returns (profile_name, profile_dict, match_score).
+    Scores every image against every profile as an (N, profiles) matrix:
+    hue closeness to the profile's range centre (a hue outside the range
+    disqualifies), plus saturation and brightness bound checks.
+
+    Returns:
+        (profile names list, match scores array)
     """
-    # Priority check: very dark + low saturation → Black Cotton
-    if mean_v < 35 and mean_s < 25:
-        profile = SOIL_COLOR_PROFILES["Black Cotton (Regur)"]
-        # Score higher if darker
-        score = 4.0 + (35 - mean_v) / 35
-        return ("Black Cotton (Regur)", profile, score)
-
-    best_match = None
-    best_score = -1
-
-    for name, profile in SOIL_COLOR_PROFILES.items():
-        if name == "Black Cotton (Regur)":
-            continue  # Already handled above
-        score = 0
-
-        # Hue check
-        h_lo, h_hi = profile.get("hue", (0, 360))
-        if h_lo <= mean_h <= h_hi:
-            # Closer to center of range → higher score
-            h_center = (h_lo + h_hi) / 2
-            h_range = (h_hi - h_lo) / 2
-            h_dist = abs(mean_h - h_center) / max(h_range, 1)
-            score += 3 * (1 - h_dist)
+    h = np.atleast_1d(np.asarray(mean_h, dtype=np.float64))[:, None]
+    s = np.atleast_1d(np.asarray(mean_s, dtype=np.float64))[:, None]
+    v = np.atleast_1d(np.asarray(mean_v, dtype=np.float64))[:, None]
+
+    in_hue = (_P_HUE_LO <= h) & (h <= _P_HUE_HI)
+    h_center = (_P_HUE_LO + _P_HUE_HI) / 2
+    h_range = np.maximum((_P_HUE_HI - _P_HUE_LO) / 2, 1)
+    scores = 3 * (1 - np.abs(h - h_center) / h_range)
+    scores += np.where((s < _P_MIN_SAT) | (s > _P_MAX_SAT), -2, 1)
+    scores += np.where((v < _P_MIN_VAL) | (v > _P_MAX_VAL), -2, 1.5)
+    scores = np.where(in_hue, scores, -np.inf)
+
+    best = np.argmax(scores, axis=1)            # first maximum, as the loop did
+    best_score = scores[np.arange(len(best)), best]
+    h, s, v = h[:, 0], s[:, 0], v[:, 0]
+
+    names, out = [], np.empty(len(best))
+    for i in range(len(best)):
+        if v[i] < 35 and s[i] < 25:
+            # Priority check: very dark + low saturation → Black Cotton
+            names.append(_BLACK_COTTON)
+            out[i] = 4.0 + (35 - v[i]) / 35    # Score higher if darker
+        elif best_score[i] < 1:
+            # Nothing matched well: brightness-based heuristic
+            names.append(_BLACK_COTTON if v[i] < 30 else "Sandy" if v[i] > 65 else "Loamy")
+            out[i] = 1.0
         else:
-            continue  # Hue mismatch is disqualifying
+            names.append(_SCORED_PROFILES[best[i]])
+            out[i] = best_score[i]
+    return names, out
 
-        # Saturation checks
-        min_sat = profile.get("min_sat", 0)
-        max_sat = profile.get("max_sat", 100)
-        if mean_s < min_sat or mean_s > max_sat:
-            score -= 2
-        else:
-            score += 1
 
-        # Brightness checks
-        min_val = profile.get("min_val", 0)
-        max_val = profile.get("max_val", 100)
-        if mean_v < min_val or mean_v > max_val:
-            score -= 2
-        else:
-            score += 1.5
-
-        if score > best_score:
-            best_score = score
-            best_match = (name, profile, score)
-
-    # Fallback: if nothing matched well, use brightness-based heuristic
-    if best_match is None or best_score < 1:
-        if mean_v < 30:
-            key = "Black Cotton (Regur)"
-        elif mean_v > 65:
-            key = "Sandy"
-        else:
-            key = "Loamy"
-        profile = SOIL_COLOR_PROFILES[key]
-        best_match = (key, profile, 1.0)
+def _match_soil_profile(mean_h, mean_s, mean_v):
+    """Match mean HSV values to best soil color profile.
 
-    return best_match
+    Returns (profile_name, profile_dict, match_score).
+    """
+    names, scores = _match_soil_profiles(mean_h, mean_s, mean_v)
+    return names[0], SOIL_COLOR_PROFILES[names[0]], float(scores[0])
 
 
 def _compute_health_score(profile: dict, moisture: str, std_v: float) -> int:
@@ -409,35 +489,10 @@ def _compute_confidence(match_score: float, std_v: float, std_s: float) -> float
     return round(max(0.25, min(0.80, conf)), 2)
 
 
-def analyze_soil_from_image(image_base64: str) -> dict:
-    """Analyze a soil image using color science (no API required).
-
-    Args:
-        image_base64: Base64-encoded soil image (JPEG/PNG/WEBP).
-
-    Returns:
-        dict with soil analysis results matching the API schema, plus
-        'analysis_method': 'image_color_analysis'.
-    """
-    try:
-        img = _decode_image(image_base64)
-    except Exception as e:
-        logger.error("Failed to decode soil image: %s", e)
-        return {"error": f"Invalid image data: {e}"}
-
-    # Convert to HSV and get center-crop statistics
-    hsv = _rgb_to_hsv_array(img)
-    mean_h, mean_s, mean_v, std_v, std_s = _center_crop_stats(hsv)
-
-    logger.info(
-        "Soil image stats — H:%.1f S:%.1f V:%.1f stdV:%.1f stdS:%.1f",
-        mean_h, mean_s, mean_v, std_v, std_s,
-    )
-
-    # Match to soil profile
-    profile_name, profile, match_score = _match_soil_profile(mean_h, mean_s, mean_v)
-    logger.info("Matched soil profile: %s (score=%.2f)", profile_name, match_score)
-
+def _build_result(profile_name: str, match_score: float, mean_h: float,
+                  mean_s: float, mean_v: float, std_v: float, std_s: float) -> dict:
+    """Assemble the API response for one image's colour statistics."""
+    profile = SOIL_COLOR_PROFILES[profile_name]
     soil_type = profile["soil_type"]
     ph = profile["ph_estimate"]
     moisture = _estimate_moisture(mean_s, mean_v)
@@ -465,7 +520,7 @@ def analyze_soil_from_image(image_base64: str) -> dict:
         "health_score": health,
         "deficiencies": _detect_deficiencies(profile),
         "recommendations": _generate_recommendations(profile, moisture, ph),
-        "suitable_crops": CROP_MAP.get(soil_type, ["Consult local agronomist"]),
+        "suitable_crops": _CROP_TABLE.lookup(soil_type, ph),
         "confidence": confidence,
         "analysis_method": "image_color_analysis",
         "_debug": {
@@ -475,3 +530,92 @@ def analyze_soil_from_image(image_base64: str) -> dict:
             "std_s": round(std_s, 1),
         },
     }
+
+
+def analyze_soil_from_image(image) -> dict:
+    """Analyze a soil image using color science (no API required).
+
+    Args:
+        image: ImagePayload, raw bytes or base64 string (JPEG/PNG/WEBP).
+
+    Returns:
+        dict with soil analysis results matching the API schema, plus
+        'analysis_method': 'image_color_analysis'.
+    """
+    try:
+        img = _decode_image(image)
+    except ImageError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        logger.error("Failed to decode soil image: %s", e)
+        return {"error": f"Invalid image data: {e}"}
+
+    # Convert to HSV and get center-crop statistics
+    hsv = _rgb_to_hsv_array(img)
+    mean_h, mean_s, mean_v, std_v, std_s = _center_crop_stats(hsv)
+
+    logger.info(
+        "Soil image stats — H:%.1f S:%.1f V:%.1f stdV:%.1f stdS:%.1f",
+        mean_h, mean_s, mean_v, std_v, std_s,
+    )
+
+    # Match to soil profile
+    profile_name, profile, match_score = _match_soil_profile(mean_h, mean_s, mean_v)
+    logger.info("Matched soil profile: %s (score=%.2f)", profile_name, match_score)
+
+    return _build_result(profile_name, match_score, mean_h, mean_s, mean_v, std_v, std_s)
+
+
+def analyze_soil_images(images: list) -> dict:
+    """Analyze many soil photos (e.g. one field survey) in one pass.
+
+    Args:
+        images: ImagePayloads, raw image bytes or base64 strings.
+
+    Returns:
+        dict with:
+          results — one analysis per image, in input order ({"error"} for
+                    images that could not be decoded)
+          summary — dominant soil type across decoded images and its share
+    """
+    raws, results = [], [None] * len(images)
+    for i, image in enumerate(images):
+        try:
+            raws.append((i, ensure_payload(image).raw))
+        except ImageError as e:
+            results[i] = {"error": str(e)}
+
+    decoded = _decode_many([raw for _, raw in raws])
+    ok_index, crops = [], []
+    for (i, _), (crop, err) in zip(raws, decoded):
+        if crop is None:
+            results[i] = {"error": f"Invalid image data: {err}"}
+        else:
+            ok_index.append(i)
+            crops.append(crop)
+
+    if crops:
+        # One HSV conversion and one reduction for the whole batch
+        hsv = _rgb_to_hsv_array(np.stack(crops))
+        means = hsv.mean(axis=(1, 2))
+        stds = hsv.std(axis=(1, 2))
+        names, scores = _match_soil_profiles(means[:, 0], means[:, 1], means[:, 2])
+        for k, i in enumerate(ok_index):
+            results[i] = _build_result(
+                names[k], float(scores[k]),
+                float(means[k, 0]), float(means[k, 1]), float(means[k, 2]),
+                float(stds[k, 2]), float(stds[k, 1]),
+            )
+
+    counts = Counter(r["soil_type"] for r in results if "error" not in r)
+    summary = {"analyzed": len(crops), "failed": len(images) - len(crops)}
+    if counts:
+        dominant, n = counts.most_common(1)[0]
+        summary.update({
+            "dominant_soil_type": dominant,
+            "dominant_share": round(n / len(crops), 2),
+            "soil_type_counts": dict(counts),
+            "suitable_crops": _CROP_TABLE.lookup(dominant),
+        })
+    logger.info("Soil batch: %d images, %d failed", len(images), summary["failed"])
+    return {"results": results, "summary": summary}
@@ -9,6 +9,9 @@ References:
   - Standard NPK classification thresholds (kg/ha)
 """
 import logging
+from bisect import bisect_left
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -261,10 +264,8 @@ def _compute_health_score(n_level: str, p_level: str, k_level: str,
     return max(1, min(10, round(score)))
 
 
-def _get_suitable_crops(soil_type: str, ph: float) -> list:
-    """Get suitable crops based on soil type and pH."""
-    base_crops = CROP_SUITABILITY.get(soil_type, CROP_SUITABILITY.get("Loam", []))
-
+def _filter_crops_by_ph(base_crops: list, ph: float) -> list:
+    """Crops from `base_crops` whose pH window contains `ph` (at most 8)."""
     if ph is None:
         return base_crops[:8]
 
@@ -288,6 +289,65 @@ def _get_suitable_crops(soil_type: str, ph: float) -> list:
     return suitable[:8]
 
 
+class CropSuitabilityTable:
+    """Precomputed suitable-crop lists for every soil type × pH bucket.
+
+    The filtered list only changes where the pH crosses one of the
+    CROP_PH_PREFERENCE window edges, so the pH axis is cut at those edges:
+    bucket 2j+1 is the edge value itself (windows are inclusive) and bucket
+    2j the open interval below it. Each bucket's list is computed once with
+    _filter_crops_by_ph from a representative pH, which makes a lookup a
+    bisect plus an index, with exactly the per-call filter's answers. The
+    table is built from the rule tables at import, so it follows any change
+    to them.
+
+    Args:
+        suitability: soil type → crops, in preference order.
+        default_crops: crops for soil types missing from `suitability`.
+    """
+
+    def __init__(self, suitability: dict, default_crops: list):
+        self.edges = sorted({v for window in CROP_PH_PREFERENCE.values() for v in window})
+        self._edge_array = np.array(self.edges)
+
+        # Representative pH per bucket; the last slot holds "pH unknown"
+        samples = [self.edges[0] - 1.0]
+        for lo, hi in zip(self.edges, self.edges[1:] + [self.edges[-1] + 2.0]):
+            samples += [lo, (lo + hi) / 2]
+        samples.append(None)
+
+        self._lists = {
+            soil: [_filter_crops_by_ph(crops, ph) for ph in samples]
+            for soil, crops in suitability.items()
+        }
+        self._default = [_filter_crops_by_ph(default_crops, ph) for ph in samples]
+
+    def bucket(self, ph: float) -> int:
+        """Bucket index of one pH value (-1 when unknown)."""
+        if ph is None:
+            return -1
+        j = bisect_left(self.edges, ph)
+        return 2 * j + 1 if j < len(self.edges) and self.edges[j] == ph else 2 * j
+
+    def buckets(self, ph: np.ndarray) -> np.ndarray:
+        """Vectorized bucket(); NaN counts as unknown."""
+        j = np.searchsorted(self._edge_array, ph, side="left")
+        on_edge = self._edge_array[np.minimum(j, len(self.edges) - 1)] == ph
+        return np.where(np.isnan(ph), -1, 2 * j + on_edge)
+
+    def lookup(self, soil_type: str, ph: float = None) -> list:
+        """Suitable crops for a soil type at a pH (None = no pH filter)."""
+        return list(self._lists.get(soil_type, self._default)[self.bucket(ph)])
+
+
+_CROP_TABLE = CropSuitabilityTable(CROP_SUITABILITY, CROP_SUITABILITY.get("Loam", []))
+
+
+def _get_suitable_crops(soil_type: str, ph: float) -> list:
+    """Get suitable crops based on soil type and pH."""
+    return _CROP_TABLE.lookup(soil_type, ph)
+
+
 def analyze_soil_rulebased(soil_data: dict) -> dict:
     """Analyze soil from manual test report values using ICAR rules.
 
@@ -300,6 +360,15 @@ def analyze_soil_rulebased(soil_data: dict) -> dict:
     Returns:
         dict matching the same schema as Gemini-based analysis.
     """
+    result = _build_report(soil_data)
+    if "error" not in result:
+        logger.info("Rule-based soil analysis: health_score=%d, deficiencies=%s",
+                    result["health_score"], result["deficiencies"])
+    return result
+
+
+def _build_report(soil_data: dict) -> dict:
+    """The report for one sample (analyze_soil_rulebased without logging)."""
     ph = soil_data.get("ph")
     nitrogen = soil_data.get("nitrogen")
     phosphorus = soil_data.get("phosphorus")
@@ -409,7 +478,102 @@ def analyze_soil_rulebased(soil_data: dict) -> dict:
         "analysis_method": "rule_based",  # flag so frontend knows
     }
 
-    logger.info("Rule-based soil analysis: health_score=%d, deficiencies=%s",
-                health_score, deficiencies)
-
     return result
+
+
+# ─── Batch analysis (lab bulk uploads) ────────────────────────────────────
+# A report depends on a sample's values only through their classification
+# (N/P/K/OC levels, organic matter level, pH class, whether the pH is out of
+# the 5.5–8.5 band, its CropSuitabilityTable bucket) and its soil type;
+# ph_estimate is the one field copied from the sample itself. The batch path
+# classifies whole columns with np.digitize, groups samples with identical
+# classifications, and builds each group's report once with the single-sample
+# rules — a lab file of 100k rows typically has a few hundred groups.
+
+_NUMERIC_FIELDS = ("ph", "nitrogen", "phosphorus", "potassium", "organic_carbon")
+
+# Lower edge of every PH_RANGES bin, then the upper edge of the last one
+_PH_EDGES = np.array([lo for lo, _ in PH_RANGES.values()] + [max(hi for _, hi in PH_RANGES.values())])
+
+
+def _level_codes(values: np.ndarray, low: float, high: float) -> np.ndarray:
+    """Vectorized _classify_npk/_classify_oc: 0/1/2 = Low/Medium/High, -1 = missing.
+
+    A value equal to `high` is still Medium, so the upper bin edge is the
+    next float above it.
+    """
+    codes = np.digitize(values, (low, np.nextafter(high, np.inf)))
+    return np.where(np.isnan(values), -1, codes)
+
+
+def analyze_soil_batch(samples) -> list:
+    """Analyze many soil samples at once (e.g. a testing lab's CSV).
+
+    Args:
+        samples: mapping of column name → array-like, one entry per sample
+            (a pandas DataFrame works). Columns as in analyze_soil_rulebased;
+            a numeric value is missing when NaN, a soil_type when None/NaN/"".
+            Absent columns are missing for every sample.
+
+    Returns:
+        list with one dict per sample, equal to analyze_soil_rulebased() for
+        that sample alone (an error dict when it has no values at all).
+        Samples with the same classification share the nested lists of
+        their report; treat them as read-only.
+    """
+    given = [f for f in (*_NUMERIC_FIELDS, "soil_type") if f in samples]
+    n = len(samples[given[0]]) if given else 0
+    if n == 0:
+        return []
+
+    columns = {
+        f: np.asarray(samples[f], dtype=float) if f in samples else np.full(n, np.nan)
+        for f in _NUMERIC_FIELDS
+    }
+    raw_types = samples["soil_type"] if "soil_type" in samples else [None] * n
+    soil_types = np.array(
+        [t.strip() if isinstance(t, str) else "" for t in raw_types], dtype=object,
+    )
+    type_names, type_codes = np.unique(soil_types, return_inverse=True)
+
+    ph = columns["ph"]
+    ph_imbalance = (ph < 5.5) | (ph > 8.5)
+
+    keys = np.column_stack([
+        _level_codes(columns["nitrogen"], **NPK_THRESHOLDS["nitrogen"]),
+        _level_codes(columns["phosphorus"], **NPK_THRESHOLDS["phosphorus"]),
+        _level_codes(columns["potassium"], **NPK_THRESHOLDS["potassium"]),
+        _level_codes(columns["organic_carbon"], **OC_THRESHOLDS),
+        # Organic matter ≈ OC × 1.724, Low below 1 %, High above 2 %
+        _level_codes(columns["organic_carbon"] * 1.724, 1.0, 2.0),
+        np.where(np.isnan(ph), -1, np.digitize(ph, _PH_EDGES)),
+        ph_imbalance,
+        _CROP_TABLE.buckets(ph),
+        type_codes,
+    ])
+    _, group = np.unique(keys, axis=0, return_inverse=True)
+    group = group.ravel()
+    _, first = np.unique(group, return_index=True)
+
+    reports = []
+    for row in first:
+        soil_data = {
+            f: float(columns[f][row]) for f in _NUMERIC_FIELDS if not np.isnan(columns[f][row])
+        }
+        if soil_types[row]:
+            soil_data["soil_type"] = soil_types[row]
+        if soil_data:
+            reports.append(_build_report(soil_data))
+        else:
+            reports.append({"error": "At least one soil parameter is required."})
+
+    results = []
+    for g, ph_value in zip(group.tolist(), ph.tolist()):
+        result = dict(reports[g])
+        if ph_value == ph_value and "error" not in result:  # not NaN
+            result["ph_estimate"] = ph_value
+        results.append(result)
+
+    logger.info("Rule-based batch soil analysis: %d samples, %d distinct reports",
+                n, len(reports))
+    return results
@@ -1,15 +1,18 @@
 """
 AgriScheme Backend — Soil Health Analysis Service.
 Uses offline color analysis (primary) for soil images, with optional
-Gemini Vision fallback. Manual soil test analysis uses ICAR rule engine.
+Gemini Vision fallback. Manual soil test analysis uses ICAR rule engine;
+lab CSV uploads go through its vectorized batch path.
 """
 import os
-import base64
+import re
 import json
 import logging
 import requests
 from dotenv import load_dotenv
 
+from services.image_ingest import ImageError, ensure_payload
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -20,14 +23,28 @@ GEMINI_URL = (
     "gemini-2.5-flash:generateContent"
 )
 
-MAX_IMAGE_SIZE = 4 * 1024 * 1024  # 4 MB
-
 # Choose image analysis mode: "offline" (default) | "gemini" | "hybrid"
 # "offline"  — uses color analysis only (fast, free, no API needed)
 # "gemini"   — uses Gemini Vision only (needs API key + network)
 # "hybrid"   — tries offline first; falls back to Gemini on low confidence
 IMAGE_ANALYSIS_MODE = os.getenv("SOIL_IMAGE_MODE", "offline").lower()
 
+# Lab CSV uploads: samples per file, and rows analysed per vectorized batch
+SOIL_CSV_MAX_ROWS = int(os.getenv("SOIL_CSV_MAX_ROWS", "200000"))
+_CSV_CHUNK_ROWS = 10_000
+
+# Normalised CSV header → soil_data field
+_CSV_COLUMNS = {
+    "ph": "ph",
+    "nitrogen": "nitrogen", "n": "nitrogen",
+    "phosphorus": "phosphorus", "p": "phosphorus",
+    "potassium": "potassium", "k": "potassium",
+    "organic_carbon": "organic_carbon", "oc": "organic_carbon",
+    "soil_type": "soil_type",
+    "sample_id": "sample_id",
+}
+_NUMERIC_FIELDS = ["ph", "nitrogen", "phosphorus", "potassium", "organic_carbon"]
+
 
 def _clean_gemini_json(raw_text: str) -> dict:
     """Parse Gemini response text into a dict, handling markdown fences,
@@ -73,22 +90,18 @@ def _clean_gemini_json(raw_text: str) -> dict:
     return json.loads(cleaned)
 
 
-def _analyze_soil_image_gemini(image_base64: str, language: str = "en") -> dict:
-    """Analyze a soil image using Gemini Vision (API-based fallback)."""
+def _analyze_soil_image_gemini(image, language: str = "en") -> dict:
+    """Analyze a soil image using Gemini Vision (API-based fallback).
+
+    `image` is an ImagePayload (or base64 string).
+    """
     if not GEMINI_API_KEY:
         return {"error": "GEMINI_API_KEY is not configured on the server."}
 
     try:
-        raw_bytes = base64.b64decode(image_base64)
-    except Exception:
-        return {"error": "Invalid base64 image data."}
-
-    # Detect MIME type
-    mime_type = "image/jpeg"
-    if raw_bytes[:8] == b'\x89PNG\r\n\x1a\n':
-        mime_type = "image/png"
-    elif raw_bytes[:4] == b'RIFF' and raw_bytes[8:12] == b'WEBP':
-        mime_type = "image/webp"
+        payload_image = ensure_payload(image)
+    except ImageError as e:
+        return {"error": str(e)}
 
     lang_map = {"en": "English", "hi": "Hindi", "ta": "Tamil", "ml": "Malayalam"}
     lang_name = lang_map.get(language, "English")
@@ -121,7 +134,10 @@ If the image is not soil, return health_score=0 and appropriate error in color_a
         "contents": [{
             "parts": [
                 {"text": system_prompt},
-                {"inline_data": {"mime_type": mime_type, "data": image_base64}},
+                {"inline_data": {
+                    "mime_type": payload_image.mime_type,
+                    "data": payload_image.base64,
+                }},
             ]
         }],
         "generationConfig": {"temperature": 0.2, "maxOutputTokens": 2048},
@@ -176,7 +192,7 @@ If the image is not soil, return health_score=0 and appropriate error in color_a
         return {"error": f"Analysis failed: {e}"}
 
 
-def analyze_soil_image(image_base64: str, language: str = "en") -> dict:
+def analyze_soil_image(image, language: str = "en") -> dict:
     """Analyze a soil image.
 
     Mode is controlled by SOIL_IMAGE_MODE env var (default: 'offline'):
@@ -185,36 +201,32 @@ def analyze_soil_image(image_base64: str, language: str = "en") -> dict:
       - 'hybrid':  Tries offline first; if confidence < 0.40, falls back to Gemini
 
     Args:
-        image_base64: Base64-encoded soil image (JPEG/PNG/WEBP).
+        image: ImagePayload or base64-encoded soil image (JPEG/PNG/WEBP).
+            Decoded once here and shared by the offline and Gemini paths.
         language: Language code (en, hi, ta, ml).
 
     Returns:
         dict with soil analysis results or 'error' key.
     """
-    if not image_base64:
-        return {"error": "No image provided."}
-
     try:
-        raw_bytes = base64.b64decode(image_base64)
-        if len(raw_bytes) > MAX_IMAGE_SIZE:
-            return {"error": "Image too large. Maximum 4MB allowed."}
-    except Exception:
-        return {"error": "Invalid base64 image data."}
+        image = ensure_payload(image)
+    except ImageError as e:
+        return {"error": str(e)}
 
     # --- Gemini-only mode ---
     if IMAGE_ANALYSIS_MODE == "gemini":
-        return _analyze_soil_image_gemini(image_base64, language)
+        return _analyze_soil_image_gemini(image, language)
 
     # --- Offline color analysis ---
     from services.soil_image_analyzer import analyze_soil_from_image
 
-    offline_result = analyze_soil_from_image(image_base64)
+    offline_result = analyze_soil_from_image(image)
     if "error" in offline_result:
         logger.warning("Offline image analysis failed: %s", offline_result["error"])
         # Try Gemini as fallback if available
         if GEMINI_API_KEY:
             logger.info("Falling back to Gemini Vision")
-            return _analyze_soil_image_gemini(image_base64, language)
+            return _analyze_soil_image_gemini(image, language)
         return offline_result
 
     # --- Hybrid mode: check confidence ---
@@ -225,7 +237,7 @@ def analyze_soil_image(image_base64: str, language: str = "en") -> dict:
                 "Offline confidence %.2f < 0.40 — upgrading to Gemini Vision",
                 confidence,
             )
-            gemini_result = _analyze_soil_image_gemini(image_base64, language)
+            gemini_result = _analyze_soil_image_gemini(image, language)
             if "error" not in gemini_result:
                 return gemini_result
             # If Gemini also fails, return offline result anyway
@@ -234,6 +246,49 @@ def analyze_soil_image(image_base64: str, language: str = "en") -> dict:
     return offline_result
 
 
+def analyze_soil_images(images: list, language: str = "en") -> dict:
+    """Analyze a batch of soil photos (e.g. a field survey) in one call.
+
+    Offline analysis runs as one vectorised batch
+    (soil_image_analyzer.analyze_soil_images); SOIL_IMAGE_MODE is honoured
+    per image for 'gemini' and for 'hybrid' upgrades of low-confidence
+    results.
+
+    Returns:
+        dict with results[] (input order, per-image 'error' on failure)
+        and summary{}.
+    """
+    payloads, results = [], [None] * len(images)
+    for i, image in enumerate(images):
+        try:
+            payloads.append((i, ensure_payload(image)))
+        except ImageError as e:
+            results[i] = {"error": str(e)}
+
+    if IMAGE_ANALYSIS_MODE == "gemini":
+        for i, payload in payloads:
+            results[i] = _analyze_soil_image_gemini(payload, language)
+        return {"results": results, "summary": {
+            "analyzed": sum(1 for r in results if "error" not in r),
+            "failed": sum(1 for r in results if "error" in r),
+        }}
+
+    from services.soil_image_analyzer import analyze_soil_images as analyze_offline
+
+    batch = analyze_offline([payload for _, payload in payloads])
+    for (i, payload), result in zip(payloads, batch["results"]):
+        if IMAGE_ANALYSIS_MODE == "hybrid" and GEMINI_API_KEY and \
+                "error" not in result and result.get("confidence", 0) < 0.40:
+            gemini_result = _analyze_soil_image_gemini(payload, language)
+            if "error" not in gemini_result:
+                result = gemini_result
+        results[i] = result
+
+    summary = batch["summary"]
+    summary["failed"] = sum(1 for r in results if "error" in r)
+    return {"results": results, "summary": summary}
+
+
 def analyze_soil_manual(soil_data: dict, language: str = "en") -> dict:
     """Analyze soil from manual test report values using ICAR rule-based engine.
 
@@ -272,3 +327,107 @@ def analyze_soil_manual(soil_data: dict, language: str = "en") -> dict:
         return {"error": "At least one soil parameter is required."}
 
     return analyze_soil_rulebased(cleaned)
+
+
+def analyze_soil_csv(stream, max_rows: int = None):
+    """Analyze a soil testing lab's CSV upload, one result per sample.
+
+    The header row names the columns (case-insensitive): ph, nitrogen (n),
+    phosphorus (p), potassium (k), organic_carbon (oc), soil_type and an
+    optional sample_id; other columns are ignored. Empty cells are missing
+    values. The file is read and analysed in chunks of 10k rows, so memory
+    stays flat however long it is.
+
+    Args:
+        stream: Binary file-like object with the CSV (UTF-8, BOM allowed).
+        max_rows: Samples accepted per file (default SOIL_CSV_MAX_ROWS).
+
+    Returns:
+        Iterator of dicts: per sample {row, sample_id?, **report} or
+        {row, sample_id?, error}; after the last sample {"summary": {...}}.
+        A parse error or too many rows mid-file yields an {"error"} item
+        before the summary.
+
+    Raises:
+        ValueError: empty/unreadable file or no soil columns — raised
+        before anything is analysed, so a route can still answer 400.
+    """
+    import pandas as pd
+
+    try:
+        reader = pd.read_csv(
+            stream, dtype=str, chunksize=_CSV_CHUNK_ROWS,
+            encoding="utf-8-sig", skipinitialspace=True,
+        )
+        first = next(reader)
+    except pd.errors.EmptyDataError:
+        raise ValueError("CSV file is empty.") from None
+    except (pd.errors.ParserError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Could not parse CSV: {exc}") from None
+
+    rename = {}
+    for column in first.columns:
+        field = _CSV_COLUMNS.get(re.sub(r"[\s\-]+", "_", str(column).strip().lower()))
+        if field and field not in rename.values():
+            rename[column] = field
+    if not set(rename.values()) - {"sample_id"}:
+        raise ValueError(
+            "CSV needs at least one of the columns: "
+            "ph, nitrogen, phosphorus, potassium, organic_carbon, soil_type."
+        )
+
+    return _iter_csv_results(first, reader, rename, max_rows or SOIL_CSV_MAX_ROWS)
+
+
+def _iter_csv_results(first, reader, rename: dict, max_rows: int):
+    import numpy as np
+    import pandas as pd
+    from services.soil_rules_engine import analyze_soil_batch
+
+    rows = failed = 0
+    chunk = first
+    while chunk is not None:
+        truncated = rows + len(chunk) > max_rows
+        if truncated:
+            chunk = chunk.iloc[: max_rows - rows]
+        chunk = chunk.rename(columns=rename)[list(rename.values())]
+
+        errors = [None] * len(chunk)
+        samples = {}
+        for field in _NUMERIC_FIELDS:
+            if field not in chunk:
+                continue
+            values = pd.to_numeric(chunk[field], errors="coerce").to_numpy(dtype=float)
+            invalid = chunk[field].notna().to_numpy() & ~np.isfinite(values)
+            for i in np.flatnonzero(invalid):
+                errors[i] = errors[i] or f"Invalid value for {field}: must be a number."
+            values[invalid] = np.nan
+            samples[field] = values
+        if "soil_type" in chunk:
+            samples["soil_type"] = chunk["soil_type"].tolist()
+
+        sample_ids = chunk["sample_id"].tolist() if "sample_id" in chunk else None
+        for i, report in enumerate(analyze_soil_batch(samples)):
+            rows += 1
+            item = {"row": rows}
+            if sample_ids is not None:
+                item["sample_id"] = sample_ids[i] if isinstance(sample_ids[i], str) else None
+            if errors[i]:
+                item["error"] = errors[i]
+            else:
+                item.update(report)
+            failed += "error" in item
+            yield item
+
+        try:
+            chunk = next(reader, None)
+            if rows >= max_rows:
+                if truncated or chunk is not None:
+                    yield {"error": f"Too many rows. Maximum {max_rows} samples per file."}
+                break
+        except (pd.errors.ParserError, UnicodeDecodeError) as exc:
+            yield {"error": f"Could not parse CSV after row {rows}: {exc}"}
+            break
+
+    logger.info("Soil CSV analysed: %d samples, %d failed", rows, failed)
+    yield {"summary": {"samples": rows, "analyzed": rows - failed, "failed": failed}}
@@ -8,14 +8,23 @@ The model is trained on real ICRISAT/DES published statistics (2001-2022).
 Run `python scripts/train_yield_model.py` to retrain.
 
 Falls back to a lightweight in-memory model if the pre-trained model is missing.
+
+Hot-swap: the model file's mtime is checked at most every
+YIELD_MODEL_RELOAD_INTERVAL seconds (default 30; 0 disables). When the
+training script replaces the model, running predictors reload it in place.
 """
 
 import os
+import time
 import pickle
 import logging
+import threading
 
 import numpy as np
 
+from config import YIELD_MODEL_RELOAD_INTERVAL
+from services.forest_engine import FlatForest
+
 logger = logging.getLogger(__name__)
 
 # Paths
@@ -87,8 +96,44 @@ class YieldPredictor:
     def __init__(self):
         self.model = None
         self.encoders = None
+        self.forest = None
         self._is_trained = False
+        self._lock = threading.Lock()
+        self._model_mtime = None
+        self._next_reload_check = time.monotonic() + YIELD_MODEL_RELOAD_INTERVAL
         self._load_model()
+        self._build_forest()
+
+    def _build_forest(self):
+        """Flatten the trained forest for fast NumPy inference."""
+        if not self._is_trained:
+            return
+        try:
+            self.forest = FlatForest.from_estimator(self.model)
+        except Exception as e:
+            logger.warning("Could not flatten yield model, using sklearn: %s", e)
+            self.forest = None
+
+    @staticmethod
+    def _read_artifacts():
+        """Read model + encoders from disk. Returns (model, encoders, mtime)."""
+        mtime = os.stat(_MODEL_PATH).st_mtime_ns
+        with open(_MODEL_PATH, "rb") as f:
+            model = pickle.load(f)
+        with open(_ENCODER_PATH, "rb") as f:
+            encoders = pickle.load(f)
+        return model, encoders, mtime
+
+    def _apply_artifacts(self, model, encoders, mtime, forest=None):
+        """Install a loaded model (caller holds the lock or owns self)."""
+        self.model = model
+        self.encoders = encoders
+        self.crop_encoder = encoders["crop_encoder"]
+        self.state_encoder = encoders["state_encoder"]
+        self.season_encoder = encoders["season_encoder"]
+        self.forest = forest
+        self._model_mtime = mtime
+        self._is_trained = True
 
     def _load_model(self):
         """Load pre-trained model and encoders from disk."""
@@ -102,15 +147,7 @@ class YieldPredictor:
             return
 
         try:
-            with open(_MODEL_PATH, "rb") as f:
-                self.model = pickle.load(f)
-            with open(_ENCODER_PATH, "rb") as f:
-                self.encoders = pickle.load(f)
-
-            self.crop_encoder = self.encoders["crop_encoder"]
-            self.state_encoder = self.encoders["state_encoder"]
-            self.season_encoder = self.encoders["season_encoder"]
-            self._is_trained = True
+            self._apply_artifacts(*self._read_artifacts())
 
             metrics = self.encoders.get("metrics", {})
             r2 = metrics.get("test_r2", "N/A")
@@ -124,6 +161,48 @@ class YieldPredictor:
             logger.error("Failed to load yield model: %s", e)
             self._train_fallback()
 
+    def reload(self) -> bool:
+        """Load the model from disk and swap it in without a restart.
+
+        The new model is fully loaded and flattened before the swap, so
+        in-flight predictions keep using the old one. On failure the
+        current model stays active.
+
+        Returns:
+            True if a new model was installed.
+        """
+        try:
+            model, encoders, mtime = self._read_artifacts()
+            forest = FlatForest.from_estimator(model)
+        except Exception as e:
+            logger.error("Yield model reload failed, keeping current model: %s", e)
+            return False
+
+        with self._lock:
+            self._apply_artifacts(model, encoders, mtime, forest)
+        logger.info(
+            "Yield model hot-swapped (%d trees, trained_at=%s)",
+            forest.n_trees, encoders.get("trained_at", "unknown"),
+        )
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Reload when the model file on disk is newer than the loaded one."""
+        if YIELD_MODEL_RELOAD_INTERVAL <= 0:
+            return False
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return False
+        self._next_reload_check = now + YIELD_MODEL_RELOAD_INTERVAL
+
+        try:
+            mtime = os.stat(_MODEL_PATH).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._model_mtime:
+            return False
+        return self.reload()
+
     def _train_fallback(self):
         """Train a lightweight in-memory model as fallback."""
         try:
@@ -201,26 +280,35 @@ class YieldPredictor:
         Returns:
             dict with predicted yield, confidence interval, and metadata.
         """
+        self.reload_if_changed()
+
         if not self._is_trained:
             return {"error": "Model not trained. Run: python scripts/train_yield_model.py"}
 
+        # Consistent snapshot in case a hot-swap lands mid-request
+        with self._lock:
+            model, forest = self.model, self.forest
+            crop_encoder = self.crop_encoder
+            state_encoder = self.state_encoder
+            season_encoder = self.season_encoder
+
         # Validate crop
         try:
-            crop_enc = self.crop_encoder.transform([crop])[0]
+            crop_enc = crop_encoder.transform([crop])[0]
         except ValueError:
-            known = sorted(list(self.crop_encoder.classes_))
+            known = sorted(list(crop_encoder.classes_))
             return {"error": f"Unknown crop '{crop}'. Known: {known}"}
 
         # Validate state
         try:
-            state_enc = self.state_encoder.transform([state])[0]
+            state_enc = state_encoder.transform([state])[0]
         except ValueError:
-            known = sorted(list(self.state_encoder.classes_))
+            known = sorted(list(state_encoder.classes_))
             return {"error": f"Unknown state '{state}'. Known: {known}"}
 
         # Validate season
         try:
-            season_enc = self.season_encoder.transform([season])[0]
+            season_enc = season_encoder.transform([season])[0]
         except ValueError:
             return {"error": f"Unknown season '{season}'. Must be Kharif, Rabi, or Zaid."}
 
@@ -235,15 +323,23 @@ class YieldPredictor:
         X_input = np.array([[current_year, rainfall, irrigation,
                              crop_enc, state_enc, season_enc]])
 
-        predicted_yield = float(self.model.predict(X_input)[0])
+        # Mean + 10th/90th percentile of tree predictions in one pass
+        if forest is not None:
+            mean, (p10, p90) = forest.predict_quantiles(X_input, (0.10, 0.90))
+            predicted_yield, p10, p90 = float(mean[0]), float(p10[0]), float(p90[0])
+        else:
+            predicted_yield = float(model.predict(X_input)[0])
+            tree_predictions = [
+                float(tree.predict(X_input)[0]) for tree in model.estimators_
+            ]
+            p10 = float(np.percentile(tree_predictions, 10))
+            p90 = float(np.percentile(tree_predictions, 90))
+
         predicted_yield = max(0.01, predicted_yield)  # Floor at 0.01
 
         # Confidence interval from tree predictions
-        tree_predictions = [
-            float(tree.predict(X_input)[0]) for tree in self.model.estimators_
-        ]
-        lower = max(0.01, float(np.percentile(tree_predictions, 10)))
-        upper = float(np.percentile(tree_predictions, 90))
+        lower = max(0.01, p10)
+        upper = p90
 
         # Ensure bounds always contain the prediction
         lower = min(lower, predicted_yield)
@@ -270,7 +366,7 @@ class YieldPredictor:
             "category": category,
             "average_yield": round(avg, 2),
             "model": "RandomForest",
-            "n_estimators": len(self.model.estimators_),
+            "n_estimators": len(model.estimators_),
             "data_source": "ICRISAT/DES GOI Statistics (2001-2022)",
         }
 
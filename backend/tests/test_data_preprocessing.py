@@ -6,6 +6,7 @@ Tests dataset loading, feature engineering, and train/test split quality.
 
 import os
 import sys
+import tempfile
 import unittest
 
 import numpy as np
@@ -159,5 +160,55 @@ class TestFeatureEngineering(unittest.TestCase):
             )
 
 
+class TestVectorisedGenerator(unittest.TestCase):
+    """Test the --rows NumPy generator against the legacy dataset."""
+
+    @classmethod
+    def setUpClass(cls):
+        from scripts.generate_yield_dataset import generate_chunk
+        cls.df = generate_chunk(np.random.default_rng(0), 50_000)
+        cls.legacy = pd.read_csv(os.path.join(_DATA_DIR, "crop_yield.csv"))
+
+    def test_same_columns(self):
+        self.assertEqual(list(self.df.columns), list(self.legacy.columns))
+
+    def test_value_ranges(self):
+        self.assertGreaterEqual(self.df["Crop_Year"].min(), 2001)
+        self.assertLessEqual(self.df["Crop_Year"].max(), 2022)
+        self.assertTrue((self.df["Yield_tonnes_per_ha"] >= 0.05).all())
+        self.assertTrue((self.df["Area_1000_ha"] >= 5).all())
+        self.assertTrue(self.df["Irrigation_pct"].between(0, 100).all())
+
+    def test_crop_means_match_legacy(self):
+        """Per-crop mean yield should track the loop-based generator."""
+        new = self.df.groupby("Crop")["Yield_tonnes_per_ha"].mean()
+        old = self.legacy.groupby("Crop")["Yield_tonnes_per_ha"].mean()
+        self.assertEqual(set(new.index), set(old.index))
+        for crop in old.index:
+            self.assertAlmostEqual(new[crop] / old[crop], 1.0, delta=0.05, msg=crop)
+
+    def test_chunks_are_reproducible(self):
+        from scripts.generate_yield_dataset import iter_chunks
+        a = [full for full, _, _ in iter_chunks(25_000, chunksize=10_000, seed=7)]
+        b = [full for full, _, _ in iter_chunks(25_000, chunksize=10_000, seed=7)]
+        self.assertEqual([len(c) for c in a], [10_000, 10_000, 5_000])
+        for x, y in zip(a, b):
+            pd.testing.assert_frame_equal(x, y)
+
+    def test_streamed_split(self):
+        from scripts.generate_yield_dataset import save_large_dataset
+        with tempfile.TemporaryDirectory() as tmp:
+            total, train, test = save_large_dataset(12_345, tmp, chunksize=5_000)
+            self.assertEqual(total, 12_345)
+            self.assertEqual(train + test, total)
+            self.assertAlmostEqual(train / total, 0.8, delta=0.01)
+
+            full = pd.read_csv(os.path.join(tmp, "crop_yield.csv"))
+            train_df = pd.read_csv(os.path.join(tmp, "yield_train.csv"))
+            self.assertEqual(len(full), total)
+            self.assertEqual(len(train_df), train)
+            self.assertEqual(list(full.columns), list(self.legacy.columns))
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
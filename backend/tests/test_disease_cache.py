@@ -0,0 +1,231 @@
+"""
+Unit Tests — Near-duplicate photo cache for disease detection.
+
+Tests:
+  1. pHash is stable under re-compression / resizing, far apart otherwise
+  2. BK-tree nearest-neighbour search agrees with a linear scan
+  3. Results persist across instances and are shared between them
+  4. Results never shared across crop hints; age / row-count eviction;
+     one connection per instance
+  5. detect_disease answers near-duplicates without calling Gemini
+"""
+
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import disease_cache, disease_service
+from services.disease_cache import BKTree, DiseaseResultCache, hamming, perceptual_hash
+
+
+def _leaf(seed: int) -> Image.Image:
+    """A smooth random colour field, distinct per seed."""
+    rng = np.random.default_rng(seed)
+    small = (rng.random((60, 80, 3)) * 255).astype(np.uint8)
+    img = Image.fromarray(small).resize((640, 480), Image.BICUBIC)
+    return img.filter(ImageFilter.GaussianBlur(6))
+
+
+def _jpeg(img: Image.Image, quality: int = 90) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+class TestPerceptualHash(unittest.TestCase):
+
+    def test_near_duplicates_close(self):
+        img = _leaf(1)
+        h = perceptual_hash(_jpeg(img))
+        self.assertLessEqual(hamming(h, perceptual_hash(_jpeg(img, quality=40))), 2)
+        self.assertLessEqual(hamming(h, perceptual_hash(_jpeg(img.resize((320, 240))))), 2)
+
+    def test_different_images_far(self):
+        h = perceptual_hash(_jpeg(_leaf(1)))
+        for seed in range(2, 8):
+            self.assertGreater(hamming(h, perceptual_hash(_jpeg(_leaf(seed)))), 12)
+
+    def test_undecodable(self):
+        with self.assertRaises(Exception):
+            perceptual_hash(b"not an image")
+
+
+class TestBKTree(unittest.TestCase):
+
+    def test_matches_linear_scan(self):
+        rng = np.random.default_rng(5)
+        keys = [int(k) for k in rng.integers(0, 2**63, 2000, dtype=np.int64)]
+        tree = BKTree()
+        for i, key in enumerate(keys):
+            tree.add(key, i)
+        self.assertEqual(len(tree), len(set(keys)))
+
+        for _ in range(200):
+            base = keys[int(rng.integers(len(keys)))]
+            flips = rng.choice(64, int(rng.integers(0, 10)), replace=False)
+            query = base
+            for bit in flips:
+                query ^= 1 << int(bit)
+            best = min(hamming(query, k) for k in keys)
+            found = tree.nearest(query, 6)
+            if best > 6:
+                self.assertIsNone(found)
+            else:
+                self.assertEqual(found[0], best)
+                self.assertEqual(hamming(query, keys[found[1]]), best)
+
+    def test_same_hash_replaces(self):
+        tree = BKTree()
+        tree.add(7, "old")
+        tree.add(7, "new")
+        self.assertEqual(len(tree), 1)
+        self.assertEqual(tree.nearest(7, 0), (0, "new"))
+
+
+class TestDiseaseResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_partitioned_by_crop_and_language(self):
+        cache = DiseaseResultCache(self.path, max_distance=4)
+        cache.add(0b1011, "Rice", "en", {"disease_name": "Blast"})
+        self.assertEqual(cache.lookup(0b1010, " rice ", "EN"), (1, {"disease_name": "Blast"}))
+        self.assertIsNone(cache.lookup(0b1011, "Wheat", "en"))
+        self.assertIsNone(cache.lookup(0b1011, "Rice", "hi"))
+        self.assertIsNone(cache.lookup(0b1011 ^ 0b111110000, "Rice", "en"))
+
+    def test_persists_and_shares(self):
+        first = DiseaseResultCache(self.path)
+        second = DiseaseResultCache(self.path)   # another worker, already running
+        self.assertIsNone(second.lookup(2**64 - 1, "", "en"))
+        first.add(2**64 - 1, "", "en", {"disease_name": "Rust"})
+        self.assertEqual(second.lookup(2**64 - 1, "", "en")[1]["disease_name"], "Rust")
+        restarted = DiseaseResultCache(self.path)
+        self.assertEqual(restarted.lookup(2**64 - 2, "", "en")[0], 1)
+
+    def test_different_hints_never_share_results(self):
+        cache = DiseaseResultCache(self.path)
+        hints = ("Brinjal", "Paddy", "Barley", "Tomato", "")
+        for i, hint in enumerate(hints):
+            cache.add(5, hint, "en", {"disease_name": f"d{i}"})
+        for i, hint in enumerate(hints):
+            self.assertEqual(cache.lookup(5, hint, "en")[1]["disease_name"], f"d{i}")
+        self.assertEqual(cache.lookup(5, "  BRINJAL ", "en")[1]["disease_name"], "d0")
+        self.assertIsNone(cache.lookup(5, "Dragonfruit", "en"))
+        self.assertEqual(len(cache._trees), len(hints))
+
+    def test_max_rows_evicts_oldest_batch(self):
+        cache = DiseaseResultCache(self.path, max_distance=0, max_rows=10)
+        other = DiseaseResultCache(self.path, max_distance=0, max_rows=10)
+        for i in range(11):
+            cache.add(1 << i, "", "en", {"n": i})
+        self.assertIsNone(cache.lookup(1 << 1, "", "en"))  # 11 > 10 rows: kept 9 newest
+        self.assertEqual(cache.lookup(1 << 2, "", "en")[1], {"n": 2})
+        self.assertEqual(len(cache._entries), 9)
+        self.assertIsNone(other.lookup(1, "", "en"))     # evicted for every worker
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM disease_results").fetchone()[0], 9)
+
+    def test_max_age_evicts_old_rows(self):
+        cache = DiseaseResultCache(self.path, max_age=100)
+        with patch.object(disease_cache.time, "time", return_value=1000.0):
+            cache.add(1, "Rice", "en", {"n": 1})
+        with patch.object(disease_cache.time, "time", return_value=1095.0):
+            cache.add(2 ** 64 - 1, "Rice", "en", {"n": 2})
+            self.assertEqual(cache.lookup(1, "Rice", "en")[1], {"n": 1})
+        with patch.object(disease_cache.time, "time", return_value=1101.0):
+            self.assertIsNone(cache.lookup(1, "Rice", "en"))
+            self.assertEqual(cache.lookup(2 ** 64 - 1, "Rice", "en")[1], {"n": 2})
+        with patch.object(disease_cache.time, "time", return_value=2000.0):
+            self.assertIsNone(cache.lookup(2 ** 64 - 1, "Rice", "en"))
+        self.assertEqual(cache._trees, {})
+
+    def test_one_connection_per_instance(self):
+        cache = DiseaseResultCache(self.path)
+        with patch.object(disease_cache.sqlite3, "connect", wraps=sqlite3.connect) as connect:
+            cache.lookup(1, "", "en")
+            cache.add(1, "", "en", {"x": 1})
+            threads = [threading.Thread(target=cache.lookup, args=(1, "", "en")) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(connect.call_count, 1)
+
+    def test_disabled(self):
+        cache = DiseaseResultCache(self.path, max_distance=-1)
+        cache.add(1, "", "en", {"x": 1})
+        self.assertIsNone(cache.lookup(1, "", "en"))
+        self.assertFalse(os.path.exists(self.path))
+
+
+def _gemini_response(result: dict):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {
+        "candidates": [{"content": {"parts": [{"text": json.dumps(result)}]}}],
+    }
+    return response
+
+
+class TestDetectDiseaseDedup(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        cache = DiseaseResultCache(os.path.join(self._tmp.name, "cache.sqlite3"))
+        patcher = patch.object(disease_cache, "_cache", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+    def _detect(self, raw, crop_hint="Tomato", language="en"):
+        response = _gemini_response({"is_healthy": False, "disease_name": "Early Blight"})
+        with patch.object(disease_service, "GEMINI_API_KEY", "k"), \
+                patch.object(disease_service.requests, "post", return_value=response) as post:
+            result = disease_service.detect_disease(raw, crop_hint, language)
+        return result, post.call_count
+
+    def test_near_duplicate_reuses_result(self):
+        img = _leaf(3)
+        first, calls = self._detect(_jpeg(img))
+        self.assertEqual((first["disease_name"], calls), ("Early Blight", 1))
+        self.assertNotIn("cached", first)
+
+        again, calls = self._detect(_jpeg(img.resize((400, 300)), quality=50))
+        self.assertEqual(calls, 0)
+        self.assertTrue(again["cached"])
+        self.assertEqual(again["disease_name"], "Early Blight")
+
+    def test_other_image_or_context_calls_gemini(self):
+        img = _leaf(3)
+        self._detect(_jpeg(img))
+        self.assertEqual(self._detect(_jpeg(_leaf(4)))[1], 1)
+        self.assertEqual(self._detect(_jpeg(img), crop_hint="Potato")[1], 1)
+        self.assertEqual(self._detect(_jpeg(img), language="hi")[1], 1)
+
+    def test_errors_not_cached(self):
+        raw = _jpeg(_leaf(6))
+        with patch.object(disease_service, "GEMINI_API_KEY", "k"), \
+                patch.object(disease_service.requests, "post",
+                             return_value=MagicMock(status_code=500, text="boom")):
+            self.assertIn("error", disease_service.detect_disease(raw))
+        self.assertEqual(self._detect(raw, crop_hint="")[1], 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
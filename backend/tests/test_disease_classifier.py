@@ -0,0 +1,257 @@
+"""
+Unit Tests — Offline Crop Disease Classifier.
+
+Tests:
+  1. Features: fixed length, finite, separate healthy from spotted leaves
+  2. Labels: PlantVillage names split, advice matched on the disease part
+  3. classify(): schema, crop-hint restriction, missing / outdated model
+  4. detect_disease modes: offline, hybrid escalation, fallback to Gemini
+"""
+
+import io
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from PIL import Image
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import disease_cache, disease_classifier, disease_service
+from services.disease_classifier import (
+    DISEASE_INFO,
+    FEATURE_NAMES,
+    FEATURE_VERSION,
+    DiseaseClassifier,
+    _disease_info,
+    extract_features,
+    split_label,
+)
+
+
+def _photo(seed: int, spots: int = 0, spot_rgb=(130, 80, 30)) -> bytes:
+    """JPEG of a noisy green leaf with `spots` square lesions."""
+    rng = np.random.default_rng(seed)
+    img = np.empty((300, 400, 3), dtype=np.uint8)
+    img[:] = (50 + rng.integers(0, 30), 120 + rng.integers(0, 50), 40)
+    img = np.clip(img + rng.normal(0, 10, img.shape), 0, 255).astype(np.uint8)
+    for _ in range(spots):
+        x, y, r = rng.integers(20, 380), rng.integers(20, 280), rng.integers(8, 20)
+        img[y - r:y + r, x - r:x + r] = spot_rgb
+    buf = io.BytesIO()
+    Image.fromarray(img).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+_CLASSES = {
+    "Tomato___healthy": dict(spots=0),
+    "Tomato___Early_blight": dict(spots=25, spot_rgb=(130, 80, 30)),
+    "Rice___healthy": dict(spots=0),
+    "Rice___Brown_spot": dict(spots=25, spot_rgb=(90, 50, 20)),
+}
+
+
+def setUpModule():
+    """Train a small model on synthetic photos; temp disease cache."""
+    global _tmp, _model_path
+    _tmp = tempfile.TemporaryDirectory()
+    disease_cache._cache = disease_cache.DiseaseResultCache(
+        os.path.join(_tmp.name, "disease_cache.sqlite3"))
+
+    X, y = [], []
+    for c, (label, kwargs) in enumerate(_CLASSES.items()):
+        for i in range(12):
+            X.append(extract_features(_photo(100 * c + i, **kwargs)))
+            y.append(label)
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(np.array(X), y)
+    _model_path = os.path.join(_tmp.name, "disease_model.pkl")
+    with open(_model_path, "wb") as f:
+        pickle.dump({"model": model, "labels": list(model.classes_),
+                     "feature_version": FEATURE_VERSION,
+                     "metrics": {"test_accuracy": 1.0}}, f)
+
+
+def tearDownModule():
+    disease_cache._cache = None
+    _tmp.cleanup()
+
+
+class TestFeatures(unittest.TestCase):
+    """extract_features on synthetic leaves."""
+
+    def test_shape_and_finite(self):
+        for raw in (_photo(1), _photo(2, spots=30)):
+            features = extract_features(raw)
+            self.assertEqual(features.shape, (len(FEATURE_NAMES),))
+            self.assertTrue(np.isfinite(features).all())
+
+    def test_spots_raise_brown_share(self):
+        brown = FEATURE_NAMES.index("brown_share")
+        self.assertLess(extract_features(_photo(1))[brown],
+                        extract_features(_photo(1, spots=30))[brown])
+
+    def test_grey_and_tiny_images(self):
+        buf = io.BytesIO()
+        Image.new("RGB", (3, 2), (128, 128, 128)).save(buf, format="PNG")
+        self.assertTrue(np.isfinite(extract_features(buf.getvalue())).all())
+
+    def test_invalid_bytes(self):
+        with self.assertRaises(Exception):
+            extract_features(b"not an image")
+
+
+class TestLabels(unittest.TestCase):
+    """Label parsing and advice lookup."""
+
+    def test_split_label(self):
+        self.assertEqual(split_label("Tomato___Early_blight"), ("Tomato", "Early blight"))
+        self.assertEqual(split_label("Corn_(maize)___Common_rust_"), ("Corn (maize)", "Common rust"))
+        self.assertEqual(split_label("Leaf_spot"), ("", "Leaf spot"))
+
+    def test_disease_info(self):
+        self.assertIs(_disease_info("Early blight"), DISEASE_INFO["early blight"])
+        self.assertIs(_disease_info("Northern Leaf Blight"), DISEASE_INFO["leaf blight"])
+        self.assertIs(_disease_info("Bacterial leaf blight"), DISEASE_INFO["bacterial leaf blight"])
+        self.assertEqual(_disease_info("healthy")["severity"], "none")
+        self.assertEqual(_disease_info("Tomato Yellow Leaf Curl Virus")["severity"], "severe")
+        self.assertIn("Krishi Vigyan Kendra", _disease_info("Unknown thing")["treatment"][1])
+
+
+class TestClassify(unittest.TestCase):
+    """DiseaseClassifier on the synthetic model."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.clf = DiseaseClassifier(_model_path)
+
+    def test_schema(self):
+        result = self.clf.classify(_photo(900, spots=25))
+        for key in ("is_healthy", "disease_name", "confidence", "description", "symptoms",
+                    "treatment", "prevention", "severity", "crop_identified"):
+            self.assertIn(key, result)
+        self.assertFalse(result["is_healthy"])
+        self.assertEqual(result["analysis_method"], "offline_classifier")
+        self.assertTrue(0 <= result["confidence"] <= 1)
+        for alt in result["alternatives"]:
+            self.assertIn(alt["label"], _CLASSES)
+
+    def test_healthy(self):
+        result = self.clf.classify(_photo(901))
+        self.assertTrue(result["is_healthy"])
+        self.assertEqual(result["disease_name"], "Healthy")
+        self.assertEqual(result["severity"], "none")
+
+    def test_crop_hint_restricts_classes(self):
+        raw = _photo(902, spots=25)
+        for hint, crop in (("Rice", "Rice"), (" tomato ", "Tomato")):
+            result = self.clf.classify(raw, hint)
+            self.assertEqual(result["crop_identified"], crop)
+            for alt in result["alternatives"]:
+                self.assertTrue(alt["label"].startswith(crop))
+
+    def test_unknown_crop_hint_ignored(self):
+        raw = _photo(903, spots=25)
+        self.assertEqual(self.clf.classify(raw, "Mango")["disease_name"],
+                         self.clf.classify(raw)["disease_name"])
+
+    def test_matches_sklearn(self):
+        with open(_model_path, "rb") as f:
+            model = pickle.load(f)["model"]
+        features = extract_features(_photo(904, spots=10))
+        np.testing.assert_allclose(self.clf.forest.predict_proba(features)[0],
+                                   model.predict_proba(features[None, :])[0], atol=1e-12)
+
+    def test_invalid_image(self):
+        self.assertIn("error", self.clf.classify(b"junk"))
+
+    def test_missing_model(self):
+        clf = DiseaseClassifier(os.path.join(_tmp.name, "nope.pkl"))
+        self.assertFalse(clf.available)
+        self.assertIn("error", clf.classify(_photo(1)))
+
+    def test_feature_version_mismatch(self):
+        with open(_model_path, "rb") as f:
+            artifact = pickle.load(f)
+        artifact["feature_version"] = FEATURE_VERSION - 1
+        path = os.path.join(_tmp.name, "old_model.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(artifact, f)
+        self.assertFalse(DiseaseClassifier(path).available)
+
+
+def _gemini_response(disease="Late blight"):
+    body = ('{"is_healthy": false, "disease_name": "%s", "confidence": 0.9, '
+            '"severity": "severe", "crop_identified": "Tomato"}' % disease)
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"candidates": [{"content": {"parts": [{"text": body}]}}]}
+    return response
+
+
+class TestDetectDiseaseModes(unittest.TestCase):
+    """DISEASE_MODE routing in detect_disease."""
+
+    def setUp(self):
+        disease_cache._cache = disease_cache.DiseaseResultCache(
+            os.path.join(_tmp.name, f"cache_{self._testMethodName}.sqlite3"))
+        patcher = patch.object(disease_classifier, "_classifier", DiseaseClassifier(_model_path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _detect(self, mode, raw, key="k", threshold=0.6):
+        with patch.object(disease_service, "DISEASE_MODE", mode), \
+                patch.object(disease_service, "DISEASE_HYBRID_THRESHOLD", threshold), \
+                patch.object(disease_service, "GEMINI_API_KEY", key), \
+                patch.object(disease_service.requests, "post",
+                             return_value=_gemini_response()) as post:
+            return disease_service.detect_disease(raw, "Tomato"), post
+
+    def test_offline_never_calls_gemini(self):
+        result, post = self._detect("offline", _photo(910, spots=25), threshold=1.1)
+        post.assert_not_called()
+        self.assertEqual(result["analysis_method"], "offline_classifier")
+
+    def test_offline_results_not_cached(self):
+        raw = _photo(911, spots=25)
+        self._detect("offline", raw)
+        result, _ = self._detect("offline", raw)
+        self.assertNotIn("cached", result)
+
+    def test_hybrid_confident_stays_offline(self):
+        result, post = self._detect("hybrid", _photo(912, spots=25), threshold=0.0)
+        post.assert_not_called()
+        self.assertEqual(result["analysis_method"], "offline_classifier")
+
+    def test_hybrid_escalates_low_confidence(self):
+        result, post = self._detect("hybrid", _photo(913, spots=25), threshold=1.1)
+        post.assert_called_once()
+        self.assertEqual(result["disease_name"], "Late blight")
+
+    def test_hybrid_without_key_keeps_offline(self):
+        result, post = self._detect("hybrid", _photo(914, spots=25), key="", threshold=1.1)
+        post.assert_not_called()
+        self.assertEqual(result["analysis_method"], "offline_classifier")
+
+    def test_missing_model_falls_back_to_gemini(self):
+        with patch.object(disease_classifier, "_classifier",
+                          DiseaseClassifier(os.path.join(_tmp.name, "nope.pkl"))):
+            result, post = self._detect("offline", _photo(915))
+            post.assert_called_once()
+            self.assertEqual(result["disease_name"], "Late blight")
+
+            result, post = self._detect("offline", _photo(916), key="")
+            self.assertIn("error", result)
+
+    def test_gemini_mode_untouched(self):
+        with patch.object(disease_classifier, "get_classifier") as get_classifier:
+            result, post = self._detect("gemini", _photo(917))
+        get_classifier.assert_not_called()
+        post.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
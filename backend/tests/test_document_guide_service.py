@@ -0,0 +1,108 @@
+"""
+Unit Tests — Document Guide Search Index.
+
+Tests:
+  1. Exact, alias and display-name lookups
+  2. Token, prefix and misspelling matches
+  3. Unknown names return an error without scanning the guides
+  4. Index scales to many added guides
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import document_guide_service
+from services.document_guide_service import (
+    DOCUMENT_GUIDES,
+    _GuideIndex,
+    _edit_distance,
+    get_document_guide,
+    resolve_document_key,
+)
+
+
+class _NoScanDict(dict):
+    """Fails the test if a lookup iterates the guides."""
+
+    def __iter__(self):
+        raise AssertionError("DOCUMENT_GUIDES was scanned")
+
+    def items(self):
+        raise AssertionError("DOCUMENT_GUIDES was scanned")
+
+
+class TestResolve(unittest.TestCase):
+    """Name → canonical guide key."""
+
+    def test_exact_key(self):
+        self.assertEqual(resolve_document_key("Aadhaar Card"), "aadhaar card")
+
+    def test_alias_resolved(self):
+        self.assertEqual(resolve_document_key("aadhaar"), "aadhaar card")
+        self.assertEqual(resolve_document_key("affidavit"), "self declaration")
+        self.assertEqual(resolve_document_key("bank details"), "bank account details")
+
+    def test_display_name(self):
+        self.assertEqual(resolve_document_key("Kisan Credit Card (KCC)"), "kcc card")
+        self.assertEqual(resolve_document_key("patta"), "land records")
+
+    def test_partial_name(self):
+        self.assertEqual(resolve_document_key("land record copy"), "land records")
+        self.assertEqual(resolve_document_key("voter id card"), "voter id")
+
+    def test_prefix(self):
+        self.assertEqual(resolve_document_key("domic"), "domicile certificate")
+        self.assertEqual(resolve_document_key("photo"), "passport-size photographs")
+
+    def test_misspellings(self):
+        for query in ("adhar card", "aadhar", "bank acount", "ration crad", "domicle"):
+            self.assertIsNotNone(resolve_document_key(query), query)
+        self.assertEqual(resolve_document_key("adhar"), "aadhaar card")
+        self.assertEqual(resolve_document_key("ration crad"), "ration card")
+
+    def test_rare_token_wins(self):
+        # "card" is shared by many guides; "soil" is not
+        self.assertEqual(resolve_document_key("soil card"), "soil health card")
+
+    def test_unknown(self):
+        self.assertIsNone(resolve_document_key("zzzz"))
+        self.assertIn("error", get_document_guide("driving license"))
+
+    def test_no_scan_on_lookup(self):
+        guarded = _NoScanDict(DOCUMENT_GUIDES)
+        with patch.object(document_guide_service, "DOCUMENT_GUIDES", guarded):
+            self.assertIsNone(resolve_document_key("quantum teleport licence"))
+            self.assertEqual(resolve_document_key("adhar"), "aadhaar card")
+
+    def test_guide_payload(self):
+        guide = get_document_guide("adhar")
+        self.assertEqual(guide["document_name"], "Aadhaar Card")
+        self.assertGreater(len(guide["steps"]), 0)
+
+
+class TestIndex(unittest.TestCase):
+    """_GuideIndex building blocks."""
+
+    def test_edit_distance(self):
+        self.assertEqual(_edit_distance("adhar", "aadhaar"), 2)
+        self.assertEqual(_edit_distance("crad", "card"), 1)  # transposition
+        self.assertEqual(_edit_distance("same", "same"), 0)
+
+    def test_many_guides(self):
+        guides = {
+            f"{d} certificate state{i}": {"document_name": f"{d.title()} Certificate State{i}"}
+            for i in range(300) for d in ("income", "caste", "residence")
+        }
+        guides["birth certificate"] = {"document_name": "Birth Certificate"}
+        index = _GuideIndex(guides)
+        self.assertEqual(index.lookup("birth"), "birth certificate")
+        self.assertEqual(index.lookup("caste certificate state123"), "caste certificate state123")
+        self.assertEqual(index.lookup("caste state123"), "caste certificate state123")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
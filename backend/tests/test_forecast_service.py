@@ -0,0 +1,170 @@
+"""
+Unit Tests — Market Price Forecasting Service.
+
+Tests:
+  1. Holt-Winters fit recovers level, trend and weekly seasonality
+  2. Matrix fit matches fitting each series on its own
+  3. Response schema is identical across forecasting methods
+  4. Method selection and validation
+  5. Deterministic, cached synthetic history; a date's price is the same
+     in every window and on every day
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.forecast_service import (
+    _BASE_PRICES,
+    _history_matrix,
+    _holt_winters_fit,
+    _holt_winters_predict,
+    get_price_forecast,
+    get_price_history,
+)
+
+
+def _weekly_series(n_series=5, n_days=60, noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_days)
+    base = rng.uniform(1000, 5000, (n_series, 1))
+    slope = rng.uniform(-2, 2, (n_series, 1))
+    weekly = 0.03 * base * np.sin(2 * np.pi * t / 7)
+    return base + slope * t + weekly + rng.normal(0, noise, (n_series, n_days))
+
+
+class TestHoltWinters(unittest.TestCase):
+    """Core NumPy Holt-Winters engine."""
+
+    def test_noiseless_series_forecast(self):
+        Y = _weekly_series(noise=0.0)
+        fit = _holt_winters_fit(Y[:, :53])
+        yhat, lower, upper = _holt_winters_predict(fit, 7)
+        np.testing.assert_allclose(yhat, Y[:, 53:60], rtol=0.01)
+        self.assertTrue((lower <= yhat).all() and (yhat <= upper).all())
+
+    def test_bounds_widen_with_horizon(self):
+        fit = _holt_winters_fit(_weekly_series(noise=20.0))
+        yhat, lower, upper = _holt_winters_predict(fit, 7)
+        width = upper - lower
+        self.assertTrue((np.diff(width, axis=1) > 0).all())
+
+    def test_matrix_fit_matches_single_fits(self):
+        Y = _weekly_series(n_series=4, noise=15.0, seed=3)
+        joint = _holt_winters_predict(_holt_winters_fit(Y), 7)[0]
+        for i in range(len(Y)):
+            single = _holt_winters_predict(_holt_winters_fit(Y[i:i + 1]), 7)[0]
+            np.testing.assert_allclose(joint[i], single[0])
+
+    def test_short_history_raises(self):
+        with self.assertRaises(ValueError):
+            _holt_winters_fit(np.ones((2, 10)))
+
+
+class TestPriceForecast(unittest.TestCase):
+    """get_price_forecast response contract."""
+
+    _KEYS = {
+        "crop", "base_msp", "unit", "method", "history_source", "historical", "forecast",
+        "trend_pct", "trend", "best_selling_day", "best_predicted_price",
+    }
+
+    def test_default_method_schema(self):
+        result = get_price_forecast("Rice", method="holt_winters")
+        self.assertEqual(set(result), self._KEYS)
+        self.assertEqual(result["method"], "holt_winters")
+        self.assertEqual(len(result["forecast"]), 7)
+        for row in result["forecast"]:
+            self.assertEqual(set(row), {"date", "predicted_price", "lower_bound", "upper_bound"})
+            self.assertLessEqual(row["lower_bound"], row["predicted_price"])
+            self.assertGreaterEqual(row["upper_bound"], row["predicted_price"])
+
+    def test_forecast_near_base_price(self):
+        for crop, base in _BASE_PRICES.items():
+            result = get_price_forecast(crop, method="holt_winters")
+            for row in result["forecast"]:
+                self.assertAlmostEqual(row["predicted_price"] / base, 1.0, delta=0.15, msg=crop)
+
+    def test_statistical_method_schema(self):
+        result = get_price_forecast("Wheat", method="statistical")
+        self.assertEqual(set(result), self._KEYS)
+        self.assertEqual(result["method"], "statistical")
+
+    def test_short_history_uses_statistical(self):
+        result = get_price_forecast("Wheat", days_history=10, method="holt_winters")
+        self.assertEqual(result["method"], "statistical")
+
+    def test_unknown_method(self):
+        self.assertIn("error", get_price_forecast("Rice", method="arima"))
+
+    def test_unknown_crop(self):
+        self.assertIn("error", get_price_forecast("Dragonfruit"))
+
+
+class TestPriceHistory(unittest.TestCase):
+    """Vectorised synthetic history."""
+
+    def test_shape_and_dates(self):
+        crops, dates, prices = get_price_history(60)
+        self.assertEqual(crops, list(_BASE_PRICES))
+        self.assertEqual(prices.shape, (len(_BASE_PRICES), 60))
+        self.assertEqual(len(dates), 60)
+        self.assertLess(dates[-1], date.today().strftime("%Y-%m-%d"))
+
+    def test_prices_near_base(self):
+        crops, _, prices = get_price_history(60)
+        base = np.array([_BASE_PRICES[c] for c in crops])[:, None]
+        ratio = prices / base
+        self.assertTrue(((ratio > 0.9) & (ratio < 1.1)).all())
+
+    def test_cached_and_read_only(self):
+        day = date(2025, 1, 15)
+        a = _history_matrix(day, 30)
+        self.assertIs(a, _history_matrix(day, 30))
+        with self.assertRaises(ValueError):
+            a[1][0, 0] = 0
+
+    def test_different_days_differ(self):
+        a = _history_matrix(date(2025, 1, 15), 30)[1]
+        b = _history_matrix(date(2025, 1, 16), 30)[1]
+        self.assertFalse(np.array_equal(a, b))
+
+    def test_same_date_same_price_in_every_window(self):
+        day = date(2025, 1, 15)
+        dates30, p30 = _history_matrix(day, 30)
+        dates60, p60 = _history_matrix(day, 60)
+        dates_next, p_next = _history_matrix(day + timedelta(days=1), 60)
+        self.assertEqual(dates60[30:], dates30)
+        np.testing.assert_array_equal(p60[:, 30:], p30)
+        self.assertEqual(dates_next[:59], dates60[1:])
+        np.testing.assert_array_equal(p_next[:, :59], p60[:, 1:])
+
+    def test_stable_across_processes(self):
+        """No hash() randomisation: a fresh interpreter gives the same history."""
+        code = (
+            "from datetime import date;"
+            "from services.forecast_service import _history_matrix;"
+            "print(_history_matrix(date(2025, 1, 15), 30)[1].sum())"
+        )
+        backend = os.path.join(os.path.dirname(__file__), "..")
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=backend,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        self.assertEqual(float(out), float(_history_matrix(date(2025, 1, 15), 30)[1].sum()))
+
+    def test_forecast_uses_shared_history(self):
+        _, dates, prices = get_price_history(60)
+        result = get_price_forecast("Rice", method="holt_winters")
+        self.assertEqual(result["historical"][-1]["ds"], dates[-1])
+        self.assertEqual(result["historical"][-1]["y"], prices[list(_BASE_PRICES).index("Rice"), -1])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
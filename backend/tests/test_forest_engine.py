@@ -0,0 +1,127 @@
+"""
+Unit Tests — Flattened Forest Inference Engine.
+
+Parity checks against scikit-learn:
+  1. Per-tree predictions match estimator.predict
+  2. Forest mean matches RandomForestRegressor.predict
+  3. Quantiles match np.percentile over tree predictions
+  4. Class probabilities match RandomForestClassifier.predict_proba
+  5. Integration with the yield predictor
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.forest_engine import FlatForest
+from services.yield_service import get_predictor
+
+
+def _make_forest(n_estimators=25, max_depth=None, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 100, size=(400, 6))
+    X[:, 3:] = rng.integers(0, 10, size=(400, 3))  # label-encoded columns
+    y = X[:, 0] * 0.3 + np.sin(X[:, 1] / 10) * 5 + X[:, 3] + rng.normal(0, 1, 400)
+    model = RandomForestRegressor(
+        n_estimators=n_estimators, max_depth=max_depth, random_state=seed,
+    )
+    model.fit(X, y)
+    return model, X
+
+
+class TestSklearnParity(unittest.TestCase):
+    """Engine output must match scikit-learn for the same inputs."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model, cls.X = _make_forest()
+        cls.engine = FlatForest.from_estimator(cls.model)
+        rng = np.random.default_rng(1)
+        cls.X_new = rng.uniform(-10, 110, size=(200, 6))
+
+    def test_tree_count(self):
+        self.assertEqual(self.engine.n_trees, len(self.model.estimators_))
+
+    def test_per_tree_predictions(self):
+        per_tree = self.engine.predict_trees(self.X_new)
+        expected = np.stack([t.predict(self.X_new) for t in self.model.estimators_])
+        np.testing.assert_allclose(per_tree, expected, rtol=1e-12)
+
+    def test_mean_matches_predict(self):
+        np.testing.assert_allclose(
+            self.engine.predict(self.X_new), self.model.predict(self.X_new), rtol=1e-10,
+        )
+
+    def test_training_rows_match(self):
+        np.testing.assert_allclose(
+            self.engine.predict(self.X), self.model.predict(self.X), rtol=1e-10,
+        )
+
+    def test_quantiles_match_percentile(self):
+        mean, q = self.engine.predict_quantiles(self.X_new, (0.1, 0.5, 0.9))
+        per_tree = np.stack([t.predict(self.X_new) for t in self.model.estimators_])
+        self.assertEqual(q.shape, (3, len(self.X_new)))
+        np.testing.assert_allclose(q[0], np.percentile(per_tree, 10, axis=0), rtol=1e-10)
+        np.testing.assert_allclose(q[1], np.percentile(per_tree, 50, axis=0), rtol=1e-10)
+        np.testing.assert_allclose(q[2], np.percentile(per_tree, 90, axis=0), rtol=1e-10)
+        np.testing.assert_allclose(mean, self.model.predict(self.X_new), rtol=1e-10)
+
+    def test_single_row(self):
+        row = self.X_new[0]
+        mean, q = self.engine.predict_quantiles(row)
+        self.assertEqual(mean.shape, (1,))
+        self.assertAlmostEqual(float(mean[0]), float(self.model.predict(row.reshape(1, -1))[0]))
+
+    def test_depth_limited_forest(self):
+        model, _ = _make_forest(n_estimators=10, max_depth=3, seed=5)
+        engine = FlatForest.from_estimator(model)
+        np.testing.assert_allclose(engine.predict(self.X_new), model.predict(self.X_new), rtol=1e-10)
+
+    def test_wrong_feature_count_raises(self):
+        with self.assertRaises(ValueError):
+            self.engine.predict(np.zeros((1, 4)))
+
+    def test_unfitted_model_raises(self):
+        with self.assertRaises(ValueError):
+            FlatForest.from_estimator(RandomForestRegressor())
+
+
+class TestClassifierParity(unittest.TestCase):
+    """predict_proba matches scikit-learn for a multi-class forest."""
+
+    def test_predict_proba(self):
+        rng = np.random.default_rng(4)
+        X = rng.normal(size=(500, 8))
+        y = np.digitize(X[:, 0] + 0.5 * X[:, 1], [-1, 0, 1])  # 4 classes
+        model = RandomForestClassifier(n_estimators=30, max_depth=8, random_state=0)
+        model.fit(X, y)
+        engine = FlatForest.from_estimator(model)
+        X_new = rng.normal(size=(300, 8))
+        np.testing.assert_allclose(
+            engine.predict_proba(X_new), model.predict_proba(X_new), atol=1e-12,
+        )
+
+
+class TestYieldPredictorIntegration(unittest.TestCase):
+    """The singleton predictor uses the flattened engine."""
+
+    def test_engine_built(self):
+        predictor = get_predictor()
+        self.assertIsNotNone(predictor.forest)
+        self.assertEqual(predictor.forest.n_trees, len(predictor.model.estimators_))
+
+    def test_engine_matches_model(self):
+        predictor = get_predictor()
+        X = np.array([[2024, 700, 99, 0, 0, 0], [2024, 450, 95, 1, 1, 1]], dtype=float)
+        np.testing.assert_allclose(
+            predictor.forest.predict(X), predictor.model.predict(X), rtol=1e-10,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
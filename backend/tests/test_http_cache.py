@@ -0,0 +1,172 @@
+"""
+Unit Tests — HTTP caching for catalogue endpoints.
+
+Tests:
+  1. ETag + Cache-Control on 200 responses, none on errors
+  2. If-None-Match → 304 (plain, compressed-suffix and weak forms)
+  3. Version-based ETags skip the view entirely
+  4. Applied to the document guide, crop calendar and scheme list routes
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from http_cache import cache_policy
+from routes import api_bp
+
+
+def _make_app():
+    app = Flask(__name__)
+    calls = {"body": 0, "versioned": 0}
+    state = {"payload": {"items": [1, 2, 3]}, "version": "v1"}
+
+    @app.route("/body")
+    @cache_policy(max_age=60, stale_while_revalidate=600)
+    def body():
+        calls["body"] += 1
+        return jsonify(state["payload"])
+
+    @app.route("/versioned")
+    @cache_policy(max_age=60, version=lambda: state["version"])
+    def versioned():
+        calls["versioned"] += 1
+        return jsonify({"v": state["version"]})
+
+    @app.route("/flaky")
+    @cache_policy(max_age=60, version=lambda: 1 / 0)
+    def flaky():
+        return jsonify(state["payload"])
+
+    @app.route("/missing")
+    @cache_policy(max_age=60)
+    def missing():
+        return jsonify({"error": "nope"}), 404
+
+    return app, calls, state
+
+
+class TestCachePolicy(unittest.TestCase):
+    """The decorator on its own."""
+
+    def setUp(self):
+        app, self.calls, self.state = _make_app()
+        self.client = app.test_client()
+
+    def test_headers_on_success(self):
+        resp = self.client.get("/body")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.headers["ETag"].startswith('"'))
+        self.assertEqual(resp.headers["Cache-Control"],
+                         "public, max-age=60, stale-while-revalidate=600")
+
+    def test_errors_not_cached(self):
+        resp = self.client.get("/missing")
+        self.assertEqual(resp.status_code, 404)
+        self.assertNotIn("ETag", resp.headers)
+        self.assertNotIn("Cache-Control", resp.headers)
+
+    def test_not_modified(self):
+        etag = self.client.get("/body").headers["ETag"]
+        resp = self.client.get("/body", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.data, b"")
+        self.assertEqual(resp.headers["ETag"], etag)
+
+    def test_compressed_and_weak_etags_match(self):
+        etag = self.client.get("/body").headers["ETag"]
+        for header in (etag[:-1] + ':gzip"', etag[:-1] + ':br"', "W/" + etag,
+                       f'"other", {etag}'):
+            resp = self.client.get("/body", headers={"If-None-Match": header})
+            self.assertEqual(resp.status_code, 304, header)
+
+    def test_changed_content_changes_etag(self):
+        etag = self.client.get("/body").headers["ETag"]
+        self.state["payload"] = {"items": [4]}
+        resp = self.client.get("/body", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp.headers["ETag"], etag)
+
+    def test_versioned_304_skips_view(self):
+        etag = self.client.get("/versioned").headers["ETag"]
+        self.assertEqual(self.calls["versioned"], 1)
+        resp = self.client.get("/versioned", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(self.calls["versioned"], 1)
+
+    def test_version_bump_invalidates(self):
+        etag = self.client.get("/versioned").headers["ETag"]
+        self.state["version"] = "v2"
+        resp = self.client.get("/versioned", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_failing_version_falls_back_to_body_hash(self):
+        resp = self.client.get("/flaky")
+        self.assertEqual(resp.status_code, 200)
+        again = self.client.get("/flaky", headers={"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_versioned_etag_depends_on_query(self):
+        a = self.client.get("/versioned?x=1").headers["ETag"]
+        b = self.client.get("/versioned?x=2").headers["ETag"]
+        self.assertNotEqual(a, b)
+
+
+class TestCatalogueRoutes(unittest.TestCase):
+    """Policies applied to the API blueprint."""
+
+    @classmethod
+    def setUpClass(cls):
+        app = Flask(__name__)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        cls.client = app.test_client()
+
+    def _assert_revalidates(self, url):
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("max-age=", resp.headers["Cache-Control"])
+        again = self.client.get(url, headers={"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_supported_documents(self):
+        self._assert_revalidates("/api/supported-documents")
+
+    def test_document_guide(self):
+        self._assert_revalidates("/api/document-guide?document=Aadhaar%20Card")
+
+    def test_unknown_document_not_cached(self):
+        resp = self.client.get("/api/document-guide?document=zzzz")
+        self.assertEqual(resp.status_code, 404)
+        self.assertNotIn("ETag", resp.headers)
+
+    def test_crop_calendar(self):
+        self._assert_revalidates("/api/crop-calendar?crop=Rice&sowing_date=2025-06-01")
+
+    def test_schemes_versioned_by_catalogue(self):
+        coll = MagicMock()
+        cursor = coll.find.return_value.sort.return_value.skip.return_value
+        cursor.limit.return_value = [{"scheme_name": "PM-KISAN"}]
+        coll.count_documents.return_value = 1
+        version = {"v": 3}
+        with patch("routes.get_schemes_collection", return_value=coll), \
+                patch("routes.get_catalogue_version", side_effect=lambda: version["v"]):
+            etag = self.client.get("/api/schemes?type=Loan").headers["ETag"]
+            coll.reset_mock()
+            resp = self.client.get("/api/schemes?type=Loan", headers={"If-None-Match": etag})
+            self.assertEqual(resp.status_code, 304)
+            coll.find.assert_not_called()  # revalidation never touches the schemes
+            coll.count_documents.assert_not_called()
+            other = self.client.get("/api/schemes?type=Subsidy").headers["ETag"]
+            self.assertNotEqual(other, etag)
+            version["v"] = 4
+            resp = self.client.get("/api/schemes?type=Loan", headers={"If-None-Match": etag})
+            self.assertEqual(resp.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
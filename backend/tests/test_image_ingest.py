@@ -0,0 +1,238 @@
+"""
+Unit Tests — Shared Image Ingestion.
+
+Tests:
+  1. ImagePayload validation, MIME sniffing and base64 reuse
+  2. Reduced-resolution decoding (JPEG draft, box crop)
+  3. Soil and disease services decode each upload once
+  4. Binary uploads: multipart and octet-stream, streamed with a size limit
+"""
+
+import base64
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from flask import Flask
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import disease_cache, disease_service, image_ingest, soil_service
+from services.image_ingest import (
+    MAX_IMAGE_SIZE,
+    ImageError,
+    ImagePayload,
+    ensure_payload,
+    open_reduced,
+    read_limited,
+)
+from routes import api_bp
+
+
+def setUpModule():
+    # Keep the near-duplicate cache out of data/ and empty for every run
+    global _tmp
+    _tmp = tempfile.TemporaryDirectory()
+    disease_cache._cache = disease_cache.DiseaseResultCache(
+        os.path.join(_tmp.name, "disease_cache.sqlite3"))
+
+
+def tearDownModule():
+    disease_cache._cache = None
+    _tmp.cleanup()
+
+
+def _encode(size=(800, 600), fmt="JPEG", rgb=(140, 100, 60)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, rgb).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+class TestImagePayload(unittest.TestCase):
+    """Validation and metadata."""
+
+    def test_from_base64(self):
+        raw = _encode()
+        text = base64.b64encode(raw).decode()
+        payload = ImagePayload.from_base64(text)
+        self.assertEqual(payload.raw, raw)
+        self.assertEqual(payload.mime_type, "image/jpeg")
+        self.assertIs(payload.base64, text)  # no re-encode for Gemini
+
+    def test_base64_from_bytes(self):
+        raw = _encode(fmt="PNG")
+        payload = ensure_payload(raw)
+        self.assertEqual(payload.mime_type, "image/png")
+        self.assertEqual(base64.b64decode(payload.base64), raw)
+
+    def test_webp_sniffed(self):
+        self.assertEqual(ImagePayload(_encode(fmt="WEBP")).mime_type, "image/webp")
+
+    def test_errors(self):
+        cases = {
+            "": "No image provided.",
+            "a": "Invalid base64 image data.",
+        }
+        for text, message in cases.items():
+            with self.assertRaises(ImageError) as ctx:
+                ImagePayload.from_base64(text)
+            self.assertEqual(str(ctx.exception), message)
+        with self.assertRaises(ImageError):
+            ImagePayload(b"x" * (MAX_IMAGE_SIZE + 1))
+
+    def test_ensure_payload_passthrough(self):
+        payload = ImagePayload(_encode())
+        self.assertIs(ensure_payload(payload), payload)
+
+
+class TestOpenReduced(unittest.TestCase):
+    """Reduced decoding."""
+
+    def test_jpeg_draft(self):
+        raw = _encode(size=(4000, 3000))
+        with patch.object(image_ingest.Image.Image, "convert",
+                          autospec=True, side_effect=Image.Image.convert) as convert:
+            img = open_reduced(raw, 256)
+        decoded = convert.call_args[0][0]
+        self.assertLessEqual(max(decoded.size), 512)  # libjpeg scaled 1/8
+        self.assertEqual(max(img.size), 256)
+
+    def test_png_thumbnail(self):
+        img = open_reduced(_encode(size=(1000, 500), fmt="PNG"), 256)
+        self.assertEqual(img.size, (256, 128))
+
+    def test_small_image_not_enlarged(self):
+        self.assertEqual(open_reduced(_encode(size=(100, 80)), 256).size, (100, 80))
+
+    def test_box_crop(self):
+        img = open_reduced(_encode(size=(2000, 1000), rgb=(10, 200, 30)), 64, box=0.5)
+        self.assertEqual(img.size, (64, 64))
+        np.testing.assert_allclose(np.asarray(img).reshape(-1, 3).mean(axis=0),
+                                   (10, 200, 30), atol=3)
+
+
+class TestSingleDecode(unittest.TestCase):
+    """Services share one decoded payload."""
+
+    def setUp(self):
+        self.text = base64.b64encode(_encode()).decode()
+
+    def test_soil_offline_decodes_once(self):
+        with patch.object(image_ingest.base64, "b64decode",
+                          wraps=base64.b64decode) as decode, \
+                patch.object(soil_service, "IMAGE_ANALYSIS_MODE", "offline"):
+            result = soil_service.analyze_soil_image(self.text)
+        self.assertNotIn("error", result)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_soil_gemini_reuses_payload(self):
+        response = MagicMock(status_code=500, text="boom")
+        with patch.object(soil_service, "IMAGE_ANALYSIS_MODE", "gemini"), \
+                patch.object(soil_service, "GEMINI_API_KEY", "k"), \
+                patch.object(soil_service.requests, "post", return_value=response) as post, \
+                patch.object(image_ingest.base64, "b64decode",
+                             wraps=base64.b64decode) as decode:
+            soil_service.analyze_soil_image(self.text)
+        inline = post.call_args.kwargs["json"]["contents"][0]["parts"][1]["inline_data"]
+        self.assertIs(inline["data"], self.text)
+        self.assertEqual(inline["mime_type"], "image/jpeg")
+        self.assertEqual(decode.call_count, 1)
+
+    def test_disease_payload(self):
+        response = MagicMock(status_code=500, text="boom")
+        with patch.object(disease_service, "GEMINI_API_KEY", "k"), \
+                patch.object(disease_service.requests, "post", return_value=response) as post:
+            result = disease_service.detect_disease(ImagePayload.from_base64(self.text))
+        self.assertIn("error", result)
+        inline = post.call_args.kwargs["json"]["contents"][0]["parts"][1]["inline_data"]
+        self.assertIs(inline["data"], self.text)
+
+    def test_disease_errors_unchanged(self):
+        with patch.object(disease_service, "GEMINI_API_KEY", "k"):
+            self.assertEqual(disease_service.detect_disease(""), {"error": "No image provided."})
+
+
+class TestBinaryUploads(unittest.TestCase):
+    """multipart/form-data and application/octet-stream endpoints."""
+
+    @classmethod
+    def setUpClass(cls):
+        app = Flask(__name__)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        cls.client = app.test_client()
+        cls.raw = _encode()
+
+    def test_read_limited(self):
+        view = read_limited(io.BytesIO(b"x" * 200_000))
+        self.assertIsInstance(view, memoryview)
+        self.assertIsInstance(view.obj, bytearray)  # one buffer, no bytes() copy
+        self.assertEqual(len(view), 200_000)
+        with self.assertRaises(ImageError):
+            read_limited(io.BytesIO(b"x" * 1001), limit=1000)
+
+    def test_from_stream_memoryview(self):
+        payload = ImagePayload.from_stream(io.BytesIO(self.raw))
+        self.assertIsInstance(payload.raw, memoryview)
+        self.assertEqual(payload.mime_type, "image/jpeg")
+        self.assertEqual(open_reduced(payload.raw, 64).size, (64, 48))
+
+    def test_soil_multipart(self):
+        resp = self.client.post("/api/analyze-soil", data={
+            "image": (io.BytesIO(self.raw), "soil.jpg"), "language": "en",
+        }, content_type="multipart/form-data")
+        self.assertEqual(resp.status_code, 200, resp.get_json())
+        self.assertEqual(resp.get_json()["analysis_method"], "image_color_analysis")
+
+    def test_soil_octet_stream(self):
+        resp = self.client.post("/api/analyze-soil?language=hi", data=self.raw,
+                                content_type="application/octet-stream")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.get_json()["success"])
+
+    def test_soil_legacy_json(self):
+        resp = self.client.post("/api/analyze-soil", json={
+            "mode": "photo", "image": base64.b64encode(self.raw).decode(),
+        })
+        self.assertEqual(resp.status_code, 200)
+
+    def test_multipart_missing_file(self):
+        resp = self.client.post("/api/analyze-soil", data={"language": "en"},
+                                content_type="multipart/form-data")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_declared_length_rejected_before_reading(self):
+        body = MagicMock()
+        body.read.side_effect = AssertionError("body was read")
+        resp = self.client.post("/api/analyze-soil", input_stream=body,
+                                content_type="application/octet-stream",
+                                environ_overrides={"CONTENT_LENGTH": str(MAX_IMAGE_SIZE * 2)})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("4MB", resp.get_json()["error"])
+
+    def test_oversize_body_rejected_while_reading(self):
+        with patch.object(image_ingest, "MAX_IMAGE_SIZE", 1000), \
+                patch.object(image_ingest.ImagePayload, "__init__",
+                             side_effect=AssertionError("limit not enforced while reading")):
+            resp = self.client.post("/api/analyze-soil", data=self.raw,
+                                    content_type="application/octet-stream")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_disease_multipart(self):
+        response = MagicMock(status_code=500, text="boom")
+        with patch.object(disease_service, "GEMINI_API_KEY", "k"), \
+                patch.object(disease_service.requests, "post", return_value=response) as post:
+            self.client.post("/api/detect-disease", data={
+                "image": (io.BytesIO(self.raw), "leaf.jpg"), "crop_hint": "Rice",
+            }, content_type="multipart/form-data")
+        call = post.call_args.kwargs["json"]["contents"][0]["parts"]
+        self.assertEqual(base64.b64decode(call[1]["inline_data"]["data"]), self.raw)
+        self.assertIn("Rice", call[0]["text"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,205 @@
+"""
+Unit Tests — Index advisor (services/index_advisor.py).
+
+Tests:
+  1. ESR keys derived from the real query builders
+  2. Recommended set: one array field per index, prefixes folded, every
+     hot query served
+  3. apply_indexes creates the recommendations and drops legacy indexes
+  4. Explain-plan check flags COLLSCAN and in-memory SORT (canned plans)
+  5. Live explain plans on MongoDB (set MONGO_TEST_URI; skipped otherwise)
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.index_advisor import (
+    ARRAY_FIELDS,
+    LEGACY_INDEXES,
+    QueryShape,
+    apply_indexes,
+    check_hot_queries,
+    classify,
+    explain_problems,
+    hot_queries,
+    index_name,
+    plan_stages,
+    recommend_index,
+    recommended_indexes,
+)
+from services.scheme_queries import BENEFIT_SORT, eligibility_query
+
+_ELIGIBILITY_KEYS = [("states", 1), ("benefit_amount", -1), ("min_land", 1), ("max_land", 1)]
+
+
+def _plan(stage, **children):
+    return dict(stage=stage, **children)
+
+
+class FakeCursor:
+    def __init__(self, plan):
+        self.plan = plan
+        self.calls = []
+
+    def sort(self, keys):
+        self.calls.append(("sort", keys))
+        return self
+
+    def limit(self, n):
+        self.calls.append(("limit", n))
+        return self
+
+    def explain(self):
+        return {"queryPlanner": {"winningPlan": self.plan}}
+
+
+class FakeCollection:
+    def __init__(self, indexes=(), plan=None):
+        self.indexes = {"_id_": {}, **{name: {} for name in indexes}}
+        self.plan = plan
+        self.cursors = []
+
+    def create_index(self, keys):
+        name = index_name(keys)
+        self.indexes[name] = {"key": keys}
+        return name
+
+    def index_information(self):
+        return dict(self.indexes)
+
+    def drop_index(self, name):
+        del self.indexes[name]
+
+    def find(self, query):
+        cursor = FakeCursor(self.plan)
+        self.cursors.append((query, cursor))
+        return cursor
+
+
+class TestRecommendIndex(unittest.TestCase):
+
+    def test_classify_eligibility_query(self):
+        equality, ranges, residual = classify(eligibility_query("Punjab", "Wheat", 2.0, "Rabi"))
+        self.assertEqual(equality, ["states", "crops"])
+        self.assertEqual(ranges, ["min_land", "max_land"])
+        self.assertEqual(residual, ["$or"])
+
+    def test_esr_order(self):
+        for season in ("Rabi", None):
+            shape = QueryShape("q", eligibility_query("Punjab", "Wheat", 2.0, season), BENEFIT_SORT)
+            self.assertEqual(recommend_index(shape), _ELIGIBILITY_KEYS)
+
+    def test_scalar_equality_and_residual_operators(self):
+        shape = QueryShape("q", {"type": "Loan", "season": {"$exists": True},
+                                 "benefit_amount": {"$gt": 0}}, [("benefit_amount", -1)])
+        self.assertEqual(recommend_index(shape), [("type", 1), ("benefit_amount", -1)])
+        self.assertEqual(recommend_index(QueryShape("q", {}, None)), [])
+
+
+class TestRecommendedSet(unittest.TestCase):
+
+    def test_no_parallel_arrays(self):
+        for keys in recommended_indexes():
+            self.assertLessEqual(len(ARRAY_FIELDS.intersection(k for k, _ in keys)), 1, keys)
+
+    def test_prefixes_folded(self):
+        indexes = recommended_indexes()
+        self.assertIn(_ELIGIBILITY_KEYS, indexes)
+        self.assertNotIn([("states", 1)], indexes)  # crop recommender uses the prefix
+        self.assertEqual(len(indexes), len({index_name(k) for k in indexes}))
+
+    def test_every_hot_query_served(self):
+        indexes = recommended_indexes()
+        for shape in hot_queries():
+            keys = recommend_index(shape)
+            self.assertTrue(any(ix[:len(keys)] == keys for ix in indexes), shape.name)
+
+
+class TestApplyIndexes(unittest.TestCase):
+
+    def test_creates_and_drops_legacy(self):
+        coll = FakeCollection(indexes=LEGACY_INDEXES + ("benefit_amount_-1", "custom_1"))
+        names = apply_indexes(coll)
+        self.assertEqual(names, [index_name(k) for k in recommended_indexes()])
+        self.assertEqual(set(coll.indexes), {"_id_", "custom_1", *names})
+
+    def test_idempotent(self):
+        coll = FakeCollection()
+        self.assertEqual(apply_indexes(coll), apply_indexes(coll))
+
+
+class TestExplainCheck(unittest.TestCase):
+
+    def test_plan_stages(self):
+        classic = _plan("LIMIT", inputStage=_plan("FETCH", inputStage=_plan(
+            "SORT_MERGE", inputStages=[_plan("IXSCAN"), _plan("IXSCAN")])))
+        self.assertEqual(plan_stages({"queryPlanner": {"winningPlan": classic}}),
+                         ["LIMIT", "FETCH", "SORT_MERGE", "IXSCAN", "IXSCAN"])
+        sbe = {"queryPlan": _plan("SORT", inputStage=_plan("COLLSCAN")),
+               "slotBasedPlan": {"stages": "[1] sort ..."}}
+        self.assertEqual(plan_stages({"queryPlanner": {"winningPlan": sbe}}), ["SORT", "COLLSCAN"])
+
+    def test_flags_collscan_and_sort(self):
+        shape = QueryShape("q", {"type": "Loan"}, BENEFIT_SORT)
+        bad = FakeCollection(plan=_plan("SORT", inputStage=_plan("COLLSCAN")))
+        self.assertEqual(explain_problems(bad, shape), ["COLLSCAN", "SORT"])
+        query, cursor = bad.cursors[0]
+        self.assertEqual(query, {"type": "Loan"})
+        self.assertEqual(cursor.calls, [("sort", BENEFIT_SORT), ("limit", 20)])
+
+        good = FakeCollection(plan=_plan("LIMIT", inputStage=_plan("FETCH", inputStage=_plan("IXSCAN"))))
+        self.assertEqual(explain_problems(good, shape), [])
+        self.assertEqual(check_hot_queries(good), {})
+        self.assertEqual(set(check_hot_queries(bad)), {s.name for s in hot_queries()})
+
+
+@unittest.skipUnless(os.getenv("MONGO_TEST_URI"), "set MONGO_TEST_URI to run explain plans on MongoDB")
+class TestLiveExplain(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from pymongo import MongoClient
+
+        cls.client = MongoClient(os.environ["MONGO_TEST_URI"], serverSelectionTimeoutMS=5000)
+        cls.db_name = f"agrischeme_index_test_{os.getpid()}"
+        cls.coll = cls.client[cls.db_name]["schemes"]
+        rng = random.Random(0)
+        states = ["Punjab", "Kerala", "Tamil Nadu", "Bihar", "Assam", "All", "All India"]
+        crops = ["Wheat", "Rice", "Cotton", "Coconut", "All", "All Crops"]
+        docs = []
+        for i in range(3000):
+            doc = {
+                "scheme_name": f"Scheme {i}",
+                "type": rng.choice(["Subsidy", "Loan", "Insurance"]),
+                "states": rng.sample(states, rng.randint(1, 3)),
+                "crops": rng.sample(crops, rng.randint(1, 3)),
+                "min_land": rng.choice([0, 0, 0.5, 2]),
+                "max_land": rng.choice([2, 5, 999]),
+                "benefit_amount": rng.randint(0, 200000),
+            }
+            if rng.random() < 0.7:
+                doc["season"] = rng.choice(["Kharif", "Rabi", "All", ""])
+            docs.append(doc)
+        cls.coll.insert_many(docs)
+        for name in LEGACY_INDEXES:  # as left by the old init_indexes
+            cls.coll.create_index([(name[:-2], 1)])
+        apply_indexes(cls.coll)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.drop_database(cls.db_name)
+        cls.client.close()
+
+    def test_hot_queries_index_served(self):
+        self.assertEqual(check_hot_queries(self.coll), {})
+
+    def test_legacy_indexes_dropped(self):
+        self.assertFalse(set(LEGACY_INDEXES) & set(self.coll.index_information()))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
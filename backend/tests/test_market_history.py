@@ -0,0 +1,257 @@
+"""
+Unit Tests — Market Price History Store.
+
+Tests:
+  1. Record normalisation and idempotent appends
+  2. Daily aggregation and range reads
+  3. Gap-filled series for forecasting
+  4. Integration with market_service (tier 2) and forecast_service
+  5. Backfill CLI paging, normalisation and checkpoint resume
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from contextlib import closing
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import market_history
+from services.market_history import append_records, get_daily_prices, get_price_series
+
+
+def _record(day, price, market="Ludhiana", state="Punjab", commodity="Rice", variety="Common"):
+    return {
+        "state": state, "district": "Ludhiana", "market": market,
+        "commodity": commodity, "variety": variety, "grade": "FAQ",
+        "arrival_date": day.strftime("%d/%m/%Y"),
+        "min_price": str(price - 100), "max_price": str(price + 100),
+        "modal_price": str(price),
+    }
+
+
+class _TempStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "history.sqlite3")
+        self._patch = patch.object(market_history, "_DB_PATH", self.path)
+        self._patch.start()
+
+    def tearDown(self):
+        self._patch.stop()
+        self._tmp.cleanup()
+
+
+class TestAppend(_TempStore):
+    """Appending raw AGMARKNET records."""
+
+    def test_append_and_read(self):
+        day = date(2025, 3, 1)
+        n = append_records([_record(day, 2400), _record(day, 2600, market="Khanna")])
+        self.assertEqual(n, 2)
+        rows = get_daily_prices("Rice", "Punjab")
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["date"], "2025-03-01")
+        self.assertEqual(rows[0]["modal_price"], 2500)
+        self.assertEqual(rows[0]["markets"], 2)
+
+    def test_refetch_replaces_row(self):
+        day = date(2025, 3, 1)
+        append_records([_record(day, 2400)])
+        append_records([_record(day, 2450)])
+        rows = get_daily_prices("Rice")
+        self.assertEqual(rows[0]["modal_price"], 2450)
+        self.assertEqual(rows[0]["markets"], 1)
+
+    def test_invalid_records_skipped(self):
+        bad = [
+            {**_record(date(2025, 3, 1), 2400), "modal_price": "0"},
+            {**_record(date(2025, 3, 1), 2400), "arrival_date": "n/a"},
+            {**_record(date(2025, 3, 1), 2400), "modal_price": "abc"},
+            {**_record(date(2025, 3, 1), 2400), "market": ""},
+        ]
+        self.assertEqual(append_records(bad), 0)
+        self.assertEqual(append_records(None), 0)
+
+    def test_indexes_exist(self):
+        append_records([_record(date(2025, 3, 1), 2400)])
+        with closing(sqlite3.connect(self.path)) as conn:
+            names = {r[0] for r in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'market_prices'"
+            )}
+            plan = " ".join(r[3] for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT arrival_date, AVG(modal_price) FROM market_prices "
+                "WHERE commodity = 'Rice' AND state = 'Punjab' AND arrival_date >= '2025-01-01' "
+                "GROUP BY arrival_date"
+            ))
+        self.assertIn("idx_market_prices_commodity_state_date", names)
+        self.assertIn("idx_market_prices_commodity_date", names)
+        self.assertIn("USING", plan)
+        self.assertNotIn("SCAN market_prices", plan)
+
+    def test_missing_store_reads_empty(self):
+        self.assertEqual(get_daily_prices("Rice"), [])
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestRangeReads(_TempStore):
+    """Date-bounded reads and gap-filled series."""
+
+    def setUp(self):
+        super().setUp()
+        start = date(2025, 3, 1)
+        records = []
+        for i in range(20):
+            if i in (5, 6):  # no arrivals on two days
+                continue
+            records.append(_record(start + timedelta(days=i), 2400 + i * 10))
+            records.append(_record(start + timedelta(days=i), 3000, state="Haryana", market="Karnal"))
+        append_records(records)
+
+    def test_state_and_date_filter(self):
+        rows = get_daily_prices("Rice", "Punjab", "2025-03-03", "2025-03-10")
+        self.assertEqual([r["date"] for r in rows][0], "2025-03-03")
+        self.assertEqual([r["date"] for r in rows][-1], "2025-03-10")
+        self.assertEqual(len(rows), 6)
+
+    def test_all_india_average(self):
+        rows = get_daily_prices("Rice", None, "2025-03-01", "2025-03-01")
+        self.assertEqual(rows[0]["modal_price"], (2400 + 3000) / 2)
+
+    def test_series_is_gap_filled(self):
+        series = get_price_series("Rice", "Punjab", days=20, as_of=date(2025, 3, 21))
+        self.assertEqual(len(series), 20)
+        self.assertEqual(series[5]["y"], series[4]["y"])
+        self.assertEqual(series[6]["y"], series[4]["y"])
+
+    def test_series_min_days(self):
+        self.assertEqual(
+            get_price_series("Rice", "Punjab", days=20, as_of=date(2025, 3, 21), min_days=30), [],
+        )
+
+
+class TestIntegration(_TempStore):
+    """market_service appends, forecast_service reads."""
+
+    def test_market_service_appends_fetched_records(self):
+        from services import market_service
+
+        records = [_record(date(2025, 3, 1), 2400)]
+        body = json.dumps({"total": 1, "records": records}).encode()
+        response = MagicMock(status_code=200)
+        response.iter_content.return_value = [body]
+        response.__enter__.return_value = response
+        with patch.object(market_service.requests, "get", return_value=response), \
+                patch.object(market_service, "DATA_GOV_API_KEY", "test-key"), \
+                patch.object(market_service, "_get_cached", return_value=None), \
+                patch.object(market_service, "_set_cache"), \
+                patch.object(market_service, "MARKET_MODE", "api"):
+            result = market_service.get_market_prices("Punjab", "Rice")
+        self.assertEqual(result["prices"][0]["price"], 2400)
+        self.assertEqual(len(get_daily_prices("Rice", "Punjab")), 1)
+
+    def test_forecast_uses_stored_history(self):
+        from services.forecast_service import get_price_forecast
+
+        today = date.today()
+        append_records([
+            _record(today - timedelta(days=d), 2500 + (d % 7) * 20) for d in range(1, 31)
+        ])
+        result = get_price_forecast("Rice", method="holt_winters", state="Punjab")
+        self.assertEqual(result["history_source"], "agmarknet")
+        self.assertEqual(result["historical"][-1]["ds"], (today - timedelta(days=1)).isoformat())
+        self.assertEqual(len(result["forecast"]), 7)
+        for row in result["forecast"]:
+            self.assertAlmostEqual(row["predicted_price"], 2560, delta=150)
+
+    def test_forecast_falls_back_to_synthetic(self):
+        from services.forecast_service import get_price_forecast
+
+        today = date.today()
+        append_records([_record(today - timedelta(days=d), 2500) for d in range(1, 5)])
+        result = get_price_forecast("Rice", method="holt_winters")
+        self.assertEqual(result["history_source"], "synthetic")
+
+
+class _FakeAPI:
+    """Serves `total` synthetic records page by page; can fail on offsets."""
+
+    def __init__(self, total, fail_offsets=()):
+        self.total = total
+        self.fail_offsets = set(fail_offsets)
+        self.calls = []
+        start = date(2024, 1, 1)
+        self.records = [
+            _record(start + timedelta(days=i // 3), 2000 + i,
+                    market=f"Market {i % 3}", commodity=" soyabean ")
+            for i in range(total)
+        ]
+
+    def __call__(self, resource, commodity, offset, limit, state=None):
+        self.calls.append(offset)
+        if offset in self.fail_offsets:
+            raise ConnectionError("simulated outage")
+        return [dict(r) for r in self.records[offset:offset + limit]], self.total
+
+
+class TestBackfill(_TempStore):
+    """scripts/backfill_market_history.py"""
+
+    def setUp(self):
+        super().setUp()
+        self.checkpoint_path = os.path.join(self._tmp.name, "checkpoint.json")
+
+    def _run(self, api, checkpoint):
+        from scripts.backfill_market_history import backfill_commodity
+        return backfill_commodity(
+            "Soyabean", checkpoint, resource="res", page_size=10, workers=3,
+            batch_size=25, checkpoint_path=self.checkpoint_path, fetch=api,
+        )
+
+    def test_normalize_commodity(self):
+        from scripts.backfill_market_history import normalize_commodity
+        self.assertEqual(normalize_commodity(" soyabean "), "Soyabean")
+        self.assertEqual(normalize_commodity("Tur"), "Arhar (Tur/Red Gram)")
+        self.assertEqual(normalize_commodity("Garlic"), "Garlic")
+
+    def test_full_backfill(self):
+        api = _FakeAPI(95)
+        self.assertEqual(self._run(api, {}), 95)
+        self.assertEqual(sorted(api.calls), list(range(0, 100, 10)))
+        rows = get_daily_prices("Soyabean")
+        self.assertEqual(sum(r["markets"] for r in rows), 95)
+
+    def test_resume_after_failure(self):
+        from scripts.backfill_market_history import load_checkpoint
+
+        first = _FakeAPI(95, fail_offsets={40, 70})
+        self.assertEqual(self._run(first, {}), 75)
+
+        checkpoint = load_checkpoint(self.checkpoint_path)
+        progress = checkpoint["res|Soyabean|All"]
+        self.assertEqual(progress["total"], 95)
+        self.assertNotIn(40, progress["done"])
+        self.assertNotIn(70, progress["done"])
+
+        second = _FakeAPI(95)
+        self.assertEqual(self._run(second, checkpoint), 20)
+        self.assertEqual(sorted(second.calls), [40, 70])
+        rows = get_daily_prices("Soyabean")
+        self.assertEqual(sum(r["markets"] for r in rows), 95)
+
+    def test_completed_run_is_noop(self):
+        from scripts.backfill_market_history import load_checkpoint
+
+        self._run(_FakeAPI(30), {})
+        again = _FakeAPI(30)
+        self.assertEqual(self._run(again, load_checkpoint(self.checkpoint_path)), 0)
+        self.assertEqual(again.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -6,18 +6,22 @@ Tests the 3-tier market price system:
   2. Cache mechanism
   3. API integration (mocked)
   4. Error handling
+  5. Per-state snapshots (Indian states/UTs only, bounded LRU) and the
+     ETag-aware route
 """
 
 import os
 import sys
 import json
 import time
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
 # Setup path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from services import market_service
 from services.market_service import (
     get_market_prices,
     _get_msp_price,
@@ -25,11 +29,24 @@ from services.market_service import (
     _generate_msp_price,
     _get_cached,
     _set_cache,
-    _CACHE_FILE,
     _BASE_PRICES,
+    _snapshots,
+    get_market_snapshot,
+    MARKET_CACHE_TTL,
 )
 
 
+def _use_temp_cache(test) -> str:
+    """Point the market cache file at a temp dir for the test's duration."""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    path = os.path.join(tmp.name, "market_cache.json")
+    patcher = patch.object(market_service, "_CACHE_FILE", path)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return path
+
+
 class TestMSPFallback(unittest.TestCase):
     """Test MSP-based price generation (Tier 3)."""
 
@@ -44,10 +61,20 @@ class TestMSPFallback(unittest.TestCase):
     def test_msp_price_within_range(self):
         """Generated price should be within ±10% of MSP."""
         base = _BASE_PRICES["Wheat"]["price"]
-        price = _generate_msp_price(base)
+        price = _generate_msp_price("Wheat", base)
         self.assertGreater(price, base * 0.85)
         self.assertLess(price, base * 1.15)
 
+    def test_msp_price_follows_shared_history(self):
+        """Daily movement comes from the forecast service's history."""
+        from services.forecast_service import get_price_history
+
+        crops, _, history = get_price_history()
+        for crop in ("Rice", "Cotton", "Vegetables"):
+            base = _BASE_PRICES[crop]["price"]
+            latest = history[crops.index(crop), -1]
+            self.assertAlmostEqual(_generate_msp_price(crop, base), latest, delta=base * 0.021)
+
     def test_unknown_crop_returns_none(self):
         result = _get_msp_price("UnknownCrop123", "Delhi")
         self.assertIsNone(result)
@@ -116,12 +143,7 @@ class TestCacheMechanism(unittest.TestCase):
 
     def setUp(self):
         """Clean state."""
-        if os.path.exists(_CACHE_FILE):
-            os.remove(_CACHE_FILE)
-
-    def tearDown(self):
-        if os.path.exists(_CACHE_FILE):
-            os.remove(_CACHE_FILE)
+        self.cache_file = _use_temp_cache(self)
 
     def test_cache_miss_returns_none(self):
         result = _get_cached("Test", "Rice")
@@ -139,7 +161,7 @@ class TestCacheMechanism(unittest.TestCase):
         data = {"crop": "Rice", "price": 2500}
         _set_cache("TN", "Rice", data)
         # Manually expire
-        cache_path = _CACHE_FILE
+        cache_path = self.cache_file
         with open(cache_path, "r") as f:
             cache = json.load(f)
         cache["TN:Rice"]["timestamp"] = time.time() - 100000
@@ -170,9 +192,13 @@ class TestGetMarketPrices(unittest.TestCase):
         self.assertEqual(len(result["prices"]), 1)
         self.assertEqual(result["prices"][0]["crop"], "Rice")
 
-    def test_unknown_state_returns_default(self):
-        result = get_market_prices("UnknownState")
-        self.assertIn("prices", result)
+    def test_unknown_state_rejected(self):
+        with self.assertRaises(ValueError):
+            get_market_prices("UnknownState")
+
+    def test_state_without_mandi_table(self):
+        result = get_market_prices("Manipur")
+        self.assertEqual(result["state"], "Manipur")
         self.assertGreater(len(result["prices"]), 0)
 
     def test_each_price_has_required_fields(self):
@@ -200,5 +226,206 @@ class TestEdgeCases(unittest.TestCase):
         self.assertIn("prices", result)
 
 
+class TestRecordStream(unittest.TestCase):
+    """Incremental parsing of data.gov.in responses."""
+
+    def _body(self, n=25):
+        records = [
+            {"state": "Kerala", "market": f"Mandi {i} — കൊച്ചി", "commodity": "Rice",
+             "arrival_date": "01/03/2025", "min_price": str(2000 + i),
+             "max_price": str(2600 + i), "modal_price": str(2300 + i)}
+            for i in range(n)
+        ]
+        doc = {
+            "index_name": "x", "title": "Prices [daily] {mandi}",
+            "field": [{"name": "records", "id": "records"}],
+            "total": 1234, "count": n, "records": records, "version": "2.2",
+        }
+        return json.dumps(doc, ensure_ascii=False, indent=1).encode("utf-8"), records
+
+    @staticmethod
+    def _chunks(data, size):
+        return [data[i:i + size] for i in range(0, len(data), size)]
+
+    def test_matches_json_loads_for_any_chunking(self):
+        from services.market_stream import RecordStream
+
+        body, records = self._body()
+        for size in (1, 3, 7, 64, 1000, len(body)):
+            stream = RecordStream(self._chunks(body, size))
+            self.assertEqual(list(stream), records, f"chunk size {size}")
+            self.assertEqual(stream.meta["total"], 1234)
+            self.assertEqual(stream.meta["count"], 25)
+
+    def test_streams_before_download_finishes(self):
+        from services.market_stream import RecordStream
+
+        body, records = self._body()
+        chunks = iter(self._chunks(body, 256))
+        stream = iter(RecordStream(chunks))
+        self.assertEqual(next(stream), records[0])
+        self.assertIsNotNone(next(chunks, None), "whole body was consumed for one record")
+
+    def test_missing_field_yields_nothing(self):
+        from services.market_stream import RecordStream
+
+        self.assertEqual(list(RecordStream([b'{"message": "Invalid key"}'])), [])
+        self.assertEqual(list(RecordStream([b'{"records": {"a": 1}}'])), [])
+
+    def test_empty_records(self):
+        from services.market_stream import RecordStream
+
+        stream = RecordStream([b'{"total": 0, "records": []}'])
+        self.assertEqual(list(stream), [])
+        self.assertEqual(stream.meta, {"total": 0})
+
+    def test_truncated_body_raises(self):
+        from services.market_stream import RecordStream
+
+        body, _ = self._body()
+        with self.assertRaises(json.JSONDecodeError):
+            list(RecordStream(self._chunks(body[: len(body) // 2], 100)))
+
+    def test_aggregator_matches_parse_api_records(self):
+        from services.market_stream import PriceAggregator, RecordStream
+
+        body, records = self._body()
+        agg = PriceAggregator()
+        for rec in RecordStream(self._chunks(body, 50)):
+            agg.add(rec)
+        expected = _parse_api_records(records, "Rice")
+        result = agg.result("Rice", _BASE_PRICES["Rice"]["price"])
+        self.assertEqual(result, expected)
+        self.assertEqual(result["price"], 2312)
+        self.assertEqual(result["min_price"], 2000)
+        self.assertEqual(result["max_price"], 2624)
+        self.assertEqual(result["records_count"], 25)
+
+
+class TestMarketSnapshot(unittest.TestCase):
+    """Materialised per-state responses."""
+
+    def setUp(self):
+        _snapshots.clear()
+        self.cache_file = _use_temp_cache(self)
+
+    def tearDown(self):
+        _snapshots.clear()
+
+    def test_snapshot_reused(self):
+        a = get_market_snapshot("Punjab")
+        self.assertIs(a, get_market_snapshot("Punjab"))
+        self.assertIs(get_market_prices("Punjab"), a.data)
+
+    def test_body_matches_data(self):
+        snap = get_market_snapshot("Kerala", "Rice")
+        self.assertEqual(json.loads(snap.body), {"success": True, **snap.data})
+
+    def test_unknown_crop_shares_state_snapshot(self):
+        self.assertIs(get_market_snapshot("All", "DragonFruit"), get_market_snapshot("All"))
+
+    def test_snapshots_keyed_by_canonical_state(self):
+        snap = get_market_snapshot("All")
+        for state in ("", None, " all "):
+            self.assertIs(get_market_snapshot(state), snap)
+        self.assertIs(get_market_snapshot(" punjab "), get_market_snapshot("Punjab"))
+        self.assertEqual(get_market_snapshot("KERALA").data["state"], "Kerala")
+        self.assertEqual(get_market_snapshot("jammu and kashmir").data["state"],
+                         "Jammu and Kashmir")
+        self.assertEqual(set(_snapshots), {("All", None), ("Punjab", None), ("Kerala", None),
+                                           ("Jammu and Kashmir", None)})
+
+    def test_unknown_state_not_stored(self):
+        for state in ("UnknownState", "x" * 100):
+            with self.assertRaises(ValueError):
+                get_market_snapshot(state)
+        self.assertEqual(len(_snapshots), 0)
+
+    def test_snapshots_bounded_lru(self):
+        with patch.object(market_service, "_MAX_SNAPSHOTS", 3):
+            punjab = get_market_snapshot("Punjab")
+            get_market_snapshot("Kerala")
+            get_market_snapshot("Goa")
+            self.assertIs(get_market_snapshot("Punjab"), punjab)  # now most recent
+            get_market_snapshot("Bihar")
+        self.assertEqual(list(_snapshots), [("Goa", None), ("Punjab", None), ("Bihar", None)])
+
+    def test_expired_snapshots_evicted_on_insert(self):
+        get_market_snapshot("Punjab").expires_at = time.time() - 1
+        get_market_snapshot("Kerala")
+        self.assertEqual(list(_snapshots), [("Kerala", None)])
+
+    def test_set_cache_invalidates_state(self):
+        punjab = get_market_snapshot("Punjab")
+        kerala = get_market_snapshot("Kerala")
+        _set_cache("Punjab", "Wheat", {"crop": "Wheat", "price": 9999, "source": "cache"})
+        fresh = get_market_snapshot("Punjab")
+        self.assertIsNot(fresh, punjab)
+        self.assertNotEqual(fresh.etag, punjab.etag)
+        self.assertIn(9999, [p["price"] for p in fresh.data["prices"]])
+        self.assertIs(get_market_snapshot("Kerala"), kerala)
+
+    def test_expired_snapshot_rebuilt(self):
+        snap = get_market_snapshot("Punjab")
+        snap.expires_at = time.time() - 1
+        self.assertIsNot(get_market_snapshot("Punjab"), snap)
+
+    def test_expiry_follows_cache_entry(self):
+        _set_cache("Punjab", "Wheat", {"crop": "Wheat", "price": 2300})
+        with open(self.cache_file) as f:
+            cache = json.load(f)
+        cache["Punjab:Wheat"]["timestamp"] = time.time() - MARKET_CACHE_TTL + 60
+        with open(self.cache_file, "w") as f:
+            json.dump(cache, f)
+        _snapshots.clear()
+        self.assertLessEqual(get_market_snapshot("Punjab").expires_at, time.time() + 60)
+
+
+class TestMarketPricesRoute(unittest.TestCase):
+    """GET /api/market-prices serves the snapshot bytes with an ETag."""
+
+    @classmethod
+    def setUpClass(cls):
+        from flask import Flask
+        from routes import api_bp
+        app = Flask(__name__)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        cls.client = app.test_client()
+
+    def setUp(self):
+        _snapshots.clear()
+
+    def test_body_and_etag(self):
+        resp = self.client.get("/api/market-prices?state=Punjab")
+        snap = get_market_snapshot("Punjab")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, snap.body)
+        self.assertEqual(resp.headers["ETag"], f'"{snap.etag}"')
+        self.assertEqual(resp.headers["Cache-Control"], "no-cache")
+
+    def test_not_modified(self):
+        etag = self.client.get("/api/market-prices?state=Punjab").headers["ETag"]
+        resp = self.client.get("/api/market-prices?state=Punjab",
+                               headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.data, b"")
+
+    def test_not_modified_compressed_etag(self):
+        etag = self.client.get("/api/market-prices?state=Punjab").headers["ETag"]
+        resp = self.client.get("/api/market-prices?state=Punjab",
+                               headers={"If-None-Match": etag[:-1] + ':gzip"'})
+        self.assertEqual(resp.status_code, 304)
+
+    def test_unknown_state_rejected(self):
+        resp = self.client.get("/api/market-prices?state=Atlantis")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("Atlantis", resp.get_json()["error"])
+
+    def test_stale_etag(self):
+        resp = self.client.get("/api/market-prices?state=Punjab",
+                               headers={"If-None-Match": '"stale"'})
+        self.assertEqual(resp.status_code, 200)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
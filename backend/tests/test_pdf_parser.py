@@ -0,0 +1,244 @@
+"""
+Unit Tests — Streaming PDF scheme extraction (scripts/pdf_parser.py).
+
+Tests:
+  1. Incremental section splitting equals splitting the whole text
+  2. Page batches (inline and process pool) give the whole-document result
+  3. NDJSON output and the legacy JSON array
+  4. Directory mode: per-file checkpoints, resume after a crash, skip done
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+import pdfplumber
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from scripts import pdf_parser
+from scripts.pdf_parser import (
+    SectionSplitter,
+    extract_directory,
+    extract_to_ndjson,
+    iter_schemes,
+    parse_pdf_to_json,
+    section_to_scheme,
+)
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(path, pages):
+    """Minimal PDF with one Helvetica text line per entry of each page."""
+    kids = [4 + 2 * i for i in range(len(pages))]
+    objs = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(pages)} >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for i, lines in enumerate(pages):
+        content = ("BT /F1 11 Tf 14 TL 50 780 Td "
+                   + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET")
+        objs[4 + 2 * i] = ("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                           f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objs[5 + 2 * i] = f"<< /Length {len(content)} >>\nstream\n{content}\nendstream"
+    out, offsets = b"%PDF-1.4\n", {}
+    for k in sorted(objs):
+        offsets[k] = len(out)
+        out += f"{k} 0 obj\n{objs[k]}\nendobj\n".encode("latin-1")
+    xref, size = len(out), max(objs) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offsets[k]:010d} 00000 n \n".encode() for k in range(1, size))
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _compendium(n_schemes=12, lines_per_page=9, seed=0):
+    """Pages of numbered scheme sections that run across page breaks."""
+    rng = random.Random(seed)
+    lines = ["Compendium of agriculture schemes", "Department of Agriculture"]
+    for i in range(1, n_schemes + 1):
+        head = f"{i}. Scheme number {i} for farmers" if i % 3 else f"Scheme Name: Special scheme {i}"
+        lines.append(head)
+        lines.append(f"Benefit: Rs {rng.randint(1, 90) * 1000} per hectare")
+        lines += [f"Detail line {j} of scheme {i} with eligibility text" for j in range(rng.randint(1, 6))]
+        if rng.random() < 0.2:
+            lines.append("Short")  # below the 50-character noise cut-off on its own
+    return [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+
+def _reference(path):
+    """The original algorithm: whole text, one re.split."""
+    with pdfplumber.open(path) as pdf:
+        text = "".join((page.extract_text() or "") + "\n" for page in pdf.pages)
+    sections = re.split(r"(?:\n\d+\.\s+|Scheme Name:\s*)", text)
+    return [s for s in map(section_to_scheme, sections) if s]
+
+
+def _read_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class _Crash(BaseException):
+    """Stands in for the process dying (not caught like an Exception)."""
+
+
+class _TmpDirCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.dir = self._tmp.name
+
+    def _pdf(self, name="compendium.pdf", **kwargs):
+        path = os.path.join(self.dir, name)
+        make_pdf(path, _compendium(**kwargs))
+        return path
+
+
+class TestSectionSplitter(unittest.TestCase):
+
+    def test_matches_whole_text_split(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            parts = ["intro text ", "\n1. ", "Scheme Name: ", "\n", "12.", "  ", "x" * 30,
+                     "Benefit: 5000", "\n22. Name", "line\n", "3.1 not a header "]
+            text = "".join(rng.choice(parts) for _ in range(rng.randint(0, 40)))
+            cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 6))))
+            splitter, sections = SectionSplitter(), []
+            for a, b in zip([0] + cuts, cuts + [len(text)]):
+                sections += splitter.feed(text[a:b])
+            sections += splitter.close()
+            expected = re.split(r"(?:\n\d+\.\s+|Scheme Name:\s*)", text)
+            self.assertEqual(sections, [s for s in expected if s], repr(text))
+
+    def test_resume_from_tail(self):
+        text = "Preface\n1. First scheme\nmore\n2. Second scheme\n"
+        a = SectionSplitter()
+        first = a.feed(text[:30])
+        b = SectionSplitter(a.tail)  # state as stored in a checkpoint
+        self.assertEqual(first + b.feed(text[30:]) + b.close(),
+                         ["Preface", "First scheme\nmore", "Second scheme\n"])
+
+
+class TestStreaming(_TmpDirCase):
+
+    def test_batches_match_whole_document(self):
+        path = self._pdf(n_schemes=30)
+        for pages_per_task in (1, 2, 5, 100):
+            with patch.object(pdf_parser, "PAGES_PER_TASK", pages_per_task):
+                self.assertEqual(list(iter_schemes(path)), _reference(path))
+
+    def test_process_pool(self):
+        path = self._pdf(n_schemes=30)
+        with patch.object(pdf_parser, "PAGES_PER_TASK", 2), \
+                ProcessPoolExecutor(max_workers=2) as pool:
+            self.assertEqual(list(iter_schemes(path, pool)), _reference(path))
+
+    def test_yields_before_the_end(self):
+        path = self._pdf(n_schemes=30)
+        with patch.object(pdf_parser, "PAGES_PER_TASK", 1):
+            first_schemes, pages_done, tail = next(pdf_parser.stream_pdf(path))
+        self.assertEqual(pages_done, 1)
+        self.assertTrue(tail)
+        self.assertTrue(first_schemes)
+
+    def test_empty_pages_and_pdf(self):
+        path = os.path.join(self.dir, "blank.pdf")
+        make_pdf(path, [[], []])
+        self.assertEqual(list(iter_schemes(path)), [])
+
+
+class TestOutputs(_TmpDirCase):
+
+    def test_ndjson(self):
+        path = self._pdf()
+        out = os.path.join(self.dir, "schemes.ndjson")
+        count = extract_to_ndjson(path, out)
+        self.assertEqual(_read_ndjson(out), _reference(path))
+        self.assertEqual(count, len(_reference(path)))
+
+    def test_legacy_json(self):
+        path = self._pdf()
+        out = os.path.join(self.dir, "schemes.json")
+        parse_pdf_to_json(path, out, workers=1)
+        with open(out, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), _reference(path))
+
+    def test_cli(self):
+        path = self._pdf()
+        out = os.path.join(self.dir, "cli.ndjson")
+        pdf_parser.main([path, out, "--workers", "1"])
+        self.assertEqual(_read_ndjson(out), _reference(path))
+
+
+class TestDirectory(_TmpDirCase):
+
+    def setUp(self):
+        super().setUp()
+        self.in_dir = os.path.join(self.dir, "pdfs")
+        self.out_dir = os.path.join(self.dir, "out")
+        os.makedirs(self.in_dir)
+        self.paths = [os.path.join(self.in_dir, f"{name}.pdf") for name in ("a", "b")]
+        for seed, path in enumerate(self.paths):
+            make_pdf(path, _compendium(n_schemes=20, seed=seed))
+        patcher = patch.object(pdf_parser, "PAGES_PER_TASK", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _outputs(self):
+        return [_read_ndjson(os.path.join(self.out_dir, f"{n}.ndjson")) for n in ("a", "b")]
+
+    def test_extracts_every_pdf(self):
+        counts = extract_directory(self.in_dir, self.out_dir, workers=1)
+        self.assertEqual(counts, {"a.pdf": len(_reference(self.paths[0])),
+                                  "b.pdf": len(_reference(self.paths[1]))})
+        self.assertEqual(self._outputs(), [_reference(p) for p in self.paths])
+
+    def test_resume_after_crash(self):
+        real = pdf_parser.iter_page_batches
+        starts, crashed = [], []
+
+        def crash_after_two(path, start_page=0, pool=None, pages_per_task=None):
+            starts.append((os.path.basename(path), start_page))
+            for i, batch in enumerate(real(path, start_page, pool, pages_per_task)):
+                if i == 2 and os.path.basename(path) == "b.pdf" and not crashed:
+                    crashed.append(True)
+                    raise _Crash
+                yield batch
+
+        with patch.object(pdf_parser, "iter_page_batches", crash_after_two):
+            with self.assertRaises(_Crash):
+                extract_directory(self.in_dir, self.out_dir, workers=1)
+            starts.clear()
+            extract_directory(self.in_dir, self.out_dir, workers=1)
+
+        self.assertEqual(starts, [("b.pdf", 4)])  # a.pdf skipped, b.pdf resumed
+        self.assertEqual(self._outputs(), [_reference(p) for p in self.paths])
+
+    def test_changed_file_reextracted(self):
+        extract_directory(self.in_dir, self.out_dir, workers=1)
+        make_pdf(self.paths[0], _compendium(n_schemes=5, seed=9))
+        counts = extract_directory(self.in_dir, self.out_dir, workers=1)
+        self.assertEqual(counts["a.pdf"], len(_reference(self.paths[0])))
+        self.assertEqual(self._outputs()[0], _reference(self.paths[0]))
+
+    def test_broken_pdf_does_not_stop_the_run(self):
+        with open(os.path.join(self.in_dir, "0_broken.pdf"), "wb") as f:
+            f.write(b"not a pdf")
+        counts = extract_directory(self.in_dir, self.out_dir, workers=1)
+        self.assertEqual(sorted(counts), ["a.pdf", "b.pdf"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
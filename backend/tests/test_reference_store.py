@@ -0,0 +1,124 @@
+"""
+Unit Tests — Pre-encoded reference data store.
+
+Tests:
+  1. Variants decompress to the identity body
+  2. Content negotiation (br > gzip > identity)
+  3. ETag / 304 handling per encoding
+  4. Routes served from the store keep their payloads
+"""
+
+import gzip
+import json
+import os
+import sys
+import unittest
+
+import brotli
+from flask import Flask
+from flask_compress import Compress
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from reference_store import EncodedResponse, get_reference_store
+from routes import api_bp
+from services.document_guide_service import get_all_supported_documents, get_document_guide
+
+
+class TestEncodedResponse(unittest.TestCase):
+    """Serialise-once entries."""
+
+    def test_variants_roundtrip(self):
+        entry = EncodedResponse({"rows": [{"crop": "Rice", "price": 2320}] * 50})
+        self.assertEqual(gzip.decompress(entry.variants["gzip"]), entry.body)
+        self.assertEqual(brotli.decompress(entry.variants["br"]), entry.body)
+
+    def test_tiny_payload_not_compressed(self):
+        self.assertEqual(EncodedResponse({"a": 1}).variants, {})
+
+    def test_deterministic(self):
+        a = EncodedResponse({"b": 1, "a": [1, 2]})
+        b = EncodedResponse({"a": [1, 2], "b": 1})
+        self.assertEqual(a.body, b.body)
+        self.assertEqual(a.etag, b.etag)
+        self.assertEqual(a.variants, b.variants)
+
+
+class TestReferenceRoutes(unittest.TestCase):
+    """Endpoints answered from the store, behind Flask-Compress as in app.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        app = Flask(__name__)
+        Compress(app)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        cls.client = app.test_client()
+        cls.store = get_reference_store()
+
+    def _get(self, url, encoding="", **headers):
+        return self.client.get(url, headers={"Accept-Encoding": encoding, **headers})
+
+    def test_store_built_once(self):
+        self.assertIs(get_reference_store(), self.store)
+
+    def test_known_tables(self):
+        self.assertLessEqual(
+            {"document-guides", "crop-calendars", "soil-colors", "crop-suitability", "msp"},
+            set(self.store.names()),
+        )
+
+    def test_brotli_preferred(self):
+        resp = self._get("/api/reference/crop-calendars", "gzip, deflate, br")
+        self.assertEqual(resp.headers["Content-Encoding"], "br")
+        self.assertEqual(resp.data, self.store.get("crop-calendars").variants["br"])
+        self.assertIn("Accept-Encoding", resp.headers["Vary"])
+
+    def test_gzip(self):
+        resp = self._get("/api/reference/crop-calendars", "gzip")
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        body = json.loads(gzip.decompress(resp.data))
+        self.assertTrue(body["success"])
+        self.assertIn("Rice", body["calendars"])
+
+    def test_identity(self):
+        resp = self._get("/api/reference/msp")
+        self.assertNotIn("Content-Encoding", resp.headers)
+        self.assertEqual(json.loads(resp.data)["prices"]["Rice"], 2320)
+
+    def test_refused_encoding(self):
+        resp = self._get("/api/reference/crop-calendars", "br;q=0, gzip")
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+
+    def test_not_modified_any_encoding(self):
+        etag = self._get("/api/reference/soil-colors", "br").headers["ETag"]
+        self.assertTrue(etag.endswith(':br"'))
+        resp = self._get("/api/reference/soil-colors", "gzip", **{"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertIn("max-age=", resp.headers["Cache-Control"])
+
+    def test_unknown_table(self):
+        resp = self._get("/api/reference/nope")
+        self.assertEqual(resp.status_code, 404)
+        self.assertIn("msp", resp.get_json()["available"])
+
+    def test_internal_entries_not_listed(self):
+        self.assertEqual(self._get("/api/reference/document-guide:aadhaar card").status_code, 404)
+
+    def test_supported_documents_payload(self):
+        resp = self._get("/api/supported-documents")
+        self.assertEqual(resp.get_json(), {"success": True, "documents": get_all_supported_documents()})
+
+    def test_document_guide_payload(self):
+        for name in ("Aadhaar Card", "aadhaar", "affidavit"):
+            resp = self._get(f"/api/document-guide?document={name}", "gzip")
+            body = json.loads(gzip.decompress(resp.data))
+            self.assertEqual(body, {"success": True, "guide": get_document_guide(name)}, name)
+
+    def test_document_guide_not_found(self):
+        resp = self._get("/api/document-guide?document=zzzz")
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(resp.get_json()["success"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,303 @@
+"""
+Unit Tests — Write-time scheme enrichment and precomputed ranking.
+
+Tests:
+  1. Benefit parsing, size flags and profile tokens
+  2. Stored vectors rank like TF-IDF fitted on the catalogue
+  3. enrich_catalogue writes only changed features, bumps the model once
+  4. rank_schemes: arithmetic on stored features, fallback without them,
+     rank features never left on the returned schemes
+  5. Single-scheme features against the stored model; background
+     catalogue pass (coalesced)
+  6. /api/addScheme: version bumped first, only the new scheme enriched
+     in the request, enrichment failures logged
+"""
+
+import copy
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import ranking_service, scheme_enrichment
+from services.ranking_service import _build_farmer_profile, rank_schemes
+from services.scheme_enrichment import (
+    RANK_FIELD,
+    build_scheme_profile,
+    compute_features,
+    enrich_catalogue,
+    enrich_catalogue_in_background,
+    enrich_scheme,
+    get_ranking_model,
+    get_ranking_model_version,
+    parse_benefit_amount,
+    scheme_features,
+    size_category,
+    size_flags,
+)
+from tests.test_scheme_sync import FakeCollection
+
+_SCHEMES = [
+    {"scheme_name": "PM-KISAN", "type": "Income Support", "benefit": "₹6,000 per year",
+     "benefit_amount": 6000, "states": ["All"], "crops": ["All"], "min_land": 0,
+     "max_land": 2, "description": {"en": "Income support for small and marginal farmers"}},
+    {"scheme_name": "Punjab Wheat Procurement Bonus", "type": "Subsidy",
+     "benefit": "₹500 per quintal", "benefit_amount": 500, "states": ["Punjab"],
+     "crops": ["Wheat"], "season": "Rabi", "min_land": 0, "max_land": 100,
+     "description": "Bonus on wheat procured in Punjab during rabi"},
+    {"scheme_name": "Kerala Coconut Mission", "type": "Subsidy", "benefit": "Up to ₹50,000",
+     "states": ["Kerala"], "crops": ["Coconut"], "min_land": 0.5, "max_land": 20},
+    {"scheme_name": "Kisan Credit Card", "type": "Loan", "benefit": "Credit up to ₹3,00,000",
+     "benefit_amount": 300000, "states": ["All"], "crops": ["All"], "min_land": 0,
+     "max_land": 100, "season": "All"},
+]
+
+_FARMERS = [("Punjab", "Wheat", 3.0, "Rabi"), ("Kerala", "Coconut", 1.0, "All"),
+            ("Tamil Nadu", "Rice", 12.0, "Kharif")]
+
+
+def _reference_scores(schemes, state, crop, land_size, season):
+    """TF-IDF fitted on the whole catalogue, benefit normalised by its maximum."""
+    vectorizer = TfidfVectorizer(stop_words="english", max_features=5000, ngram_range=(1, 2))
+    matrix = vectorizer.fit_transform([build_scheme_profile(s) for s in schemes])
+    farmer = vectorizer.transform([_build_farmer_profile(state, crop, land_size, season)])
+    sims = cosine_similarity(farmer, matrix).flatten()
+    benefits = [s.get("benefit_amount") or parse_benefit_amount(s["benefit"]) for s in schemes]
+    top = max(benefits) or 1
+    return {s["scheme_name"]: round(0.6 * float(sim) + 0.4 * b / top, 4)
+            for s, sim, b in zip(schemes, sims, benefits)}
+
+
+class TestFeatures(unittest.TestCase):
+
+    def test_parse_benefit_amount(self):
+        self.assertEqual(parse_benefit_amount("₹6,000 per year"), 6000)
+        self.assertEqual(parse_benefit_amount("Up to ₹2,00,000"), 200000)
+        self.assertEqual(parse_benefit_amount("Comprehensive cover"), 0)
+        self.assertEqual(parse_benefit_amount(None), 0)
+
+    def test_size_flags_and_category(self):
+        self.assertEqual(size_flags({"min_land": 0, "max_land": 2}),
+                         {"small": True, "medium": True, "large": False})
+        self.assertEqual(size_flags({"min_land": 5, "max_land": 100}),
+                         {"small": False, "medium": True, "large": True})
+        self.assertEqual([size_category(x) for x in (1, 2, 3, 4, 5)],
+                         ["small", "small", "medium", "medium", "large"])
+
+    def test_compute_features(self):
+        features, model = compute_features(_SCHEMES)
+        self.assertEqual(model["max_benefit"], 300000)
+        self.assertEqual(features[2]["benefit_norm"], round(50000 / 300000, 6))
+        self.assertIn("wheat", features[1]["tokens"])
+        self.assertIn("punjab wheat", features[1]["tfidf"])
+        for feats in features:
+            norm = sum(w * w for w in feats["tfidf"].values())
+            self.assertAlmostEqual(norm, 1.0, places=4)
+            self.assertTrue(set(feats["tfidf"]) <= set(model["idf"]))
+
+    def test_empty_catalogue(self):
+        self.assertEqual(compute_features([]), ([], {"idf": {}, "max_benefit": 1.0, "schemes": 0}))
+
+
+class _CatalogueCase(unittest.TestCase):
+    def setUp(self):
+        self.coll = FakeCollection(copy.deepcopy(_SCHEMES))
+        self.meta = FakeCollection()
+        patcher = patch.object(ranking_service._RankingModel, "_meta",
+                               staticmethod(lambda: self.meta))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        ranking_service.invalidate_ranking_model()
+        self.addCleanup(ranking_service.invalidate_ranking_model)
+
+    def _page(self, names=None):
+        """Schemes as the eligibility route reads them (with rank features)."""
+        docs = [{k: v for k, v in d.items() if k != "_id"} for d in self.coll.docs]
+        return [d for d in docs if names is None or d["scheme_name"] in names]
+
+
+class TestEnrichCatalogue(_CatalogueCase):
+
+    def test_first_run_enriches_everything(self):
+        stats = enrich_catalogue(self.coll, self.meta)
+        self.assertEqual((stats["schemes"], stats["enriched"], stats["version"]), (4, 4, 1))
+        kerala = self.coll.by_name("Kerala Coconut Mission")
+        self.assertEqual(kerala["benefit_amount"], 50000)  # parsed at write time
+        self.assertIn(RANK_FIELD, kerala)
+        self.assertIn("idf", self.meta.find_one({"_id": "ranking"}))
+
+    def test_second_run_writes_nothing(self):
+        enrich_catalogue(self.coll, self.meta)
+        stats = enrich_catalogue(self.coll, self.meta)
+        self.assertEqual(stats["enriched"], 0)
+        self.assertEqual(len(self.coll.bulk_calls), 1)
+        self.assertEqual(get_ranking_model_version(self.meta), 1)
+
+    def test_new_scheme_renormalises_catalogue(self):
+        enrich_catalogue(self.coll, self.meta)
+        self.coll.docs.append({"_id": 99, "scheme_name": "Big Grant", "type": "Grant",
+                               "benefit": "₹6,00,000", "states": ["All"], "crops": ["All"],
+                               "min_land": 0, "max_land": 100})
+        stats = enrich_catalogue(self.coll, self.meta)
+        self.assertEqual(stats["enriched"], 5)  # new max benefit and IDF touch every scheme
+        self.assertEqual(stats["version"], 2)
+        self.assertEqual(self.coll.by_name("Kisan Credit Card")[RANK_FIELD]["benefit_norm"], 0.5)
+
+
+class TestRanking(_CatalogueCase):
+
+    def test_matches_catalogue_tfidf(self):
+        enrich_catalogue(self.coll, self.meta)
+        for farmer in _FARMERS:
+            ranked = rank_schemes(self._page(), *farmer)
+            expected = _reference_scores(self.coll.docs, *farmer)
+            for scheme in ranked:
+                self.assertAlmostEqual(scheme["relevance_score"],
+                                       expected[scheme["scheme_name"]], places=3)
+            scores = [s["relevance_score"] for s in ranked]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_read_path_does_not_fit(self):
+        enrich_catalogue(self.coll, self.meta)
+        with patch.object(ranking_service, "TfidfVectorizer", side_effect=AssertionError):
+            ranked = rank_schemes(self._page(), "Punjab", "Wheat", 3.0, "Rabi")
+        expected = _reference_scores(self.coll.docs, "Punjab", "Wheat", 3.0, "Rabi")
+        self.assertEqual([s["scheme_name"] for s in ranked],
+                         sorted(expected, key=expected.get, reverse=True))
+        self.assertTrue(all(RANK_FIELD not in s for s in ranked))
+
+    def test_fallback_without_features(self):
+        ranked = rank_schemes(self._page(), "Punjab", "Wheat", 3.0, "Rabi")
+        self.assertEqual(len(ranked), 4)
+        self.assertTrue(all(0 <= s["relevance_score"] <= 1 for s in ranked))
+        enrich_catalogue(self.coll, self.meta)
+        page = self._page()
+        del page[0][RANK_FIELD]  # written after the last enrichment
+        ranked = rank_schemes(page, "Punjab", "Wheat", 3.0, "Rabi")
+        self.assertTrue(all(RANK_FIELD not in s for s in ranked))
+
+    def test_single_scheme_stripped(self):
+        enrich_catalogue(self.coll, self.meta)
+        ranked = rank_schemes(self._page({"PM-KISAN"}), "Punjab", "Wheat", 3.0, "Rabi")
+        self.assertEqual(ranked[0]["relevance_score"], 1.0)
+        self.assertNotIn(RANK_FIELD, ranked[0])
+
+    def test_model_reloaded_on_new_version(self):
+        enrich_catalogue(self.coll, self.meta)
+        rank_schemes(self._page(), "Punjab", "Wheat", 3.0, "Rabi")
+        self.coll.docs.append({"_id": 99, "scheme_name": "Punjab Wheat Seed Kit", "type": "Subsidy",
+                               "benefit": "₹2,000", "states": ["Punjab"], "crops": ["Wheat"],
+                               "min_land": 0, "max_land": 100})
+        enrich_catalogue(self.coll, self.meta)
+        with patch.object(ranking_service, "RANKING_MODEL_CHECK_INTERVAL", 0):
+            ranked = rank_schemes(self._page(), "Punjab", "Wheat", 3.0, "Rabi")
+        expected = _reference_scores(self.coll.docs, "Punjab", "Wheat", 3.0, "Rabi")
+        for scheme in ranked:
+            self.assertAlmostEqual(scheme["relevance_score"], expected[scheme["scheme_name"]], places=3)
+
+
+class TestSingleScheme(_CatalogueCase):
+
+    def test_features_match_catalogue_pass(self):
+        enrich_catalogue(self.coll, self.meta)
+        model = get_ranking_model(self.meta)
+        for doc in self.coll.docs:
+            stored, fresh = doc[RANK_FIELD], scheme_features(doc, model)
+            self.assertEqual(fresh["benefit_norm"], stored["benefit_norm"])
+            self.assertEqual(set(fresh["tfidf"]), set(stored["tfidf"]))
+            for term, w in stored["tfidf"].items():
+                self.assertAlmostEqual(fresh["tfidf"][term], w, places=5)
+
+    def test_enrich_scheme_uses_stored_model(self):
+        self.assertFalse(enrich_scheme(0, self.coll.docs[0], self.coll, self.meta))
+        enrich_catalogue(self.coll, self.meta)
+        new = {"_id": 99, "scheme_name": "Punjab Wheat Seed Kit", "type": "Subsidy",
+               "benefit": "₹9,00,000", "states": ["Punjab"], "crops": ["Wheat"],
+               "min_land": 0, "max_land": 100}
+        self.coll.docs.append(dict(new))
+        with patch.object(scheme_enrichment, "TfidfVectorizer", side_effect=AssertionError):
+            self.assertTrue(enrich_scheme(99, new, self.coll, self.meta))
+        features = self.coll.by_name("Punjab Wheat Seed Kit")[RANK_FIELD]
+        self.assertEqual(features["benefit_norm"], 1.0)  # above the stored maximum
+        self.assertIn("punjab wheat", features["tfidf"])
+        self.assertEqual(get_ranking_model_version(self.meta), 1)
+        ranked = rank_schemes(self._page(), "Punjab", "Wheat", 3.0, "Rabi")
+        self.assertEqual(ranked[0]["scheme_name"], "Punjab Wheat Seed Kit")
+
+
+class TestBackgroundPass(_CatalogueCase):
+
+    def test_runs_catalogue_pass(self):
+        with patch.object(scheme_enrichment, "enrich_catalogue",
+                          side_effect=lambda: enrich_catalogue(self.coll, self.meta)):
+            enrich_catalogue_in_background().join(5)
+        self.assertEqual(get_ranking_model_version(self.meta), 1)
+        self.assertTrue(all(RANK_FIELD in d for d in self.coll.docs))
+
+    def test_requests_during_a_pass_coalesce(self):
+        started, release, calls = threading.Event(), threading.Event(), []
+
+        def slow_pass():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+
+        with patch.object(scheme_enrichment, "enrich_catalogue", side_effect=slow_pass):
+            thread = enrich_catalogue_in_background()
+            started.wait(5)
+            for _ in range(3):
+                self.assertIs(enrich_catalogue_in_background(), thread)
+            release.set()
+            thread.join(5)
+        self.assertEqual(len(calls), 2)
+
+    def test_failure_is_logged(self):
+        with patch.object(scheme_enrichment, "enrich_catalogue", side_effect=RuntimeError("down")), \
+                self.assertLogs("services.scheme_enrichment", "ERROR"):
+            enrich_catalogue_in_background().join(5)
+
+
+class TestAddSchemeRoute(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from flask import Flask
+        from routes import api_bp
+        app = Flask(__name__)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        cls.client = app.test_client()
+
+    def _post(self, enrich_scheme):
+        coll, calls = MagicMock(), []
+        coll.insert_one.return_value.inserted_id = "new-id"
+        with patch("routes.get_schemes_collection", return_value=coll), \
+                patch("routes.bump_catalogue_version", side_effect=lambda: calls.append("bump")), \
+                patch("routes.invalidate_scheme_guides", side_effect=lambda: calls.append("guides")), \
+                patch("routes.enrich_scheme", side_effect=enrich_scheme) as single, \
+                patch("routes.enrich_catalogue_in_background",
+                      side_effect=lambda: calls.append("background")), \
+                patch.object(scheme_enrichment, "TfidfVectorizer", side_effect=AssertionError):
+            resp = self.client.post("/api/addScheme", json=dict(_SCHEMES[1]))
+        coll.insert_one.assert_called_once()
+        return resp, calls, single
+
+    def test_only_new_scheme_enriched_in_request(self):
+        resp, calls, single = self._post(lambda scheme_id, scheme: True)
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(single.call_args[0][0], "new-id")
+        self.assertEqual(calls, ["bump", "guides", "background"])
+
+    def test_enrichment_failure_does_not_fail_insert(self):
+        with self.assertLogs("routes", "ERROR"):
+            resp, calls, _ = self._post(RuntimeError("mongo down"))
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(calls, ["bump", "guides", "background"])
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
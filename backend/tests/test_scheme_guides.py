@@ -0,0 +1,163 @@
+"""
+Unit Tests — Bulk Document Guide Resolution.
+
+Tests:
+  1. Deduplicated resolution of a document list
+  2. Scheme → guides join built once, refreshed when schemes change
+     (new documents or a new catalogue version)
+  3. POST /api/document-guides (MongoDB replaced by an in-memory fake)
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from routes import api_bp
+from services import scheme_guides_service
+from services.document_guide_service import resolve_documents
+from services.scheme_guides_service import get_scheme_guides, invalidate_scheme_guides
+
+
+class _FakeSchemes:
+    """Just enough of a pymongo collection for the join."""
+
+    def __init__(self, docs):
+        self.docs = [dict(d, _id=i) for i, d in enumerate(docs)]
+        self.finds = 0
+
+    def add(self, doc):
+        self.docs.append(dict(doc, _id=len(self.docs)))
+
+    def find(self, query, projection):
+        self.finds += 1
+        return [{k: d[k] for k in projection if projection[k] and k in d} for d in self.docs]
+
+    def find_one(self, query, projection, sort):
+        return {"_id": self.docs[-1]["_id"]} if self.docs else None
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+
+_SCHEMES = [
+    {"scheme_name": "Pradhan Mantri Kisan Samman Nidhi (PM-KISAN)",
+     "documents_required": ["Aadhaar Card", "Land Records", "Bank Account Details", "aadhaar"]},
+    {"scheme_name": "Kisan Credit Card (KCC)",
+     "documents_required": ["Aadhaar Card", "Land Records", "Project Proposal"]},
+]
+
+
+class _JoinTestCase(unittest.TestCase):
+    def setUp(self):
+        self.coll = _FakeSchemes(_SCHEMES)
+        patcher = patch.object(scheme_guides_service._SchemeGuideJoin, "_collection",
+                               staticmethod(lambda: self.coll))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.version = 1
+        patcher = patch.object(scheme_guides_service._SchemeGuideJoin, "_catalogue_version",
+                               staticmethod(lambda: self.version))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        invalidate_scheme_guides()
+        self.addCleanup(invalidate_scheme_guides)
+
+
+class TestResolveDocuments(unittest.TestCase):
+    """Pure list resolution."""
+
+    def test_shared_guides_deduplicated(self):
+        result = resolve_documents(["Aadhaar Card", "aadhaar", "adhar card", "Land Records"])
+        self.assertEqual(set(result["guides"]), {"aadhaar card", "land records"})
+        self.assertEqual([d["guide_key"] for d in result["documents"]],
+                         ["aadhaar card", "aadhaar card", "aadhaar card", "land records"])
+
+    def test_unresolved(self):
+        result = resolve_documents(["Project Proposal", "Aadhaar Card"])
+        self.assertEqual(result["unresolved"], ["Project Proposal"])
+        self.assertIsNone(result["documents"][0]["guide_key"])
+
+
+class TestSchemeJoin(_JoinTestCase):
+    """Precomputed scheme → guides."""
+
+    def test_scheme_lookup(self):
+        result = get_scheme_guides("pradhan mantri kisan samman nidhi (pm-kisan)")
+        self.assertEqual(set(result["guides"]), {"aadhaar card", "land records", "bank account details"})
+        self.assertEqual(len(result["documents"]), 4)
+
+    def test_unknown_scheme(self):
+        self.assertIn("error", get_scheme_guides("No Such Scheme"))
+
+    def test_built_once(self):
+        get_scheme_guides("Kisan Credit Card (KCC)")
+        get_scheme_guides("Kisan Credit Card (KCC)")
+        self.assertEqual(self.coll.finds, 1)
+
+    def test_invalidate_picks_up_new_scheme(self):
+        get_scheme_guides("Kisan Credit Card (KCC)")
+        self.coll.add({"scheme_name": "New Scheme", "documents_required": ["Ration Card"]})
+        self.assertIn("error", get_scheme_guides("New Scheme"))  # within check interval
+        invalidate_scheme_guides()
+        self.assertEqual(list(get_scheme_guides("New Scheme")["guides"]), ["ration card"])
+
+    def test_signature_change_rebuilds(self):
+        get_scheme_guides("Kisan Credit Card (KCC)")
+        self.coll.add({"scheme_name": "New Scheme", "documents_required": ["Ration Card"]})
+        with patch.object(scheme_guides_service, "SCHEME_GUIDES_CHECK_INTERVAL", 0):
+            self.assertNotIn("error", get_scheme_guides("New Scheme"))
+            self.assertEqual(self.coll.finds, 2)
+            get_scheme_guides("New Scheme")
+            self.assertEqual(self.coll.finds, 2)  # unchanged signature, no rebuild
+
+    def test_catalogue_version_rebuilds(self):
+        get_scheme_guides("Kisan Credit Card (KCC)")
+        # In-place bulk update: same count and newest _id, new catalogue version
+        self.coll.docs[1]["documents_required"] = ["Ration Card"]
+        with patch.object(scheme_guides_service, "SCHEME_GUIDES_CHECK_INTERVAL", 0):
+            self.assertIn("aadhaar card", get_scheme_guides("Kisan Credit Card (KCC)")["guides"])
+            self.version += 1
+            self.assertEqual(list(get_scheme_guides("Kisan Credit Card (KCC)")["guides"]),
+                             ["ration card"])
+
+
+class TestDocumentGuidesRoute(_JoinTestCase):
+    """POST /api/document-guides."""
+
+    @classmethod
+    def setUpClass(cls):
+        app = Flask(__name__)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        cls.client = app.test_client()
+
+    def test_by_scheme(self):
+        resp = self.client.post("/api/document-guides",
+                                json={"scheme_name": "Kisan Credit Card (KCC)"})
+        self.assertEqual(resp.status_code, 200)
+        body = resp.get_json()
+        self.assertTrue(body["success"])
+        self.assertEqual(body["unresolved"], ["Project Proposal"])
+
+    def test_by_documents(self):
+        resp = self.client.post("/api/document-guides",
+                                json={"documents": ["Voter ID", "voter id card"]})
+        self.assertEqual(list(resp.get_json()["guides"]), ["voter id"])
+
+    def test_unknown_scheme_404(self):
+        resp = self.client.post("/api/document-guides", json={"scheme_name": "Nope"})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_validation(self):
+        for body in ({}, {"documents": []}, {"documents": "Aadhaar"},
+                     {"documents": [1]}, {"documents": ["x"] * 51}):
+            resp = self.client.post("/api/document-guides", json=body)
+            self.assertEqual(resp.status_code, 400, body)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,205 @@
+"""
+Unit Tests — Bulk scheme sync (services/scheme_sync.py).
+
+Tests:
+  1. Content hash ignores key order, _id and scrape time
+  2. Only changed schemes are written, in one unordered bulk_write
+  3. Merge keeps unmentioned fields; replace + prune mirrors the payload
+  4. Catalogue version is bumped only when something was written
+"""
+
+import os
+import sys
+import unittest
+
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.scheme_sync import (
+    content_hash,
+    get_catalogue_version,
+    sync_schemes,
+)
+
+
+class _Result:
+    def __init__(self, upserted=0, modified=0, deleted=0):
+        self.upserted_count = upserted
+        self.modified_count = modified
+        self.deleted_count = deleted
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        if isinstance(cond, dict) and "$in" in cond:
+            if doc.get(key) not in cond["$in"]:
+                return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class FakeCollection:
+    """In-memory stand-in for the parts of pymongo the sync uses."""
+
+    def __init__(self, docs=()):
+        self.docs = [dict(d, _id=i) for i, d in enumerate(docs)]
+        self._next_id = len(self.docs)
+        self.bulk_calls = []
+
+    def find(self, query, projection):
+        keys = [k for k, v in projection.items() if v]
+        return [{k: d[k] for k in keys if k in d} for d in self.docs if _matches(d, query)]
+
+    def find_one(self, query, projection=None):
+        return next((dict(d) for d in self.docs if _matches(d, query)), None)
+
+    def find_one_and_update(self, query, update, upsert, return_document):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is None:
+            doc = dict(query)
+            self.docs.append(doc)
+        for key, inc in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + inc
+        doc.update(update.get("$set", {}))
+        return dict(doc)
+
+    def update_one(self, query, update):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is not None:
+            doc.update(update["$set"])
+
+    def bulk_write(self, ops, ordered=True):
+        self.bulk_calls.append((list(ops), ordered))
+        result = _Result()
+        for op in ops:
+            if isinstance(op, DeleteMany):
+                before = len(self.docs)
+                self.docs = [d for d in self.docs if not _matches(d, op._filter)]
+                result.deleted_count += before - len(self.docs)
+                continue
+            doc = next((d for d in self.docs if _matches(d, op._filter)), None)
+            if doc is None:
+                new = dict(op._doc["$set"] if isinstance(op, UpdateOne) else op._doc)
+                new["_id"] = self._next_id
+                self._next_id += 1
+                self.docs.append(new)
+                result.upserted_count += 1
+            elif isinstance(op, UpdateOne):
+                doc.update(op._doc["$set"])
+                result.modified_count += 1
+            else:
+                _id = doc["_id"]
+                doc.clear()
+                doc.update(op._doc, _id=_id)
+                result.modified_count += 1
+        return result
+
+    def by_name(self, name):
+        return next(d for d in self.docs if d.get("scheme_name") == name)
+
+
+def _scheme(name, amount=1000, **extra):
+    return {"scheme_name": name, "type": "Subsidy", "benefit_amount": amount,
+            "states": ["All"], **extra}
+
+
+class TestContentHash(unittest.TestCase):
+
+    def test_order_and_volatile_fields(self):
+        a = {"scheme_name": "A", "states": ["All"], "benefit_amount": 5}
+        b = {"benefit_amount": 5, "_id": 7, "scraped_at": "2026-01-01",
+             "content_hash": "x", "states": ["All"], "scheme_name": "A"}
+        self.assertEqual(content_hash(a), content_hash(b))
+        self.assertNotEqual(content_hash(a), content_hash({**a, "states": ["Punjab"]}))
+        self.assertNotEqual(content_hash(a), content_hash({**a, "description": {"en": "x"}}))
+
+
+class TestSync(unittest.TestCase):
+
+    def setUp(self):
+        self.coll = FakeCollection()
+        self.meta = FakeCollection()
+
+    def _sync(self, schemes, **kwargs):
+        return sync_schemes(schemes, collection=self.coll, meta=self.meta, **kwargs)
+
+    def test_first_sync_inserts_all_in_one_batch(self):
+        stats = self._sync([_scheme("A"), _scheme("B")])
+        self.assertEqual((stats["inserted"], stats["updated"], stats["unchanged"]), (2, 0, 0))
+        self.assertEqual(len(self.coll.bulk_calls), 1)
+        ops, ordered = self.coll.bulk_calls[0]
+        self.assertFalse(ordered)
+        self.assertTrue(all(isinstance(op, UpdateOne) for op in ops))
+        self.assertEqual(self.coll.by_name("A")["content_hash"], content_hash(_scheme("A")))
+        self.assertEqual(stats["version"], 1)
+
+    def test_unchanged_schemes_not_written(self):
+        self._sync([_scheme("A"), _scheme("B", scraped_at="t1")])
+        stats = self._sync([_scheme("A"), _scheme("B", scraped_at="t2")])
+        self.assertEqual(stats["unchanged"], 2)
+        self.assertEqual(len(self.coll.bulk_calls), 1)
+        self.assertEqual(stats["version"], 1)
+        self.assertEqual(get_catalogue_version(self.meta), 1)
+
+    def test_only_changed_scheme_sent(self):
+        self._sync([_scheme("A"), _scheme("B")])
+        stats = self._sync([_scheme("A"), _scheme("B", amount=2000), _scheme("C")])
+        ops, _ = self.coll.bulk_calls[-1]
+        self.assertEqual([op._filter["scheme_name"] for op in ops], ["B", "C"])
+        self.assertEqual((stats["inserted"], stats["updated"], stats["unchanged"]), (1, 1, 1))
+        self.assertEqual(self.coll.by_name("B")["benefit_amount"], 2000)
+        self.assertEqual(stats["version"], 2)
+
+    def test_merge_keeps_other_fields_and_id(self):
+        self.coll = FakeCollection([_scheme("A", description={"hi": "योजना"})])
+        self._sync([_scheme("A", amount=5)])
+        doc = self.coll.by_name("A")
+        self.assertEqual(doc["_id"], 0)
+        self.assertEqual(doc["description"], {"hi": "योजना"})
+        self.assertEqual(doc["benefit_amount"], 5)
+
+    def test_replace_and_prune(self):
+        self._sync([_scheme("A", extra="old"), _scheme("B"), _scheme("Scraped")])
+        ids = {d["scheme_name"]: d["_id"] for d in self.coll.docs}
+        stats = self._sync([_scheme("A"), _scheme("B")], mode="replace", prune=True)
+        ops, _ = self.coll.bulk_calls[-1]
+        self.assertIsInstance(ops[0], ReplaceOne)
+        self.assertIsInstance(ops[-1], DeleteMany)
+        self.assertEqual(sorted(d["scheme_name"] for d in self.coll.docs), ["A", "B"])
+        self.assertNotIn("extra", self.coll.by_name("A"))
+        self.assertEqual(self.coll.by_name("A")["_id"], ids["A"])  # replaced in place
+        self.assertEqual((stats["updated"], stats["unchanged"], stats["deleted"]), (1, 1, 1))
+
+    def test_reseed_is_a_no_op(self):
+        seed = [_scheme("A"), _scheme("B")]
+        self._sync(seed, mode="replace", prune=True)
+        stats = self._sync(seed, mode="replace", prune=True)
+        self.assertEqual(len(self.coll.bulk_calls), 1)
+        self.assertEqual(stats["unchanged"], 2)
+
+    def test_legacy_documents_without_hash_rewritten_once(self):
+        self.coll = FakeCollection([_scheme("A")])
+        self.assertEqual(self._sync([_scheme("A")])["updated"], 1)
+        self.assertEqual(self._sync([_scheme("A")])["unchanged"], 1)
+
+    def test_duplicates_last_wins(self):
+        self._sync([_scheme("A", amount=1), _scheme("A", amount=2)])
+        self.assertEqual(len(self.coll.docs), 1)
+        self.assertEqual(self.coll.by_name("A")["benefit_amount"], 2)
+
+    def test_input_not_mutated(self):
+        scheme = _scheme("A", _id="external")
+        self._sync([scheme])
+        self.assertEqual(scheme, _scheme("A", _id="external"))
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            self._sync([_scheme("A")], mode="upsert")
+        with self.assertRaises(ValueError):
+            self._sync([{"type": "Loan"}])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,206 @@
+"""
+Unit Tests — Scheme scraper engine (scripts/scraper.py).
+
+Tests:
+  1. Sources run concurrently: total time ≈ slowest source
+  2. Conditional GET: validators stored, 304 reuses parsed schemes
+  3. Failures and per-source time budgets fall back per source
+  4. Results keep source order and are stamped with scraped_at
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from scripts import scraper
+from scripts.scraper import Source, load_cache, scrape_sources
+
+_PAGE = "<html><body><a href='/s/{i}'>Rural credit scheme number {i}</a></body></html>"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body="", headers=None, chunks=None, delay=0.0):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+        self._chunks = chunks if chunks is not None else [body.encode()]
+        self._delay = delay
+
+    def iter_content(self, chunk_size=1):
+        for chunk in self._chunks:
+            time.sleep(self._delay)
+            yield chunk
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Maps URL → callable(request headers) → FakeResponse; records calls."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        with self._lock:
+            self.calls.append((url, dict(headers or {}), timeout))
+        return self.routes[url](headers or {})
+
+
+def _sources(n=3, timeout=5):
+    return [Source(f"src{i}", f"https://src{i}.example", scraper.parse_nabard,
+                   [{"scheme_name": f"Fallback {i}"}], timeout) for i in range(n)]
+
+
+def _ok(i, delay=0.0, headers=None):
+    def route(_):
+        time.sleep(delay)
+        return FakeResponse(body=_PAGE.format(i=i), headers=headers)
+    return route
+
+
+class TestConcurrency(unittest.TestCase):
+
+    def test_total_time_is_slowest_source(self):
+        sources = _sources(5)
+        session = FakeSession({s.url: _ok(i, delay=0.3) for i, s in enumerate(sources)})
+        start = time.monotonic()
+        schemes, timings = scrape_sources(sources, session, cache_path=None)
+        self.assertLess(time.monotonic() - start, 1.0)  # 1.5s when sequential
+        self.assertEqual([t["source"] for t in timings], [s.name for s in sources])
+        self.assertEqual([s["scheme_name"] for s in schemes],
+                         [f"Rural credit scheme number {i}" for i in range(5)])
+        for t in timings:
+            self.assertEqual(t["status"], "fetched")
+            self.assertGreaterEqual(t["seconds"], 0.25)
+
+    def test_timeouts_per_source(self):
+        sources = _sources(2)
+        sources[1] = sources[1]._replace(timeout=42)
+        session = FakeSession({s.url: _ok(i) for i, s in enumerate(sources)})
+        scrape_sources(sources, session, cache_path=None)
+        timeouts = {url: t for url, _, t in session.calls}
+        self.assertEqual(timeouts[sources[0].url], (scraper.CONNECT_TIMEOUT, 5))
+        self.assertEqual(timeouts[sources[1].url], (scraper.CONNECT_TIMEOUT, 42))
+
+    def test_shared_session_pools_every_host(self):
+        session = scraper.make_session()
+        adapter = session.get_adapter("https://pmkisan.gov.in")
+        self.assertIs(adapter, session.get_adapter("https://www.nabard.org"))
+        self.assertEqual(adapter._pool_maxsize, len(scraper.SOURCES))
+        self.assertEqual(session.headers["User-Agent"], scraper.HEADERS["User-Agent"])
+
+
+class TestConditionalGet(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.cache_path = os.path.join(self._tmp.name, "scraper_cache.json")
+
+    def test_not_modified_reuses_schemes(self):
+        sources = _sources(2)
+        validators = [{"ETag": '"v1"'}, {"Last-Modified": "Wed, 01 Oct 2025 10:00:00 GMT"}]
+        session = FakeSession({s.url: _ok(i, headers=validators[i])
+                               for i, s in enumerate(sources)})
+        first, _ = scrape_sources(sources, session, self.cache_path)
+        self.assertEqual(session.calls[0][1], {})
+
+        def not_modified(request_headers):
+            self.assertTrue(request_headers)
+            return FakeResponse(status_code=304)
+
+        session = FakeSession({s.url: not_modified for s in sources})
+        second, timings = scrape_sources(sources, session, self.cache_path)
+        self.assertEqual(second, first)
+        self.assertEqual({t["status"] for t in timings}, {"not_modified"})
+        sent = {url: h for url, h, _ in session.calls}
+        self.assertEqual(sent[sources[0].url], {"If-None-Match": '"v1"'})
+        self.assertEqual(sent[sources[1].url],
+                         {"If-Modified-Since": "Wed, 01 Oct 2025 10:00:00 GMT"})
+
+    def test_no_validators_no_cache_entry(self):
+        sources = _sources(1)
+        scrape_sources(sources, FakeSession({sources[0].url: _ok(0)}), self.cache_path)
+        self.assertEqual(load_cache(self.cache_path), {})
+
+    def test_changed_url_fetches_unconditionally(self):
+        sources = _sources(1)
+        scrape_sources(sources, FakeSession({sources[0].url: _ok(0, headers={"ETag": "x"})}),
+                       self.cache_path)
+        moved = [sources[0]._replace(url="https://moved.example")]
+        session = FakeSession({"https://moved.example": _ok(1)})
+        scrape_sources(moved, session, self.cache_path)
+        self.assertEqual(session.calls[0][1], {})
+
+    def test_failure_keeps_cache_entry(self):
+        sources = _sources(1)
+        scrape_sources(sources, FakeSession({sources[0].url: _ok(0, headers={"ETag": "x"})}),
+                       self.cache_path)
+        scrape_sources(sources, FakeSession({sources[0].url: lambda h: FakeResponse(503)}),
+                       self.cache_path)
+        self.assertEqual(load_cache(self.cache_path)["src0"]["etag"], "x")
+
+    def test_unreadable_cache(self):
+        with open(self.cache_path, "w") as f:
+            f.write("{broken")
+        sources = _sources(1)
+        schemes, _ = scrape_sources(sources, FakeSession({sources[0].url: _ok(0)}),
+                                    self.cache_path)
+        self.assertEqual(len(schemes), 1)
+
+
+class TestFailures(unittest.TestCase):
+
+    def test_errors_fall_back_per_source(self):
+        sources = _sources(3)
+
+        def boom(_):
+            raise requests.exceptions.ConnectionError("refused")
+
+        session = FakeSession({sources[0].url: _ok(0), sources[1].url: boom,
+                               sources[2].url: lambda h: FakeResponse(500)})
+        schemes, timings = scrape_sources(sources, session, cache_path=None)
+        self.assertEqual([s["scheme_name"] for s in schemes],
+                         ["Rural credit scheme number 0", "Fallback 1", "Fallback 2"])
+        self.assertEqual([t["status"] for t in timings], ["fetched", "failed", "failed"])
+
+    def test_slow_body_exceeds_budget(self):
+        sources = _sources(1, timeout=0.2)
+        slow = FakeResponse(chunks=[b"<a>x</a>"] * 20, delay=0.05)
+        session = FakeSession({sources[0].url: lambda h: slow})
+        start = time.monotonic()
+        schemes, timings = scrape_sources(sources, session, cache_path=None)
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(timings[0]["status"], "failed")
+        self.assertEqual(schemes, [{"scheme_name": "Fallback 0"}])
+
+
+class TestScrapeAllSources(unittest.TestCase):
+
+    def test_timestamps_and_registry(self):
+        session = FakeSession({s.url: _ok(i) for i, s in enumerate(scraper.SOURCES)})
+        with patch.object(scraper, "make_session", return_value=session):
+            schemes = scraper.scrape_all_sources(cache_path=None)
+        self.assertEqual(len(session.calls), len(scraper.SOURCES))
+        self.assertTrue(schemes)
+        self.assertEqual(len({s["scraped_at"] for s in schemes}), 1)
+        self.assertNotIn("scraped_at", scraper.PMKISAN_FALLBACK[0])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,162 @@
+"""
+Unit Tests — Soil Image Analyzer (single + batch).
+
+Tests:
+  1. Vectorised profile matching agrees with per-image matching
+  2. Batch results agree with the single-image path
+  3. JPEG draft decoding and per-image error isolation
+  4. Process-pool decoding
+  5. POST /api/analyze-soil-batch
+"""
+
+import base64
+import io
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from flask import Flask
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from routes import api_bp
+from services import soil_image_analyzer
+from services.soil_image_analyzer import (
+    _BATCH_CROP,
+    _decode_center_crop,
+    _match_soil_profile,
+    _match_soil_profiles,
+    analyze_soil_from_image,
+    analyze_soil_images,
+)
+
+# Typical soil colours: red laterite, black cotton, light alluvial, sandy
+_COLOURS = [(150, 70, 40), (40, 36, 33), (150, 120, 80), (200, 180, 140)]
+
+
+def _image_bytes(rgb, size=(640, 480), fmt="JPEG", noise=8, seed=0):
+    rng = np.random.default_rng(seed)
+    arr = np.clip(np.array(rgb) + rng.normal(0, noise, (size[1], size[0], 3)), 0, 255)
+    buf = io.BytesIO()
+    Image.fromarray(arr.astype(np.uint8)).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+
+class TestProfileMatching(unittest.TestCase):
+    """Matrix scoring vs the single-image wrapper."""
+
+    def test_matrix_matches_single(self):
+        rng = np.random.default_rng(0)
+        h, s, v = rng.uniform(0, 360, 500), rng.uniform(0, 100, 500), rng.uniform(0, 100, 500)
+        names, scores = _match_soil_profiles(h, s, v)
+        for i in range(len(h)):
+            name, _, score = _match_soil_profile(h[i], s[i], v[i])
+            self.assertEqual(name, names[i])
+            self.assertAlmostEqual(score, scores[i])
+
+    def test_priority_and_fallback(self):
+        names, _ = _match_soil_profiles([20, 200, 200], [10, 60, 60], [20, 80, 45])
+        self.assertEqual(names, ["Black Cotton (Regur)", "Sandy", "Loamy"])
+
+
+class TestBatchAnalysis(unittest.TestCase):
+    """analyze_soil_images."""
+
+    def test_agrees_with_single_path(self):
+        raws = [_image_bytes(c, seed=i) for i, c in enumerate(_COLOURS)]
+        batch = analyze_soil_images(raws)
+        for raw, result in zip(raws, batch["results"]):
+            single = analyze_soil_from_image(_b64(raw))
+            self.assertEqual(result["soil_type"], single["soil_type"])
+            np.testing.assert_allclose(result["_debug"]["mean_hsv"],
+                                       single["_debug"]["mean_hsv"], atol=2.0)
+
+    def test_accepts_base64(self):
+        result = analyze_soil_images([_b64(_image_bytes(_COLOURS[0], fmt="PNG"))])
+        self.assertEqual(result["summary"]["analyzed"], 1)
+
+    def test_bad_image_isolated(self):
+        raws = [_image_bytes(_COLOURS[0]), b"not an image", _image_bytes(_COLOURS[0], seed=1)]
+        result = analyze_soil_images(raws)
+        self.assertIn("error", result["results"][1])
+        self.assertNotIn("error", result["results"][0])
+        self.assertEqual(result["summary"]["failed"], 1)
+        self.assertEqual(result["summary"]["dominant_share"], 1.0)
+
+    def test_summary(self):
+        raws = [_image_bytes(_COLOURS[1], seed=i) for i in range(3)] + [_image_bytes(_COLOURS[3])]
+        summary = analyze_soil_images(raws)["summary"]
+        self.assertEqual(summary["dominant_soil_type"], "Black Cotton")
+        self.assertEqual(summary["dominant_share"], 0.75)
+
+    def test_empty_batch(self):
+        self.assertEqual(analyze_soil_images([])["summary"], {"analyzed": 0, "failed": 0})
+
+    def test_pool_matches_inline(self):
+        raws = [_image_bytes(_COLOURS[i % 4], seed=i) for i in range(8)]
+        with patch.object(soil_image_analyzer, "SOIL_BATCH_WORKERS", 2):
+            pooled = analyze_soil_images(raws)
+        with patch.object(soil_image_analyzer, "SOIL_BATCH_WORKERS", 1):
+            inline = analyze_soil_images(raws)
+        self.assertEqual(pooled, inline)
+
+
+class TestDraftDecode(unittest.TestCase):
+    """Reduced-resolution JPEG decoding."""
+
+    def test_large_jpeg_uses_draft(self):
+        raw = _image_bytes(_COLOURS[2], size=(4000, 3000), noise=0)
+        opened = []
+        real_open = Image.open
+
+        def spy(fp, *args, **kwargs):
+            img = real_open(fp, *args, **kwargs)
+            opened.append(img)
+            return img
+
+        with patch.object(soil_image_analyzer.Image, "open", spy):
+            crop = _decode_center_crop(raw)
+        self.assertEqual(crop.shape, (_BATCH_CROP, _BATCH_CROP, 3))
+        self.assertLess(max(opened[0].size), 4000)  # decoded at 1/8 scale
+        np.testing.assert_allclose(crop.reshape(-1, 3).mean(axis=0), _COLOURS[2], atol=3)
+
+
+class TestBatchRoute(unittest.TestCase):
+    """POST /api/analyze-soil-batch."""
+
+    @classmethod
+    def setUpClass(cls):
+        app = Flask(__name__)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        cls.client = app.test_client()
+
+    def test_batch(self):
+        images = [_b64(_image_bytes(c)) for c in _COLOURS]
+        resp = self.client.post("/api/analyze-soil-batch", json={"images": images})
+        self.assertEqual(resp.status_code, 200)
+        body = resp.get_json()
+        self.assertEqual(len(body["results"]), 4)
+        self.assertEqual(body["summary"]["analyzed"], 4)
+
+    def test_invalid_base64_reported_per_image(self):
+        resp = self.client.post("/api/analyze-soil-batch",
+                                json={"images": [_b64(_image_bytes(_COLOURS[0])), "@@@"]})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("error", resp.get_json()["results"][1])
+
+    def test_validation(self):
+        for body in ({}, {"images": []}, {"images": "abc"}, {"images": [1]},
+                     {"images": ["a"] * 51}):
+            resp = self.client.post("/api/analyze-soil-batch", json=body)
+            self.assertEqual(resp.status_code, 400, body)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,237 @@
+"""
+Unit Tests — Rule-based soil analysis (single sample + lab batch).
+
+Tests:
+  1. Precomputed soil type × pH crop table equals the per-call filter
+  2. Batch reports equal single-sample reports, including on thresholds
+  3. Missing values and empty samples
+  4. Lab CSV parsing: header aliases, invalid cells, row limit, chunking
+  5. POST /api/analyze-soil-csv (text/csv and multipart, NDJSON stream)
+"""
+
+import io
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from routes import api_bp
+from services import soil_service
+from services.soil_image_analyzer import CROP_MAP
+from services.soil_rules_engine import (
+    CROP_PH_PREFERENCE,
+    CROP_SUITABILITY,
+    CropSuitabilityTable,
+    _filter_crops_by_ph,
+    analyze_soil_batch,
+    analyze_soil_rulebased,
+)
+from services.soil_service import analyze_soil_csv
+
+_FIELDS = ("ph", "nitrogen", "phosphorus", "potassium", "organic_carbon")
+
+
+def _single(samples, i):
+    """analyze_soil_rulebased for row i, with missing values left out."""
+    soil_data = {f: float(samples[f][i]) for f in _FIELDS if not np.isnan(samples[f][i])}
+    if samples["soil_type"][i]:
+        soil_data["soil_type"] = samples["soil_type"][i]
+    if not soil_data:
+        return {"error": "At least one soil parameter is required."}
+    return analyze_soil_rulebased(soil_data)
+
+
+def _column(rng, n, lo, hi, edges):
+    """Random values with a share of exact threshold values and NaNs."""
+    values = rng.uniform(lo, hi, n)
+    on_edge = rng.random(n) < 0.3
+    values[on_edge] = rng.choice(edges, on_edge.sum())
+    values[rng.random(n) < 0.1] = np.nan
+    return values
+
+
+class TestCropSuitabilityTable(unittest.TestCase):
+    """Table lookups give exactly the per-call filter's answer."""
+
+    def _check(self, suitability, default):
+        table = CropSuitabilityTable(suitability, default)
+        edges = sorted({v for w in CROP_PH_PREFERENCE.values() for v in w})
+        phs = [None, -1.0, 0.0, 14.0, 20.0] + edges
+        phs += [e + d for e in edges for d in (-1e-9, 1e-9, 0.05)]
+        phs += list(np.random.default_rng(3).uniform(3, 10, 500))
+        for soil in [*suitability, "Unknown"]:
+            base = suitability.get(soil, default)
+            for ph in phs:
+                self.assertEqual(table.lookup(soil, ph), _filter_crops_by_ph(base, ph),
+                                 f"{soil} @ {ph}")
+
+    def test_manual_table(self):
+        self._check(CROP_SUITABILITY, CROP_SUITABILITY["Loam"])
+
+    def test_image_table(self):
+        self._check(CROP_MAP, ["Consult local agronomist"])
+
+    def test_vectorized_buckets(self):
+        table = CropSuitabilityTable(CROP_SUITABILITY, [])
+        ph = np.array([np.nan, 2.0, 4.5, 4.6, 6.0, 6.05, 9.0])
+        self.assertEqual(table.buckets(ph).tolist(),
+                         [-1] + [table.bucket(float(v)) for v in ph[1:]])
+
+    def test_lookup_returns_copy(self):
+        table = CropSuitabilityTable(CROP_SUITABILITY, [])
+        table.lookup("Loam", 6.5).append("Weeds")
+        self.assertNotIn("Weeds", table.lookup("Loam", 6.5))
+
+
+class TestSoilBatch(unittest.TestCase):
+    """analyze_soil_batch agrees with analyze_soil_rulebased."""
+
+    def test_matches_single_sample(self):
+        rng = np.random.default_rng(7)
+        n = 3000
+        samples = {
+            "ph": _column(rng, n, 3, 15, [4.5, 5.5, 6.0, 6.5, 7.5, 8.5, 9.5, 14]),
+            "nitrogen": _column(rng, n, 100, 700, [280, 560]),
+            "phosphorus": _column(rng, n, 0, 40, [10, 25]),
+            "potassium": _column(rng, n, 50, 400, [110, 280]),
+            # OC thresholds and the organic-matter boundaries (OM = OC × 1.724)
+            "organic_carbon": _column(rng, n, 0, 2, [0.5, 0.75, 1 / 1.724, 2 / 1.724]),
+        }
+        types = list(CROP_SUITABILITY) + ["Peat", None, ""]
+        samples["soil_type"] = [types[i] for i in rng.integers(0, len(types), n)]
+
+        results = analyze_soil_batch(samples)
+        self.assertEqual(len(results), n)
+        for i in range(n):
+            self.assertEqual(results[i], _single(samples, i), f"row {i}")
+
+    def test_absent_columns_and_empty_rows(self):
+        results = analyze_soil_batch({"ph": [6.8, float("nan")]})
+        self.assertEqual(results[0], analyze_soil_rulebased({"ph": 6.8}))
+        self.assertIn("error", results[1])
+
+    def test_soil_type_only(self):
+        results = analyze_soil_batch({"soil_type": ["Clay", "  Red "]})
+        self.assertEqual(results[0], analyze_soil_rulebased({"soil_type": "Clay"}))
+        self.assertEqual(results[1]["soil_type"], "Red")
+
+    def test_empty_input(self):
+        self.assertEqual(analyze_soil_batch({}), [])
+        self.assertEqual(analyze_soil_batch({"ph": []}), [])
+
+    def test_results_are_independent_dicts(self):
+        results = analyze_soil_batch({"ph": [7.0, 7.1]})
+        results[0]["row"] = 1
+        self.assertNotIn("row", results[1])
+        self.assertEqual(results[1]["ph_estimate"], 7.1)
+
+
+def _csv(text: str):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+class TestSoilCsv(unittest.TestCase):
+    """Lab CSV → per-sample results."""
+
+    def test_aliases_and_sample_ids(self):
+        items = list(analyze_soil_csv(_csv(
+            "\ufeffSample_ID, pH ,N,P,K,OC,Soil Type,lab_notes\n"
+            "A1,6.8,300,12,150,0.6,Loam,ok\n"
+            "A2,5.0,,,,,Red,\n"
+        )))
+        self.assertEqual(items[0]["row"], 1)
+        self.assertEqual(items[0]["sample_id"], "A1")
+        expected = analyze_soil_rulebased({
+            "ph": 6.8, "nitrogen": 300.0, "phosphorus": 12.0,
+            "potassium": 150.0, "organic_carbon": 0.6, "soil_type": "Loam",
+        })
+        self.assertEqual({k: items[0][k] for k in expected}, expected)
+        self.assertEqual(items[1]["soil_type"], "Red")
+        self.assertEqual(items[-1], {"summary": {"samples": 2, "analyzed": 2, "failed": 0}})
+
+    def test_invalid_and_empty_rows(self):
+        items = list(analyze_soil_csv(_csv("ph,nitrogen\nabc,300\n,\n7,inf\n7,300\n")))
+        self.assertEqual(items[0]["error"], "Invalid value for ph: must be a number.")
+        self.assertIn("error", items[1])
+        self.assertEqual(items[2]["error"], "Invalid value for nitrogen: must be a number.")
+        self.assertEqual(items[3]["npk_status"]["nitrogen"], "Medium")
+        self.assertEqual(items[-1]["summary"]["failed"], 3)
+
+    def test_header_errors(self):
+        with self.assertRaises(ValueError):
+            analyze_soil_csv(_csv(""))
+        with self.assertRaises(ValueError):
+            analyze_soil_csv(_csv("sample_id,colour\nA1,red\n"))
+
+    def test_header_only(self):
+        items = list(analyze_soil_csv(_csv("ph,soil_type\n")))
+        self.assertEqual(items, [{"summary": {"samples": 0, "analyzed": 0, "failed": 0}}])
+
+    def test_chunks_and_row_limit(self):
+        body = "ph\n" + "".join(f"{5 + (i % 40) / 10}\n" for i in range(25))
+        with patch.object(soil_service, "_CSV_CHUNK_ROWS", 4):
+            items = list(analyze_soil_csv(_csv(body)))
+            self.assertEqual([it["row"] for it in items[:-1]], list(range(1, 26)))
+
+            items = list(analyze_soil_csv(_csv(body), max_rows=10))
+            self.assertEqual(len([it for it in items if "row" in it]), 10)
+            self.assertIn("Too many rows", items[-2]["error"])
+
+            items = list(analyze_soil_csv(_csv(body), max_rows=25))
+            self.assertNotIn("error", items[-2])
+
+
+class TestSoilCsvRoute(unittest.TestCase):
+    """POST /api/analyze-soil-csv streams NDJSON."""
+
+    @classmethod
+    def setUpClass(cls):
+        app = Flask(__name__)
+        app.register_blueprint(api_bp, url_prefix="/api")
+        cls.client = app.test_client()
+
+    _BODY = "sample_id,ph,nitrogen,soil_type\nA1,6.8,300,Loam\nA2,x,300,Clay\n"
+
+    def _lines(self, resp):
+        return [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+    def test_text_csv_body(self):
+        resp = self.client.post("/api/analyze-soil-csv", data=self._BODY,
+                                content_type="text/csv")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, "application/x-ndjson")
+        lines = self._lines(resp)
+        self.assertEqual(lines[0]["sample_id"], "A1")
+        self.assertEqual(lines[0]["analysis_method"], "rule_based")
+        self.assertIn("error", lines[1])
+        self.assertEqual(lines[2]["summary"]["failed"], 1)
+
+    def test_multipart(self):
+        resp = self.client.post(
+            "/api/analyze-soil-csv",
+            data={"file": (io.BytesIO(self._BODY.encode()), "lab.csv")},
+            content_type="multipart/form-data",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(self._lines(resp)), 3)
+
+    def test_bad_requests(self):
+        resp = self.client.post("/api/analyze-soil-csv", json={"ph": 7})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post("/api/analyze-soil-csv", data={},
+                                content_type="multipart/form-data")
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post("/api/analyze-soil-csv", data="a,b\n1,2\n",
+                                content_type="text/csv")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("columns", resp.get_json()["error"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
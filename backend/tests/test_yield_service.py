@@ -8,14 +8,21 @@ Tests the production yield predictor:
   4. Confidence intervals
   5. Fallback mechanism
   6. Edge cases
+  7. Warm-start retraining + hot-swap
 """
 
 import os
 import sys
+import pickle
+import tempfile
 import unittest
+from unittest.mock import patch
+
+import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+import services.yield_service as yield_service
 from services.yield_service import predict_yield, get_predictor, YieldPredictor
 
 
@@ -165,5 +172,71 @@ class TestMultipleCrops(unittest.TestCase):
                              f"Zero yield for {crop}/{state}/{season}")
 
 
+class TestWarmStartAndHotSwap(unittest.TestCase):
+    """Growing the forest on disk is picked up by a running predictor."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp.name, "yield_model.pkl")
+        self.encoder_path = os.path.join(self.tmp.name, "yield_encoders.pkl")
+
+        # Start from the fallback model, persisted like the training script does
+        fallback = YieldPredictor.__new__(YieldPredictor)
+        fallback._train_fallback()
+        self.model = fallback.model
+        self.encoders = {
+            "crop_encoder": fallback.crop_encoder,
+            "state_encoder": fallback.state_encoder,
+            "season_encoder": fallback.season_encoder,
+        }
+        self._dump(self.model, self.encoders)
+
+        patches = [
+            patch.object(yield_service, "_MODEL_PATH", self.model_path),
+            patch.object(yield_service, "_ENCODER_PATH", self.encoder_path),
+            patch.object(yield_service, "YIELD_MODEL_RELOAD_INTERVAL", 0.0001),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def _dump(self, model, encoders):
+        with open(self.encoder_path, "wb") as f:
+            pickle.dump(encoders, f)
+        with open(self.model_path, "wb") as f:
+            pickle.dump(model, f)
+
+    def test_warm_start_adds_trees_and_hot_swaps(self):
+        from scripts.train_yield_model import warm_start_model
+
+        predictor = YieldPredictor()
+        self.assertEqual(predictor.forest.n_trees, 50)
+
+        X_new = np.array([[2023, 700, 99, 0, 0, 0], [2023, 150, 99, 1, 1, 1]] * 4, dtype=float)
+        y_new = np.array([4.6, 5.3] * 4)
+        grown = warm_start_model(pickle.loads(pickle.dumps(self.model)), X_new, y_new, 10)
+        self.assertEqual(len(grown.estimators_), 60)
+
+        self._dump(grown, self.encoders)
+        os.utime(self.model_path, ns=(0, os.stat(self.model_path).st_mtime_ns + 10**9))
+
+        self.assertTrue(predictor.reload_if_changed())
+        self.assertEqual(predictor.forest.n_trees, 60)
+        result = predictor.predict("Rice", "Punjab", "Kharif")
+        self.assertEqual(result["n_estimators"], 60)
+
+    def test_unchanged_file_is_not_reloaded(self):
+        predictor = YieldPredictor()
+        self.assertFalse(predictor.reload_if_changed())
+
+    def test_failed_reload_keeps_current_model(self):
+        predictor = YieldPredictor()
+        with open(self.model_path, "wb") as f:
+            f.write(b"not a pickle")
+        self.assertFalse(predictor.reload())
+        self.assertNotIn("error", predictor.predict("Rice", "Punjab", "Kharif"))
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)